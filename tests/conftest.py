@@ -15,6 +15,15 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from wxgtd.model import objects as OBJ
+from wxgtd.model import dictregistry
+
+
+@pytest.fixture(autouse=True)
+def clear_dictregistry():
+    """Dictionaries are cached globally; every test use own database."""
+    dictregistry.clear()
+    yield
+    dictregistry.clear()
 
 
 @pytest.fixture
@@ -0,0 +1,235 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.model.archive module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import io
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from wxgtd.model import objects as OBJ
+from wxgtd.model import enums
+from wxgtd.model import queries
+from wxgtd.model import archive
+from wxgtd.model import exporter
+from wxgtd.model import loader
+from wxgtd.model import taskrow
+
+_NOW = datetime.datetime.utcnow()
+_OLD = _NOW - datetime.timedelta(days=400)
+
+
+@pytest.fixture
+def session():
+    """Database with archive; old finished task, project with old finished
+    subtasks, project with active subtask and recently finished task."""
+    engine = create_engine('sqlite:///:memory:')
+    archive.attach(engine, ':memory:')
+    OBJ.Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    tag = OBJ.Tag(uuid='g1', title='tag')
+    old = OBJ.Task(uuid='old', title='old task', completed=_OLD)
+    old.tags.append(tag)
+    old.notes.append(OBJ.Tasknote(uuid='n1', title='old note'))
+    project = OBJ.Task(uuid='p1', title='old project', completed=_OLD,
+            type=enums.TYPE_PROJECT)
+    OBJ.Task(uuid='p1s', title='old subtask', completed=_OLD, parent=project)
+    active = OBJ.Task(uuid='p2', title='active project', completed=_OLD,
+            type=enums.TYPE_PROJECT)
+    OBJ.Task(uuid='p2s', title='active subtask', parent=active)
+    session.add_all([tag, old, project, active,
+            OBJ.Task(uuid='new', title='new task', completed=_NOW),
+            OBJ.Task(uuid='del', title='deleted task', completed=_OLD,
+                deleted=_OLD),
+            OBJ.Task(uuid='todo', title='todo task')])
+    session.commit()
+    yield session
+    session.close()
+
+
+def _uuids(query):
+    return sorted(row.uuid for row in taskrow.select(query))
+
+
+def _main_uuids(session):
+    return sorted(row[0] for row in session.execute(
+            text("SELECT uuid FROM tasks")))
+
+
+def test_move_finished(session):
+    engine = session.get_bind()
+    assert archive.move_finished(engine, 0) == 0
+    assert archive.move_finished(engine, 100) == 4
+    assert _main_uuids(session) == ['new', 'p2', 'p2s', 'todo']
+    assert archive.count_archived(session) == 4
+    assert session.execute(text("SELECT tag_uuid FROM archive.task_tags "
+            "WHERE task_uuid = 'old'")).scalar() == 'g1'
+    assert session.execute(text("SELECT count(*) FROM task_tags")) \
+            .scalar() == 0
+    assert session.execute(text("SELECT task_uuid FROM archive.tasknotes")) \
+            .scalar() == 'old'
+    # nothing more to move
+    assert archive.move_finished(engine, 100) == 0
+
+
+def test_queries(session):
+    archive.move_finished(session.get_bind(), 100)
+    session.expunge_all()
+
+    def select(group, options=0, search=''):
+        params = queries.build_query_params(group, options, None, search)
+        return _uuids(OBJ.Task.select_by_filters(params, session=session))
+
+    # active tasks - main database only
+    statement = str(OBJ.Task.select_by_filters(queries.build_query_params(
+            queries.QUERY_ALL_TASK, 0, None, ''), session=session).statement)
+    assert 'archive' not in statement
+    assert select(queries.QUERY_ALL_TASK) == ['todo']
+    # finished, trash and search - both databases
+    assert select(queries.QUERY_FINISHED) == ['new', 'old', 'p1', 'p2']
+    assert select(queries.QUERY_TRASH) == ['del']
+    assert _uuids(OBJ.Task.search('old', False, session=session)) == \
+            ['old', 'p1', 'p1s']
+    assert _uuids(OBJ.Task.search('old', True, session=session)) == []
+    # tags of archived tasks
+    params = queries.build_query_params(queries.QUERY_FINISHED, 0, None, '')
+    params['tags'] = ['g1']
+    assert _uuids(OBJ.Task.select_by_filters(params, session=session)) == \
+            ['old']
+    # objects and notes are loaded from archive too
+    params = queries.build_query_params(queries.QUERY_FINISHED, 0, None, '')
+    tasks = OBJ.Task.select_by_filters(params, session=session,
+            with_notes=True).all()
+    assert sorted(task.uuid for task in tasks) == ['new', 'old', 'p1', 'p2']
+    assert OBJ.Task.select_by_filters(params, session=session).count() == 4
+
+
+def test_export_archived(session):
+    archive.move_finished(session.get_bind(), 100)
+    session.expunge_all()
+    params = queries.build_query_params(queries.QUERY_FINISHED, 0, None, '')
+    output = io.StringIO()
+    count, _time = exporter.export_tasks(OBJ.Task.select_by_filters(params,
+            session=session), 'csv', 0, output)
+    assert count == 4
+    assert 'old task' in output.getvalue()
+
+
+def test_restore(session):
+    archive.move_finished(session.get_bind(), 100)
+    session.expunge_all()
+    # reading don't change archive
+    assert OBJ.Task.get(session, uuid='p1s') is None
+    assert archive.count_archived(session) == 4
+    assert archive.restore_tasks(session, ['p1s', 'old', 'missing']) == 3
+    subtask = OBJ.Task.get(session, uuid='p1s')
+    assert subtask.title == 'old subtask'
+    # parent is restored with subtask
+    assert subtask.parent.uuid == 'p1'
+    assert 'p1' in _main_uuids(session)
+    task = OBJ.Task.get(session, uuid='old')
+    assert [tag.title for tag in task.tags] == ['tag']
+    assert [note.title for note in task.notes] == ['old note']
+    # only deleted task is left
+    assert archive.count_archived(session) == 1
+    session.commit()
+
+
+def test_restore_changed(session):
+    archive.move_finished(session.get_bind(), 100)
+    session.expunge_all()
+    changed = _NOW + datetime.timedelta(days=1)
+    archived = archive.restore_changed(session, {
+        'old': (_NOW - datetime.timedelta(days=500), None),
+        'p1': (None, None),
+        'p1s': (changed, 'p1'),
+        'todo': (changed, None),
+        'added': (changed, 'p2')})
+    # unchanged task is left in archive
+    assert archived == {'old'}
+    # changed subtask is restored with parent
+    assert 'p1s' in _main_uuids(session)
+    assert 'p1' in _main_uuids(session)
+    assert archive.count_archived(session) == 2
+    assert archive.restore_changed(session, {'old': (None, None)}) == set()
+    assert archive.count_archived(session) == 1
+
+
+def test_load_tasks_skips_archived(session):
+    archive.move_finished(session.get_bind(), 100)
+    session.expunge_all()
+    modified = (_NOW + datetime.timedelta(days=1)).strftime(
+            "%Y-%m-%dT%H:%M:%S.000Z")
+    data = {
+        'task': [
+            {'_id': 1, 'uuid': 'old', 'title': 'old task',
+                'modified': '2000-01-01T00:00:00.000Z'},
+            {'_id': 2, 'uuid': 'p1s', 'title': 'changed', 'parent_id': 3,
+                'modified': modified},
+            {'_id': 3, 'uuid': 'p1', 'title': 'old project'}],
+        'tasknote': [
+            {'_id': 1, 'uuid': 'n1', 'task_id': 1, 'title': 'changed',
+                'modified': modified}]}
+    tasks_cache, archived = loader._load_tasks(data, session,
+            lambda *_args: None)
+    assert archived == {'old'}
+    assert tasks_cache[1] == 'old'
+    loader._load_tasknotes(data, session, tasks_cache, lambda *_args: None,
+            archived)
+    session.flush()
+    assert OBJ.Task.get(session, uuid='p1s').title == 'changed'
+    assert OBJ.Task.get(session, uuid='old') is None
+    assert session.execute(text("SELECT title FROM archive.tasknotes")) \
+            .scalar() == 'old note'
+    assert session.execute(text("SELECT count(*) FROM tasknotes")) \
+            .scalar() == 0
+
+
+def test_enable(tmp_path):
+    engine = create_engine('sqlite:///' + str(tmp_path / 'wxgtd.db'))
+    OBJ.Base.metadata.create_all(engine)
+    assert not archive.is_attached(engine)
+    assert archive.enable(engine)
+    assert archive.is_attached(engine)
+    assert (tmp_path / 'wxgtd-archive.db').is_file()
+    assert archive.move_finished(engine, 100) == 0
+    engine.dispose()
+    assert not archive.enable(create_engine('sqlite:///:memory:'))
+
+
+def test_disabled_by_default():
+    assert archive.DEFAULT_DAYS == 0
+
+
+def test_dump_includes_archived(session):
+    archive.move_finished(session.get_bind(), 100)
+    session.expunge_all()
+    res, tasks_cache = exporter._dump_tasks(session, lambda *_args: None,
+            {}, {}, {})
+    assert sorted(task['uuid'] for task in res['task']) == \
+            ['new', 'old', 'p1', 'p1s', 'p2', 'p2s', 'todo']
+    project_id = tasks_cache['p1']
+    assert [task['parent_id'] for task in res['task']
+            if task['uuid'] == 'p1s'] == [project_id]
+    notes = exporter._dump_task_notes(session, lambda *_args: None,
+            tasks_cache)
+    assert [note['title'] for note in notes] == ['old note']
+
+
+def test_not_attached(db_session):
+    assert not archive.is_attached(db_session)
+    assert archive.restore_tasks(db_session, ['x']) == 0
+    assert archive.entity(db_session, OBJ.Task) is OBJ.Task
+    assert archive.rows(db_session, OBJ.TaskTag.__table__) is \
+            OBJ.TaskTag.__table__
+
+
+def test_archive_filename():
+    assert archive.archive_filename('/tmp/wxgtd.db') == \
+            '/tmp/wxgtd-archive.db'
@@ -0,0 +1,166 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.model.backup module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import os
+import gzip
+import sqlite3
+
+import pytest
+from unittest.mock import patch, Mock
+from sqlalchemy import create_engine
+
+from wxgtd.model import backup
+from wxgtd.model import objects as OBJ
+
+
+def _count_tasks(filename):
+    conn = sqlite3.connect(filename)
+    try:
+        return conn.execute("select count(*) from tasks").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Database file with some tasks."""
+    filename = str(tmp_path / "wxgtd.db")
+    engine = create_engine("sqlite:///" + filename)
+    OBJ.Base.metadata.create_all(engine)
+    conn = sqlite3.connect(filename)
+    conn.executemany("insert into tasks (uuid, title, type) values (?, ?, 0)",
+            [("uuid%d" % idx, "task %d" % idx) for idx in range(500)])
+    conn.commit()
+    conn.close()
+    engine.dispose()
+    return filename
+
+
+@pytest.fixture
+def backup_dir(tmp_path, database):
+    """Configured backup directory."""
+    path = tmp_path / "backups"
+    config = {('backup', 'location'): str(path),
+            ('backup', 'number_copies'): 3}
+    appcfg = Mock()
+    appcfg.get.side_effect = lambda section, key, default=None: config.get(
+            (section, key), default)
+    with patch('wxgtd.model.backup.appconfig.AppConfig',
+            return_value=appcfg), \
+            patch('wxgtd.model.backup.get_db_filename',
+                    return_value=database):
+        yield path
+
+
+class TestCopyDatabase:
+    """Tests for copy_database."""
+
+    def test_copy(self, database, tmp_path):
+        dst = str(tmp_path / "copy.db")
+        progress = []
+        backup.copy_database(database, dst, pages=1,
+                sleep=0, progress=lambda *args: progress.append(args))
+        assert _count_tasks(dst) == 500
+        # copied in many steps
+        assert len(progress) > 1
+
+
+class TestCreateBackup:
+    """Tests for create_backup."""
+
+    def test_create_compressed_copy(self, backup_dir):
+        assert backup.create_backup(backup.FORMAT_DB, background=False)
+        files = os.listdir(str(backup_dir))
+        assert len(files) == 1
+        assert files[0].startswith(backup.BACKUP_PREFIX)
+        assert files[0].endswith(".db.gz")
+        with gzip.open(str(backup_dir / files[0])) as bfile:
+            assert bfile.read(16) == b"SQLite format 3\x00"
+
+    def test_background_compression(self, backup_dir):
+        assert backup.create_backup(backup.FORMAT_DB)
+        backup.wait_for_compression()
+        files = os.listdir(str(backup_dir))
+        assert len(files) == 1
+        assert files[0].endswith(".db.gz")
+
+    def test_store_is_default(self, backup_dir):
+        assert backup.create_backup()
+        backup.wait_for_compression()
+        assert os.listdir(str(backup_dir)) == ["store"]
+        store = backup.get_store()
+        assert len(store.list_snapshots()) == 1
+        assert store.verify() == []
+
+    def test_skip_when_today_backup_exists(self, backup_dir):
+        assert backup.create_backup(background=False)
+        with patch('wxgtd.model.backup.copy_database') as copy:
+            assert backup.create_backup(background=False)
+            assert not copy.called
+
+    def test_remove_old_backups(self, backup_dir):
+        backup_dir.mkdir()
+        for day in range(1, 6):
+            (backup_dir / ("BACKUP_2020-01-%02d.db.gz" % day)).write_bytes(
+                    b"")
+        (backup_dir / "BACKUP_2020-01-01.json.zip").write_bytes(b"")
+        (backup_dir / "other.txt").write_bytes(b"")
+        backup.create_backup(backup.FORMAT_DB, background=False)
+        files = sorted(os.listdir(str(backup_dir)))
+        assert "BACKUP_2020-01-01.json.zip" not in files
+        assert "BACKUP_2020-01-02.db.gz" not in files
+        assert "BACKUP_2020-01-03.db.gz" in files
+        assert "other.txt" in files
+        assert len(files) == 5
+
+    def test_json_format(self, backup_dir):
+        with patch('wxgtd.model.exporter.save_to_file') as save:
+            assert backup.create_backup(backup.FORMAT_JSON)
+        filename = save.call_args[0][0]
+        assert filename.endswith(".json.zip")
+
+
+class TestRestoreBackup:
+    """Tests for restore_backup."""
+
+    def test_restore(self, backup_dir, database):
+        backup.create_backup(backup.FORMAT_DB, background=False)
+        conn = sqlite3.connect(database)
+        conn.execute("delete from tasks")
+        conn.commit()
+        conn.close()
+        filename = str(backup_dir / backup.list_backups()[0])
+        backup.restore_backup(filename, database)
+        assert _count_tasks(database) == 500
+
+    def test_restore_snapshot(self, backup_dir, database):
+        backup.create_backup(background=False)
+        conn = sqlite3.connect(database)
+        conn.execute("delete from tasks")
+        conn.commit()
+        conn.close()
+        backup.restore_backup(backup.get_store().list_snapshots()[0],
+                database)
+        assert _count_tasks(database) == 500
+
+    def test_restore_invalid_file(self, tmp_path, database):
+        filename = tmp_path / "BACKUP_2020-01-01.db.gz"
+        with gzip.open(str(filename), "wb") as bfile:
+            bfile.write(b"garbage" * 100)
+        with patch('wxgtd.model.backup.get_backup_dir',
+                return_value=str(tmp_path)):
+            with pytest.raises(backup.BackupError):
+                backup.restore_backup(str(filename), database)
+        assert _count_tasks(database) == 500
+
+    def test_restore_missing_file(self, tmp_path, database):
+        with patch('wxgtd.model.backup.get_backup_dir',
+                return_value=str(tmp_path)):
+            with pytest.raises(backup.BackupError):
+                backup.restore_backup(str(tmp_path / "missing.db.gz"),
+                        database)
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.model.backupstore module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import os
+import datetime
+
+import pytest
+
+from wxgtd.model import backupstore
+
+
+CHUNK = backupstore.CHUNK_SIZE
+
+
+@pytest.fixture
+def store(tmp_path):
+    return backupstore.BackupStore(str(tmp_path / "store"))
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def _chunks_count(store):
+    return sum(len(files) for _root, _dirs, files
+            in os.walk(os.path.join(store.path, "chunks")))
+
+
+class TestSnapshots:
+    """Tests for adding and restoring snapshots."""
+
+    def test_roundtrip(self, store, tmp_path):
+        data = os.urandom(CHUNK * 3 + 100)
+        src = _write(tmp_path / "db", data)
+        assert store.add_snapshot(src, "2026-01-01") == (4, 4)
+        dst = str(tmp_path / "restored")
+        store.restore("2026-01-01", dst)
+        with open(dst, "rb") as ifile:
+            assert ifile.read() == data
+
+    def test_unchanged_chunks_are_shared(self, store, tmp_path):
+        data = bytearray(os.urandom(CHUNK * 10))
+        store.add_snapshot(_write(tmp_path / "db", bytes(data)), "2026-01-01")
+        data[CHUNK * 5 + 10] ^= 0xff
+        assert store.add_snapshot(_write(tmp_path / "db", bytes(data)),
+                "2026-01-02") == (10, 1)
+        assert _chunks_count(store) == 11
+
+    def test_empty_file(self, store, tmp_path):
+        store.add_snapshot(_write(tmp_path / "db", b""), "empty")
+        dst = str(tmp_path / "restored")
+        store.restore("empty", dst)
+        assert os.path.getsize(dst) == 0
+        assert store.verify() == []
+
+    def test_missing_snapshot(self, store, tmp_path):
+        with pytest.raises(backupstore.BackupStoreError):
+            store.restore("missing", str(tmp_path / "out"))
+
+
+class TestVerify:
+    """Tests for store verification."""
+
+    def test_ok(self, store, tmp_path):
+        store.add_snapshot(_write(tmp_path / "db", os.urandom(CHUNK * 2)),
+                "2026-01-01")
+        assert store.verify() == []
+
+    def test_damaged_chunk(self, store, tmp_path):
+        store.add_snapshot(_write(tmp_path / "db", os.urandom(CHUNK * 2)),
+                "2026-01-01")
+        digest = store.get_manifest("2026-01-01")['chunks'][1]
+        with open(store._chunk_path(digest), "wb") as ofile:
+            ofile.write(b"garbage")
+        errors = store.verify()
+        assert len(errors) == 1
+        assert digest in errors[0]
+        with pytest.raises(backupstore.BackupStoreError):
+            store.restore("2026-01-01", str(tmp_path / "out"))
+        assert not os.path.exists(str(tmp_path / "out"))
+
+    def test_missing_chunk(self, store, tmp_path):
+        store.add_snapshot(_write(tmp_path / "db", os.urandom(CHUNK)),
+                "2026-01-01")
+        digest = store.get_manifest("2026-01-01")['chunks'][0]
+        os.unlink(store._chunk_path(digest))
+        assert len(store.verify()) == 1
+
+
+class TestRetention:
+    """Tests for retention policy and garbage collection."""
+
+    def test_daily_weekly_monthly(self, store, tmp_path):
+        src = _write(tmp_path / "db", b"x")
+        start = datetime.date(2026, 1, 1)
+        for day in range(120):
+            name = (start + datetime.timedelta(days=day)).isoformat()
+            store.add_snapshot(src, name)
+        store.add_snapshot(src, "wxgtd_archive")
+        store.apply_retention(daily=7, weekly=4, monthly=6)
+        names = store.list_snapshots()
+        assert "wxgtd_archive" in names
+        dailies = sorted(name for name in names if name[0].isdigit())
+        # last 7 days
+        assert dailies[-7:] == [(start + datetime.timedelta(days=day))
+                .isoformat() for day in range(113, 120)]
+        # one per month: Jan..Apr (newest in each)
+        for name in ("2026-01-31", "2026-02-28", "2026-03-31"):
+            assert name in dailies
+        assert len(dailies) <= 7 + 4 + 6
+
+    def test_gc_removes_unused_chunks(self, store, tmp_path):
+        store.add_snapshot(_write(tmp_path / "db1", os.urandom(CHUNK)),
+                "2026-01-01")
+        store.add_snapshot(_write(tmp_path / "db2", os.urandom(CHUNK)),
+                "2026-01-02")
+        store.remove_snapshot("2026-01-01")
+        assert store.gc() == 1
+        assert store.verify() == []
+        assert _chunks_count(store) == 1
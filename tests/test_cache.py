@@ -0,0 +1,62 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.lib.cache module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+from wxgtd.lib import cache
+
+
+class TestLRUCache:
+    """Tests for LRUCache."""
+
+    def test_get_put(self):
+        lru = cache.LRUCache(10)
+        lru.put('a', 1)
+        assert lru.get('a') == 1
+        assert lru.get('b') is None
+        assert lru.get('b', 2) == 2
+        assert (lru.hits, lru.misses) == (1, 2)
+
+    def test_evicts_least_recently_used(self):
+        lru = cache.LRUCache(2)
+        lru.put('a', 1)
+        lru.put('b', 2)
+        lru.get('a')
+        lru.put('c', 3)
+        assert 'a' in lru
+        assert 'b' not in lru
+        assert 'c' in lru
+
+    def test_bounded_by_values_size(self):
+        lru = cache.LRUCache(100, sizeof=len)
+        lru.put('a', 'x' * 60)
+        lru.put('b', 'x' * 30)
+        assert lru.size == 90
+        lru.put('c', 'x' * 20)
+        assert 'a' not in lru
+        assert lru.size == 50
+        assert len(lru) == 2
+
+    def test_replace_value_updates_size(self):
+        lru = cache.LRUCache(100, sizeof=len)
+        lru.put('a', 'x' * 60)
+        lru.put('a', 'x' * 10)
+        assert lru.size == 10
+        assert lru.get('a') == 'x' * 10
+
+    def test_too_big_value_not_stored(self):
+        lru = cache.LRUCache(10, sizeof=len)
+        lru.put('a', 'x' * 5)
+        lru.put('b', 'x' * 11)
+        assert 'b' not in lru
+        assert 'a' in lru
+
+    def test_clear(self):
+        lru = cache.LRUCache(10)
+        lru.put('a', 1)
+        lru.clear()
+        assert len(lru) == 0
+        assert lru.size == 0
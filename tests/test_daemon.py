@@ -0,0 +1,80 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.daemon module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import threading
+
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from wxgtd import daemon
+from wxgtd.model import objects as OBJ
+from wxgtd.model import queries
+from wxgtd.wxtools import ipc
+
+
+@pytest.fixture
+def session_factory():
+    """Session factory usable from daemon threads."""
+    engine = create_engine('sqlite://',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool)
+    OBJ.Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with patch('wxgtd.model.objects.Session', factory):
+        yield factory
+
+
+@pytest.fixture
+def running_daemon(tmp_path, session_factory):
+    """Daemon serving requests in background thread."""
+    lock_path = str(tmp_path / "lock")
+    dmn = daemon.Daemon(lock_path)
+    assert dmn.start()
+    thread = threading.Thread(target=dmn.serve)
+    thread.start()
+    yield dmn, lock_path
+    dmn.stop()
+    thread.join(5)
+
+
+class TestDaemon:
+    """Tests for headless daemon."""
+
+    def test_quick_task_and_list(self, running_daemon, session_factory):
+        dmn, lock_path = running_daemon
+        client = ipc.IPC(lock_path)
+        address = client.check_lock()
+        assert address == dmn.address
+        uuid = client.call('task.quick', {'title': 'from script'}, address)
+        session = session_factory()
+        assert session.query(OBJ.Task).filter_by(uuid=uuid).one().title == \
+                'from script'
+        session.close()
+        result = client.call('task.list', {
+            'query_group': queries.QUERY_ALL_TASK,
+            'options': queries.OPT_SHOW_FINISHED}, address)
+        assert 'from script' in result
+
+    def test_second_daemon_not_started(self, running_daemon):
+        _dmn, lock_path = running_daemon
+        assert not daemon.Daemon(lock_path).start()
+
+    def test_stop_command(self, tmp_path, session_factory):
+        lock_path = str(tmp_path / "lock")
+        dmn = daemon.Daemon(lock_path)
+        assert dmn.start()
+        thread = threading.Thread(target=dmn.serve)
+        thread.start()
+        client = ipc.IPC(lock_path)
+        client.call('daemon.stop', address=client.check_lock())
+        thread.join(5)
+        assert not thread.is_alive()
+        assert client.check_lock() is None
@@ -35,6 +35,14 @@ class MockDropboxResponse:
 	"""Mock Dropbox file download response."""
 	def __init__(self, content=b"test content"):
 		self.content = content
+		self.closed = False
+
+	def iter_content(self, chunk_size):
+		for idx in range(0, len(self.content), chunk_size):
+			yield self.content[idx:idx + chunk_size]
+
+	def close(self):
+		self.closed = True
 
 
 class MockDropboxMetadata:
@@ -47,6 +55,14 @@ class MockDropboxResponse:
 	"""Mock Dropbox file download response."""
 	def __init__(self, content=b"test content"):
 		self.content = content
+		self.closed = False
+
+	def iter_content(self, chunk_size):
+		for idx in range(0, len(self.content), chunk_size):
+			yield self.content[idx:idx + chunk_size]
+
+	def close(self):
+		self.closed = True
 
 
 class TestDropboxAvailability:
@@ -352,7 +368,8 @@ class TestSync:
 			mock_temp_file.name = '/tmp/test.zip'
 			mock_temp.return_value = mock_temp_file
 			
-			dbsync.sync(load_only=False, notify_cb=notify_cb)
+			with patch('os.path.getsize', return_value=9):
+				dbsync.sync(load_only=False, notify_cb=notify_cb)
 		
 		# Verify download happened
 		mock_download_file.assert_called_once()
@@ -363,8 +380,8 @@ class TestSync:
 		# Verify export happened
 		mock_save_to_file.assert_called_once()
 		
-		# Verify old file was deleted before upload
-		assert any(call[0][1] == dbsync.SYNC_PATH for call in mock_delete_file.call_args_list)
+		# Verify sync file is overwritten, not deleted before upload
+		assert all(call[0][1] != dbsync.SYNC_PATH for call in mock_delete_file.call_args_list)
 		
 		# Verify upload happened
 		mock_client.files_upload.assert_called_once()
@@ -712,7 +729,8 @@ class TestSyncEdgeCases:
 			mock_temp_file.name = '/tmp/test.zip'
 			mock_temp.return_value = mock_temp_file
 			
-			with pytest.raises(SYNC.OtherSyncError):
+			with pytest.raises(SYNC.OtherSyncError), \
+					patch('os.path.getsize', return_value=9):
 				dbsync.sync(load_only=False, notify_cb=notify_cb)
 	
 	@patch('wxgtd.model.dbsync.download_file')
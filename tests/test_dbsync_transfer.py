@@ -0,0 +1,250 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for streaming transfers in wxgtd.model.dbsync against in-process
+fake of Dropbox client.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import io
+import types
+import hashlib
+
+import pytest
+from unittest.mock import patch
+
+from wxgtd.model import dbsync
+
+
+class FakeFiles:
+    """Replacement for `dropbox.files` types."""
+
+    class WriteMode:
+        def __init__(self, tag):
+            self.tag = tag
+
+    class UploadSessionCursor:
+        def __init__(self, session_id, offset):
+            self.session_id = session_id
+            self.offset = offset
+
+    class CommitInfo:
+        def __init__(self, path, mode):
+            self.path = path
+            self.mode = mode
+
+
+class FakeMetadata:
+    def __init__(self, data):
+        self.size = len(data)
+        # files in tests are smaller than one block
+        self.content_hash = hashlib.sha256(
+                hashlib.sha256(data).digest()).hexdigest()
+
+
+class FakeApiError(LookupError):
+    """Upload session error with offset expected by server or error of
+    closed session."""
+
+    def __init__(self, correct_offset=None, closed=False):
+        LookupError.__init__(self, "closed" if closed else "incorrect offset")
+        offset_error = types.SimpleNamespace(correct_offset=correct_offset)
+        self.error = types.SimpleNamespace(
+                is_incorrect_offset=lambda: correct_offset is not None,
+                get_incorrect_offset=lambda: offset_error,
+                is_closed=lambda: closed)
+
+
+class FakeResponse:
+    def __init__(self, data, fail_after=None):
+        self.data = data
+        self.fail_after = fail_after
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for idx in range(0, len(self.data), chunk_size):
+            if self.fail_after is not None and idx >= self.fail_after:
+                raise ConnectionError("connection reset")
+            yield self.data[idx:idx + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDropbox:
+    """In-process fake of `dropbox.Dropbox` keeping files in dict."""
+
+    def __init__(self):
+        self.files = {}
+        self.sessions = {}
+        self.finished_sessions = set()
+        self.calls = []
+        # method name -> number of calls to fail with ConnectionError
+        self.failures = {}
+        # method name -> number of calls to fail after request is processed
+        self.lost_responses = {}
+        self.download_fail_after = None
+
+    def _call(self, name):
+        self.calls.append(name)
+        if self.failures.get(name):
+            self.failures[name] -= 1
+            raise ConnectionError("network error")
+
+    def _response(self, name):
+        if self.lost_responses.get(name):
+            self.lost_responses[name] -= 1
+            raise ConnectionError("connection reset")
+
+    def _check_offset(self, cursor):
+        if cursor.session_id in self.finished_sessions:
+            raise FakeApiError(closed=True)
+        received = len(self.sessions[cursor.session_id])
+        if received != cursor.offset:
+            raise FakeApiError(received)
+
+    def files_get_metadata(self, path):
+        self._call('files_get_metadata')
+        if path not in self.files:
+            raise LookupError(path)
+        return FakeMetadata(self.files[path])
+
+    def files_download(self, path):
+        self._call('files_download')
+        data = self.files[path]
+        response = FakeResponse(data, self.download_fail_after)
+        self.download_fail_after = None
+        return FakeMetadata(data), response
+
+    def files_upload(self, data, path, mode=None):
+        self._call('files_upload')
+        self.files[path] = data
+
+    def files_upload_session_start(self, data):
+        self._call('files_upload_session_start')
+        session_id = "session%d" % len(self.sessions)
+        self.sessions[session_id] = data
+        return types.SimpleNamespace(session_id=session_id)
+
+    def files_upload_session_append_v2(self, data, cursor):
+        self._call('files_upload_session_append_v2')
+        self._check_offset(cursor)
+        self.sessions[cursor.session_id] += data
+        self._response('files_upload_session_append_v2')
+
+    def files_upload_session_finish(self, data, cursor, commit):
+        self._call('files_upload_session_finish')
+        self._check_offset(cursor)
+        self.files[commit.path] = self.sessions.pop(cursor.session_id) + data
+        self.finished_sessions.add(cursor.session_id)
+        self._response('files_upload_session_finish')
+
+
+@pytest.fixture
+def client():
+    fake_dropbox = types.SimpleNamespace(files=FakeFiles)
+    with patch('wxgtd.model.dbsync.dropbox', fake_dropbox), \
+            patch('wxgtd.model.dbsync.ApiError', LookupError), \
+            patch('wxgtd.model.dbsync._sleep') as sleep, \
+            patch('wxgtd.model.dbsync.CHUNK_SIZE', 1024), \
+            patch('wxgtd.model.dbsync.UPLOAD_SESSION_THRESHOLD', 2048):
+        fake = FakeDropbox()
+        fake.sleep = sleep
+        yield fake
+
+
+def _write(tmp_path, data):
+    filename = tmp_path / "sync.zip"
+    filename.write_bytes(data)
+    return str(filename)
+
+
+class TestUploadFile:
+    """Tests for upload_file."""
+
+    def test_small_file_single_request(self, client, tmp_path):
+        dbsync.upload_file(_write(tmp_path, b"x" * 100), "/sync.zip", client)
+        assert client.files["/sync.zip"] == b"x" * 100
+        assert 'files_upload_session_start' not in client.calls
+
+    def test_large_file_in_session(self, client, tmp_path):
+        data = bytes(range(256)) * 40
+        dbsync.upload_file(_write(tmp_path, data), "/sync.zip", client)
+        assert client.files["/sync.zip"] == data
+        assert client.calls.count('files_upload_session_append_v2') == 8
+        assert client.calls.count('files_upload_session_finish') == 1
+        assert 'files_upload' not in client.calls
+
+    def test_retry_chunk(self, client, tmp_path):
+        data = bytes(range(256)) * 20
+        client.failures['files_upload_session_append_v2'] = 2
+        dbsync.upload_file(_write(tmp_path, data), "/sync.zip", client)
+        assert client.files["/sync.zip"] == data
+        # exponential backoff
+        assert [call[0][0] for call in client.sleep.call_args_list] == \
+                [dbsync.RETRY_DELAY, dbsync.RETRY_DELAY * 2]
+
+    def test_lost_response(self, client, tmp_path):
+        data = bytes(range(256)) * 20
+        # chunk is stored, but client gets error and resend it
+        client.lost_responses['files_upload_session_append_v2'] = 1
+        dbsync.upload_file(_write(tmp_path, data), "/sync.zip", client)
+        assert client.files["/sync.zip"] == data
+        assert client.calls.count('files_upload_session_append_v2') == 4
+
+    def test_lost_finish_response(self, client, tmp_path):
+        data = bytes(range(256)) * 20
+        # file is committed, but client gets error and resend last chunk
+        client.lost_responses['files_upload_session_finish'] = 1
+        dbsync.upload_file(_write(tmp_path, data), "/sync.zip", client)
+        assert client.files["/sync.zip"] == data
+        assert client.calls.count('files_upload_session_finish') == 2
+        assert client.calls.count('files_get_metadata') == 1
+
+    def test_lost_finish_response_other_file(self, client, tmp_path):
+        data = bytes(range(256)) * 20
+        client.lost_responses['files_upload_session_finish'] = 1
+        filename = _write(tmp_path, data)
+        finish = client.files_upload_session_finish
+
+        def finish_other(data, cursor, commit):
+            try:
+                finish(data, cursor, commit)
+            finally:
+                # other client overwrote file meanwhile
+                client.files[commit.path] = b"y" * len(
+                        client.files.get(commit.path, b""))
+
+        client.files_upload_session_finish = finish_other
+        with pytest.raises(FakeApiError):
+            dbsync.upload_file(filename, "/sync.zip", client)
+
+    def test_give_up_after_retries(self, client, tmp_path):
+        client.failures['files_upload'] = dbsync.RETRY_COUNT
+        with pytest.raises(ConnectionError):
+            dbsync.upload_file(_write(tmp_path, b"z"), "/sync.zip", client)
+        assert client.sleep.call_count == dbsync.RETRY_COUNT - 1
+
+
+class TestDownloadFile:
+    """Tests for streaming download_file."""
+
+    def test_stream(self, client):
+        data = bytes(range(256)) * 30
+        client.files["/sync.zip"] = data
+        out = io.BytesIO()
+        assert dbsync.download_file(out, "/sync.zip", client)
+        assert out.getvalue() == data
+
+    def test_retry_interrupted_download(self, client):
+        data = bytes(range(256)) * 30
+        client.files["/sync.zip"] = data
+        client.download_fail_after = 4096
+        out = io.BytesIO()
+        assert dbsync.download_file(out, "/sync.zip", client)
+        assert out.getvalue() == data
+        assert client.calls.count('files_download') == 2
+
+    def test_missing_file(self, client):
+        assert not dbsync.download_file(io.BytesIO(), "/sync.zip", client)
@@ -0,0 +1,110 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.model.dictregistry module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import datetime
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from wxgtd.model import dictregistry
+from wxgtd.model import objects as OBJ
+from wxgtd.logic import dicts as dicts_logic
+
+
+def _count_queries(session):
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute",
+            lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestDictRegistry:
+    """Tests for loading and updating dictionaries."""
+
+    def test_load_once(self, db_session):
+        db_session.add_all([OBJ.Context(uuid="c1", title="home"),
+                OBJ.Context(uuid="c2", title="Office")])
+        db_session.commit()
+        statements = _count_queries(db_session)
+        registry = dictregistry.get('contexts')
+        assert registry.find("office", db_session) == "c2"
+        assert [item.uuid for item in registry.items()] == ["c2", "c1"]
+        assert registry.titles() == {"c1": "home", "c2": "Office"}
+        assert registry.get("c1").title == "home"
+        assert len(statements) == 1
+
+    def test_update_after_commit(self, db_session):
+        db_session.add(OBJ.Tag(uuid="t1", title="a"))
+        db_session.commit()
+        registry = dictregistry.get('tags')
+        assert registry.titles(db_session) == {"t1": "a"}
+        version = dictregistry.version()
+        statements = _count_queries(db_session)
+        tag = OBJ.Tag.get(db_session, uuid="t1")
+        tag.title = "b"
+        db_session.add(OBJ.Tag(uuid="t2", title="c"))
+        db_session.flush()
+        # not committed yet
+        assert registry.titles() == {"t1": "a"}
+        db_session.commit()
+        assert registry.titles() == {"t1": "b", "t2": "c"}
+        assert dictregistry.version() > version
+        # only select tag + update + insert; registry is not reloaded
+        assert len(statements) == 3
+
+    def test_deleted(self, db_session):
+        db_session.add_all([OBJ.Goal(uuid="g1", title="goal"),
+                OBJ.Goal(uuid="g2", title="other")])
+        db_session.commit()
+        registry = dictregistry.get('goals')
+        assert registry.find("GOAL", db_session) == "g1"
+        OBJ.Goal.get(db_session, uuid="g1").deleted = datetime.datetime.now()
+        db_session.delete(OBJ.Goal.get(db_session, uuid="g2"))
+        db_session.commit()
+        assert registry.find("goal") is None
+        assert registry.items() == []
+        assert registry.get("g1").deleted is not None
+        assert registry.get("g2") is None
+
+    def test_rollback(self, db_session):
+        registry = dictregistry.get('folders')
+        assert registry.items(db_session) == []
+        db_session.add(OBJ.Folder(uuid="f1", title="folder"))
+        db_session.flush()
+        db_session.rollback()
+        assert registry.items() == []
+        db_session.add(OBJ.Folder(uuid="f2", title="other"))
+        db_session.commit()
+        assert [item.uuid for item in registry.items()] == ["f2"]
+
+    @patch('wxgtd.logic.dicts.publisher')
+    def test_find_or_create_uses_registry(self, _publisher, db_session):
+        db_session.add(OBJ.Context(uuid="c1", title="Home"))
+        db_session.commit()
+        context = dicts_logic.find_or_create_context("Home", db_session)
+        assert context.uuid == "c1"
+        new = dicts_logic.find_or_create_context("office", db_session)
+        assert dicts_logic.find_or_create_context("office", db_session) is new
+        db_session.commit()
+        assert dictregistry.get('contexts').find("office") == new.uuid
+
+    @patch('wxgtd.logic.dicts.publisher')
+    def test_find_or_create_exact_title(self, _publisher, db_session):
+        # as filter_by(title=...): title must match exactly, deleted items
+        # are found too
+        db_session.add_all([OBJ.Goal(uuid="g1", title="Goal"),
+                OBJ.Goal(uuid="g2", title="old",
+                    deleted=datetime.datetime.now())])
+        db_session.commit()
+        assert dicts_logic.find_or_create_goal("old", db_session).uuid == "g2"
+        other = dicts_logic.find_or_create_goal("goal", db_session)
+        assert other.uuid != "g1"
+        db_session.commit()
+        assert dicts_logic.find_or_create_goal("Goal", db_session).uuid == \
+                "g1"
+        assert dicts_logic.find_or_create_goal("goal", db_session) is other
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for streaming tasks export (wxgtd.model.exporter).
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import io
+import csv
+import json
+import datetime
+
+import pytest
+
+from wxgtd.model import enums
+from wxgtd.model import exporter
+from wxgtd.model import objects as OBJ
+
+
+@pytest.fixture
+def tasks(db_session):
+    """ Query for three tasks. """
+    project = OBJ.Task(uuid="p1", title="project", type=enums.TYPE_PROJECT,
+            priority=3)
+    db_session.add_all([project,
+            OBJ.Task(uuid="t1", title="task, one; with\nnewline",
+                parent=project, note="note",
+                due_date=datetime.datetime(2026, 3, 1, 10, 30),
+                due_time_set=1, repeat_pattern="Daily", priority=0),
+            OBJ.Task(uuid="t2", title="done " + "x" * 100,
+                completed=datetime.datetime(2026, 2, 1),
+                start_date=datetime.datetime(2026, 1, 1), priority=-1)])
+    db_session.commit()
+    return OBJ.Task.select_by_filters({}, session=db_session)
+
+
+@pytest.mark.parametrize("output_format", sorted(exporter.EXPORT_FORMATS))
+def test_export_count(tasks, output_format):
+    output = io.StringIO()
+    count, elapsed = exporter.export_tasks(tasks, output_format, 2, output)
+    assert count == 3
+    assert elapsed >= 0
+    assert "t1" in output.getvalue()
+
+
+def test_export_jsonl(tasks):
+    output = io.StringIO()
+    exporter.export_tasks(tasks, 'jsonl', 2, output)
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [row['uuid'] for row in rows] == ["t2", "p1", "t1"]
+    assert rows[2]['parent_uuid'] == "p1"
+    assert rows[2]['due_date'] == "2026-03-01T10:30:00"
+    assert rows[2]['repeat'] == "Daily"
+    assert 'uuid' not in json.loads(_export(tasks, 'jsonl', 0)
+            .splitlines()[0])
+
+
+def test_export_ical(tasks):
+    data = _export(tasks, 'ical', 1)
+    lines = data.split("\r\n")
+    assert lines[0] == "BEGIN:VCALENDAR"
+    assert lines[-2:] == ["END:VCALENDAR", ""]
+    assert data.count("BEGIN:VTODO") == 3
+    assert "SUMMARY:task\\, one\\; with\\nnewline" in lines
+    assert "DUE:20260301T103000Z" in lines
+    assert "DTSTART;VALUE=DATE:20260101" in lines
+    assert "STATUS:COMPLETED" in lines
+    assert "RELATED-TO:p1" in lines
+    assert "PRIORITY:1" in lines
+    assert "DESCRIPTION:note\\n\\nDaily" in lines
+    assert all(len(line.encode("UTF-8")) <= 75 for line in lines)
+    assert "SUMMARY:done " + "x" * 100 in data.replace("\r\n ", "")
+
+
+def test_export_csv(tasks):
+    rows = list(csv.reader(io.StringIO(_export(tasks, 'csv', 0)),
+            delimiter=';'))
+    assert len(rows) == 4
+    assert rows[3][0] == "task, one; with\nnewline"
+
+
+def test_export_notes(tasks):
+    rows = [json.loads(line) for line in _export(tasks, 'jsonl', 1)
+            .splitlines()]
+    assert rows[2]['note'] == "note"
+    rows = [json.loads(line) for line in _export(tasks, 'jsonl', 1,
+            with_notes=False).splitlines()]
+    assert rows[2]['note'] is None
+    # text show only flag; one line for each task
+    lines = _export(tasks, 'text', 1).splitlines()
+    assert len(lines) == 3
+    assert "task, one; with newline" in lines[2]
+    assert "[r n]" in lines[2]
+
+
+def _export(tasks, output_format, verbose, with_notes=None):
+    output = io.StringIO()
+    exporter.export_tasks(tasks, output_format, verbose, output,
+            with_notes=with_notes)
+    return output.getvalue()
@@ -10,6 +10,7 @@ Licence: GPLv2+
 import unittest
 from unittest.mock import MagicMock, patch
 from wxgtd.gui._filtertreectrl import TreeItem, TreeItemCB, FilterTreeModel
+from wxgtd.model import enums
 
 
 class TestTreeItem(unittest.TestCase):
@@ -76,37 +77,31 @@ class TestFilterTreeModel(unittest.TestCase):
 	"""Test FilterTreeModel class."""
 
 	@patch('wxgtd.gui._filtertreectrl.appconfig.AppConfig')
-	@patch('wxgtd.gui._filtertreectrl.OBJ')
-	def test_create_model(self, mock_obj, mock_appconfig):
+	@patch('wxgtd.gui._filtertreectrl.dictregistry')
+	def test_create_model(self, mock_registry, mock_appconfig):
 		"""Test creating filter tree model."""
 		# Mock AppConfig
 		mock_config = MagicMock()
 		mock_config.get.return_value = None
 		mock_appconfig.return_value = mock_config
 		
-		# Mock the model objects
-		mock_obj.Context.all.return_value = []
-		mock_obj.Folder.all.return_value = []
-		mock_obj.Goal.all.return_value = []
-		mock_obj.Tag.all.return_value = []
+		# Mock the dictionaries
+		mock_registry.get.return_value.items.return_value = []
 		
 		model = FilterTreeModel()
 		self.assertIsNotNone(model._items)
-		self.assertEqual(len(model._items), 5)  # STATUSES, CONTEXTS, FOLDERS, GOALS, TAGS
+		self.assertEqual(len(model._items), 6)  # STATUSES, CONTEXTS, FOLDERS, GOALS, TAGS, TAGS_MATCH
 
 	@patch('wxgtd.gui._filtertreectrl.appconfig.AppConfig')
-	@patch('wxgtd.gui._filtertreectrl.OBJ')
-	def test_get_text_without_counts(self, mock_obj, mock_appconfig):
+	@patch('wxgtd.gui._filtertreectrl.dictregistry')
+	def test_get_text_without_counts(self, mock_registry, mock_appconfig):
 		"""Test getting text without count callback."""
 		# Mock AppConfig
 		mock_config = MagicMock()
 		mock_config.get.return_value = None
 		mock_appconfig.return_value = mock_config
 		
-		mock_obj.Context.all.return_value = []
-		mock_obj.Folder.all.return_value = []
-		mock_obj.Goal.all.return_value = []
-		mock_obj.Tag.all.return_value = []
+		mock_registry.get.return_value.items.return_value = []
 		
 		model = FilterTreeModel()
 		# Get first category (Statuses)
@@ -114,18 +109,15 @@ class TestFilterTreeModel(unittest.TestCase):
 		self.assertIn("Status", text)  # Should contain 'Status' or 'Statuses'
 		
 	@patch('wxgtd.gui._filtertreectrl.appconfig.AppConfig')
-	@patch('wxgtd.gui._filtertreectrl.OBJ')
-	def test_get_text_with_count_callback(self, mock_obj, mock_appconfig):
+	@patch('wxgtd.gui._filtertreectrl.dictregistry')
+	def test_get_text_with_count_callback(self, mock_registry, mock_appconfig):
 		"""Test getting text with count callback."""
 		# Mock AppConfig
 		mock_config = MagicMock()
 		mock_config.get.return_value = None
 		mock_appconfig.return_value = mock_config
 		
-		mock_obj.Context.all.return_value = []
-		mock_obj.Folder.all.return_value = []
-		mock_obj.Goal.all.return_value = []
-		mock_obj.Tag.all.return_value = []
+		mock_registry.get.return_value.items.return_value = []
 		
 		# Create mock count callback
 		def mock_count_callback(category, item_id):
@@ -143,36 +135,30 @@ class TestFilterTreeModel(unittest.TestCase):
 		# Count might be 0, which won't add suffix
 		
 	@patch('wxgtd.gui._filtertreectrl.appconfig.AppConfig')
-	@patch('wxgtd.gui._filtertreectrl.OBJ')
-	def test_get_children_count_root(self, mock_obj, mock_appconfig):
+	@patch('wxgtd.gui._filtertreectrl.dictregistry')
+	def test_get_children_count_root(self, mock_registry, mock_appconfig):
 		"""Test getting children count from root."""
 		# Mock AppConfig
 		mock_config = MagicMock()
 		mock_config.get.return_value = None
 		mock_appconfig.return_value = mock_config
 		
-		mock_obj.Context.all.return_value = []
-		mock_obj.Folder.all.return_value = []
-		mock_obj.Goal.all.return_value = []
-		mock_obj.Tag.all.return_value = []
+		mock_registry.get.return_value.items.return_value = []
 		
 		model = FilterTreeModel()
 		count = model.get_children_count([])
-		self.assertEqual(count, 5)  # 5 main categories
+		self.assertEqual(count, 6)  # 6 main categories
 
 	@patch('wxgtd.gui._filtertreectrl.appconfig.AppConfig')
-	@patch('wxgtd.gui._filtertreectrl.OBJ')
-	def test_get_item_type(self, mock_obj, mock_appconfig):
+	@patch('wxgtd.gui._filtertreectrl.dictregistry')
+	def test_get_item_type(self, mock_registry, mock_appconfig):
 		"""Test getting item type."""
 		# Mock AppConfig
 		mock_config = MagicMock()
 		mock_config.get.return_value = None
 		mock_appconfig.return_value = mock_config
 		
-		mock_obj.Context.all.return_value = []
-		mock_obj.Folder.all.return_value = []
-		mock_obj.Goal.all.return_value = []
-		mock_obj.Tag.all.return_value = []
+		mock_registry.get.return_value.items.return_value = []
 		
 		model = FilterTreeModel()
 		# Root should be type 0
@@ -183,18 +169,15 @@ class TestFilterTreeModel(unittest.TestCase):
 		self.assertEqual(typ, 1)
 
 	@patch('wxgtd.gui._filtertreectrl.appconfig.AppConfig')
-	@patch('wxgtd.gui._filtertreectrl.OBJ')
-	def test_checked_items_by_parent(self, mock_obj, mock_appconfig):
+	@patch('wxgtd.gui._filtertreectrl.dictregistry')
+	def test_checked_items_by_parent(self, mock_registry, mock_appconfig):
 		"""Test getting checked items by parent category."""
 		# Mock AppConfig
 		mock_config = MagicMock()
 		mock_config.get.return_value = None
 		mock_appconfig.return_value = mock_config
 		
-		mock_obj.Context.all.return_value = []
-		mock_obj.Folder.all.return_value = []
-		mock_obj.Goal.all.return_value = []
-		mock_obj.Tag.all.return_value = []
+		mock_registry.get.return_value.items.return_value = []
 		
 		model = FilterTreeModel()
 		# Find statuses item and check some children
@@ -215,18 +198,15 @@ class TestFilterTreeModel(unittest.TestCase):
 			self.assertEqual(len(checked), 2)
 
 	@patch('wxgtd.gui._filtertreectrl.appconfig.AppConfig')
-	@patch('wxgtd.gui._filtertreectrl.OBJ')
-	def test_check_items(self, mock_obj, mock_appconfig):
+	@patch('wxgtd.gui._filtertreectrl.dictregistry')
+	def test_check_items(self, mock_registry, mock_appconfig):
 		"""Test checking items by IDs."""
 		# Mock AppConfig
 		mock_config = MagicMock()
 		mock_config.get.return_value = None
 		mock_appconfig.return_value = mock_config
 		
-		mock_obj.Context.all.return_value = []
-		mock_obj.Folder.all.return_value = []
-		mock_obj.Goal.all.return_value = []
-		mock_obj.Tag.all.return_value = []
+		mock_registry.get.return_value.items.return_value = []
 		
 		model = FilterTreeModel()
 		
@@ -246,18 +226,15 @@ class TestFilterTreeModel(unittest.TestCase):
 			self.assertTrue(statuses_item.childs[0].checked)
 
 	@patch('wxgtd.gui._filtertreectrl.appconfig.AppConfig')
-	@patch('wxgtd.gui._filtertreectrl.OBJ')
-	def test_counts_cache(self, mock_obj, mock_appconfig):
+	@patch('wxgtd.gui._filtertreectrl.dictregistry')
+	def test_counts_cache(self, mock_registry, mock_appconfig):
 		"""Test that counts are cached."""
 		# Mock AppConfig
 		mock_config = MagicMock()
 		mock_config.get.return_value = None
 		mock_appconfig.return_value = mock_config
 		
-		mock_obj.Context.all.return_value = []
-		mock_obj.Folder.all.return_value = []
-		mock_obj.Goal.all.return_value = []
-		mock_obj.Tag.all.return_value = []
+		mock_registry.get.return_value.items.return_value = []
 		
 		call_count = 0
 		
@@ -283,5 +260,25 @@ class TestFilterTreeModel(unittest.TestCase):
 		self.assertEqual(call_count, 2)
 
 
+	@patch('wxgtd.gui._filtertreectrl.appconfig.AppConfig')
+	@patch('wxgtd.gui._filtertreectrl.dictregistry')
+	def test_tags_match(self, mock_registry, mock_appconfig):
+		"""Test selecting mode of matching tags."""
+		mock_config = MagicMock()
+		mock_config.get.side_effect = lambda section, key, default=None: \
+				enums.TAGS_MATCH_ALL if key == 'tags_match' else None
+		mock_appconfig.return_value = mock_config
+
+		mock_registry.get.return_value.items.return_value = []
+
+		model = FilterTreeModel()
+		self.assertEqual(model.get_tags_match(), enums.TAGS_MATCH_ALL)
+		model.set_tags_match(enums.TAGS_MATCH_NONE)
+		self.assertEqual(model.get_tags_match(), enums.TAGS_MATCH_NONE)
+		self.assertEqual(list(model.checked_items_by_parent("TAGS_MATCH")),
+				[enums.TAGS_MATCH_NONE])
+		# radio items
+		self.assertEqual(model.get_item_type([5, 0]), 2)
+
 if __name__ == '__main__':
 	unittest.main()
@@ -13,6 +13,7 @@ import datetime
 import time
 
 from wxgtd.lib import fmt
+from wxgtd.lib import datetimeutils as DTU
 
 
 class TestFormatTimestamp:
@@ -83,3 +84,61 @@ class TestFormatTimestamp:
         # Zero timestamp returns empty string or formats as epoch
         assert isinstance(result, str)
 
+
+
+@pytest.fixture
+def warsaw_tz(monkeypatch):
+    """Local timezone with DST: Europe/Warsaw."""
+    if not hasattr(time, 'tzset'):
+        pytest.skip("time.tzset not available")
+    monkeypatch.setenv('TZ', 'Europe/Warsaw')
+    time.tzset()
+    fmt.clear_cache()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+    fmt.clear_cache()
+
+
+class TestFormatTimestampFastPath:
+    """Tests for memoized formatting and utc offset fast path."""
+
+    def test_dst_transition(self, warsaw_tz):
+        # 2025-03-30 01:00 UTC: CET (+1) -> CEST (+2)
+        before = datetime.datetime(2025, 3, 30, 0, 59, 59)
+        after = datetime.datetime(2025, 3, 30, 1, 0, 0)
+        assert fmt.format_timestamp(before) == \
+                datetime.datetime(2025, 3, 30, 1, 59, 59).strftime("%x %X")
+        assert fmt.format_timestamp(after) == \
+                datetime.datetime(2025, 3, 30, 3, 0, 0).strftime("%x %X")
+        # 2025-10-26 01:00 UTC: CEST (+2) -> CET (+1)
+        before = datetime.datetime(2025, 10, 26, 0, 30)
+        after = datetime.datetime(2025, 10, 26, 1, 30)
+        assert fmt.format_timestamp(before) == \
+                datetime.datetime(2025, 10, 26, 2, 30).strftime("%x %X")
+        assert fmt.format_timestamp(after) == \
+                datetime.datetime(2025, 10, 26, 2, 30).strftime("%x %X")
+
+    def test_matches_dateutil_conversion(self):
+        start = datetime.datetime(2025, 1, 1, 0, 17)
+        for hours in range(0, 24 * 365, 7):
+            value = start + datetime.timedelta(hours=hours)
+            expected = DTU.datetime_utc2local(value).strftime("%x %X")
+            assert fmt.format_timestamp(value) == expected
+
+    def test_show_time_flag_in_key(self):
+        value = datetime.datetime(2025, 1, 15, 14, 30, 45)
+        with_time = fmt.format_timestamp(value, True, False)
+        without_time = fmt.format_timestamp(value, False, False)
+        assert with_time != without_time
+        assert fmt.format_timestamp(value, 1, False) == with_time
+
+    def test_batch(self):
+        values = [datetime.datetime(2025, 1, 15, 14, 30), None,
+                datetime.datetime(2025, 1, 16, 8, 0), "text"]
+        assert fmt.format_timestamps(values) == \
+                [fmt.format_timestamp(value) for value in values]
+        flags = [True, False, False, True]
+        assert fmt.format_timestamps(values, flags) == \
+                [fmt.format_timestamp(value, flag)
+                        for value, flag in zip(values, flags)]
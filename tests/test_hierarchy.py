@@ -0,0 +1,344 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for tasks hierarchy index (wxgtd.model.hierarchy).
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from wxgtd.model import enums
+from wxgtd.model import hierarchy
+from wxgtd.model import objects as OBJ
+from wxgtd.model import sqls
+from wxgtd.logic import task as task_logic
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite:///:memory:')
+
+    @event.listens_for(engine, "connect")
+    def _fk_on(dbapi_connection, _record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    OBJ.Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def session(engine):
+    sess = sessionmaker(bind=engine)()
+    yield sess
+    sess.close()
+
+
+def _paths(session):
+    return dict(session.query(OBJ.Task.uuid, hierarchy.TREE_PATH))
+
+
+def _tree(session):
+    """ p1 -> (c1 -> (g1, g2), c2); p2 """
+    p1 = OBJ.Task(uuid="p1", title="p1", type=enums.TYPE_PROJECT)
+    c1 = OBJ.Task(uuid="c1", title="c1", type=enums.TYPE_CHECKLIST,
+            parent=p1)
+    OBJ.Task(uuid="g1", title="g1", type=enums.TYPE_CHECKLIST_ITEM,
+            parent=c1)
+    OBJ.Task(uuid="g2", title="g2", type=enums.TYPE_CHECKLIST_ITEM,
+            parent=c1, completed=datetime.datetime(2026, 1, 1))
+    OBJ.Task(uuid="c2", title="c2", parent=p1)
+    p2 = OBJ.Task(uuid="p2", title="p2", type=enums.TYPE_PROJECT)
+    session.add_all([p1, p2])
+    session.commit()
+
+
+class TestTreePathTriggers:
+    """Tests for maintaining tree_path in database."""
+
+    def test_insert(self, session):
+        _tree(session)
+        paths = _paths(session)
+        assert paths["p1"] == "/p1/"
+        assert paths["g1"] == "/p1/c1/g1/"
+        assert paths["c2"] == "/p1/c2/"
+
+    def test_move_subtree(self, session):
+        _tree(session)
+        task = OBJ.Task.get(session, uuid="c1")
+        task.parent = OBJ.Task.get(session, uuid="p2")
+        session.commit()
+        paths = _paths(session)
+        assert paths["c1"] == "/p2/c1/"
+        assert paths["g1"] == "/p2/c1/g1/"
+        assert paths["c2"] == "/p1/c2/"
+
+    def test_parent_deleted(self, session):
+        _tree(session)
+        session.execute(OBJ.Task.__table__.delete().where(
+                OBJ.Task.uuid == "p1"))
+        paths = _paths(session)
+        assert paths["c1"] == "/c1/"
+        assert paths["g2"] == "/c1/g2/"
+
+    def test_clone_gets_own_path(self, session):
+        _tree(session)
+        clone = OBJ.Task.get(session, uuid="c1").clone()
+        session.add(clone)
+        session.commit()
+        paths = _paths(session)
+        assert paths[clone.uuid] == "/p1/%s/" % clone.uuid
+        assert paths["c1"] == "/p1/c1/"
+
+    def test_rebuild(self, session):
+        _tree(session)
+        session.execute("UPDATE tasks SET tree_path = NULL")
+        hierarchy.rebuild(session)
+        assert _paths(session)["g1"] == "/p1/c1/g1/"
+
+    def test_migration(self, engine, session):
+        _tree(session)
+        session.close()
+        engine.execute("DROP TRIGGER tasks_tree_path_insert")
+        engine.execute("DROP TRIGGER tasks_tree_path_move")
+        engine.execute("DROP INDEX ix_tasks_tree_path")
+        engine.execute("ALTER TABLE tasks DROP COLUMN tree_path")
+        sqls.fix_tasks_tree_path(engine)
+        assert _paths(session)["g2"] == "/p1/c1/g2/"
+        session.add(OBJ.Task(uuid="n1", title="n1", parent_uuid="c2"))
+        session.commit()
+        assert _paths(session)["n1"] == "/p1/c2/n1/"
+
+
+class TestHierarchyQueries:
+    """Tests for subtree, counts and ancestors queries."""
+
+    def test_subtree(self, session):
+        _tree(session)
+        tasks = hierarchy.subtree(session, "p1").all()
+        assert [task.uuid for task in tasks] == ["c1", "g1", "g2", "c2"]
+        tasks = hierarchy.subtree(session, "c1", include_root=True).all()
+        assert [task.uuid for task in tasks] == ["c1", "g1", "g2"]
+
+    def test_subtree_skip_deleted(self, session):
+        _tree(session)
+        OBJ.Task.get(session, uuid="g1").deleted = datetime.datetime.now()
+        session.commit()
+        assert [task.uuid for task in hierarchy.subtree(session, "c1")] == \
+                ["g2"]
+
+    def test_count_descendants(self, session):
+        _tree(session)
+        assert hierarchy.count_descendants(session, ["p1", "c1", "p2"]) == \
+                {"p1": 4, "c1": 2, "p2": 0}
+        assert hierarchy.count_descendants(session, ["p1"],
+                active_only=True) == {"p1": 3}
+
+    def test_ancestors(self, session):
+        _tree(session)
+        assert [task.uuid for task in hierarchy.get_ancestors(session,
+                "g1")] == ["p1", "c1"]
+        assert hierarchy.get_ancestors(session, "p1") == []
+        assert hierarchy.get_ancestors(session, "missing") == []
+
+    def test_constant_queries(self, engine, session):
+        _tree(session)
+        statements = []
+        event.listen(engine, "before_cursor_execute",
+                lambda *args: statements.append(args[2]))
+        hierarchy.get_ancestors(session, "g1")
+        hierarchy.count_descendants(session, ["p1", "c1"])
+        hierarchy.subtree(session, "p1").all()
+        assert len(statements) == 4
+
+    def test_projects_tree(self, session):
+        _tree(session)
+        tree = hierarchy.projects_tree(session)
+        assert [item[0] for item in tree[None]] == ["p1", "p2"]
+        assert tree["p1"] == [("c1", "c1", enums.TYPE_CHECKLIST)]
+        assert "c1" not in tree
+
+
+class TestMoveSubtree:
+    """Tests for moving tasks with subtasks."""
+
+    def test_move(self, session):
+        _tree(session)
+        task = OBJ.Task.get(session, uuid="c1")
+        assert task_logic.change_task_parent(task, "p2", session)
+        session.commit()
+        assert _paths(session)["g2"] == "/p2/c1/g2/"
+
+    def test_refuse_loop(self, session):
+        _tree(session)
+        task = OBJ.Task.get(session, uuid="p1")
+        assert not task_logic.change_task_parent(task, "g1", session)
+        assert task.parent is None
+        assert not hierarchy.move_subtree(session, task, task)
+
+
+class TestBulkSubtree:
+    """Tests for cloning and deleting whole subtrees."""
+
+    def test_clone(self, session):
+        _tree(session)
+        tag = OBJ.Tag(uuid="t1", title="t1")
+        session.add(tag)
+        task = OBJ.Task.get(session, uuid="g1")
+        task.tags.append(tag)
+        task.notes.append(OBJ.Tasknote(title="note"))
+        session.commit()
+        new_uuid = hierarchy.clone_subtree(session, "c1")
+        session.commit()
+        clone = OBJ.Task.get(session, uuid=new_uuid)
+        assert clone.parent_uuid == "p1"
+        assert clone.type == enums.TYPE_CHECKLIST
+        children = sorted(clone.children, key=lambda task: task.title)
+        assert [task.title for task in children] == ["g1", "g2"]
+        assert children[1].completed is None
+        assert [tag.uuid for tag in children[0].tags] == ["t1"]
+        assert [note.title for note in children[0].notes] == ["note"]
+        assert children[0].notes[0].uuid != task.notes[0].uuid
+        paths = _paths(session)
+        assert paths[children[0].uuid] == "/p1/%s/%s/" % (new_uuid,
+                children[0].uuid)
+        assert paths["g1"] == "/p1/c1/g1/"
+
+    def test_clone_skip_deleted(self, session):
+        _tree(session)
+        OBJ.Task.get(session, uuid="c1").deleted = datetime.datetime.now()
+        session.commit()
+        new_uuid = hierarchy.clone_subtree(session, "p1")
+        session.commit()
+        assert [task.title for task in hierarchy.subtree(session, new_uuid,
+                with_deleted=True)] == ["c2"]
+        assert hierarchy.clone_subtree(session, "missing") is None
+
+    def test_clone_constant_queries(self, engine, session):
+        _tree(session)
+        statements = []
+        event.listen(engine, "before_cursor_execute",
+                lambda *args: statements.append(args[2]))
+        hierarchy.clone_subtree(session, "p1")
+        # select tasks, notes, tags; insert tasks
+        assert len(statements) == 4
+
+    def test_delete_task_with_subtasks(self, session):
+        _tree(session)
+        assert task_logic.delete_task("c1", session, with_subtasks=True)
+        assert hierarchy.subtree(session, "p1").all()[0].uuid == "c2"
+        assert OBJ.Task.get(session, uuid="g2").deleted is not None
+        assert OBJ.Task.get(session, uuid="p1").deleted is None
+
+    def test_delete_task_with_subtasks_permanently(self, session):
+        _tree(session)
+        task = OBJ.Task.get(session, uuid="g1")
+        task.notes.append(OBJ.Tasknote(title="note"))
+        session.commit()
+        assert task_logic.delete_task(["c1", "p2"], session,
+                permanently=True, with_subtasks=True)
+        assert sorted(_paths(session)) == ["c2", "p1"]
+        assert session.query(OBJ.Tasknote).count() == 0
+
+
+def _counters(session, uuid):
+    session.expire_all()
+    task = OBJ.Task.get(session, uuid=uuid)
+    return task.child_count, task.active_child_count, task.children_due
+
+
+class TestChildCounters:
+    """Tests for subtasks counters maintained by triggers."""
+
+    def test_insert(self, session):
+        _tree(session)
+        assert _counters(session, "p1") == (2, 2, None)
+        assert _counters(session, "c1") == (2, 1, None)
+        assert _counters(session, "g1") == (0, 0, None)
+
+    def test_complete_delete_move(self, session):
+        _tree(session)
+        task = OBJ.Task.get(session, uuid="g1")
+        task.completed = datetime.datetime(2026, 1, 2)
+        session.commit()
+        assert _counters(session, "c1") == (2, 0, None)
+        OBJ.Task.get(session, uuid="g2").deleted = datetime.datetime.now()
+        session.commit()
+        assert _counters(session, "c1") == (1, 0, None)
+        OBJ.Task.get(session, uuid="c2").parent_uuid = "p2"
+        session.commit()
+        assert _counters(session, "p1") == (1, 1, None)
+        assert _counters(session, "p2") == (1, 1, None)
+        session.delete(OBJ.Task.get(session, uuid="c2"))
+        session.commit()
+        assert _counters(session, "p2") == (0, 0, None)
+
+    def test_children_due(self, session):
+        _tree(session)
+        due1 = datetime.datetime(2026, 3, 1)
+        due2 = datetime.datetime(2026, 2, 1)
+        OBJ.Task.get(session, uuid="c2").due_date = due1
+        session.commit()
+        assert _counters(session, "p1")[2] == due1
+        # subproject use due_date_project
+        OBJ.Task.get(session, uuid="c1").type = enums.TYPE_PROJECT
+        OBJ.Task.get(session, uuid="c1").due_date_project = due2
+        session.commit()
+        assert _counters(session, "p1")[2] == due2
+        OBJ.Task.get(session, uuid="c1").completed = datetime.datetime.now()
+        session.commit()
+        assert _counters(session, "p1")[2] == due1
+        OBJ.Task.get(session, uuid="c2").due_date = None
+        session.commit()
+        assert _counters(session, "p1")[2] is None
+
+    def test_overdue(self, session):
+        _tree(session)
+        OBJ.Task.get(session, uuid="c2").due_date = datetime.datetime(2000,
+                1, 1)
+        session.commit()
+        assert OBJ.Task.get(session, uuid="p1").child_overdue
+        assert not OBJ.Task.get(session, uuid="c1").child_overdue
+
+    def test_bulk_clone_and_delete(self, session):
+        _tree(session)
+        new_uuid = hierarchy.clone_subtree(session, "c1")
+        session.commit()
+        assert _counters(session, "p1") == (3, 3, None)
+        assert _counters(session, new_uuid) == (2, 2, None)
+        hierarchy.delete_subtrees(session, [new_uuid], permanently=True)
+        session.commit()
+        assert _counters(session, "p1") == (2, 2, None)
+
+    def test_no_queries_on_access(self, engine, session):
+        _tree(session)
+        task = OBJ.Task.get(session, uuid="c1")
+        statements = []
+        event.listen(engine, "before_cursor_execute",
+                lambda *args: statements.append(args[2]))
+        assert (task.child_count, task.active_child_count,
+                task.child_overdue) == (2, 1, False)
+        assert statements == []
+
+    def test_rebuild_and_migration(self, engine, session):
+        _tree(session)
+        session.execute("UPDATE tasks SET children_count = 0, "
+                "active_children_count = 0")
+        hierarchy.rebuild(session)
+        session.commit()
+        assert _counters(session, "c1") == (2, 1, None)
+        session.close()
+        for name in ("insert", "update", "move", "delete"):
+            engine.execute("DROP TRIGGER tasks_child_counters_" + name)
+        for column in ("children_count", "active_children_count",
+                "children_due"):
+            engine.execute("ALTER TABLE tasks DROP COLUMN " + column)
+        sqls.fix_tasks_child_counters(engine)
+        assert _counters(session, "p1") == (2, 2, None)
+        session.add(OBJ.Task(uuid="n1", title="n1", parent_uuid="p2"))
+        session.commit()
+        assert _counters(session, "p2") == (1, 1, None)
@@ -0,0 +1,95 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.model.indexadvisor module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from wxgtd.model import objects as OBJ
+from wxgtd.model import indexadvisor
+from wxgtd.model import sqls
+
+
+@pytest.fixture(autouse=True)
+def appconfig():
+    """Hotlist settings are read from configuration."""
+    config = MagicMock()
+    config.get.side_effect = lambda _section, _key, default=None: default
+    with patch('wxgtd.model.queries.AppConfig', return_value=config):
+        yield config
+
+
+def _indexes(engine):
+    return set(row[0] for row in engine.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'tasks' AND sql IS NOT NULL"))
+
+
+@pytest.fixture
+def engine():
+    """Database with few tasks and index from previous version."""
+    engine = create_engine('sqlite:///:memory:')
+    OBJ.Base.metadata.create_all(engine)
+    engine.execute("CREATE INDEX ix_tasks_start_date ON tasks (start_date)")
+    indexadvisor._fill_benchmark_database(engine, 300)
+    engine.execute("ANALYZE")
+    return engine
+
+
+def test_record_workload(engine):
+    session = sessionmaker(bind=engine)()
+    shapes = indexadvisor.record_workload(session)
+    names = set(shape.name for shape in shapes)
+    assert {'all', 'hotlist', 'basket', 'trash', 'count_contexts',
+            'count_tags', 'subtasks', 'reminders'} <= names
+    assert all(shape.statement.lstrip().upper().startswith("SELECT")
+            for shape in shapes)
+
+
+def test_advise_and_apply(engine):
+    session = sessionmaker(bind=engine)()
+    before = _indexes(engine)
+    advice = indexadvisor.advise(engine, session, repeat=1)
+    # database is not changed by advise
+    assert _indexes(engine) == before
+    assert advice.drop == ['ix_tasks_start_date']
+    assert set(advice.before.queries) == set(advice.after.queries)
+    assert advice.after.inserts > 0
+    lines = indexadvisor.format_report(advice)
+    assert "drop index ix_tasks_start_date" in lines
+
+    indexadvisor.apply(engine, advice)
+    after = _indexes(engine)
+    assert 'ix_tasks_start_date' not in after
+    assert set(name for name, _sql in advice.create) <= after
+    # indexes from schema are kept
+    assert 'idx_task_active' in after
+
+
+def test_benchmark_indexes():
+    # alarm index is chosen by planner only for bigger tables
+    advice = indexadvisor.benchmark_indexes(tasks=5000, repeat=1)
+    # indexes from previous version are dropped, partial created
+    assert set(advice.drop) <= set(sqls.OBSOLETE_INDEXES)
+    assert {'ix_tasks_start_date', 'ix_tasks_due_date_project'} <= \
+            set(advice.drop)
+    created = set(name for name, _sql in advice.create)
+    # all partial indexes from schema are chosen by advisor
+    assert created == set(index.name for index in OBJ.Task.__table__.indexes
+            if index.name.startswith('idx_task_'))
+
+
+def test_drop_obsolete_indexes():
+    engine = create_engine('sqlite:///:memory:')
+    OBJ.Base.metadata.create_all(engine)
+    engine.execute("CREATE INDEX ix_tasks_alarm ON tasks (alarm)")
+    engine.execute("CREATE INDEX idx_task_show ON tasks (hide_until)")
+    assert sqls.drop_obsolete_indexes(engine) == 2
+    assert not _indexes(engine) & set(sqls.OBSOLETE_INDEXES)
+    assert sqls.drop_obsolete_indexes(engine) == 0
@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.wxtools.ipc module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import socket
+
+import pytest
+from unittest.mock import patch
+
+from wxgtd.wxtools import ipc
+
+
+@pytest.fixture(params=['unix', 'tcp'])
+def server(request, tmp_path):
+    """Running IPC server using unix socket or tcp transport."""
+    if request.param == 'unix' and ipc._ThreadedUnixServer is None:
+        pytest.skip("unix sockets not supported")
+    lock_path = str(tmp_path / "lock")
+    if request.param == 'tcp':
+        with patch('wxgtd.wxtools.ipc._ThreadedUnixServer', None):
+            srv = ipc.IPC(lock_path)
+            assert srv.start()
+    else:
+        srv = ipc.IPC(lock_path)
+        assert srv.start()
+    yield srv
+    srv.shutdown()
+
+
+class TestFraming:
+    """Tests for length-prefixed frames."""
+
+    def test_roundtrip(self):
+        sock1, sock2 = socket.socketpair()
+        try:
+            ipc.send_frame(sock1, {'command': 'x', 'data': {'a': 'zażółć'}})
+            assert ipc.recv_frame(sock2) == {'command': 'x',
+                    'data': {'a': 'zażółć'}}
+        finally:
+            sock1.close()
+            sock2.close()
+
+    def test_large_frame(self):
+        """Frames larger than single recv buffer are read completely."""
+        sock1, sock2 = socket.socketpair()
+        payload = {'text': 'x' * 300000}
+        try:
+            import threading
+            sender = threading.Thread(target=ipc.send_frame,
+                    args=(sock1, payload))
+            sender.start()
+            assert ipc.recv_frame(sock2) == payload
+            sender.join()
+        finally:
+            sock1.close()
+            sock2.close()
+
+    def test_closed_connection(self):
+        sock1, sock2 = socket.socketpair()
+        sock1.close()
+        assert ipc.recv_frame(sock2) is None
+        sock2.close()
+
+    def test_too_large_frame_rejected(self):
+        sock1, sock2 = socket.socketpair()
+        try:
+            sock1.sendall(ipc._HEADER.pack(ipc.MAX_FRAME_SIZE + 1))
+            with pytest.raises(ipc.IPCError):
+                ipc.recv_frame(sock2)
+        finally:
+            sock1.close()
+            sock2.close()
+
+
+class TestServer:
+    """Tests for IPC server and client."""
+
+    def test_check_lock_finds_running_server(self, server):
+        client = ipc.IPC(server.lock_path)
+        assert client.check_lock() == server.address
+
+    def test_startup_fails_when_running(self, server):
+        client = ipc.IPC(server.lock_path)
+        assert client.startup() is False
+
+    def test_call_command(self, server):
+        server.register('add', lambda a, b: a + b)
+        client = ipc.IPC(server.lock_path)
+        address = client.check_lock()
+        assert client.call('add', {'a': 2, 'b': 3}, address) == 5
+
+    def test_unknown_command(self, server):
+        client = ipc.IPC(server.lock_path)
+        with pytest.raises(ipc.UnknownCommandError):
+            client.call('missing', address=server.address)
+
+    def test_command_error(self, server):
+        def fail():
+            raise ValueError("boom")
+        server.register('fail', fail)
+        client = ipc.IPC(server.lock_path)
+        with pytest.raises(ipc.IPCError) as err:
+            client.call('fail', address=server.address)
+        assert 'boom' in str(err.value)
+
+    def test_notify_after_command(self, server):
+        calls = []
+        server._dispatcher = lambda func, *args, **kwargs: calls.append(args)
+        server.register('noop', lambda: None, ('task.update', ))
+        ipc.IPC(server.lock_path).call('noop', address=server.address)
+        assert calls == [('task.update', )]
+
+    def test_message_is_published(self, server):
+        calls = []
+        server._dispatcher = lambda func, *args, **kwargs: calls.append(
+                (args, kwargs))
+        resp = ipc.IPC(server.lock_path).send('gui.frame_main.raise',
+                address=server.address)
+        assert resp == 'ok'
+        assert calls == [(('gui.frame_main.raise', ), {'data': None})]
+
+
+class TestStaleLock:
+    """Tests for handling lock of not running application."""
+
+    def test_stale_lock_removed(self, tmp_path):
+        lock_path = tmp_path / "lock"
+        lock_path.write_text("unix:" + str(tmp_path / "missing.sock"))
+        assert ipc.IPC(str(lock_path)).check_lock() is None
+        assert not lock_path.exists()
+
+    def test_invalid_lock_removed(self, tmp_path):
+        lock_path = tmp_path / "lock"
+        lock_path.write_text("garbage")
+        assert ipc.IPC(str(lock_path)).check_lock() is None
+        assert not lock_path.exists()
+
+    def test_parse_address(self):
+        assert ipc._parse_address("12345\n") == 12345
+        assert ipc._parse_address("unix:/tmp/x.sock") == "/tmp/x.sock"
+        with pytest.raises(ValueError):
+            ipc._parse_address("80")
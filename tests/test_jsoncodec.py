@@ -0,0 +1,90 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.lib.jsoncodec module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import json
+
+import pytest
+
+from wxgtd.lib import jsoncodec
+
+
+_DATA = {"version": 3, "TASK": [{"ID": 1, "TITLE": "zadanie żółte",
+        "NOTE": "line\n\"quoted\"", "PRIORITY": -1, "VALUE": 1.5,
+        "COMPLETED": None, "STARRED": True}]}
+
+
+@pytest.fixture(params=sorted(jsoncodec.BACKENDS))
+def backend(request):
+    return jsoncodec.BACKENDS[request.param]
+
+
+class TestBackends:
+    """Tests for each available backend."""
+
+    def test_roundtrip(self, backend):
+        dumps, loads = backend
+        encoded = dumps(_DATA)
+        assert isinstance(encoded, bytes)
+        assert loads(encoded) == _DATA
+        assert json.loads(encoded.decode("UTF-8")) == _DATA
+
+    def test_decode_str_and_bytearray(self, backend):
+        _dumps, loads = backend
+        text = json.dumps(_DATA)
+        assert loads(text) == _DATA
+        assert loads(bytearray(text.encode("UTF-8"))) == _DATA
+
+    def test_invalid_data(self, backend):
+        _dumps, loads = backend
+        with pytest.raises(ValueError):
+            loads(b"{not json")
+
+
+class TestCodec:
+    """Tests for module-level API."""
+
+    def test_preferred_backend(self):
+        expected = 'orjson' if jsoncodec.orjson is not None else 'json'
+        assert jsoncodec.BACKEND == expected
+
+    def test_big_integers(self):
+        data = {"value": 2 ** 70}
+        assert jsoncodec.loads(jsoncodec.dumps(data)) == data
+
+    @pytest.mark.parametrize("size", [1, 7, 1000])
+    def test_section_decoder(self, size):
+        data = dict(_DATA, TAGS=[[1, {"a": "]},"}], {}], CONF={"k": "}, "})
+        encoded = jsoncodec.dumps(data)
+        decoder = jsoncodec.SectionDecoder()
+        sections = []
+        for idx in range(0, len(encoded), size):
+            sections.extend(decoder.feed(encoded[idx:idx + size]))
+        sections.extend(decoder.finish())
+        assert sections == list(data.items())
+
+    def test_section_decoder_yields_completed(self):
+        decoder = jsoncodec.SectionDecoder()
+        assert decoder.feed(b'{"version": 3, "TASK": [{"ID"') == \
+                [("version", 3)]
+        assert decoder.feed(b': 1}],\n "TAG": [') == [("TASK", [{"ID": 1}])]
+        assert decoder.feed(b']}') == [("TAG", [])]
+        assert decoder.finish() == []
+
+    @pytest.mark.parametrize("data", [b"{not json", b"[1]", b'{"a": 1',
+        b'{"a": 1} x', b'{"a": [1}', b'{"a": [1]]}', b"", b'{[1]}'])
+    def test_section_decoder_invalid(self, data):
+        decoder = jsoncodec.SectionDecoder()
+        with pytest.raises(ValueError):
+            decoder.feed(data)
+            decoder.finish()
+
+    def test_benchmark(self):
+        result = jsoncodec.benchmark(tasks=50, repeat=1)
+        assert set(result) == set(jsoncodec.BACKENDS)
+        sizes = set(size for _enc, _dec, size in result.values())
+        assert len(sizes) == 1
@@ -0,0 +1,151 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.model.livesearch module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import time
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from wxgtd.model import objects as OBJ
+from wxgtd.model import livesearch
+from wxgtd.model import taskrow
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """File database (worker use own connection) with few tasks."""
+    engine = create_engine('sqlite:///' + str(tmp_path / 'wxgtd.db'),
+            connect_args={'check_same_thread': False})
+    OBJ.Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    session.add_all([OBJ.Task(uuid='t%d' % idx, title='task %d' % idx)
+            for idx in range(5)] + [OBJ.Task(uuid='x1', title='other')])
+    session.commit()
+    session.close()
+    return factory
+
+
+class _Results(object):
+    """Collect results delivered by LiveSearch."""
+
+    def __init__(self):
+        self.parts = []
+        self.done = threading.Event()
+
+    def __call__(self, rows, first, done):
+        self.parts.append(([row.uuid for row in rows], first, done))
+        if done:
+            self.done.set()
+
+
+def _search(session, text_):
+    return taskrow.iter_rows(OBJ.Task.search(text_, True, session))
+
+
+def test_debounce_and_batches(session_factory):
+    calls = []
+
+    def search(session, text_):
+        calls.append(text_)
+        return _search(session, text_)
+
+    results = _Results()
+    search_ctrl = livesearch.LiveSearch(search, results,
+            session_factory=session_factory, delay=0.1, batch_size=2)
+    try:
+        for text_ in ('t', 'ta', 'tas', 'task'):
+            search_ctrl.update(text_)
+        assert results.done.wait(5)
+        # only latest input is searched
+        assert calls == ['task']
+        assert results.parts == [(['t0', 't1'], True, False),
+                (['t2', 't3'], False, False), (['t4'], False, True)]
+    finally:
+        search_ctrl.close()
+
+
+def test_cancel(session_factory):
+    results = _Results()
+    search_ctrl = livesearch.LiveSearch(_search, results,
+            session_factory=session_factory, delay=0.1)
+    try:
+        search_ctrl.update('task')
+        search_ctrl.cancel()
+        time.sleep(0.3)
+        assert results.parts == []
+        search_ctrl.search_now('other')
+        assert results.done.wait(5)
+        assert results.parts == [(['x1'], True, True)]
+    finally:
+        search_ctrl.close()
+
+
+def test_stale_results_discarded(session_factory):
+    started = threading.Event()
+    release = threading.Event()
+
+    def search(session, text_):
+        if text_ == 'slow':
+            started.set()
+            release.wait(5)
+            return [OBJ.Task(uuid='slow')]
+        return _search(session, text_)
+
+    results = _Results()
+    delivered = []
+
+    def dispatch(func, *args):
+        # results are shown later, like with wx.CallAfter
+        delivered.append((func, args))
+
+    search_ctrl = livesearch.LiveSearch(search, results, dispatch,
+            session_factory=session_factory, delay=0)
+    try:
+        search_ctrl.search_now('slow')
+        assert started.wait(5)
+        search_ctrl.search_now('other')
+        release.set()
+        deadline = time.time() + 5
+        while not delivered and time.time() < deadline:
+            time.sleep(0.01)
+        # newer input arrived when results waited for dispatch
+        pending = list(delivered)
+        assert pending
+        search_ctrl.search_now('task')
+        for func, args in pending:
+            func(*args)
+        assert results.parts == []
+    finally:
+        search_ctrl.close()
+
+
+def test_query_interrupted(session_factory):
+    started = threading.Event()
+
+    def search(session, text_):
+        if text_ == 'endless':
+            started.set()
+            return session.execute(text("WITH RECURSIVE cnt(x) AS "
+                    "(SELECT 1 UNION ALL SELECT x + 1 FROM cnt) "
+                    "SELECT x FROM cnt WHERE x < 0"))
+        return _search(session, text_)
+
+    results = _Results()
+    search_ctrl = livesearch.LiveSearch(search, results,
+            session_factory=session_factory, delay=0)
+    try:
+        search_ctrl.search_now('endless')
+        assert started.wait(5)
+        search_ctrl.search_now('other')
+        assert results.done.wait(5)
+        assert results.parts == [(['x1'], True, True)]
+    finally:
+        search_ctrl.close()
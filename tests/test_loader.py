@@ -6,6 +6,8 @@ Copyright (c) Johan Andersson, 2026
 License: GPLv2+
 """
 
+import datetime
+
 import pytest
 from unittest.mock import Mock, patch
 
@@ -201,3 +203,48 @@ class TestSortObjectsByParent:
             
             # Both should have orphan notes
             assert all("ORPHANED TASK" in obj["note"] for obj in result)
+
+
+class TestStr2DatetimeUtc:
+    """Tests for str2datetime_utc function."""
+
+    @pytest.mark.parametrize("string", [
+        "2013-03-22T21:27:46.461Z",
+        "2013-03-22T21:27:46Z",
+        "2025-10-10 00:00",
+        "2025-01-05 08:00:00.000",
+        "2025-10-10",
+        "2025-06-01T23:30:00+02:00",
+        "2025-06-01T01:30:00-0130",
+        "2025-06-01T12:00:00.123456",
+    ])
+    def test_same_as_dateutil(self, string):
+        assert loader.str2datetime_utc(string) == \
+                loader._parse_timestamp_generic(string)
+        assert loader._parse_timestamp(string) is not None
+
+    def test_utc_conversion(self):
+        assert loader.str2datetime_utc("2025-06-01T23:30:00+02:00") == \
+                datetime.datetime(2025, 6, 1, 21, 30)
+
+    def test_fallback_to_dateutil(self):
+        assert loader._parse_timestamp("March 22, 2013 21:27") is None
+        assert loader.str2datetime_utc("March 22, 2013 21:27") == \
+                datetime.datetime(2013, 3, 22, 21, 27)
+
+    @pytest.mark.parametrize("string", ["", None, "2025", "2025-13-45 00:00",
+        "not a timestamp at all"])
+    def test_invalid(self, string):
+        assert loader.str2datetime_utc(string) is None
+
+    def test_cache(self):
+        loader._str2datetime_utc.cache_clear()
+        with patch('wxgtd.model.loader._parse_timestamp',
+                wraps=loader._parse_timestamp) as parse:
+            for _idx in range(10):
+                loader.str2datetime_utc("2013-03-22T21:27:46.461Z")
+            assert parse.call_count == 1
+
+    def test_benchmark(self):
+        generic_time, fast_time = loader.benchmark_timestamps(tasks=200)
+        assert fast_time < generic_time
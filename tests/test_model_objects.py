@@ -426,3 +426,119 @@ class TestNotebookPage:
         assert page.title == "Notes"
         assert page.note == "Some content"
 
+
+
+class TestDeferredNotes:
+    """Tests for deferred loading of task and notebook notes."""
+
+    def _task(self, db_session):
+        db_session.add(OBJ.Task(uuid="n1", title="task", note="x" * 1000))
+        db_session.add(OBJ.Task(uuid="n2", title="empty"))
+        db_session.commit()
+        db_session.expunge_all()
+
+    def test_list_does_not_load_note(self, db_session):
+        self._task(db_session)
+        tasks = OBJ.Task.select_by_filters({}, session=db_session).all()
+        assert all('note' not in task.__dict__ for task in tasks)
+        assert {task.uuid: bool(task.has_note) for task in tasks} == \
+                {"n1": True, "n2": False}
+
+    def test_with_notes(self, db_session):
+        self._task(db_session)
+        task = OBJ.Task.get(db_session, uuid="n1", with_notes=True)
+        assert task.__dict__['note'] == "x" * 1000
+        tasks = OBJ.Task.search("task", False, db_session,
+                with_notes=True).all()
+        assert 'note' in tasks[0].__dict__
+
+    def test_lazy_note(self, db_session):
+        self._task(db_session)
+        task = OBJ.Task.get(db_session, uuid="n1")
+        assert task.note == "x" * 1000
+
+    def test_notebook_pages(self, db_session):
+        db_session.add(OBJ.NotebookPage(uuid="p1", title="page", note="y"))
+        db_session.commit()
+        db_session.expunge_all()
+        page = OBJ.NotebookPage.get(db_session, uuid="p1")
+        assert 'note' not in page.__dict__
+        assert page.note == "y"
+        assert OBJ.NotebookPage.count_by_folders(db_session) == {None: 1}
+
+
+class TestTagFilters:
+    """Tests for filtering tasks by tags."""
+
+    @pytest.fixture
+    def tagged(self, db_session):
+        red = OBJ.Tag(uuid="red", title="red")
+        blue = OBJ.Tag(uuid="blue", title="blue")
+        both = OBJ.Task(uuid="both", title="both")
+        both.tags = [red, blue]
+        only_red = OBJ.Task(uuid="only_red", title="only red")
+        only_red.tags = [red]
+        none = OBJ.Task(uuid="none", title="none")
+        db_session.add_all([red, blue, both, only_red, none])
+        db_session.commit()
+        return db_session
+
+    def _select(self, session, tags, tags_match=None):
+        params = {'tags': tags}
+        if tags_match:
+            params['tags_match'] = tags_match
+        return sorted(task.uuid for task in
+                OBJ.Task.select_by_filters(params, session=session))
+
+    def _plan(self, session, tags, tags_match):
+        query = OBJ.Task.select_by_filters({'tags': tags,
+                'tags_match': tags_match}, session=session)
+        sql = str(query.statement.compile(session.bind,
+                compile_kwargs={'literal_binds': True}))
+        return [row[-1] for row in session.connection().exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + sql)]
+
+    def test_any(self, tagged):
+        assert self._select(tagged, ["red", "blue"]) == ["both", "only_red"]
+        assert self._select(tagged, ["blue"]) == ["both"]
+
+    def test_no_tags(self, tagged):
+        assert self._select(tagged, [None]) == ["none"]
+        assert self._select(tagged, ["blue", None]) == ["both", "none"]
+
+    def test_all(self, tagged):
+        assert self._select(tagged, ["red", "blue"],
+                enums.TAGS_MATCH_ALL) == ["both"]
+        assert self._select(tagged, ["red"],
+                enums.TAGS_MATCH_ALL) == ["both", "only_red"]
+        assert self._select(tagged, ["red", None],
+                enums.TAGS_MATCH_ALL) == ["both", "only_red"]
+
+    def test_none(self, tagged):
+        assert self._select(tagged, ["blue"],
+                enums.TAGS_MATCH_NONE) == ["none", "only_red"]
+        assert self._select(tagged, ["blue", None],
+                enums.TAGS_MATCH_NONE) == ["only_red"]
+
+    @pytest.mark.parametrize("tags_match", [enums.TAGS_MATCH_ANY,
+            enums.TAGS_MATCH_ALL, enums.TAGS_MATCH_NONE])
+    def test_plan_use_tag_index(self, tagged, tags_match):
+        plan = self._plan(tagged, ["red", "blue"], tags_match)
+        assert any("COVERING INDEX idx_task_tags_tag (tag_uuid=?)" in step
+                for step in plan), plan
+        assert not any(step.startswith("SCAN task_tags") for step in plan), \
+                plan
+
+    def test_plan_search_tasks_from_tags(self, tagged):
+        # with statistics (see db.connect) planner select tasks by tags
+        tagged.execute(OBJ.Task.__table__.insert(), [
+                {'uuid': "t%04d" % idx, 'title': "task %d" % idx,
+                    'type': enums.TYPE_TASK} for idx in range(1000)])
+        tagged.execute(OBJ.TaskTag.__table__.insert(), [
+                {'task_uuid': "t%04d" % idx, 'tag_uuid': ("red", "blue")[idx % 2]}
+                for idx in range(0, 1000, 10)])
+        tagged.commit()
+        tagged.connection().exec_driver_sql("ANALYZE")
+        plan = self._plan(tagged, ["red"], enums.TAGS_MATCH_ANY)
+        assert any(step.startswith("SEARCH tasks USING")
+                and "(uuid=?)" in step for step in plan), plan
@@ -0,0 +1,194 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.lib.pipeline and pipelined loading of sync files.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import json
+import time
+import zipfile
+import threading
+
+import pytest
+from unittest.mock import patch, Mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from wxgtd.lib import pipeline
+from wxgtd.model import objects as OBJ
+from wxgtd.model import loader
+
+
+class TestStageTimer:
+    """Tests for StageTimer."""
+
+    def test_stages(self):
+        timer = pipeline.StageTimer()
+        with timer.stage("read"):
+            time.sleep(0.01)
+        timer.timed("apply", lambda: None)()
+        timer.add("read", 1.0)
+        assert list(timer.timings) == ["read", "apply"]
+        assert timer.timings["read"] >= 1.01
+        assert "read 1.0" in timer.summary()
+
+    def test_report(self):
+        timer = pipeline.StageTimer()
+        timer.add("download", 0.5)
+        notify_cb = Mock()
+        timer.report(notify_cb)
+        progress, msg = notify_cb.call_args[0]
+        assert progress == 100
+        assert "download 0.50s" in msg
+
+
+class TestBackgroundIterator:
+    """Tests for BackgroundIterator."""
+
+    def test_items(self):
+        with pipeline.BackgroundIterator(range(100)) as items:
+            assert list(items) == list(range(100))
+
+    def test_bounded_queue(self):
+        produced = []
+
+        def producer():
+            for idx in range(10):
+                produced.append(idx)
+                yield idx
+
+        items = pipeline.BackgroundIterator(producer(), maxsize=2)
+        time.sleep(0.05)
+        # 2 items in queue, 1 waiting for place
+        assert len(produced) <= 3
+        assert next(items) == 0
+        items.close()
+
+    def test_exception_reraised(self):
+        def producer():
+            yield 1
+            raise ValueError("bad data")
+
+        items = pipeline.BackgroundIterator(producer())
+        assert next(items) == 1
+        with pytest.raises(ValueError):
+            next(items)
+
+    def test_close_stops_worker(self):
+        def producer():
+            while True:
+                yield 1
+
+        items = pipeline.BackgroundIterator(producer(), maxsize=1)
+        next(items)
+        items.close()
+        assert not any(thr.name == "pipeline"
+                for thr in threading.enumerate())
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite:///:memory:')
+    OBJ.Base.metadata.create_all(engine)
+    sess = sessionmaker(bind=engine)()
+    sess.add(OBJ.Conf(key='deviceId', val='dev1'))
+    sess.commit()
+    with patch('wxgtd.model.objects.Session', return_value=sess):
+        yield sess
+    sess.close()
+
+
+def _sync_file(tmp_path, data):
+    filename = str(tmp_path / "GTD_SYNC.zip")
+    with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as zfile:
+        zfile.writestr("GTD_SYNC.json", json.dumps(data))
+    return filename
+
+
+_TIMESTAMP = "2026-01-01T10:00:00.000Z"
+_DATA = {"version": 2,
+        "TASK": [{"_id": 1, "uuid": "t1", "title": "task", "parent_id": 0,
+            "folder_id": 1, "context_id": 0, "goal_id": 0, "type": 0,
+            "created": _TIMESTAMP, "modified": _TIMESTAMP}],
+        "FOLDER": [{"_id": 1, "uuid": "f1", "title": "work",
+            "parent_id": 0, "created": _TIMESTAMP, "modified": _TIMESTAMP}]}
+
+
+class TestPipelinedLoad:
+    """Tests for loader.load_from_file."""
+
+    def test_load(self, session, tmp_path):
+        timer = pipeline.StageTimer()
+        assert loader.load_from_file(_sync_file(tmp_path, _DATA), force=True,
+                timer=timer)
+        assert session.query(OBJ.Task.title, OBJ.Task.folder_uuid).all() == \
+                [("task", "f1")]
+        for stage in ("read", "decode", "apply"):
+            assert stage in timer.timings
+
+    def test_before_apply_called_before_changes(self, session, tmp_path):
+        counts = []
+
+        def before_apply():
+            counts.append(session.query(OBJ.Folder).count())
+
+        loader.load_from_file(_sync_file(tmp_path, _DATA), force=True,
+                before_apply=before_apply)
+        assert counts == [0]
+        assert session.query(OBJ.Folder).count() == 1
+
+    def test_dates_recomputed_for_changed_tasks(self, session, tmp_path):
+        filename = _sync_file(tmp_path, _DATA)
+        with patch('wxgtd.logic.task.recompute_tasks_dates') as recompute:
+            loader.load_from_file(filename, force=True)
+            loader.load_from_file(filename, force=True)
+        first, second = [call[0][0] for call in recompute.call_args_list]
+        assert [task.uuid for task in first] == ["t1"]
+        assert second == []
+
+    def test_projects_due_dates_updated_incrementally(self, session,
+            tmp_path):
+        data = dict(_DATA)
+        data["TASK"] = [
+            {"_id": 1, "uuid": "p1", "title": "project", "parent_id": 0,
+                "type": 1, "created": _TIMESTAMP, "modified": _TIMESTAMP},
+            {"_id": 2, "uuid": "t1", "title": "task", "parent_id": 1,
+                "type": 0, "due_date": "2026-02-01T10:00:00.000Z",
+                "created": _TIMESTAMP, "modified": _TIMESTAMP}]
+        filename = _sync_file(tmp_path, data)
+        loader.load_from_file(filename, force=True)
+        project = OBJ.Task.get(session, uuid="p1")
+        assert str(project.due_date) == "2026-02-01 10:00:00"
+        with patch('wxgtd.logic.task.update_projects_due_dates') as update:
+            loader.load_from_file(filename, force=True)
+        assert not update.called
+
+    def test_sections_in_file_order(self, tmp_path):
+        sections = loader.iter_file_sections(_sync_file(tmp_path, _DATA))
+        assert [name for name, _value in sections] == \
+                ["version", "task", "folder"]
+
+    def test_sections_read_lazily(self, tmp_path):
+        # file is opened by consumer (worker thread)
+        sections = loader.iter_file_sections(str(tmp_path / "missing.zip"))
+        with pytest.raises(IOError):
+            next(sections)
+        timer = pipeline.StageTimer()
+        with patch.object(loader, "_READ_CHUNK_SIZE", 16):
+            sections = loader.iter_file_sections(
+                    _sync_file(tmp_path, _DATA), timer)
+            assert next(sections) == ("version", 2)
+            # first section is ready before rest of file is decoded
+            read = timer.timings["read"]
+            assert [name for name, _value in sections] == ["task", "folder"]
+            assert timer.timings["read"] > read
+
+    def test_invalid_file(self, session, tmp_path):
+        filename = str(tmp_path / "GTD_SYNC.zip")
+        with zipfile.ZipFile(filename, "w") as zfile:
+            zfile.writestr("GTD_SYNC.json", "{not json")
+        with pytest.raises(ValueError):
+            loader.load_from_file(filename, force=True)
+        assert session.query(OBJ.Folder).count() == 0
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.model.prefetch module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from wxgtd.model import objects as OBJ
+from wxgtd.model import prefetch
+
+
+@pytest.fixture
+def session():
+    """Session with a few related objects and statements counter."""
+    engine = create_engine('sqlite:///:memory:')
+    OBJ.Base.metadata.create_all(engine)
+    sess = sessionmaker(bind=engine)()
+    ctx = OBJ.Context(uuid='c1', title='home')
+    folder = OBJ.Folder(uuid='f1', title='work')
+    goal = OBJ.Goal(uuid='g1', title='health')
+    tag1 = OBJ.Tag(uuid='t1', title='red')
+    tag2 = OBJ.Tag(uuid='t2', title='blue')
+    root = OBJ.Task(uuid='p1', title='root', type=1)
+    project = OBJ.Task(uuid='p2', title='project', type=1, parent=root)
+    task = OBJ.Task(uuid='x1', title='task', parent=project, context=ctx,
+            folder=folder, goal=goal)
+    task.tags = [tag1, tag2]
+    other = OBJ.Task(uuid='x2', title='other')
+    sess.add_all([ctx, folder, goal, tag1, tag2, root, project, task, other])
+    sess.commit()
+    sess.expunge_all()
+    prefetch.invalidate_dicts()
+    sess.statements = statements = []
+    event.listen(engine, "before_cursor_execute",
+            lambda *args: statements.append(args[2]))
+    with patch('wxgtd.model.objects.Session', return_value=sess):
+        yield sess
+    prefetch.invalidate_dicts()
+    sess.close()
+
+
+class TestTaskInfo:
+    """Tests for TaskInfo."""
+
+    def test_titles(self, session):
+        tasks = session.query(OBJ.Task).filter(
+                OBJ.Task.uuid.in_(['x1', 'x2'])).all()
+        info = prefetch.TaskInfo(tasks, session)
+        task = [task for task in tasks if task.uuid == 'x1'][0]
+        assert info.context_title(task) == 'home'
+        assert info.folder_title(task) == 'work'
+        assert info.goal_title(task) == 'health'
+        assert info.parent_titles(task) == ['root', 'project']
+        assert sorted(info.tags_titles(task)) == ['blue', 'red']
+        other = [task for task in tasks if task.uuid == 'x2'][0]
+        assert info.context_title(other) is None
+        assert info.parent_titles(other) == []
+        assert info.tags_titles(other) == []
+
+    def test_no_lazy_loading(self, session):
+        tasks = session.query(OBJ.Task).all()
+        info = prefetch.TaskInfo(tasks, session)
+        del session.statements[:]
+        for task in tasks:
+            info.context_title(task)
+            info.folder_title(task)
+            info.goal_title(task)
+            info.parent_titles(task)
+            info.tags_titles(task)
+        assert session.statements == []
+
+    def test_query_count_independent_of_rows(self, session):
+        tasks = session.query(OBJ.Task).all()
+        del session.statements[:]
+        prefetch.TaskInfo(tasks, session)
+        # 4 dictionaries, tags, 1 query for each level of missing parents
+        assert len(session.statements) <= 6
+
+    def test_dicts_are_cached(self, session):
+        prefetch.get_dict_titles('contexts', session)
+        del session.statements[:]
+        assert prefetch.get_dict_titles('contexts', session) == {'c1': 'home'}
+        assert session.statements == []
+        prefetch.invalidate_dicts()
+        prefetch.get_dict_titles('contexts', session)
+        assert len(session.statements) == 1
+
+    def test_not_loaded_task_uses_relationships(self, session):
+        info = prefetch.TaskInfo()
+        task = OBJ.Task.get(session, uuid='x1')
+        assert info.parent_titles(task) == ['root', 'project']
+        assert sorted(info.tags_titles(task)) == ['blue', 'red']
+
+    def test_load_project_subtasks(self, session):
+        tasks = session.query(OBJ.Task).filter(
+                OBJ.Task.uuid.in_(['p1', 'x2'])).all()
+        del session.statements[:]
+        subtasks = prefetch.load_project_subtasks(tasks, session)
+        assert {uuid: [task.uuid for task in subs]
+                for uuid, subs in subtasks.items()} == \
+                {'p1': ['p2'], 'p2': ['x1']}
+        # one query per level of tree
+        assert len(session.statements) == 2
+
+    def test_benchmark_list_refresh(self):
+        with_notes, deferred = prefetch.benchmark_list_refresh(tasks=200,
+                note_size=16 * 1024)
+        assert deferred * 4 < with_notes
@@ -8,6 +8,8 @@ Copyright (c) Johan Andersson, 2025
 License: GPLv2+
 """
 
+import datetime
+
 import pytest
 from unittest.mock import Mock, patch
 
@@ -81,3 +83,94 @@ class TestCreateQuicktask:
         assert task is not None
         assert task.title == title
 
+
+
+class TestParseQuicktask:
+    """Tests for parse_quicktask function."""
+
+    # monday
+    TODAY = datetime.datetime(2026, 10, 19)
+
+    @patch('wxgtd.logic.quicktask.DTU.datetime_local2utc', lambda date: date)
+    def test_tokens(self):
+        """Test recognizing context, tags, priority and due date."""
+        item = quicktask.parse_quicktask(
+                "Buy milk @shop #home #Home !high ^tomorrow", self.TODAY)
+        assert item['title'] == "Buy milk"
+        assert item['context'] == "shop"
+        assert item['tags'] == ["home"]
+        assert item['priority'] == 2
+        assert item['due_date'] == datetime.datetime(2026, 10, 20)
+        assert item['due_time_set'] == 0
+
+    @patch('wxgtd.logic.quicktask.DTU.datetime_local2utc', lambda date: date)
+    def test_due_dates(self):
+        """Test various due date formats."""
+        def due(token):
+            return quicktask.parse_quicktask("x " + token, self.TODAY)[
+                    'due_date']
+        assert due("^fri") == datetime.datetime(2026, 10, 23)
+        assert due("^mon") == datetime.datetime(2026, 10, 26)
+        assert due("^+3") == datetime.datetime(2026, 10, 22)
+        assert due("^2026-11-01") == datetime.datetime(2026, 11, 1)
+        item = quicktask.parse_quicktask("x ^2026-11-01T10:30", self.TODAY)
+        assert item['due_date'] == datetime.datetime(2026, 11, 1, 10, 30)
+        assert item['due_time_set'] == 1
+
+    def test_due_parsed_once(self):
+        """Test due date token is parsed only once."""
+        with patch('wxgtd.logic.quicktask._parse_due',
+                return_value=(self.TODAY, 0)) as parse_due:
+            item = quicktask.parse_quicktask("x ^today", self.TODAY)
+        assert item['due_date'] == self.TODAY
+        parse_due.assert_called_once_with("today", self.TODAY)
+
+    def test_invalid_tokens_in_title(self):
+        """Test not recognized tokens are left in title."""
+        item = quicktask.parse_quicktask("call ^bogus !9 @ #", self.TODAY)
+        assert item['title'] == "call ^bogus !9 @ #"
+        assert item['priority'] == -1
+        assert item['due_date'] is None
+
+    def test_empty(self):
+        """Test lines without title are skipped."""
+        assert quicktask.parse_quicktask("   ") is None
+        assert quicktask.parse_quicktask("@home #tag") is None
+
+
+class TestImportQuicktasks:
+    """Tests for import_quicktasks function."""
+
+    def test_import(self, db_session):
+        """Test creating many tasks with contexts and tags."""
+        db_session.add(OBJ.Context(uuid="c1", title="Home"))
+        db_session.add(OBJ.Tag(uuid="t1", title="urgent"))
+        db_session.commit()
+        uuids = quicktask.import_quicktasks([
+                "first @home #URGENT #new",
+                "",
+                "second @office #new !1"], db_session)
+        assert len(uuids) == 2
+        tasks = {task.title: task for task in db_session.query(OBJ.Task)}
+        assert tasks["first"].context_uuid == "c1"
+        assert tasks["first"].priority == -1
+        assert tasks["second"].priority == 1
+        office = db_session.query(OBJ.Context).filter_by(
+                title="office").one()
+        assert tasks["second"].context_uuid == office.uuid
+        assert db_session.query(OBJ.Tag).filter_by(title="new").count() == 1
+        assert sorted(tag.title for tag in tasks["first"].tags) == \
+                ["new", "urgent"]
+
+    def test_own_session_closed(self, db_session):
+        """Test session created by import_quicktasks is closed."""
+        session = Mock(wraps=db_session)
+        with patch('wxgtd.model.objects.Session', return_value=session):
+            assert len(quicktask.import_quicktasks(["task"])) == 1
+        session.commit.assert_called_once_with()
+        session.close.assert_called_once_with()
+
+    def test_import_empty(self, db_session):
+        """Test nothing is created for empty input."""
+        assert quicktask.import_quicktasks(["", "  "], db_session) == []
+        assert db_session.query(OBJ.Task).count() == 0
@@ -167,6 +167,132 @@ class TestUpdateTaskHide:
         assert result is False
 
 
+class TestRecomputeTasksDates:
+    """Tests for recompute_tasks_dates function."""
+
+    DUE = datetime.datetime(2025, 1, 15, 10, 0, 0)
+
+    def _tasks(self, db_session):
+        tasks = []
+        for idx in range(6):
+            task = OBJ.Task(title="task %d" % idx, due_date=self.DUE,
+                    hide_pattern='1 week before due',
+                    alarm_pattern='1 day' if idx % 2 else 'due')
+            tasks.append(task)
+        # unchanged task
+        tasks.append(OBJ.Task(title="hidden", due_date=self.DUE,
+                hide_pattern='task is due', hide_until=self.DUE))
+        db_session.add_all(tasks)
+        db_session.commit()
+        return tasks
+
+    def test_same_result_as_single_task_update(self, db_session):
+        tasks = self._tasks(db_session)
+        changed = task_logic.recompute_tasks_dates(tasks)
+        assert changed == 6
+        for task in tasks[:6]:
+            assert task.hide_until == datetime.datetime(2025, 1, 8, 10, 0, 0)
+            expected = Mock(alarm=None, alarm_pattern=task.alarm_pattern,
+                    due_date=task.due_date)
+            task_logic.update_task_alarm(expected)
+            assert task.alarm == expected.alarm
+        assert tasks[6] not in db_session.dirty
+
+    def test_pattern_parsed_once(self, db_session):
+        tasks = self._tasks(db_session)
+        with patch('wxgtd.logic.task._parse_hide_pattern',
+                wraps=task_logic._parse_hide_pattern) as parse_hide, \
+                patch('wxgtd.logic.task._parse_alarm_pattern',
+                wraps=task_logic._parse_alarm_pattern) as parse_alarm:
+            task_logic.recompute_tasks_dates(tasks)
+        assert parse_hide.call_count == 1
+        assert parse_alarm.call_count == 1
+
+    def test_bulk_update(self, db_session):
+        tasks = self._tasks(db_session)
+        assert task_logic.recompute_tasks_dates(tasks, db_session) == 6
+        # values written to database, objects not modified
+        assert not db_session.dirty
+        db_session.expire_all()
+        assert tasks[0].hide_until == datetime.datetime(2025, 1, 8, 10, 0, 0)
+        assert tasks[1].alarm == datetime.datetime(2025, 1, 14, 10, 0, 0)
+        assert tasks[0].alarm == self.DUE
+        # nothing to change in next call
+        assert task_logic.recompute_tasks_dates(tasks, db_session) == 0
+
+    def test_invalid_patterns(self, db_session):
+        task = OBJ.Task(title="task", due_date=self.DUE,
+                hide_pattern='invalid', alarm_pattern='bad pattern here',
+                alarm=self.DUE)
+        db_session.add(task)
+        db_session.commit()
+        assert task_logic.recompute_tasks_dates([task], db_session) == 0
+        assert task.alarm == self.DUE
+
+
+class TestProjectDueDates:
+    """Tests for incremental update of projects due dates."""
+
+    DUE = datetime.datetime(2025, 1, 15, 10, 0, 0)
+    EARLY = datetime.datetime(2025, 1, 10, 10, 0, 0)
+
+    @pytest.fixture
+    def projects(self, db_session):
+        proj1 = OBJ.Task(uuid='p1', title='project 1',
+                type=enums.TYPE_PROJECT, due_date_project=self.DUE)
+        proj2 = OBJ.Task(uuid='p2', title='project 2',
+                type=enums.TYPE_PROJECT, due_date_project=self.DUE)
+        db_session.add_all([proj1, proj2])
+        db_session.flush()
+        task_logic.update_dirty_projects(db_session)
+        db_session.commit()
+        return proj1, proj2
+
+    def test_subtask_sets_project_due(self, db_session, projects):
+        proj1, proj2 = projects
+        assert proj1.due_date == self.DUE
+        subtask = OBJ.Task(uuid='s1', title='sub', parent_uuid='p1',
+                due_date=self.EARLY, due_time_set=1)
+        with patch('wxgtd.logic.task.publisher'):
+            task_logic.save_modified_task(subtask, db_session)
+        assert proj1.due_date == self.EARLY
+        assert proj1.due_time_set == 1
+        assert proj2.due_date == self.DUE
+        assert proj1 not in db_session.dirty
+
+    def test_only_dirty_projects_recomputed(self, db_session, projects):
+        subtask = OBJ.Task(uuid='s1', title='sub', parent_uuid='p1',
+                due_date=self.EARLY)
+        db_session.add(subtask)
+        db_session.flush()
+        with patch('wxgtd.logic.task.update_projects_due_dates',
+                return_value=1) as update:
+            task_logic.update_dirty_projects(db_session)
+        assert update.call_args[0][0] == {'p1'}
+        # change not related to dates
+        subtask.title = 'new title'
+        db_session.flush()
+        assert task_logic.update_dirty_projects(db_session) == 0
+
+    def test_move_and_delete_subtask(self, db_session, projects):
+        proj1, proj2 = projects
+        subtask = OBJ.Task(uuid='s1', title='sub', parent_uuid='p1',
+                due_date=self.EARLY)
+        db_session.add(subtask)
+        task_logic.update_dirty_projects(db_session)
+        subtask.parent_uuid = 'p2'
+        assert task_logic.update_dirty_projects(db_session) == 2
+        assert proj1.due_date == self.DUE
+        assert proj2.due_date == self.EARLY
+        subtask.deleted = datetime.datetime.now()
+        assert task_logic.update_dirty_projects(db_session) == 1
+        assert proj2.due_date == self.DUE
+
+    def test_unchanged_projects_not_written(self, db_session, projects):
+        assert task_logic.update_projects_due_dates(['p1', 'p2'],
+                db_session) == 0
+
+
 class TestRepeatPatterns:
     """Tests for repeat pattern building functions."""
     
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" Tests for wxgtd.model.taskrow module.
+
+Copyright (c) Johan Andersson, 2026
+License: GPLv2+
+"""
+
+import datetime
+
+import pytest
+from unittest.mock import patch
+
+from wxgtd.model import objects as OBJ
+from wxgtd.model import enums
+from wxgtd.model import prefetch
+from wxgtd.model import taskrow
+
+
+@pytest.fixture
+def session(db_session):
+    """Project with subtasks and standalone tasks."""
+    now = datetime.datetime.utcnow()
+    past = now - datetime.timedelta(days=2)
+    future = now + datetime.timedelta(days=2)
+    ctx = OBJ.Context(uuid='c1', title='home')
+    project = OBJ.Task(uuid='p1', title='project', type=enums.TYPE_PROJECT,
+            due_date_project=future)
+    late = OBJ.Task(uuid='x1', title='late', parent=project, due_date=past,
+            context=ctx, note="some note")
+    done = OBJ.Task(uuid='x2', title='done', parent=project, due_date=past,
+            completed=now)
+    other = OBJ.Task(uuid='x3', title='other', due_date=future)
+    db_session.add_all([ctx, project, late, done, other])
+    db_session.commit()
+    db_session.expunge_all()
+    with patch('wxgtd.model.objects.Session', return_value=db_session):
+        yield db_session
+
+
+def _rows(session, **kwargs):
+    query = OBJ.Task.select_by_filters({}, session=session)
+    return {row.uuid: row for row in taskrow.select(query, **kwargs)}
+
+
+def test_select(session):
+    rows = _rows(session)
+    assert sorted(rows) == ['p1', 'x1', 'x2', 'x3']
+    late = rows['x1']
+    assert isinstance(late, taskrow.TaskRow)
+    assert late.title == 'late'
+    assert late.parent_uuid == 'p1'
+    assert late.context_uuid == 'c1'
+    assert late.has_note
+    assert late.note is None
+    # rows are not bound to session
+    assert not session.identity_map
+
+
+def test_select_with_notes(session):
+    rows = _rows(session, with_notes=True)
+    assert rows['x1'].note == "some note"
+    assert rows['x3'].note is None
+
+
+def test_flags(session):
+    rows = _rows(session)
+    assert rows['x1'].overdue
+    assert not rows['x2'].overdue
+    assert not rows['x3'].overdue
+    project = rows['p1']
+    assert not project.overdue
+    assert project.child_count == 2
+    assert project.active_child_count == 1
+    assert project.child_overdue
+    assert rows['x3'].child_count == 0
+    assert not rows['x3'].child_overdue
+
+
+def test_iter_rows_batches(session):
+    query = OBJ.Task.select_by_filters({}, session=session)
+    titles = [row.title for row in taskrow.iter_rows(query, fetch_size=1)]
+    assert titles == ['done', 'late', 'other', 'project']
+
+
+def test_rows_in_task_info(session):
+    rows = _rows(session)
+    info = prefetch.TaskInfo(list(rows.values()), session)
+    assert info.context_title(rows['x1']) == 'home'
+    assert info.parent_titles(rows['x1']) == ['project']
+    assert info.tags_titles(rows['x1']) == []
+
+
+def test_row_is_compact():
+    assert not hasattr(taskrow.TaskRow(*([None] * 28)), '__dict__')
+
+
+def test_benchmark_rows():
+    objects_size, rows_size = taskrow.benchmark_rows(tasks=500)
+    # about 2.7kB for object with its state and 0.55kB for row
+    assert rows_size * 4 < objects_size
@@ -15,9 +15,10 @@ __version__ = "2025-12-03"
 
 
 import gettext
-import argparse
+import optparse
 import logging
 import sys
+import os
 
 _ = gettext.gettext
 _LOG = logging.getLogger(__name__)
@@ -68,6 +69,9 @@ def _parse_opt():
 	group = optparse.OptionGroup(optp, "Task operations")
 	group.add_option('--quick-task', '-q', dest="quick_task_title",
 			help='quickly add new task', type="string")
+	group.add_option('--import-inbox', dest="import_inbox", metavar="FILE",
+			help='add tasks from file (or stdin for "-"), one per line; '
+			'words @context, #tag, !priority and ^due are recognized')
 	optp.add_option_group(group)
 
 	group = optparse.OptionGroup(optp, "List tasks options")
@@ -82,14 +86,44 @@ def _parse_opt():
 	group.add_option('--search', '-s', dest="search_text",
 			help='search for title/note')
 	group.add_option('--verbose', '-v', action="count",
-			dest="verbose", help='show more information')
-	group.add_option('--output-csv', action="store_true",
-			dest="output_csv", help='show result as csv file')
+			dest="verbose", default=0, help='show more information')
+	group.add_option('--output-csv', action="store_const", const="csv",
+			dest="output_format", help='show result as csv file')
+	group.add_option('--output-format', dest="output_format",
+			choices=["text", "csv", "jsonl", "ical"], default="text",
+			help='format of result: text, csv, jsonl or ical')
+	group.add_option('--with-notes', action="store_true", dest="with_notes",
+			help='show also tasks notes')
 	optp.add_option_group(group)
 
 	group = optparse.OptionGroup(optp, "Options")
 	group.add_option('--sync', action="store_true", dest="sync",
 			help='sync data on startup and exit')
+	group.add_option('--local', action="store_true", default=False,
+			help="don't pass commands to running wxGTD instance")
+	group.add_option('--daemon', action="store_true", default=False,
+			help="run in background and serve cli requests")
+	group.add_option('--stop-daemon', action="store_true", default=False,
+			dest="stop_daemon", help="stop running daemon")
+	group.add_option('--restore-backup', dest="restore_backup",
+			metavar="FILE", help="restore database from backup file or "
+			"snapshot")
+	group.add_option('--list-backups', action="store_true",
+			dest="list_backups", help="show backup files and snapshots")
+	group.add_option('--verify-backups', action="store_true",
+			dest="verify_backups", help="check backups integrity")
+	group.add_option('--rebuild-hierarchy', action="store_true",
+			dest="rebuild_hierarchy", help="recalculate tasks tree and "
+			"subtasks counters")
+	group.add_option('--advise-indexes', action="store_true",
+			dest="advise_indexes", help="show indexes proposed for database "
+			"with timings of queries")
+	group.add_option('--apply-indexes', action="store_true",
+			dest="apply_indexes", help="create and drop indexes proposed by "
+			"--advise-indexes")
+	group.add_option('--archive-finished', type="int", dest="archive_finished",
+			metavar="DAYS", help="move tasks completed more than DAYS ago to "
+			"archive database")
 	optp.add_option_group(group)
 
 	group = optparse.OptionGroup(optp, "Debug options")
@@ -101,8 +135,13 @@ def _parse_opt():
 			help="start shell", dest="shell")
 	optp.add_option_group(group)
 	options, args = optp.parse_args()
-	if not any((options.quick_task_title, options.query_group >= 0,
-			options.sync, options.shell)):
+	if not any((options.quick_task_title, options.import_inbox,
+			options.query_group is not None,
+			options.sync, options.shell, options.daemon,
+			options.stop_daemon, options.restore_backup,
+			options.list_backups, options.verify_backups,
+			options.rebuild_hierarchy, options.advise_indexes,
+			options.apply_indexes, options.archive_finished)):
 		optp.print_help()
 		exit(0)
 	return options, args
@@ -130,31 +169,136 @@ def run():
 	from wxgtd.lib import locales
 	locales.setup_locale(config)
 
+	if options.list_backups or options.verify_backups:
+		_backups_info(options)
+		exit(0)
+
+	if options.stop_daemon:
+		from wxgtd import daemon
+		if not daemon.stop(config):
+			print(_("Daemon is not running"), file=sys.stderr)
+			exit(1)
+		exit(0)
+
+	if options.import_inbox:
+		# stdin can be read only once
+		options.inbox_lines = _read_inbox(options.import_inbox)
+
+	# pass commands to running application if possible
+	if not any((options.local, options.shell, options.daemon,
+			options.restore_backup, options.rebuild_hierarchy,
+			options.advise_indexes, options.apply_indexes,
+			options.archive_finished)) and \
+			_run_remote(options, config):
+		exit(0)
+
 	# database
 	from wxgtd.model import db
 	db_filename = db.find_db_file(config)
 	# connect to databse
 	db.connect(db_filename, options.debug_sql)
 
+	if options.restore_backup:
+		_restore_backup(options.restore_backup)
+	if options.rebuild_hierarchy:
+		_rebuild_hierarchy()
+	if options.advise_indexes or options.apply_indexes:
+		_advise_indexes(options.apply_indexes)
+	if options.archive_finished:
+		_archive_finished(options.archive_finished)
 	if options.sync:
 		_sync(config, True)
+	if options.import_inbox:
+		from wxgtd.logic import quicktask as quicktask_logic
+		_print_imported(quicktask_logic.import_quicktasks(
+				options.inbox_lines))
 	if options.quick_task_title:
 		from wxgtd.logic import quicktask as quicktask_logic
 		quicktask_logic.create_quicktask(options.quick_task_title)
-	elif options.query_group >= 0:
+	elif options.query_group is not None:
 		_list_tasks(options, args)
 	if options.sync:
 		_sync(config, False)
 	if options.shell:
 		_shell()
+	if options.daemon:
+		from wxgtd import daemon
+		if not daemon.run(config):
+			print(_("Daemon is already running"), file=sys.stderr)
+			exit(1)
 	config.save()
 	exit(0)
 
 
-def _list_tasks(options, _args):
-	""" List tasks action. """
-	from wxgtd.model import objects as OBJ
-	group_id = options.query_group
+def _find_server(config):
+	""" Find running wxGTD gui or daemon.
+
+	Returns:
+		(ipc client, address) or (None, None) when nothing is running.
+	"""
+	from wxgtd.wxtools import ipc
+	from wxgtd import daemon
+	for lock_path in (os.path.join(config.config_path, "wxgtd_lock"),
+			daemon.get_lock_path(config)):
+		client = ipc.IPC(lock_path)
+		address = client.check_lock()
+		if address is not None:
+			return client, address
+	return None, None
+
+
+def _run_remote(options, config):
+	""" Execute actions in running wxGTD instance or daemon.
+
+	Returns:
+		False when there is no running instance or it don't support commands;
+		then actions should be executed locally.
+	"""
+	from wxgtd.wxtools import ipc
+	client, address = _find_server(config)
+	if address is None:
+		return False
+	_LOG.info("_run_remote: using running instance %r", address)
+	try:
+		if options.sync:
+			_print_sync_log(client.call('sync', {'load_only': True},
+					address))
+		if options.import_inbox:
+			_print_imported(client.call('task.import',
+					{'lines': options.inbox_lines}, address))
+		if options.quick_task_title:
+			client.call('task.quick', {'title': options.quick_task_title},
+					address)
+		elif options.query_group is not None:
+			sys.stdout.write(client.call('task.list', {
+				'query_group': options.query_group,
+				'options': _get_query_options(options),
+				'parent': options.parent_uuid,
+				'search': options.search_text or '',
+				'verbose': options.verbose or 0,
+				'output_format': options.output_format,
+				'with_notes': options.with_notes}, address))
+		if options.sync:
+			_print_sync_log(client.call('sync', {'load_only': False},
+					address))
+	except ipc.UnknownCommandError as err:
+		_LOG.info("_run_remote: %s; running locally", err)
+		return False
+	except ipc.IPCError as err:
+		print(_("Error: %s") % err, file=sys.stderr)
+		exit(1)
+	except OSError as err:
+		_LOG.warning("_run_remote: connection error %s; running locally", err)
+		return False
+	return True
+
+
+def _print_sync_log(messages):
+	for msg in messages or []:
+		_log_sync_cb(None, msg)
+
+
+def _get_query_options(options):
 	query_opt = 0
 	if options.query_show_finished:
 		query_opt |= queries.OPT_SHOW_FINISHED
@@ -162,26 +306,37 @@ def _list_tasks(options, _args):
 		query_opt |= queries.OPT_SHOW_SUBTASKS
 	if not options.query_dont_hide_until:
 		query_opt |= queries.OPT_HIDE_UNTIL
+	return query_opt
+
+
+def _list_tasks(options, _args):
+	""" List tasks action. """
+	from wxgtd.model import objects as OBJ
+	from wxgtd.model import exporter
+	group_id = options.query_group
+	query_opt = _get_query_options(options)
 	params = queries.build_query_params(group_id, query_opt,
 			options.parent_uuid, options.search_text or '')
 
 	tasks = OBJ.Task.select_by_filters(params)
-	if options.output_csv:
-		_print_csv_tasks_list(tasks, options.verbose)
-	else:
-		_print_simple_tasks_list(tasks, options.verbose)
+	exporter.export_tasks(tasks, options.output_format, options.verbose,
+			with_notes=options.with_notes)
 
 
-def _print_simple_tasks_list(tasks, verbose):
-	""" Export task list to stdout in human-friendly format. """
-	from wxgtd.model import exporter
-	exporter.dump_tasks_to_text(tasks, verbose)
+def _read_inbox(filename):
+	""" Read lines to import from file or stdin ("-"). """
+	if filename == '-':
+		return sys.stdin.read().splitlines()
+	try:
+		with open(filename, encoding='UTF-8') as ifile:
+			return ifile.read().splitlines()
+	except IOError as err:
+		print(_("Error: %s") % err, file=sys.stderr)
+		exit(1)
 
 
-def _print_csv_tasks_list(tasks, verbose):
-	""" Export task list to stdout in cvs format. """
-	from wxgtd.model import exporter
-	exporter.dump_tasks_to_csv(tasks, verbose)
+def _print_imported(tasks_uuid):
+	print(_("Imported %d tasks") % len(tasks_uuid or []), file=sys.stderr)
 
 
 def _log_sync_cb(progress, msg):
@@ -195,6 +350,67 @@ def _sync(config, load_only):
 		sync.sync(last_sync_file, load_only, notify_cb=_log_sync_cb)
 
 
+def _restore_backup(filename):
+	from wxgtd.model import backup
+	try:
+		backup.restore_backup(filename)
+	except backup.BackupError as err:
+		print(_("Error: %s") % err, file=sys.stderr)
+		exit(1)
+	print(_("Database restored from %s") % filename, file=sys.stderr)
+
+
+def _rebuild_hierarchy():
+	from wxgtd.model import objects as OBJ
+	from wxgtd.model import hierarchy
+	session = OBJ.Session()
+	hierarchy.rebuild(session)
+	session.commit()
+	print(_("Tasks hierarchy rebuilt"), file=sys.stderr)
+
+
+def _advise_indexes(apply_advice):
+	from wxgtd.model import objects as OBJ
+	from wxgtd.model import indexadvisor
+	session = OBJ.Session()
+	engine = session.get_bind()
+	advice = indexadvisor.advise(engine, session)
+	session.close()
+	print("\n".join(indexadvisor.format_report(advice)))
+	if apply_advice:
+		indexadvisor.apply(engine, advice)
+		print(_("Indexes updated"), file=sys.stderr)
+
+
+def _archive_finished(days):
+	from wxgtd.model import objects as OBJ
+	from wxgtd.model import archive
+	engine = OBJ.Session().get_bind()
+	archive.enable(engine)
+	moved = archive.move_finished(engine, days)
+	print(_("Moved to archive %d tasks") % moved, file=sys.stderr)
+
+
+def _backups_info(options):
+	from wxgtd.model import backup
+	if options.list_backups:
+		store = backup.get_store()
+		for name in store.list_snapshots():
+			manifest = store.get_manifest(name)
+			print("%-30s %s %10d" % (name, manifest['created'],
+				manifest['size']))
+		for fname in backup.list_backups():
+			print(fname)
+		print(_("Store size: %d") % store.disk_usage())
+	if options.verify_backups:
+		errors = backup.verify_backups()
+		for error in errors:
+			print(error, file=sys.stderr)
+		if errors:
+			exit(1)
+		print(_("Backups are ok"), file=sys.stderr)
+
+
 def _shell():
 	# starting interactive shell
 	from IPython.terminal import ipapp
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+""" Main module - headless daemon serving cli requests.
+
+Daemon keeps database connection and all modules loaded, so scripts calling
+`wxgtd_cli` many times don't pay for startup on each call.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+
+import os
+import gettext
+import logging
+import signal
+import threading
+
+from wxgtd.wxtools import ipc
+
+_ = gettext.gettext
+_LOG = logging.getLogger(__name__)
+
+# name of lock file (in config dir) used by daemon
+LOCK_FILE = "wxgtd_daemon_lock"
+
+
+def get_lock_path(config):
+	""" Get path to daemon lock file. """
+	return os.path.join(config.config_path, LOCK_FILE)
+
+
+class Daemon:
+	""" Headless server executing `logic.commands` over local socket.
+
+	Args:
+		lock_path: path to file holding daemon address.
+	"""
+
+	def __init__(self, lock_path):
+		self._ipc = ipc.IPC(lock_path)
+		self._stop_event = threading.Event()
+
+	@property
+	def address(self):
+		""" Address daemon listen on. """
+		return self._ipc.address
+
+	def start(self):
+		""" Start listening.
+
+		Returns:
+			False when another daemon is running or server can't be started.
+		"""
+		if self._ipc.check_lock() is not None:
+			_LOG.info("Daemon.start: daemon is already running")
+			return False
+		from wxgtd.logic import commands
+		self._ipc.register_commands(commands.COMMANDS)
+		self._ipc.register('daemon.stop', self.stop)
+		return self._ipc.start()
+
+	def stop(self):
+		""" Request daemon stop. """
+		_LOG.info("Daemon.stop")
+		self._stop_event.set()
+
+	def serve(self):
+		""" Wait until stop is requested, then shutdown server. """
+		try:
+			while not self._stop_event.wait(1):
+				pass
+		finally:
+			self._ipc.shutdown()
+			_LOG.info("Daemon.serve: finished")
+
+
+def run(config):
+	""" Run daemon until stopped by signal or `daemon.stop` command.
+
+	Database must be already connected.
+
+	Returns:
+		False when daemon can't be started.
+	"""
+	daemon = Daemon(get_lock_path(config))
+	if not daemon.start():
+		return False
+
+	def on_signal(_signum, _frame):
+		daemon.stop()
+
+	signal.signal(signal.SIGTERM, on_signal)
+	signal.signal(signal.SIGINT, on_signal)
+	_LOG.info("daemon.run: listening on %r", daemon.address)
+	daemon.serve()
+	return True
+
+
+def stop(config):
+	""" Stop running daemon.
+
+	Returns:
+		False when daemon is not running.
+	"""
+	client = ipc.IPC(get_lock_path(config))
+	address = client.check_lock()
+	if address is None:
+		return False
+	client.call('daemon.stop', address=address, timeout=5)
+	return True
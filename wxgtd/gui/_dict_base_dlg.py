@@ -22,6 +22,7 @@ import wx
 
 from wxgtd.wxtools.wxpub import publisher
 from wxgtd.model.objects import Session
+from wxgtd.model import dictregistry
 from wxgtd.wxtools.validators import Validator, ValidatorColorStr
 from wxgtd.gui._base_dialog import BaseDialog
 from wxgtd.gui import message_boxes as mbox
@@ -161,10 +162,10 @@ class DictBaseDlg(BaseDialog):
 		return self._item_class.get(self._session, uuid=uuid)
 
 	def _get_items(self):
-		""" Get all items given class from database. """
-		items = self._item_class.all(session=self._session, order_by='title')
-		for obj in items:
-			yield obj.title, obj.uuid
+		""" Get all items given class from dictionary registry. """
+		registry = dictregistry.for_class(self._item_class)
+		for item in registry.items(self._session):
+			yield item.title, item.uuid
 
 	def _display_item(self, item):
 		""" Display item in window. """
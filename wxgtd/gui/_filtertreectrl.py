@@ -22,7 +22,7 @@ import wx.gizmos
 from wx.lib.mixins import treemixin
 
 from wxgtd.wxtools.wxpub import publisher
-from wxgtd.model import objects as OBJ
+from wxgtd.model import dictregistry
 from wxgtd.model import enums
 from wxgtd.lib import appconfig
 
@@ -76,6 +76,14 @@ class TreeItemCB(TreeItem):
 				child.checked = check
 
 
+class TreeItemRadio(TreeItem):
+	"""Radio button tree item"""
+	def __init__(self, *args, **kwargs):
+		TreeItem.__init__(self, *args, **kwargs)
+		self.node_type = NODE_RADIO
+		self.checked = False
+
+
 class FilterTreeModel(object):
 	""" Model used in FilterTreeModel. """
 
@@ -83,9 +91,12 @@ class FilterTreeModel(object):
 		self._items = []
 		self._count_callback = count_callback
 		self._counts_cache = {}
+		# dictregistry version of loaded items
+		self.version = None
 		self.load()
 
 	def load(self):
+		self.version = dictregistry.version()
 		self._items = []
 		self._items.append(TreeItemCB(_("Statuses"), "STATUSES",
 				*tuple(TreeItemCB(status, status_id or 0)
@@ -94,19 +105,23 @@ class FilterTreeModel(object):
 		self._items.append(TreeItemCB(_("Contexts"), "CONTEXTS",
 				TreeItemCB(_("No Context"), None),
 				*tuple(TreeItemCB(context.title, context.uuid)
-						for context in OBJ.Context.all())))
+						for context in dictregistry.get('contexts').items())))
 		self._items.append(TreeItemCB(_("Folders"), "FOLDERS",
 				TreeItemCB(_("No Folder"), None),
 				*tuple(TreeItemCB(folder.title, folder.uuid)
-						for folder in OBJ.Folder.all('title'))))
+						for folder in dictregistry.get('folders').items())))
 		self._items.append(TreeItemCB(_("Goals"), "GOALS",
 				TreeItemCB(_("No goal"), None),
 				*tuple(TreeItemCB(goal.title, goal.uuid)
-						for goal in OBJ.Goal.all('title'))))
+						for goal in dictregistry.get('goals').items())))
 		self._items.append(TreeItemCB(_("Tags"), "TAGS",
 				TreeItemCB(_("No tag"), None),
 				*tuple(TreeItemCB(tag.title, tag.uuid)
-						for tag in OBJ.Tag.all('title'))))
+						for tag in dictregistry.get('tags').items())))
+		self._items.append(TreeItem(_("Tags matching"), "TAGS_MATCH",
+				*tuple(TreeItemRadio(title, match)
+						for match, title in enums.TAGS_MATCH_LIST)))
+		self.set_tags_match(enums.TAGS_MATCH_ANY)
 		self._load_last_settings()
 
 	def get_item(self, indices):
@@ -165,6 +180,17 @@ class FilterTreeModel(object):
 				checked_cnt += 1
 		parent.checked = checked_cnt == len(parent.childs)
 
+	def get_tags_match(self):
+		""" Get selected mode of matching tags (enums.TAGS_MATCH_*). """
+		for item in self.checked_items_by_parent("TAGS_MATCH"):
+			return item
+		return enums.TAGS_MATCH_ANY
+
+	def set_tags_match(self, tags_match):
+		items = [item for item in self._items if item.obj == "TAGS_MATCH"]
+		for item in items[0].childs:
+			item.checked = item.obj == tags_match
+
 	def _load_last_settings(self):
 		appcfg = appconfig.AppConfig()
 
@@ -192,6 +218,9 @@ class FilterTreeModel(object):
 		if tags:
 			ids = set(convert(tags.split(',')))
 			self.check_items("TAGS", ids)
+		tags_match = appcfg.get('last_filter', 'tags_match', None)
+		if tags_match in dict(enums.TAGS_MATCH_LIST):
+			self.set_tags_match(tags_match)
 
 
 class FilterTreeCtrl(treemixin.VirtualTree, treemixin.ExpansionState,
@@ -241,7 +270,8 @@ class FilterTreeCtrl(treemixin.VirtualTree, treemixin.ExpansionState,
 		item = event.GetItem()
 		indices = self.GetIndexOfItem(item)
 		if self.GetItemType(item) == 2:  # radio
-			pass
+			if item.GetValue():
+				self._model.set_tags_match(self._model.get_item(indices).obj)
 		elif self.GetItemType(item) == 1:  # checkbox
 			# checkbox - select or unselect all sub-items
 			self._model.get_item(indices).checked = item.GetValue()
@@ -274,10 +304,12 @@ class FilterTreeCtrl(treemixin.VirtualTree, treemixin.ExpansionState,
 		appcfg.set('last_filter', 'goals', ','.join(map(str, goals)))
 		tags = self._model.checked_items_by_parent("TAGS")
 		appcfg.set('last_filter', 'tags', ','.join(map(str, tags)))
+		appcfg.set('last_filter', 'tags_match', self._model.get_tags_match())
 
 	def _reload_items(self, *_args):
-		self.save_last_settings()
-		self._model.load()
+		if self._model.version != dictregistry.version():
+			self.save_last_settings()
+			self._model.load()
 		wx.CallAfter(self.refresh)
 
 	def _on_right_up(self, evt):
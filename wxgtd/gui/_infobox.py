@@ -19,8 +19,12 @@ import logging
 
 import wx
 
+from wxgtd.lib.cache import LRUCache
 from wxgtd.model import enums
+from wxgtd.model import prefetch
+from wxgtd.model import taskrow
 from wxgtd.wxtools import iconprovider
+from wxgtd.wxtools.wxpub import publisher
 
 _ = gettext.gettext
 _LOG = logging.getLogger(__name__)
@@ -28,6 +32,13 @@ _LOG = logging.getLogger(__name__)
 
 SETTINGS = {}
 
+# maximal number of pixels of bitmaps kept in rendered rows cache (~32MB)
+RENDER_CACHE_MAX_PIXELS = 8 * 1024 * 1024
+# rendered task info rows: (uuid, modified, width, height, overdue, indent,
+# theme) -> bitmap
+_RENDER_CACHE = LRUCache(RENDER_CACHE_MAX_PIXELS,
+		lambda bitmap: bitmap.GetWidth() * bitmap.GetHeight())
+
 
 def configure():
 	if SETTINGS:
@@ -44,6 +55,28 @@ def configure():
 	dummy, ytext2 = dc.GetTextExtent("Agw")
 	dc.SelectObject(wx.NullBitmap)
 	SETTINGS['line_height'] = ytext1 + ytext2 + 12
+	# rendered rows depends on fonts
+	SETTINGS['theme'] = (SETTINGS['font_task'].GetNativeFontInfoDesc(),
+			SETTINGS['font_info'].GetNativeFontInfoDesc())
+	# rows shows also titles of related objects; clear cache on any change
+	publisher.subscribe(_on_task_update, ('task', 'update'))
+	publisher.subscribe(_on_task_update, ('task', 'delete'))
+	publisher.subscribe(_on_dict_update, ('dict', 'update'))
+	publisher.subscribe(_on_dict_update, ('dict', 'delete'))
+
+
+def _on_task_update(task_uuid=None):
+	clear_render_cache()
+
+
+def _on_dict_update():
+	# dictionaries itself are updated by registry on commit
+	clear_render_cache()
+
+
+def clear_render_cache():
+	""" Remove all rendered rows from cache. """
+	_RENDER_CACHE.clear()
 
 
 _TYPE_ICON_NAMES = {enums.TYPE_PROJECT: 'project_big',
@@ -55,14 +88,21 @@ _TYPE_ICON_NAMES = {enums.TYPE_PROJECT: 'project_big',
 		enums.TYPE_RETURN_CALL: 'returncall_big'}
 
 
-def draw_info(mdc, task, overdue, cache, indent=0):
+def draw_info(mdc, task, overdue, cache, indent=0, info=None):
 	""" Draw information about task on given DC.
 
 	Args:
 		mdc: DC canvas
-		task: task to render
+		task: task to render (Task or taskrow.TaskRow)
 		overdue: is task overdue
+		cache: dict for values computed for task
+		indent: task indentation level
+		info: optional prefetch.TaskInfo with loaded related objects
 	"""
+	if info is None:
+		# rows have no relationships, so related objects must be loaded
+		info = prefetch.TaskInfo([task] if isinstance(task, taskrow.TaskRow)
+				else None)
 	prefix = ""
 	if indent > 0:
 		prefix = "  " * indent + " └─ "
@@ -83,100 +123,76 @@ def draw_info(mdc, task, overdue, cache, indent=0):
 	y_off = mdc.GetTextExtent("Agw")[1] + 10
 	x_off = 35
 
-	x_off = _draw_info_task_status(mdc, cache, task, x_off, y_off)
-	x_off = _draw_info_task_context(mdc, cache, task, x_off, y_off)
-	x_off = _draw_info_task_parent(mdc, cache, task, x_off, y_off)
-	x_off = _draw_info_task_goal(mdc, cache, task, x_off, y_off)
-	x_off = _draw_info_task_folder(mdc, cache, task, x_off, y_off)
-	x_off = _draw_info_task_tags(mdc, cache, task, x_off, y_off)
-
-
-def _draw_info_task_status(mdc, cache, task, x_off, y_off):
-	task_status = cache.get('task_status')
-	if task_status is None and task.status:
-		cache['task_status'] = task_status = enums.STATUSES[task.status]
-		cache['task_status_x_off'] = mdc.GetTextExtent(task_status)[0] + 10
-	if task_status:
-		mdc.DrawBitmap(iconprovider.get_image('status_small'), x_off,
-				y_off, False)
-		x_off += 15  # 12=icon
-		mdc.DrawText(task_status, x_off, y_off)
-		x_off += cache['task_status_x_off']
-	return x_off
+	x_off = _draw_info_item(mdc, cache, 'task_status', 'status_small',
+			x_off, y_off, lambda: enums.STATUSES[task.status]
+			if task.status else None)
+	x_off = _draw_info_item(mdc, cache, 'task_context', None, x_off, y_off,
+			lambda: _format_context(info.context_title(task)))
+	x_off = _draw_info_item(mdc, cache, 'task_parent', 'project_small',
+			x_off, y_off, lambda: '/'.join(info.parent_titles(task)))
+	x_off = _draw_info_item(mdc, cache, 'task_goal', 'goal_small',
+			x_off, y_off, lambda: info.goal_title(task))
+	x_off = _draw_info_item(mdc, cache, 'task_folder', 'folder_small',
+			x_off, y_off, lambda: info.folder_title(task))
+	x_off = _draw_info_item(mdc, cache, 'task_tags', 'tag_small',
+			x_off, y_off, lambda: ",".join(info.tags_titles(task)))
 
 
-def _draw_info_task_context(mdc, cache, task, x_off, y_off):
-	task_context = cache.get('task_context')
-	if task_context is None and task.context:
-		task_context = task.context.title
-		if not task_context.startswith('@'):
-			task_context = '@' + task_context
-		cache['task_context'] = task_context
-		cache['task_context_x_off'] = mdc.GetTextExtent(task_context)[0] + 10
-	if task_context:
-		mdc.DrawText(task_context, x_off, y_off)
-		x_off += cache['task_context_x_off']
-	return x_off
+def get_info_bitmap(task, overdue, width, height, indent=0, info=None):
+	""" Get bitmap with task information rendered by `draw_info`.
 
+	Bitmaps are kept in process-wide LRU cache so repainting rows (i.e. on
+	scrolling) don't load task relations nor measure texts again.
 
-def _draw_info_task_parent(mdc, cache, task, x_off, y_off):
-	task_parent = cache.get('task_parent')
-	if task_parent is None and task.parent:
-		task_parents = []
-		while task.parent:
-			task_parents.insert(0, task.parent.title)
-			task = task.parent
-		task_parent = '/'.join(task_parents)
-		cache['task_parent'] = task_parent
-		cache['task_parent_x_off'] = mdc.GetTextExtent(task_parent)[0] + 10
-	if task_parent:
-		mdc.DrawBitmap(iconprovider.get_image('project_small'), x_off,
-				y_off, False)
-		x_off += 15  # 12=icon
-		mdc.DrawText(task_parent, x_off, y_off)
-		x_off += cache['task_parent_x_off']
-	return x_off
+	Args:
+		task: task to render (Task or taskrow.TaskRow)
+		overdue: is task overdue
+		width, height: bitmap size
+		indent: task indentation level
+		info: optional prefetch.TaskInfo with loaded related objects
+	Returns:
+		wx.Bitmap
+	"""
+	key = (task.uuid, task.modified, width, height, overdue, indent,
+			SETTINGS['theme'])
+	bitmap = _RENDER_CACHE.get(key)
+	if bitmap is None:
+		bitmap = wx.Bitmap(width, height)
+		mdc = wx.MemoryDC()
+		mdc.SelectObject(bitmap)
+		mdc.Clear()
+		draw_info(mdc, task, overdue, {}, indent, info)
+		mdc.SelectObject(wx.NullBitmap)
+		_RENDER_CACHE.put(key, bitmap)
+	return bitmap
 
 
-def _draw_info_task_goal(mdc, cache, task, x_off, y_off):
-	task_goal = cache.get('task_goal')
-	if task_goal is None and task.goal:
-		cache['task_goal'] = task_goal = task.goal.title
-		cache['task_goal_x_off'] = mdc.GetTextExtent(task_goal)[0] + 10
-	if task_goal:
-		mdc.DrawBitmap(iconprovider.get_image('goal_small'), x_off,
-				y_off, False)
-		x_off += 15  # 12=icon
-		mdc.DrawText(task_goal, x_off, y_off)
-		x_off += cache['task_goal_x_off']
-	return x_off
+def _format_context(title):
+	if title and not title.startswith('@'):
+		title = '@' + title
+	return title
 
 
-def _draw_info_task_folder(mdc, cache, task, x_off, y_off):
-	task_folder = cache.get('task_folder')
-	if task_folder is None and task.folder:
-		cache['task_folder'] = task_folder = task.folder.title
-		cache['task_folder_x_off'] = mdc.GetTextExtent(task_folder)[0] + 10
-	if task_folder:
-		mdc.DrawBitmap(iconprovider.get_image('folder_small'), x_off,
-				y_off, False)
-		x_off += 15  # 12=icon
-		mdc.DrawText(task_folder, x_off, y_off)
-		x_off += cache['task_folder_x_off']
-	return x_off
+def _draw_info_item(mdc, cache, name, icon_name, x_off, y_off, get_value):
+	""" Draw one information (optional icon and text) about task.
 
+	Text and its width are computed once and stored in `cache`.
 
-def _draw_info_task_tags(mdc, cache, task, x_off, y_off):
-	task_tags = cache.get('task_tags')
-	if task_tags is None and task.tags:
-		cache['task_tags'] = task_tags = ",".join(
-				tag.title for tag in task.tags)
-	if task_tags:
-		mdc.DrawBitmap(iconprovider.get_image('tag_small'), x_off,
-				y_off, False)
-		x_off += 15  # 12=icon
-		mdc.DrawText(task_tags, x_off, y_off)
-		#x_off += mdc.GetTextExtent(task_tags)[0] + 10
+	Returns:
+		Offset of next item.
+	"""
+	value = cache.get(name)
+	if value is None:
+		cache[name] = value = get_value() or ''
+		cache[name + '_x_off'] = (mdc.GetTextExtent(value)[0] + 10) \
+				if value else 0
+	if value:
+		if icon_name:
+			mdc.DrawBitmap(iconprovider.get_image(icon_name), x_off,
+					y_off, False)
+			x_off += 15  # 12=icon
+		mdc.DrawText(value, x_off, y_off)
+		x_off += cache[name + '_x_off']
 	return x_off
 
 
@@ -226,7 +242,7 @@ def draw_icons(mdc, task, overdue, active_only, cache):
 	if task.repeat_pattern and task.repeat_pattern != 'Norepeat':
 		mdc.DrawBitmap(iconprovider.get_image('repeat_small'), 16, y_off,
 				False)
-	if task.note:
+	if task.has_note:
 		mdc.DrawBitmap(iconprovider.get_image('note_small'), 32, y_off,
 				False)
 
@@ -18,6 +18,7 @@ import wx
 
 from wxgtd.model import objects as OBJ
 from wxgtd.model import enums
+from wxgtd.model import taskrow
 from wxgtd.gui import _tasklistctrl as TLC
 from wxgtd.wxtools.wxpub import publisher
 
@@ -100,17 +101,17 @@ class ProjectListPanel(wx.Panel):
 		self._list_no_tasks.DeleteAllItems()
 
 		# Get all projects (not completed, not deleted)
-		all_projects = OBJ.Task.all_projects().all()
+		all_projects = taskrow.iter_rows(OBJ.Task.all_projects())
 		
 		projects_with_actions = []
 		projects_no_tasks = []
 
 		# Categorize projects
 		for project in all_projects:
-			if project.completed or project.deleted:
-				continue  # Skip completed and deleted projects
+			if project.completed:
+				continue  # Skip completed projects; deleted are not loaded
 			
-			# Count children (tasks) - using cached property
+			# Count children (tasks) - counter stored in task row
 			child_count = project.child_count
 			
 			if child_count > 0:
@@ -27,7 +27,7 @@ from wxgtd.model import enums
 from wxgtd.lib import fmt
 from wxgtd.gui import _infobox as infobox
 from wxgtd.wxtools import iconprovider
-from wxgtd.model import objects as OBJ
+from wxgtd.model import prefetch
 
 _ = gettext.gettext
 _LOG = logging.getLogger(__name__)
@@ -55,20 +55,16 @@ class _ListItemRenderer(object):
 	+-----------+-----------------------+------+---------------+
 	"""
 
-	def __init__(self, _parent, task, overdue=False, indent=0):
+	def __init__(self, _parent, task, overdue=False, indent=0, info=None):
 		self._task = task
 		self._overdue = overdue
 		self._indent = indent
-		self._values_cache = {}
+		self._info = info
 
 	def DrawSubItem(self, dc, rect, _line, _highlighted, _enabled):
-		canvas = wx.Bitmap(rect.width, rect.height)
-		mdc = wx.MemoryDC()
-		mdc.SelectObject(canvas)
-		mdc.Clear()
-		infobox.draw_info(mdc, self._task, self._overdue,
-				cache=self._values_cache, indent=self._indent)
-		dc.Blit(rect.x + 3, rect.y, rect.width - 6, rect.height, mdc, 0, 0)
+		bitmap = infobox.get_info_bitmap(self._task, self._overdue,
+				rect.width - 6, rect.height, self._indent, self._info)
+		dc.DrawBitmap(bitmap, rect.x + 3, rect.y, False)
 
 	def GetLineHeight(self):  # pylint: disable=R0201
 		return infobox.SETTINGS['line_height']
@@ -143,6 +139,9 @@ class TaskListControl(ULC.UltimateListCtrl, listmix.ColumnSorterMixin):
 		self._icon_sm_up = icon_prov.get_image_index('sm_up')
 		self._icon_sm_down = icon_prov.get_image_index('sm_down')
 		self._drag_item_start = None
+		self._task_info = None
+		# parent uuid -> subtasks of expanded projects
+		self._subtasks = {}
 
 		self.Bind(ULC.EVT_LIST_BEGIN_DRAG, self._on_begin_drag)
 		self.Bind(ULC.EVT_LIST_END_DRAG, self._on_end_drag)
@@ -203,7 +202,7 @@ class TaskListControl(ULC.UltimateListCtrl, listmix.ColumnSorterMixin):
 		""" Fill the list with tasks.
 
 		Args:
-			task: list of tasks
+			task: list of tasks (Task or taskrow.TaskRow)
 			active_only: boolean - show/count only active tasks.
 		"""
 		# pylint: disable=R0915
@@ -216,20 +215,46 @@ class TaskListControl(ULC.UltimateListCtrl, listmix.ColumnSorterMixin):
 		self.itemDataMap.clear()
 		self._mainWin.HideWindows()  # workaround for some bug in ULC
 		self.DeleteAllItems()
+		index = -1
+		self._task_info = prefetch.TaskInfo()
+		self._subtasks = {}
+		self._append(tasks, active_only, session, expand_projects)
+		self._mainWin.ResetCurrent()
+		if not expand_projects and index > 0:
+			self.SortListItems(*current_sort_state)  # pylint: disable=W0142
+		self.Thaw()
+		self.Update()
+
+	def append(self, tasks, active_only=False, session=None,
+			expand_projects=False):
+		""" Add tasks to the end of list (i.e. next part of search results).
+
+		Args:
+			task: list of tasks (Task or taskrow.TaskRow)
+			active_only: boolean - show/count only active tasks.
+		"""
+		self.Freeze()
+		self._append(tasks, active_only, session, expand_projects)
+		self.Thaw()
+		self.Update()
+
+	def _append(self, tasks, active_only, session, expand_projects):
 		icon_completed = self._icons.get_image_index('task_done')
 		prio_icon = {-1: self._icons.get_image_index('prio-1'),
 				0: self._icons.get_image_index('prio0'),
 				1: self._icons.get_image_index('prio1'),
 				2: self._icons.get_image_index('prio2'),
 				3: self._icons.get_image_index('prio3')}
-		index = -1
+		tasks = list(tasks)
+		# load related objects for all tasks at once
+		self._task_info.load(tasks, session)
+		if expand_projects:
+			subtasks = prefetch.load_project_subtasks(tasks, session)
+			self._subtasks.update(subtasks)
+			self._task_info.load([sub for subs in subtasks.values()
+					for sub in subs], session)
 		for task in tasks:
 			self._add_task(task, 0, active_only, session, expand_projects, icon_completed, prio_icon)
-		self._mainWin.ResetCurrent()
-		if not expand_projects and index > 0:
-			self.SortListItems(*current_sort_state)  # pylint: disable=W0142
-		self.Thaw()
-		self.Update()
 
 	def _add_task(self, task, indent, active_only, session, expand_projects, icon_completed, prio_icon):
 		child_count = task.active_child_count if active_only else \
@@ -241,7 +266,7 @@ class TaskListControl(ULC.UltimateListCtrl, listmix.ColumnSorterMixin):
 		index = self.InsertImageStringItem(sys.maxsize, "", icon)
 		self.SetStringItem(index, 1, "")
 		self.SetItemCustomRenderer(index, 1, _ListItemRenderer(self,
-			task, task_is_overdue, indent))
+			task, task_is_overdue, indent, self._task_info))
 		if task.type == enums.TYPE_CHECKLIST_ITEM:
 			self.SetStringItem(index, 2, str(task.importance + 1))
 		elif task.type == enums.TYPE_PROJECT:
@@ -276,11 +301,8 @@ class TaskListControl(ULC.UltimateListCtrl, listmix.ColumnSorterMixin):
 		if task_is_overdue:
 			self.SetItemTextColour(index, wx.RED)
 		if expand_projects and task.type == enums.TYPE_PROJECT and task.child_count > 0:
-			# Optimized: Load all subtasks at once instead of querying recursively
-			subs = session.query(OBJ.Task).filter(
-				OBJ.Task.parent_uuid == task.uuid, 
-				OBJ.Task.deleted.is_(None)).order_by(OBJ.Task.title).all()
-			for sub in subs:
+			# subtasks are loaded in fill
+			for sub in self._subtasks.get(task.uuid, ()):
 				self._add_task(sub, indent + 1, active_only, session, expand_projects, 
 							   icon_completed, prio_icon)
 
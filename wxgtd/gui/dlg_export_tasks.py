@@ -29,13 +29,19 @@ from ._base_dialog import BaseDialog
 _ = gettext.gettext
 _LOG = logging.getLogger(__name__)
 
+# radio button suffix -> (exporter format, file extension)
+_FORMATS = {'txt': ('text', '.txt'),
+		'csv': ('csv', '.csv'),
+		'jsonl': ('jsonl', '.jsonl'),
+		'ical': ('ical', '.ics')}
+
 
 class DlgExportTasks(BaseDialog):
 	""" Exporting task parameters dialog.
 
 	Args:
 		parent: parent window
-		tasks: list of task to export
+		tasks: query selecting tasks to export
 	"""
 
 	def __init__(self, parent, tasks):
@@ -50,8 +56,9 @@ class DlgExportTasks(BaseDialog):
 				self['btn_filen_select'])
 		wnd.Bind(wx.EVT_RADIOBUTTON, self._on_format_change,
 				self['rb_format_txt'])
-		wnd.Bind(wx.EVT_RADIOBUTTON, self._on_format_change,
-				self['rb_format_csv'])
+		for name in _FORMATS:
+			wnd.Bind(wx.EVT_RADIOBUTTON, self._on_format_change,
+					self['rb_format_' + name])
 
 	def _setup(self):
 		self['tc_filename'].SetValidator(Validator(
@@ -68,21 +75,23 @@ class DlgExportTasks(BaseDialog):
 		elif self['rb_details_verbose'].GetValue():
 			details = 2
 		filename = self['tc_filename'].GetValue()
+		output_format = _FORMATS[self._get_format()][0]
 		try:
-			with open(filename, 'wt') as dfile:
-				if self['rb_format_txt'].GetValue():  # txt
-					exporter.dump_tasks_to_text(self._tasks, details, output=dfile)
-				else:  # csv
-					exporter.dump_tasks_to_csv(self._tasks, details, output=dfile)
-			msg.message_box_info(self._wnd, _("Export complete."))
+			with open(filename, 'wt', encoding='UTF-8', newline='') as dfile:
+				count, elapsed = exporter.export_tasks(self._tasks,
+						output_format, details, output=dfile)
+			msg.message_box_info_ex(self._wnd, _("Export complete."),
+					_("Exported %(count)d tasks in %(time).1fs "
+						"(%(rate)d tasks/s).") % {'count': count,
+						'time': elapsed,
+						'rate': count / elapsed if elapsed else count})
 		except IOError as error:
 			msg.message_box_error_ex(self._wnd, _("Export Error."),
 					str(error))
 
 	def _on_btn_file_select(self, _evt):
 		default_dir = os.path.expanduser("~")
-		default_file = ("tasks.txt" if self['rb_format_txt'].GetValue() else
-				'tasks.csv')
+		default_file = "tasks" + _FORMATS[self._get_format()][1]
 		curr_filename = self['tc_filename'].GetValue()
 		if curr_filename:
 			default_file = os.path.basename(curr_filename)
@@ -95,14 +104,16 @@ class DlgExportTasks(BaseDialog):
 			self['tc_filename'].SetValue(dlg.GetPath())
 		dlg.Destroy()
 
+	def _get_format(self):
+		for name in _FORMATS:
+			if self['rb_format_' + name].GetValue():
+				return name
+		return 'txt'
+
 	def _on_format_change(self, _evt):
 		filename = self['tc_filename'].GetValue()
 		if filename:
 			fname, fext = os.path.splitext(filename)
-			if self['rb_format_txt'].GetValue():
-				if fext.lower() == '.csv':
-					self['tc_filename'].SetValue(fname + ".txt")
-			else:
-				if fext.lower() != '.csv':
-					self['tc_filename'].SetValue(fname + ".csv")
-
+			ext = _FORMATS[self._get_format()][1]
+			if fext.lower() != ext:
+				self['tc_filename'].SetValue(fname + ext)
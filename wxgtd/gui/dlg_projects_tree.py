@@ -20,6 +20,7 @@ import wx
 
 from wxgtd.model import objects as OBJ
 from wxgtd.model import enums
+from wxgtd.model import hierarchy
 from wxgtd.wxtools import iconprovider
 
 from ._base_dialog import BaseDialog
@@ -76,18 +77,20 @@ class DlgProjectTree(BaseDialog):
 		icon_project_idx = self._icons.get_image_index('project_small')
 		icon_checklist_idx = self._icons.get_image_index('checklist_small')
 
-		def add_item(root, task):
-			child = tc_tree.AppendItem(root, task.title)
-			tc_tree.SetItemData(child, task.uuid)
-			icon = (icon_project_idx if task.type == enums.TYPE_PROJECT
-					else icon_checklist_idx)
-			tc_tree.SetItemImage(child, icon, wx.TreeItemIcon_Normal)
-			tc_tree.SetItemImage(child, icon, wx.TreeItemIcon_Expanded)
-			for subtask in task.sub_project_or_checklists:
-				add_item(child, subtask)
-
-		for obj in OBJ.Task.root_projects_checklists(self._session):
-			add_item(tree_root, obj)
+		# whole tree in one query
+		children = hierarchy.projects_tree(self._session)
+
+		def add_items(root, parent_uuid):
+			for uuid, title, task_type in children.get(parent_uuid, ()):
+				child = tc_tree.AppendItem(root, title)
+				tc_tree.SetItemData(child, uuid)
+				icon = (icon_project_idx if task_type == enums.TYPE_PROJECT
+						else icon_checklist_idx)
+				tc_tree.SetItemImage(child, icon, wx.TreeItemIcon_Normal)
+				tc_tree.SetItemImage(child, icon, wx.TreeItemIcon_Expanded)
+				add_items(child, uuid)
+
+		add_items(tree_root, None)
 
 		tc_tree.ExpandAll()
 
@@ -29,9 +29,14 @@ from wxgtd.model import loader
 from wxgtd.model import exporter
 from wxgtd.model import sync
 from wxgtd.model import enums
+from wxgtd.model import hierarchy
 from wxgtd.model import queries
 from wxgtd.model import dbsync
 from wxgtd.model import db
+from wxgtd.model import backup
+from wxgtd.model import archive
+from wxgtd.model import taskrow
+from wxgtd.model import livesearch
 from wxgtd.logic import task as task_logic
 from wxgtd.lib import fmt
 from wxgtd.gui import dlg_about
@@ -60,6 +65,12 @@ ngettext = gettext.ngettext  # pylint: disable=C0103
 _LOG = logging.getLogger(__name__)
 
 
+def _search_tasks(session, params):
+	""" Load tasks for search-as-you-type (in worker thread). """
+	return taskrow.iter_rows(OBJ.Task.select_by_filters(params,
+			session=session))
+
+
 class FrameMain(BaseFrame):
 	""" Main window class. """
 	# pylint: disable=R0903, R0902
@@ -86,6 +97,10 @@ class FrameMain(BaseFrame):
 			wx.CallAfter(self._autosync)
 		self._reminders_timer = wx.Timer(self.wnd)
 		self._reminders_timer.Start(30 * 1000)  # 30 sec
+		# params of latest search-as-you-type request
+		self._search_params = None
+		self._live_search = livesearch.LiveSearch(_search_tasks,
+				self._on_search_results, wx.CallAfter)
 
 	def _load_controls(self):
 		# pylint: disable=W0201
@@ -132,10 +147,14 @@ class FrameMain(BaseFrame):
 		self._create_menu_bind('menu_file_sync', self._on_menu_file_sync)
 		self._create_menu_bind('menu_file_export_tasks',
 				self._on_menu_file_export_tasks)
+		self._create_menu_bind('menu_file_archive_finished',
+				self._on_menu_file_archive_finished)
 		self._create_menu_bind('menu_file_archive_db', self._on_menu_file_archive_db)
 		self._create_menu_bind('menu_help_about', self._on_menu_help_about)
 		self._create_menu_bind('menu_task_new', self._on_menu_task_new)
 		self._create_menu_bind('menu_task_quick', self._on_menu_task_quick)
+		self._create_menu_bind('menu_task_paste_inbox',
+				self._on_menu_task_paste_inbox)
 		self._create_menu_bind('menu_task_edit', self._on_menu_task_edit)
 		self._create_menu_bind('menu_task_delete', self._on_menu_task_delete)
 		self._create_menu_bind('menu_task_clone', self._on_menu_task_clone)
@@ -299,7 +318,7 @@ class FrameMain(BaseFrame):
 		self._searchbox.SetDescriptiveText(_('Search'))
 		self._searchbox.ShowCancelButton(True)
 		toolbar.AddControl(self._searchbox)
-		#self.wnd.Bind(wx.EVT_TEXT, self._on_search, self._searchbox)
+		self.wnd.Bind(wx.EVT_TEXT, self._on_search_text, self._searchbox)
 		self.wnd.Bind(wx.EVT_SEARCHCTRL_SEARCH_BTN, self._on_search,
 				self._searchbox)
 		self.wnd.Bind(wx.EVT_SEARCHCTRL_CANCEL_BTN, self._on_search_cancel,
@@ -342,6 +361,7 @@ class FrameMain(BaseFrame):
 		appconfig.set(self._window_name, 'splitter_pos',
 			self['window_2'].GetSashPosition())
 		self._filter_tree_ctrl.save_last_settings()
+		self._live_search.close()
 		self._tbicon.Destroy()
 		BaseFrame._on_close(self, event)
 
@@ -414,6 +434,26 @@ class FrameMain(BaseFrame):
 		if tasks:
 			DlgExportTasks(self.wnd, tasks).run(modal=True)
 
+	def _on_menu_file_archive_finished(self, _evt):
+		""" Move old finished tasks to archive database. """
+		days = wx.GetNumberFromUser(_("Move to archive tasks completed more "
+				"than given number of days ago.\nArchived tasks are still "
+				"available in Finished, Trash and search."), _("Days:"),
+				_("Archive Finished Tasks"),
+				archive.get_archive_days() or archive.SUGGESTED_DAYS, 1, 10000,
+				self.wnd)
+		if days < 1:
+			return
+		self._appconfig.set('archive', 'days', days)
+		self._session.commit()
+		engine = self._session.get_bind()
+		archive.enable(engine)
+		moved = archive.move_finished(engine, days)
+		self._session.expire_all()
+		self._refresh_list()
+		mbox.message_box_info(self.wnd, _("Moved to archive %d tasks.") %
+				moved, _("Archive Finished Tasks"))
+
 	def _on_menu_file_archive_db(self, _evt):
 		"""Archive current database and create a new empty one."""
 		# Warning dialog
@@ -422,10 +462,7 @@ class FrameMain(BaseFrame):
 			"The current database will be backed up to:\n"
 			"{backup_dir}\n\n"
 			"Are you sure you want to continue?"
-		).format(backup_dir=os.path.join(
-			os.path.dirname(db.find_db_file(self._appconfig)),
-			"backups"
-		))
+		).format(backup_dir=backup.get_store().path)
 		
 		dlg = wx.MessageDialog(
 			self.wnd,
@@ -442,25 +479,22 @@ class FrameMain(BaseFrame):
 		try:
 			# Get current database path
 			db_file = db.find_db_file(self._appconfig)
-			backup_dir = os.path.join(os.path.dirname(db_file), "backups")
-			
-			# Create backup directory if it doesn't exist
-			if not os.path.exists(backup_dir):
-				os.makedirs(backup_dir)
-			
-			# Generate backup filename with timestamp
+
+			# Generate snapshot name with timestamp
 			timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-			backup_file = os.path.join(backup_dir, f"wxgtd_{timestamp}.db")
-			
+			snapshot = f"wxgtd_{timestamp}"
+
 			# Close current session
 			self._session.close()
+
+			# Copy database to backups store
+			backup.archive_database(snapshot)
 			
-			# Copy database to backup
-			import shutil
-			shutil.copy2(db_file, backup_file)
-			
-			# Delete current database
+			# Delete current database (with archive of finished tasks)
 			os.remove(db_file)
+			archive_file = archive.archive_filename(db_file)
+			if os.path.isfile(archive_file):
+				os.remove(archive_file)
 			
 			# Reinitialize database
 			db.connect(db_file)
@@ -472,7 +506,8 @@ class FrameMain(BaseFrame):
 			
 			# Success message
 			wx.MessageBox(
-				_("Database archived successfully!\n\nBackup saved to:\n{0}").format(backup_file),
+				_("Database archived successfully!\n\nBackup saved as "
+					"snapshot:\n{0}").format(snapshot),
 				_("Success"),
 				wx.OK | wx.ICON_INFORMATION,
 				self.wnd
@@ -506,6 +541,9 @@ class FrameMain(BaseFrame):
 	def _on_menu_task_quick(self, _evt):
 		quicktask.quick_task(self.wnd)
 
+	def _on_menu_task_paste_inbox(self, _evt):
+		quicktask.paste_tasks(self.wnd)
+
 	def _on_menu_task_delete(self, _evt):
 		self._delete_selected_task()
 
@@ -525,13 +563,13 @@ class FrameMain(BaseFrame):
 		self._toggle_task_complete()
 
 	def _on_menu_task_set_completed(self, _evt):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		if tasks_uuid:
 			TaskController(self.wnd, self._session,
 					None).tasks_set_completed_status(tasks_uuid, True)
 
 	def _on_menu_task_set_not_completed(self, _evt):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		if tasks_uuid:
 			TaskController(self.wnd, self._session,
 					None).tasks_set_completed_status(tasks_uuid, False)
@@ -540,12 +578,12 @@ class FrameMain(BaseFrame):
 		self._toggle_task_starred()
 
 	def _on_menu_task_set_starred(self, _evt):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		TaskController(self.wnd, self._session,
 				None).tasks_set_starred_flag(tasks_uuid, True)
 
 	def _on_menu_task_set_not_starred(self, _evt):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		TaskController(self.wnd, self._session,
 				None).tasks_set_starred_flag(tasks_uuid, False)
 
@@ -556,7 +594,7 @@ class FrameMain(BaseFrame):
 					task_change_due_date():
 				task_logic.save_modified_task(task, self._session)
 		elif self._items_list_ctrl.selected_count > 1:
-			tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+			tasks_uuid = self._get_selected_tasks_uuid()
 			TaskController(self.wnd, self._session,
 					None).tasks_change_due_date(tasks_uuid)
 
@@ -567,7 +605,7 @@ class FrameMain(BaseFrame):
 					task_change_start_date()):
 				task_logic.save_modified_task(task, self._session)
 		elif self._items_list_ctrl.selected_count > 1:
-			tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+			tasks_uuid = self._get_selected_tasks_uuid()
 			TaskController(self.wnd, self._session,
 					None).tasks_change_start_date(tasks_uuid)
 
@@ -578,7 +616,7 @@ class FrameMain(BaseFrame):
 					task_change_remind():
 				task_logic.save_modified_task(task, self._session)
 		elif self._items_list_ctrl.selected_count > 1:
-			tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+			tasks_uuid = self._get_selected_tasks_uuid()
 			TaskController(self.wnd, self._session,
 					None).tasks_change_remind(tasks_uuid)
 
@@ -589,36 +627,36 @@ class FrameMain(BaseFrame):
 					task_change_hide_until():
 				task_logic.save_modified_task(task, self._session)
 		elif self._items_list_ctrl.selected_count > 1:
-			tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+			tasks_uuid = self._get_selected_tasks_uuid()
 			TaskController(self.wnd, self._session,
 					None).tasks_change_hide_until(tasks_uuid)
 
 	def _on_menu_task_change_context(self, _evt):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		if tasks_uuid:
 			TaskController(self.wnd, self._session,
 					None).tasks_change_context(tasks_uuid)
 
 	def _on_menu_task_change_folder(self, _evt):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		if tasks_uuid:
 			TaskController(self.wnd, self._session,
 					None).tasks_change_folder(tasks_uuid)
 
 	def _on_menu_task_change_project(self, _evt):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		if tasks_uuid:
 			TaskController(self.wnd, self._session,
 					None).tasks_change_project(tasks_uuid)
 
 	def _on_menu_task_change_status(self, _evt):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		if tasks_uuid:
 			TaskController(self.wnd, self._session,
 					None).tasks_change_status(tasks_uuid)
 
 	def _on_menu_task_change_priority(self, _evt):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		if tasks_uuid:
 			TaskController(self.wnd, self._session,
 					None).tasks_change_priority(tasks_uuid)
@@ -673,8 +711,14 @@ class FrameMain(BaseFrame):
 	def _on_items_list_activated(self, evt):
 		task_uuid, task_type = self._items_list_ctrl.items[self._items_list_ctrl.GetItemData(evt.GetIndex())]
 		if task_type == enums.TYPE_CHECKLIST:
+			archive.restore_tasks(self._session, [task_uuid])
 			task = OBJ.Task.get(self._session, uuid=task_uuid)
-			self._items_path.append(task)
+			if self._items_path and self._items_path[-1].uuid == task.parent_uuid:
+				self._items_path.append(task)
+			else:
+				# i.e. checklist found in flat list - show full path
+				self._items_path = hierarchy.get_ancestors(self._session,
+						task_uuid) + [task]
 			self._refresh_list()
 			return
 		if task_uuid:
@@ -721,7 +765,11 @@ class FrameMain(BaseFrame):
 			menu = self._tasks_popup_menu.build_trash_menu()
 		elif self._items_list_ctrl.selected_count == 1:
 			task_uuid = self._items_list_ctrl.get_item_uuid(None)
-			task = OBJ.Task.get(session=self._session, uuid=task_uuid)
+			# menu only show state of task; archived task is not restored
+			# until some action is chosen
+			task_cls = archive.entity(self._session, OBJ.Task)
+			task = self._session.query(task_cls).filter(
+					task_cls.uuid == task_uuid).first()
 			menu = self._tasks_popup_menu.build(task)
 		else:
 			menu = self._tasks_popup_menu.build_multi(set(
@@ -735,11 +783,26 @@ class FrameMain(BaseFrame):
 			self._refresh_list()
 
 	def _on_tasks_update(self, task_uuid=None):
+		if self._items_path and task_uuid in set(task.uuid for task
+				in self._items_path):
+			# task in path may be moved
+			self._update_items_path()
 		self._refresh_list()
 		# Refresh project list if on that tab
 		if self._main_notebook.GetSelection() == 1:  # Project List tab
 			self._project_list_panel.refresh(self._session)
 
+	def _update_items_path(self):
+		""" Rebuild path to current parent from database. """
+		parent_uuid = self._items_path[-1].uuid
+		self._session.expire_all()
+		parent = OBJ.Task.get(self._session, uuid=parent_uuid)
+		if parent is None or parent.deleted:
+			self._items_path = []
+			return
+		self._items_path = hierarchy.get_ancestors(self._session,
+				parent_uuid) + [parent]
+
 	def _on_notebook_page_changed(self, _evt):
 		""" Handle notebook tab change. """
 		if self._main_notebook.GetSelection() == 1:  # Project List tab
@@ -781,13 +844,34 @@ class FrameMain(BaseFrame):
 					_("Alarms"))
 
 	def _on_search(self, _evt):
-		self._refresh_list()
+		if self._all_loaded:
+			self._search_params = self._get_params_for_list()
+			self._live_search.search_now(self._search_params)
+
+	def _on_search_text(self, _evt):
+		if self._all_loaded:
+			self._search_params = self._get_params_for_list()
+			self._live_search.update(self._search_params)
 
 	def _on_search_cancel(self, _evt):
 		if self._searchbox.GetValue():
 			self._searchbox.SetValue('')
 			self._refresh_list()
 
+	def _on_search_results(self, tasks, first, _done):
+		""" Show next part of search-as-you-type results. """
+		params = self._search_params
+		active_only = params['finished'] is not None and not params['finished']
+		expand_projects = (params['_query_group'] == queries.QUERY_PROJECTS)
+		if first:
+			self._items_list_ctrl.fill(tasks, active_only=active_only,
+					session=self._session, expand_projects=expand_projects)
+		else:
+			self._items_list_ctrl.append(tasks, active_only=active_only,
+					session=self._session, expand_projects=expand_projects)
+		showed = self._items_list_ctrl.GetItemCount()
+		self.wnd.SetStatusText(ngettext("%d item", "%d items", showed) % showed, 1)
+
 	def _on_timer(self, _evt, _force_show=False):
 		if self._appconfig.get('notification', 'popup_alarms'):
 			_LOG.debug('FrameMain._on_timer: check reminders')
@@ -800,12 +884,15 @@ class FrameMain(BaseFrame):
 	def _refresh_list(self):
 		if not self._all_loaded:
 			return
+		# list is reloaded, so results of pending search are not needed
+		self._live_search.cancel()
 		wx.SetCursor(wx.HOURGLASS_CURSOR)
 		self.wnd.Freeze()
 		params = self._get_params_for_list()
 		_LOG.debug("FrameMain._refresh_list; params=%r", params)
 		self._session.expire_all()  # pylint: disable=E1101
-		tasks = OBJ.Task.select_by_filters(params, session=self._session)
+		tasks = taskrow.select(OBJ.Task.select_by_filters(params,
+				session=self._session))
 		active_only = params['finished'] is not None and not params['finished']
 		expand_projects = (params['_query_group'] == queries.QUERY_PROJECTS)
 		self._items_list_ctrl.fill(tasks, active_only=active_only, session=self._session, expand_projects=expand_projects)
@@ -844,6 +931,7 @@ class FrameMain(BaseFrame):
 				params['goals'] = [item_id]
 			elif category == "TAGS":
 				params['tags'] = [item_id]
+				params['tags_match'] = enums.TAGS_MATCH_ANY
 			
 			# Query count
 			count = OBJ.Task.select_by_filters(params, session=self._session).count()
@@ -862,7 +950,7 @@ class FrameMain(BaseFrame):
 			publisher.sendMessage('dict.update')
 
 	def _delete_selected_task(self, permanently=False):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		if len(tasks_uuid) == 1:
 			TaskController(self.wnd, self._session, tasks_uuid[0]).\
 					delete_task(permanently=permanently)
@@ -871,7 +959,7 @@ class FrameMain(BaseFrame):
 					None).delete_tasks(tasks_uuid, permanently=permanently)
 
 	def _undelete_selected_tasks(self):
-		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		tasks_uuid = self._get_selected_tasks_uuid()
 		if tasks_uuid:
 			TaskController(self.wnd, self._session,
 					None).undelete_tasks(tasks_uuid)
@@ -899,7 +987,7 @@ class FrameMain(BaseFrame):
 			TaskController.open_task(self.wnd, task_uuid)
 
 	def _clone_selected_task(self):
-		task_uuid = self._items_list_ctrl.get_item_uuid(None)
+		task_uuid = self._get_selected_task_uuid()
 		if not task_uuid:
 			return
 		if not mbox.message_box_question_yesno(self.wnd,
@@ -966,6 +1054,7 @@ class FrameMain(BaseFrame):
 				tmodel.checked_items_by_parent("STATUSES"))
 		queries.query_params_append_tags(params,
 				tmodel.checked_items_by_parent("TAGS"))
+		queries.query_params_set_tags_match(params, tmodel.get_tags_match())
 		return params
 
 	def _toggle_task_complete(self):
@@ -978,12 +1067,31 @@ class FrameMain(BaseFrame):
 		task_logic.toggle_task_complete(task.uuid, self._session)
 
 	def _toggle_task_starred(self):
-		task_uuid = self._items_list_ctrl.get_item_uuid(None)
+		task_uuid = self._get_selected_task_uuid()
 		task_logic.toggle_task_starred(task_uuid, self._session)
 
+	def _get_selected_task_uuid(self):
+		""" Return uuid of selected item.
+
+		Selected task is changed by caller, so when it is archived (finished
+		tasks, trash and search list show also archived tasks) it is moved
+		back to main database.
+		"""
+		task_uuid = self._items_list_ctrl.get_item_uuid(None)
+		if task_uuid:
+			archive.restore_tasks(self._session, [task_uuid])
+		return task_uuid
+
+	def _get_selected_tasks_uuid(self):
+		""" Return list of uuids of selected items; archived tasks are
+		restored (see `_get_selected_task_uuid`). """
+		tasks_uuid = list(self._items_list_ctrl.get_selected_items_uuid())
+		archive.restore_tasks(self._session, tasks_uuid)
+		return tasks_uuid
+
 	def _get_selected_task(self):
 		""" Return Task object for selected item. """
-		task_uuid = self._items_list_ctrl.get_item_uuid(None)
+		task_uuid = self._get_selected_task_uuid()
 		if task_uuid:
 			return OBJ.Task.get(self._session, uuid=task_uuid)
 		return None
@@ -191,11 +191,12 @@ class FrameNotebook(BaseFrame):
 						OBJ.NotebookPage.deleted.is_(None)).count()
 		cnt_str = ("  (%d)" % no_folder_cnt) if no_folder_cnt else ""
 		self._lb_folders.Append(_("No Folder") + cnt_str, None)
+		folders_cnt = OBJ.NotebookPage.count_by_folders(self._session)
 		for folder in (self._session.query(OBJ.Folder)
 				.filter(OBJ.Folder.deleted.is_(None))
 				.order_by(OBJ.Folder.title)):
 			title = folder.title
-			cnt = len(folder.notebook_pages)
+			cnt = folders_cnt.get(folder.uuid, 0)
 			if cnt > 0:
 				title += "  (" + str(cnt) + ")"
 			self._lb_folders.Append(title, folder.uuid)
@@ -19,6 +19,8 @@ import logging
 import wx
 
 from wxgtd.model import objects as OBJ
+from wxgtd.model import taskrow
+from wxgtd.model import livesearch
 from wxgtd.gui._base_frame import BaseFrame
 from wxgtd.gui import _tasklistctrl as TLC
 from wxgtd.gui.task_controller import TaskController
@@ -28,6 +30,11 @@ ngettext = gettext.ngettext  # pylint: disable=C0103
 _LOG = logging.getLogger(__name__)
 
 
+def _search_tasks(session, text, active_only):
+	""" Find tasks (in worker thread). """
+	return taskrow.iter_rows(OBJ.Task.search(text, active_only, session))
+
+
 class FrameSeach(BaseFrame):
 	""" Search tasks window class. """
 	# pylint: disable=R0903, R0902
@@ -54,6 +61,8 @@ class FrameSeach(BaseFrame):
 		self._searchbox.ShowCancelButton(True)
 		self._searchbox.ShowSearchButton(True)
 		self._session = OBJ.Session()
+		self._live_search = livesearch.LiveSearch(_search_tasks,
+				self._on_search_results, wx.CallAfter)
 
 	def _load_controls(self):
 		# pylint: disable=W0201
@@ -67,7 +76,7 @@ class FrameSeach(BaseFrame):
 
 	def _create_bindings(self, wnd):
 		BaseFrame._create_bindings(self, wnd)
-		#self.wnd.Bind(wx.EVT_TEXT, self._on_search, self._searchbox)
+		self.wnd.Bind(wx.EVT_TEXT, self._on_search_text, self._searchbox)
 		self.wnd.Bind(wx.EVT_SEARCHCTRL_SEARCH_BTN, self._on_search,
 				self._searchbox)
 		self.wnd.Bind(wx.EVT_SEARCHCTRL_CANCEL_BTN, self._on_search_cancel,
@@ -81,33 +90,56 @@ class FrameSeach(BaseFrame):
 
 	def _on_close(self, event):
 		FrameSeach._instance = None
+		self._live_search.close()
 		self._session.close()
 		BaseFrame._on_close(self, event)
 
 	def _on_search(self, _evt):
 		self._refresh_list()
 
+	def _on_search_text(self, _evt):
+		self._refresh_list(delay=True)
+
 	def _on_search_cancel(self, _evt):
 		if self._searchbox.GetValue():
 			self._searchbox.SetValue('')
 		self._refresh_list()
 
+	def _on_search_results(self, tasks, first, done):
+		""" Show next part of search results. """
+		active_only = not self['cb_search_finished'].GetValue()
+		if first:
+			self._items_list_ctrl.fill(tasks, active_only=active_only,
+					session=self._session)
+		else:
+			self._items_list_ctrl.append(tasks, active_only=active_only,
+					session=self._session)
+		self._show_count()
+		if done:
+			wx.SetCursor(wx.STANDARD_CURSOR)
+
 	def _on_items_list_activated(self, evt):
 		task_uuid, _task_type = self._items_list_ctrl.items[evt.GetData()]
 		if task_uuid:
 			TaskController.open_task(self.wnd, task_uuid)
 
-	def _refresh_list(self):
-		wx.SetCursor(wx.HOURGLASS_CURSOR)
-		self.wnd.Freeze()
+	def _refresh_list(self, delay=False):
+		""" Search tasks in background; `delay` - wait for next keystrokes.
+		"""
 		text = self._searchbox.GetValue()
-		tasks = []
 		active_only = not self['cb_search_finished'].GetValue()
-		if text:
-			tasks = OBJ.Task.search(text, active_only, self._session)
-		self._items_list_ctrl.fill(tasks, active_only=active_only)
+		if not text:
+			self._live_search.cancel()
+			self._items_list_ctrl.fill([], active_only=active_only)
+			self._show_count()
+			wx.SetCursor(wx.STANDARD_CURSOR)
+			return
+		if delay:
+			self._live_search.update(text, active_only)
+		else:
+			wx.SetCursor(wx.HOURGLASS_CURSOR)
+			self._live_search.search_now(text, active_only)
+
+	def _show_count(self):
 		showed = self._items_list_ctrl.GetItemCount()
 		self.wnd.SetStatusText(ngettext("%d item", "%d items", showed) % showed, 1)
-		self.wnd.Thaw()
-		wx.SetCursor(wx.STANDARD_CURSOR)
-
@@ -69,7 +69,8 @@ class NotebookController:
 			cls._controllers[page_uuid].open_dialog()
 			return
 		session = OBJ.Session()
-		page = OBJ.NotebookPage.get(session=session, uuid=page_uuid)
+		page = OBJ.NotebookPage.get(session=session, uuid=page_uuid,
+				with_notes=True)
 		contr = NotebookController(parent_wnd, session, page)
 		cls._controllers[page_uuid] = contr
 		contr.open_dialog()
@@ -22,6 +22,7 @@ import wx
 from wxgtd.wxtools.wxpub import publisher
 
 from wxgtd.logic import quicktask
+from wxgtd.gui import message_boxes as mbox
 
 _ = gettext.gettext
 _LOG = logging.getLogger(__name__)
@@ -36,3 +37,27 @@ def quick_task(parent_wnd=None):
 		publisher.sendMessage('task.update', task_uuid=task_uuid)
 	dlg.Destroy()
 
+
+
+def paste_tasks(parent_wnd=None):
+	""" Create tasks from text in clipboard - one task for each line
+	(see quicktask.parse_quicktask). """
+	text = ''
+	if wx.TheClipboard.Open():
+		data = wx.TextDataObject()
+		if wx.TheClipboard.GetData(data):
+			text = data.GetText()
+		wx.TheClipboard.Close()
+	lines = [line for line in text.splitlines() if line.strip()]
+	if not lines:
+		mbox.message_box_info(parent_wnd, _("Clipboard don't contain any "
+				"text."), _("wxGTD Quick Task"))
+		return
+	if not mbox.message_box_question_yesno(parent_wnd,
+			_("Add %d tasks into Inbox?") % len(lines)):
+		return
+	tasks_uuid = quicktask.import_quicktasks(lines)
+	_LOG.info("paste_tasks: created %d tasks", len(tasks_uuid))
+	# new contexts and tags may be created
+	publisher.sendMessage('dict.update')
+	publisher.sendMessage('task.update')
@@ -21,6 +21,7 @@ import wx
 from wxgtd.lib.appconfig import AppConfig
 from wxgtd.lib import datetimeutils as DTU
 from wxgtd.model import objects as OBJ
+from wxgtd.model import archive
 from wxgtd.model import enums
 from wxgtd.logic import task as task_logic
 
@@ -44,6 +45,7 @@ class TaskController:
 	def __init__(self, parent_wnd, session, task):
 		self._session = session or OBJ.Session()
 		if isinstance(task, str):
+			archive.restore_tasks(self._session, [task])
 			task = OBJ.Task.get(self._session, uuid=task)
 		self._task = task
 		self._parent_wnd = parent_wnd
@@ -89,7 +91,9 @@ class TaskController:
 			cls._controllers[task_uuid].open_dialog()
 			return
 		session = OBJ.Session()
-		task = OBJ.Task.get(session=session, uuid=task_uuid)
+		# archived task is moved back to main database for edit
+		archive.restore_tasks(session, [task_uuid])
+		task = OBJ.Task.get(session=session, uuid=task_uuid, with_notes=True)
 		contr = TaskController(parent_wnd, session, task)
 		cls._controllers[task_uuid] = contr
 		contr.open_dialog()
@@ -133,7 +137,10 @@ class TaskController:
 		elif not mbox.message_box_delete_confirm(self.wnd, item_type,
 				_("%s will be moved to trash.") % enums.TYPES.get(self._task.type, _("Task"))):
 			return False
-		return task_logic.delete_task(self._task, self._session, permanently)
+		# subtasks are removed with task (as by orm cascade), but by bulk
+		# statements; moving to trash mark only given task
+		return task_logic.delete_task(self._task, self._session, permanently,
+				with_subtasks=permanently)
 
 	def delete_tasks(self, tasks_uuid, permanently=False):
 		""" Delete multiple task with confirmation.
@@ -144,7 +151,8 @@ class TaskController:
 		"""
 		if not mbox.message_box_delete_confirm(self.wnd, _("tasks")):
 			return False
-		return task_logic.delete_task(tasks_uuid, self._session, permanently)
+		return task_logic.delete_task(tasks_uuid, self._session, permanently,
+				with_subtasks=permanently)
 
 	def undelete_task(self):
 		""" UnDelete task with confirmation.
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+""" Size-bounded LRU cache.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import collections
+import threading
+
+
+class LRUCache(object):
+	""" Least-recently-used cache bounded by total size of values.
+
+	Args:
+		max_size: maximal sum of values sizes
+		sizeof: function returning size of value; default each value has
+			size 1 (cache is bounded by number of items).
+	"""
+
+	def __init__(self, max_size, sizeof=None):
+		self.max_size = max_size
+		self._sizeof = sizeof or (lambda _value: 1)
+		self._items = collections.OrderedDict()
+		self._lock = threading.Lock()
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+
+	def __len__(self):
+		return len(self._items)
+
+	def __contains__(self, key):
+		return key in self._items
+
+	def get(self, key, default=None):
+		""" Get value for `key` and mark it as recently used. """
+		with self._lock:
+			item = self._items.get(key)
+			if item is None:
+				self.misses += 1
+				return default
+			self._items.move_to_end(key)
+			self.hits += 1
+			return item[0]
+
+	def put(self, key, value):
+		""" Store value; evict least recently used values when cache is full.
+
+		Values bigger than whole cache are not stored.
+		"""
+		size = self._sizeof(value)
+		with self._lock:
+			old = self._items.pop(key, None)
+			if old is not None:
+				self.size -= old[1]
+			if size > self.max_size:
+				return
+			self._items[key] = (value, size)
+			self.size += size
+			while self.size > self.max_size:
+				_key, (_value, old_size) = self._items.popitem(last=False)
+				self.size -= old_size
+
+	def clear(self):
+		""" Remove all values. """
+		with self._lock:
+			self._items.clear()
+			self.size = 0
@@ -21,18 +21,69 @@ __version__ = "2025-12-03"
 
 import time
 import datetime
+import functools
 
 from dateutil import tz
 
 TZ_UTC = tz.tzutc()
 TZ_LOCAL = tz.tzlocal()
 
+_EPOCH = datetime.datetime(1970, 1, 1)
+_ONE_SECOND = datetime.timedelta(seconds=1)
+
 
 def datetime_utc2local(date_time):
 	""" Convert datetime object from UTC to local timezone. """
 	return date_time.replace(tzinfo=TZ_UTC).astimezone(TZ_LOCAL)
 
 
+def _local_utc_offset(seconds):
+	return datetime.timedelta(seconds=time.localtime(seconds).tm_gmtoff)
+
+
+@functools.lru_cache(maxsize=4096)
+def _hour_utc_offset(hour_start):
+	""" Get local time offset valid for whole UTC hour starting at
+	`hour_start` or None when offset change within this hour. """
+	seconds = (hour_start - _EPOCH) // _ONE_SECOND
+	offset = _local_utc_offset(seconds)
+	if offset != _local_utc_offset(seconds + 3599):
+		return None
+	return offset
+
+
+def utc2local_offset(date_time):
+	""" Get offset of local timezone for naive UTC datetime.
+
+	Offsets are cached per UTC hour; for hours with DST transition offset
+	is computed for exact time.
+	"""
+	if date_time.tzinfo is not None:
+		date_time = date_time.astimezone(TZ_UTC).replace(tzinfo=None)
+	try:
+		offset = _hour_utc_offset(date_time.replace(minute=0, second=0,
+				microsecond=0))
+		if offset is None:
+			offset = _local_utc_offset((date_time - _EPOCH) // _ONE_SECOND)
+		return offset
+	except (OverflowError, OSError, ValueError):
+		# out of range of platform time functions
+		return datetime_utc2local(date_time).utcoffset()
+
+
+def datetime_utc2local_naive(date_time):
+	""" Convert naive UTC datetime to naive local datetime.
+
+	Faster equivalent of `datetime_utc2local(date_time).replace(tzinfo=None)`.
+	"""
+	return date_time + utc2local_offset(date_time)
+
+
+def clear_cache():
+	""" Clear cached timezone offsets (i.e. after timezone change). """
+	_hour_utc_offset.cache_clear()
+
+
 def datetime_local2utc(date_time):
 	""" Convert datetime object from local to UTC timezone. """
 	return date_time.replace(tzinfo=TZ_LOCAL).astimezone(TZ_UTC).replace(
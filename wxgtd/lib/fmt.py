@@ -16,12 +16,16 @@ __version__ = "2025-12-03"
 import time
 import logging
 import datetime
+import functools
 
 from wxgtd.lib import datetimeutils as DTU
 
 
 _LOG = logging.getLogger(__name__)
 
+# max number of memoized formatted timestamps
+_MEMO_SIZE = 16384
+
 
 def format_timestamp(timestamp, show_time=True, datetime_in_utc=True):
 	""" Format date time object.
@@ -35,12 +39,42 @@ def format_timestamp(timestamp, show_time=True, datetime_in_utc=True):
 	if isinstance(timestamp, str):
 		return timestamp
 	if isinstance(timestamp, datetime.datetime):
-		if datetime_in_utc:
-			timestamp = DTU.datetime_utc2local(timestamp)
-		if show_time:
-			return timestamp.strftime("%x %X")
-		return timestamp.strftime("%x")
+		return _format_datetime(timestamp, bool(show_time),
+				bool(datetime_in_utc))
 	if show_time:
 		return time.strftime("%x %X", time.localtime(timestamp))
 	return time.strftime("%x", time.localtime(timestamp))
 
+
+def format_timestamps(timestamps, show_time=True, datetime_in_utc=True):
+	""" Format many date time objects (i.e. whole column).
+
+	Args:
+		timestamps: list of date/time as str, datetime or number.
+		show_time: boolean for all values or list of flags for each value.
+	Returns:
+		list of formatted values
+	"""
+	if isinstance(show_time, (bool, int)):
+		return [format_timestamp(timestamp, show_time, datetime_in_utc)
+				for timestamp in timestamps]
+	return [format_timestamp(timestamp, stime, datetime_in_utc)
+			for timestamp, stime in zip(timestamps, show_time)]
+
+
+@functools.lru_cache(maxsize=_MEMO_SIZE)
+def _format_datetime(timestamp, show_time, datetime_in_utc):
+	if datetime_in_utc:
+		if timestamp.tzinfo is None:
+			timestamp = DTU.datetime_utc2local_naive(timestamp)
+		else:
+			timestamp = DTU.datetime_utc2local(timestamp)
+	if show_time:
+		return timestamp.strftime("%x %X")
+	return timestamp.strftime("%x")
+
+
+def clear_cache():
+	""" Clear memoized values (i.e. after locale or timezone change). """
+	_format_datetime.cache_clear()
+	DTU.clear_cache()
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+""" JSON encoding and decoding with fastest available backend.
+
+Backends in order of preference: orjson, stdlib json. Both encoder and
+decoder work on UTF-8 encoded bytes, so callers don't need extra
+`.encode`/`.decode` copies. `SectionDecoder` decodes top-level members of
+big document (sync file) as soon as they are read.
+
+Run `python -m wxgtd.lib.jsoncodec` to compare backends on generated
+sync-file-like data.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import re
+import json
+import time
+import logging
+
+try:
+	import orjson
+except ImportError:
+	orjson = None  # pylint: disable=C0103
+
+_LOG = logging.getLogger(__name__)
+
+
+def _std_dumps(obj):
+	return json.dumps(obj, ensure_ascii=False,
+			separators=(',', ':')).encode("UTF-8")
+
+
+def _std_loads(data):
+	# json.loads detects encoding of bytes itself
+	return json.loads(data)
+
+
+def _orjson_dumps(obj):
+	try:
+		return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+	except TypeError:
+		# i.e. integers out of 64bit range
+		return _std_dumps(obj)
+
+
+def _orjson_loads(data):
+	return orjson.loads(data)
+
+
+# name -> (dumps, loads)
+BACKENDS = {'json': (_std_dumps, _std_loads)}
+if orjson is not None:
+	BACKENDS['orjson'] = (_orjson_dumps, _orjson_loads)
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+_DUMPS, _LOADS = BACKENDS[BACKEND]
+
+
+def dumps(obj):
+	""" Encode `obj` to JSON.
+
+	Returns:
+		UTF-8 encoded bytes.
+	"""
+	return _DUMPS(obj)
+
+
+def loads(data):
+	""" Decode JSON from bytes, bytearray, memoryview or str. """
+	return _LOADS(data)
+
+
+# run of data without brackets (may contain complete strings)
+_FLAT = rb'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*'
+# run of data with complete objects/arrays without nested brackets (i.e.
+# list of tasks)
+_SKIP = re.compile(_FLAT + rb'(?:(?:\{' + _FLAT + rb'\}|\[' + _FLAT
+		+ rb'\])' + _FLAT + rb')*')
+# tokens of top-level object
+_MEMBER_TOKENS = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[,:{}\[\]]|"')
+_SPACES = re.compile(rb'\s*')
+_CLOSING = {b'{': b'}', b'[': b']'}
+
+
+class SectionDecoder(object):
+	""" Incremental decoder of JSON object fed by chunks of data (i.e. read
+	from zip file).
+
+	Top-level members are decoded (by selected backend) as soon as they are
+	complete, so consumer may process sections while rest of file is read.
+
+	End of array/object value is first guessed by nearest closing bracket
+	followed by separator (in sync file it is end of section) and checked
+	by decoding; when guess is wrong, value is scanned for brackets outside
+	strings.
+	"""
+
+	def __init__(self):
+		self._buffer = bytearray()
+		# position of first not scanned byte in buffer
+		self._pos = 0
+		# nesting level; 1 - top-level object
+		self._depth = 0
+		self._key = None
+		self._value_start = None
+		# closing bracket searched for current value (fast path)
+		self._closing = None
+		self._finished = False
+
+	def feed(self, chunk):
+		""" Add chunk of encoded data.
+
+		Returns:
+			list of (key, value) of top-level members completed by chunk.
+		"""
+		self._buffer += chunk
+		sections = []
+		self._scan(sections)
+		return sections
+
+	def finish(self):
+		""" Check that whole document was fed and release buffer.
+
+		Returns:
+			list of (key, value) of remaining members (always empty for
+			valid document).
+
+		Raises:
+			ValueError: document is incomplete or invalid.
+		"""
+		sections = []
+		self._scan(sections)
+		if not self._finished or self._buffer[self._pos:].strip():
+			raise ValueError("incomplete or invalid JSON object")
+		self._buffer = bytearray()
+		self._pos = 0
+		return sections
+
+	def _scan(self, sections):
+		buf = self._buffer
+		while True:
+			if self._closing is not None:
+				if not self._find_value_end(sections):
+					break
+			elif self._depth == 1:
+				if not self._scan_members(sections):
+					break
+			elif self._depth > 1:
+				if not self._scan_value():
+					break
+			else:
+				end = _SPACES.match(buf, self._pos).end()
+				if end == len(buf):
+					self._pos = end
+					break
+				if self._finished:
+					raise ValueError("extra data after JSON object")
+				if buf[end:end + 1] != b'{':
+					raise ValueError("JSON object expected")
+				self._pos = end + 1
+				self._depth = 1
+		self._release()
+
+	def _scan_members(self, sections):
+		""" Parse keys and separators of top-level object. """
+		buf = self._buffer
+		for match in _MEMBER_TOKENS.finditer(buf, self._pos):
+			token = match.group()
+			if token == b'"':
+				# string not complete yet
+				self._pos = match.start()
+				return False
+			self._pos = match.end()
+			if token == b':':
+				self._value_start = match.end()
+			elif token == b',':
+				self._end_member(match.start(), sections)
+			elif token == b'}':
+				self._end_member(match.start(), sections)
+				self._depth = 0
+				self._finished = True
+				return True
+			elif token in _CLOSING:
+				if self._value_start is None:
+					raise ValueError("missing key in JSON object")
+				self._closing = _CLOSING[token]
+				return True
+			elif token == b']':
+				raise ValueError("unexpected ']' in JSON object")
+			elif self._value_start is None:
+				self._key = _LOADS(token)
+		self._pos = len(buf)
+		return False
+
+	def _find_value_end(self, sections):
+		""" Fast path: find end of array/object value by closing bracket. """
+		buf = self._buffer
+		while True:
+			idx = buf.find(self._closing, self._pos)
+			if idx < 0:
+				self._pos = len(buf)
+				return False
+			end = _SPACES.match(buf, idx + 1).end()
+			if end == len(buf):
+				# separator not read yet
+				self._pos = idx
+				return False
+			if buf[end] in b',}':
+				try:
+					value = _LOADS(buf[self._value_start:idx + 1])
+				except ValueError:
+					# bracket in nested value or string
+					break
+				sections.append((self._key, value))
+				self._value_start = None
+				self._closing = None
+				self._pos = idx + 1
+				return True
+			self._pos = idx + 1
+		# scan whole value
+		self._closing = None
+		self._depth = 2
+		self._pos = _SPACES.match(buf, self._value_start).end() + 1
+		return True
+
+	def _scan_value(self):
+		""" Find end of array/object value by counting brackets. """
+		buf = self._buffer
+		size = len(buf)
+		pos = self._pos
+		while self._depth > 1:
+			end = _SKIP.match(buf, pos).end()
+			if end == size or buf[end] == 0x22:  # '"'
+				# wait for more data (i.e. rest of string)
+				self._pos = end
+				return False
+			pos = end + 1
+			self._depth += 1 if buf[end] in b'{[' else -1
+		# value is completed by following separator
+		self._pos = pos
+		return True
+
+	def _end_member(self, end, sections):
+		if self._value_start is not None:
+			sections.append((self._key,
+					_LOADS(self._buffer[self._value_start:end])))
+			self._value_start = None
+
+	def _release(self):
+		""" Remove decoded data from buffer. """
+		consumed = self._pos if self._value_start is None \
+				else self._value_start
+		if consumed:
+			del self._buffer[:consumed]
+			self._pos -= consumed
+			if self._value_start is not None:
+				self._value_start -= consumed
+
+
+def _sample_data(tasks=5000):
+	""" Generate data with structure of sync file. """
+	timestamp = "2026-01-01T10:00:00.000Z"
+	data = {"version": 3,
+			"FOLDER": [{"ID": idx, "UUID": "f%032d" % idx, "PARENT": 0,
+				"TITLE": "Folder %d" % idx, "CREATED": timestamp,
+				"MODIFIED": timestamp, "COLOR": -16776961, "VISIBLE": 1}
+				for idx in range(1, 51)],
+			"TASK": [{"ID": idx, "UUID": "t%032d" % idx, "PARENT": idx // 10,
+				"TITLE": "Task %d - zadanie żółte" % idx,
+				"NOTE": "Note line\n" * (idx % 5), "CREATED": timestamp,
+				"MODIFIED": timestamp, "DUE_DATE": timestamp,
+				"FOLDER": idx % 50, "CONTEXT": idx % 20, "PRIORITY": idx % 4,
+				"STARRED": idx % 2, "COMPLETED": "", "TYPE": 0}
+				for idx in range(1, tasks + 1)],
+			"TASK_TAG": [{"TASK": idx, "TAG": idx % 10, "CREATED": timestamp,
+				"MODIFIED": timestamp} for idx in range(1, tasks + 1)]}
+	return data
+
+
+def benchmark(tasks=5000, repeat=5):
+	""" Measure encode and decode time of each available backend.
+
+	Returns:
+		dict backend name -> (best encode time, best decode time, size)
+	"""
+	data = _sample_data(tasks)
+	result = {}
+	for name, (enc, dec) in sorted(BACKENDS.items()):
+		enc_times, dec_times = [], []
+		for _idx in range(repeat):
+			start = time.perf_counter()
+			encoded = enc(data)
+			enc_times.append(time.perf_counter() - start)
+			start = time.perf_counter()
+			dec(encoded)
+			dec_times.append(time.perf_counter() - start)
+		result[name] = (min(enc_times), min(dec_times), len(encoded))
+	return result
+
+
+def main():
+	print("selected backend:", BACKEND)
+	for name, (enc, dec, size) in sorted(benchmark().items()):
+		print("%-8s encode %7.2fms  decode %7.2fms  size %d" % (name,
+				enc * 1000, dec * 1000, size))
+
+
+if __name__ == '__main__':
+	main()
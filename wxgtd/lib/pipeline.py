@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+""" Helpers for running long operations as pipeline of stages.
+
+Stages run in worker threads and pass data through bounded queues, so
+producer can't run too far ahead of consumer. Wall time of each stage is
+collected by `StageTimer`.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import time
+import queue
+import logging
+import gettext
+import threading
+import contextlib
+import collections
+
+_LOG = logging.getLogger(__name__)
+_ = gettext.gettext
+
+# marker of end of data in queue
+_END = object()
+
+
+class StageTimer(object):
+	""" Collect wall time of named stages.
+
+	Stages may run concurrently (in different threads), so sum of stages
+	time may be greater than total time.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._start = time.perf_counter()
+		self.timings = collections.OrderedDict()
+
+	@contextlib.contextmanager
+	def stage(self, name):
+		""" Context manager measuring time of stage `name`. """
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.add(name, time.perf_counter() - start)
+
+	def add(self, name, duration):
+		""" Add `duration` (in seconds) to time of stage `name`. """
+		with self._lock:
+			self.timings[name] = self.timings.get(name, 0.0) + duration
+
+	def timed(self, name, func):
+		""" Wrap `func` so each call is counted as stage `name`. """
+		def wrapper(*args, **kwargs):
+			with self.stage(name):
+				return func(*args, **kwargs)
+		return wrapper
+
+	def total(self):
+		""" Time since creation of timer. """
+		return time.perf_counter() - self._start
+
+	def summary(self):
+		""" Get stages timing as human readable string. """
+		with self._lock:
+			stages = ", ".join("%s %.2fs" % item
+					for item in self.timings.items())
+		return "%s; total %.2fs" % (stages or "-", self.total())
+
+	def report(self, notify_cb, progress=100):
+		""" Send timing summary by `notify_cb` and log it. """
+		summary = self.summary()
+		_LOG.info("timing: %s", summary)
+		notify_cb(progress, _("Timing: %s") % summary)
+
+
+class BackgroundIterator(object):
+	""" Iterate over `iterable` in worker thread.
+
+	Items are passed through queue that holds at most `maxsize` items; worker
+	blocks when queue is full. Exception raised by `iterable` is re-raised
+	in consumer. Worker starts immediately after object creation.
+
+	Args:
+		iterable: source of items
+		maxsize: number of items that may be produced ahead of consumer
+		name: name of worker thread
+	"""
+
+	def __init__(self, iterable, maxsize=2, name="pipeline"):
+		self._queue = queue.Queue(maxsize)
+		self._stopped = threading.Event()
+		self._finished = False
+		self._thread = threading.Thread(target=self._worker,
+				args=(iterable, ), name=name)
+		self._thread.daemon = True
+		self._thread.start()
+
+	def _put(self, item):
+		while not self._stopped.is_set():
+			try:
+				self._queue.put(item, timeout=0.1)
+				return True
+			except queue.Full:
+				continue
+		return False
+
+	def _worker(self, iterable):
+		try:
+			for item in iterable:
+				if not self._put((item, None)):
+					return
+		except Exception as err:  # pylint: disable=W0703
+			self._put((_END, err))
+			return
+		self._put((_END, None))
+
+	def __iter__(self):
+		return self
+
+	def __next__(self):
+		if self._finished:
+			raise StopIteration
+		item, error = self._queue.get()
+		if item is _END:
+			self._finished = True
+			self._thread.join()
+			if error is not None:
+				raise error
+			raise StopIteration
+		return item
+
+	def close(self):
+		""" Stop worker and wait for it. """
+		self._finished = True
+		self._stopped.set()
+		self._thread.join()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+		return False
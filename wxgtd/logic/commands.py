@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+""" Commands executed on request of other processes (i.e. CLI) by running
+application.
+
+All functions accept only json-serializable arguments and return
+json-serializable results.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import io
+import gettext
+import logging
+
+from wxgtd.lib import appconfig
+from wxgtd.model import objects as OBJ
+from wxgtd.model import queries
+from wxgtd.model import exporter
+from wxgtd.logic import quicktask as quicktask_logic
+
+_ = gettext.gettext
+_LOG = logging.getLogger(__name__)
+
+
+def quick_task(title):
+	""" Create quick task.
+
+	Returns:
+		UUID of created task.
+	"""
+	session = OBJ.Session()
+	try:
+		return quicktask_logic.create_quicktask(title, session)
+	finally:
+		session.close()
+
+
+def import_tasks(lines):
+	""" Create tasks from lines in quick task format (see
+	quicktask.parse_quicktask).
+
+	Returns:
+		List of UUID of created tasks.
+	"""
+	session = OBJ.Session()
+	try:
+		return quicktask_logic.import_quicktasks(lines, session)
+	finally:
+		session.close()
+
+
+def list_tasks(query_group, options=0, parent=None, search='', verbose=0,
+		output_csv=False, output_format=None, with_notes=None):
+	""" Select tasks and format it like `wxgtd_cli` do.
+
+	Args:
+		query_group: one of queries.QUERY_*
+		options: queries.OPT_* flags
+		parent: optional parent UUID
+		search: text to search
+		verbose: details level
+		output_csv: format result as csv instead of text
+		output_format: one of exporter.EXPORT_FORMATS; overwrite `output_csv`
+		with_notes: export notes; by default depend on format and verbose
+
+	Returns:
+		Formatted list of tasks.
+	"""
+	output_format = output_format or ('csv' if output_csv else 'text')
+	if output_format not in exporter.EXPORT_FORMATS:
+		raise ValueError(_("Unknown output format: %s") % output_format)
+	params = queries.build_query_params(query_group, options, parent,
+			search or '')
+	session = OBJ.Session()
+	try:
+		tasks = OBJ.Task.select_by_filters(params, session=session)
+		output = io.StringIO()
+		exporter.export_tasks(tasks, output_format, verbose, output=output,
+				with_notes=with_notes)
+		return output.getvalue()
+	finally:
+		session.close()
+
+
+def sync(load_only=False):
+	""" Synchronize data using configured method (Dropbox or sync file).
+
+	Returns:
+		List of progress messages.
+	"""
+	from wxgtd.model import sync as sync_mod
+	from wxgtd.model import dbsync
+	messages = []
+
+	def notify_cb(_progress, msg):
+		messages.append(msg)
+
+	appcfg = appconfig.AppConfig()
+	if appcfg.get('sync', 'use_dropbox') and dbsync.is_available():
+		dbsync.sync(load_only, notify_cb=notify_cb)
+	else:
+		last_sync_file = appcfg.get('files', 'last_sync_file')
+		if not last_sync_file:
+			raise sync_mod.OtherSyncError(_("Sync file is not configured."))
+		sync_mod.sync(last_sync_file, load_only, notify_cb=notify_cb)
+	return messages
+
+
+# command name -> (function, pubsub topics sent after successful execution)
+COMMANDS = {
+	'task.quick': (quick_task, ('task.update', )),
+	'task.import': (import_tasks, ('task.update', 'dict.update')),
+	'task.list': (list_tasks, ()),
+	'sync': (sync, ('task.update', 'dict.update')),
+}
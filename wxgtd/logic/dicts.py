@@ -20,11 +20,22 @@ import datetime
 
 from wxgtd.wxtools.wxpub import publisher
 from wxgtd.model import objects as obj
+from wxgtd.model import dictregistry
 
 
 _LOG = logging.getLogger(__name__)
 
 
+def _find_item(cls, title, session):
+	""" Find item by exact title (also deleted) in dictionary registry or in
+	objects added to session and not yet committed. """
+	for item in session.new:
+		if isinstance(item, cls) and item.title == title:
+			return item
+	uuid = dictregistry.for_class(cls).find(title, session, exact=True)
+	return cls.get(session, uuid=uuid) if uuid else None
+
+
 def find_or_create_goal(title, session):
 	""" Find goal with given title, if not found - create it.
 
@@ -35,7 +46,7 @@ def find_or_create_goal(title, session):
 	Returns:
 		Goal object
 	"""
-	goal = obj.Goal.get(session, title=title)
+	goal = _find_item(obj.Goal, title, session)
 	if not goal:
 		_LOG.debug('find_or_create_goal: creating goal from title=%r',
 				title)
@@ -55,7 +66,7 @@ def find_or_create_folder(title, session):
 	Returns:
 		Folder object
 	"""
-	folder = obj.Folder.get(session, title=title)
+	folder = _find_item(obj.Folder, title, session)
 	if not folder:
 		_LOG.debug('find_or_create_folder: creating folder from title=%r',
 				title)
@@ -75,7 +86,7 @@ def find_or_create_context(title, session):
 	Returns:
 		Context object
 	"""
-	context = obj.Context.get(session, title=title)
+	context = _find_item(obj.Context, title, session)
 	if not context:
 		_LOG.debug('find_or_create_context: creating context from title=%r',
 				title)
@@ -16,16 +16,19 @@ __version__ = "2025-12-03"
 
 import gettext
 import logging
+import datetime
 
+from wxgtd.lib import datetimeutils as DTU
 from wxgtd.model import objects as OBJ
+from wxgtd.model import dictregistry
 
 _ = gettext.gettext
 _LOG = logging.getLogger(__name__)
 
 
-def create_quicktask(title):
+def create_quicktask(title, session=None):
 	""" Create quick task from given title. """
-	session = OBJ.Session()
+	session = session or OBJ.Session()
 	task = OBJ.Task(title=title, priority=-1)
 	session.add(task)
 	session.commit()
@@ -33,3 +36,169 @@ def create_quicktask(title):
 	_LOG.info("create_quicktask: ok")
 	return uuid
 
+
+
+# priority tokens (after "!") -> task priority
+_PRIORITIES = {'0': 0, '1': 1, '2': 2, '3': 3,
+		'low': 0, 'med': 1, 'high': 2, 'top': 3}
+_WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday',
+		'saturday', 'sunday')
+
+
+def _parse_due(text, today):
+	""" Parse due date token (without "^").
+
+	Accepted: today, tomorrow, +<days>, mon..sun (next such day),
+	YYYY-MM-DD and YYYY-MM-DDTHH:MM (local time).
+
+	Returns:
+		(due date in UTC, time set flag) or None when text is invalid.
+	"""
+	text = text.lower()
+	date = None
+	time_set = 0
+	if text == 'today':
+		date = today
+	elif text == 'tomorrow':
+		date = today + datetime.timedelta(days=1)
+	elif text[:1] == '+' and text[1:].isdigit():
+		date = today + datetime.timedelta(days=int(text[1:]))
+	elif len(text) >= 3 and text.isalpha():
+		for weekday, name in enumerate(_WEEKDAYS):
+			if name.startswith(text):
+				days = (weekday - today.weekday() - 1) % 7 + 1
+				date = today + datetime.timedelta(days=days)
+				break
+	else:
+		for date_fmt, with_time in (('%Y-%m-%d', 0), ('%Y-%m-%dt%H:%M', 1)):
+			try:
+				date = datetime.datetime.strptime(text, date_fmt)
+			except ValueError:
+				continue
+			time_set = with_time
+			break
+	if date is None:
+		return None
+	return DTU.datetime_local2utc(date), time_set
+
+
+def parse_quicktask(line, today=None):
+	""" Parse one line of inbox import.
+
+	Words starting with "@" set context, "#" - add tag, "!" - priority
+	(0-3 or low/med/high/top), "^" - due date (see `_parse_due`). Other
+	words (also not recognized tokens) make task title.
+
+	Args:
+		line: text to parse
+		today: local date (datetime at midnight) used for relative dates
+
+	Returns:
+		dict with keys: title, context, tags, priority, due_date,
+		due_time_set; None for line without title.
+	"""
+	if today is None:
+		today = datetime.datetime.combine(datetime.date.today(),
+				datetime.time())
+	result = {'title': None, 'context': None, 'tags': [], 'priority': -1,
+			'due_date': None, 'due_time_set': 0}
+	words = []
+	for word in line.split():
+		prefix, value = word[:1], word[1:]
+		due = _parse_due(value, today) if prefix == '^' else None
+		if prefix == '@' and value:
+			result['context'] = value
+		elif prefix == '#' and value:
+			if value.lower() not in (tag.lower() for tag in result['tags']):
+				result['tags'].append(value)
+		elif prefix == '!' and value.lower() in _PRIORITIES:
+			result['priority'] = _PRIORITIES[value.lower()]
+		elif due:
+			result['due_date'], result['due_time_set'] = due
+		else:
+			words.append(word)
+	if not words:
+		return None
+	result['title'] = ' '.join(words)
+	return result
+
+
+def _resolve_dict_items(session, objclass, titles):
+	""" Find uuids of dictionary items by title (case insensitive); create
+	missing items.
+
+	Returns:
+		dict lowercase title -> uuid
+	"""
+	if not titles:
+		return {}
+	registry = dictregistry.for_class(objclass)
+	found = {}
+	for title in titles:
+		key = title.lower()
+		if key in found:
+			continue
+		found[key] = registry.find(title, session)
+		if not found[key]:
+			_LOG.info("import_quicktasks: new %s %r", objclass.__name__,
+					title)
+			obj = objclass(uuid=OBJ.generate_uuid(), title=title)
+			session.add(obj)
+			found[key] = obj.uuid
+	return found
+
+
+def import_quicktasks(lines, session=None):
+	""" Create many quick tasks in one transaction.
+
+	Each not empty line is parsed by `parse_quicktask`. Contexts and tags are
+	resolved by dictionary registry; missing ones are created once.
+
+	Args:
+		lines: iterable of strings (i.e. opened file)
+		session: optional SqlAlchemy session; when not given, new session is
+			created and closed
+
+	Returns:
+		list of created tasks uuid
+	"""
+	parsed = [item for item in map(parse_quicktask, lines) if item]
+	if not parsed:
+		return []
+	if session is None:
+		session = OBJ.Session()
+		try:
+			return _create_tasks(parsed, session)
+		finally:
+			session.close()
+	return _create_tasks(parsed, session)
+
+
+def _create_tasks(parsed, session):
+	""" Create tasks from parsed lines and commit session.
+
+	Returns:
+		list of created tasks uuid
+	"""
+	contexts = _resolve_dict_items(session, OBJ.Context,
+			set(item['context'] for item in parsed if item['context']))
+	tags = _resolve_dict_items(session, OBJ.Tag,
+			set(tag for item in parsed for tag in item['tags']))
+	now = datetime.datetime.utcnow()
+	objs = []
+	for item in parsed:
+		task = OBJ.Task(uuid=OBJ.generate_uuid(), title=item['title'],
+				priority=item['priority'], due_date=item['due_date'],
+				due_time_set=item['due_time_set'], created=now,
+				modified=now)
+		if item['context']:
+			task.context_uuid = contexts[item['context'].lower()]
+		objs.append(task)
+		# tags by uuid - Tag objects are not loaded
+		objs.extend(OBJ.TaskTag(task_uuid=task.uuid,
+				tag_uuid=tags[tag.lower()], created=now, modified=now)
+				for tag in item['tags'])
+	session.add_all(objs)
+	session.commit()
+	_LOG.info("import_quicktasks: created %d tasks", len(parsed))
+	return [item.uuid for item in objs if isinstance(item, OBJ.Task)]
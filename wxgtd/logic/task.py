@@ -14,17 +14,23 @@ __copyright__ = """Copyright (c) Karol Będkowski, 2013
 Copyright (c) Johan Andersson, 2025"""
 __version__ = "2025-12-03"
 
-import datetime
+import re
 import logging
 import gettext
-import re
+import datetime
+import itertools
+import collections
 
 from dateutil.relativedelta import relativedelta
+from sqlalchemy import bindparam, event, func, inspect, orm, select
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 
 from wxgtd.wxtools.wxpub import publisher
 
 from wxgtd.model import objects as OBJ
 from wxgtd.model import enums
+from wxgtd.model import hierarchy
 
 _LOG = logging.getLogger(__name__)
 _ = gettext.gettext
@@ -54,6 +60,42 @@ def alarm_pattern_to_time(pattern):
 	return offset
 
 
+def _parse_alarm_pattern(alarm_pattern):
+	""" Get offset for alarm pattern "x minute(s)|hour(s)|day(s)" or None
+	when pattern is invalid. """
+	try:
+		return alarm_pattern_to_time(alarm_pattern)
+	except ValueError:
+		_LOG.warning('alarm_pattern: invalid pattern = %r', alarm_pattern)
+		return None
+
+
+def _compute_alarm(alarm_pattern, offset, alarm, due_date):
+	""" Compute alarm for task.
+
+	Args:
+		alarm_pattern: task alarm pattern
+		offset: offset for pattern (result of `_parse_alarm_pattern`)
+		alarm, due_date: current values of task fields
+
+	Returns:
+		(alarm, alarm_pattern)
+	"""
+	if not alarm_pattern:
+		if alarm == due_date:
+			alarm_pattern = 'due'
+		return alarm, alarm_pattern
+	if alarm_pattern == 'due':
+		return due_date, alarm_pattern
+	if offset and due_date:
+		return due_date - offset, alarm_pattern
+	return alarm, alarm_pattern
+
+
+def _is_offset_alarm_pattern(alarm_pattern):
+	return bool(alarm_pattern) and alarm_pattern != 'due'
+
+
 def update_task_alarm(task):
 	""" Update Task alarm field according to values other fields.
 
@@ -69,66 +111,44 @@ def update_task_alarm(task):
 	"""
 	_LOG.debug('update_task_alarm: %r', task)
 	alarm_pattern = task.alarm_pattern
-	if not alarm_pattern:
-		if task.alarm == task.due_date:
-			task.alarm_pattern = 'due'
-		return
-	if alarm_pattern == 'due':
-		task.alarm = task.due_date
-		return
-	offset = alarm_pattern_to_time(alarm_pattern)
-	if offset:
-		task.alarm = task.due_date - offset
+	offset = (_parse_alarm_pattern(alarm_pattern)
+			if _is_offset_alarm_pattern(alarm_pattern) else None)
+	alarm, alarm_pattern = _compute_alarm(alarm_pattern, offset, task.alarm,
+			task.due_date)
+	if alarm_pattern != task.alarm_pattern:
+		task.alarm_pattern = alarm_pattern
+	if alarm != task.alarm:
+		task.alarm = alarm
 	_LOG.debug('update_task_alarm result=%r', task.alarm)
 
 
-def update_task_hide(task):
-	""" Update Task hide_until field.
+_HIDE_GIVEN_DATE = 'given date'
+_HIDE_TASK_IS_DUE = 'task is due'
 
-	Update Task.hide_until according to values of field Task.hide_pattern and
-	due_date, start_date
 
-	Args:
-		task: object Task
+def _is_offset_hide_pattern(hide_pattern):
+	return bool(hide_pattern) and hide_pattern not in (_HIDE_GIVEN_DATE,
+			_HIDE_TASK_IS_DUE)
 
-	Returns:
-		True = task updated, no error
 
-	Sample patterns:
-		- "task is due"
-		- "given date"
-		- "<number> (weak|day|month) before (due|start)
+def _parse_hide_pattern(hide_pattern):
+	""" Parse hide pattern "<number> (week|day|month) before (due|start)".
+
+	Returns:
+		(relative date, offset) or None when pattern is wrong; offset is None
+		when number or period is invalid.
 	"""
-	# pylint: disable=R0911
-	hide_pattern = task.hide_pattern
-	_LOG.debug('update_task_hide: date=%r, pattern=%r, due=%r, start=%r',
-			task.hide_until, task.hide_pattern, task.due_date, task.start_date)
-	if not hide_pattern:
-		task.hide_until = None
-		return True
-	elif hide_pattern == 'given date':
-		if not task.hide_until:
-			_LOG.warning("update_task_hide: given date + empty hide_until; %r",
-					task)
-		return True
-	elif hide_pattern == "task is due":
-		task.hide_until = task.due_date or task.start_date
-		return True
 	try:
 		num, period, dummy_, rel = hide_pattern.split(' ')
 		num = float(num)
 	except ValueError:
 		_LOG.warning("update_task_hide: wrong hide_pattern: %r",
 				hide_pattern)
-		return False
-	rel_date = ((task.due_date or task.start_date) if rel == 'due' else
-			(task.start_date or task.due_date))
-	if not rel_date:  # missing date
-		return True
+		return None
 	if num < 1 or num > 99:
 		_LOG.warning("update_task_hide: invalid hide_pattern (x): %r",
 				hide_pattern)
-		return False
+		return rel, None
 	if period in ('week', 'weeks'):
 		offset = datetime.timedelta(0, weeks=-num)
 	elif period in ('day', 'days'):
@@ -138,9 +158,140 @@ def update_task_hide(task):
 	else:
 		_LOG.warn('update_task_hide: invalid hide_period = %r',
 			hide_pattern)
-		return False
-	task.hide_until = rel_date + offset
-	return True
+		return rel, None
+	return rel, offset
+
+
+def _compute_hide_until(hide_pattern, parsed, hide_until, due_date,
+		start_date):
+	""" Compute hide_until for task.
+
+	Args:
+		hide_pattern: task hide pattern
+		parsed: result of `_parse_hide_pattern` for offset patterns
+		hide_until, due_date, start_date: current values of task fields
+
+	Returns:
+		(True if no error, hide_until)
+	"""
+	# pylint: disable=R0911
+	if not hide_pattern:
+		return True, None
+	elif hide_pattern == _HIDE_GIVEN_DATE:
+		if not hide_until:
+			_LOG.warning("update_task_hide: given date + empty hide_until")
+		return True, hide_until
+	elif hide_pattern == _HIDE_TASK_IS_DUE:
+		return True, due_date or start_date
+	if parsed is None:
+		return False, hide_until
+	rel, offset = parsed
+	rel_date = ((due_date or start_date) if rel == 'due' else
+			(start_date or due_date))
+	if not rel_date:  # missing date
+		return True, hide_until
+	if offset is None:
+		return False, hide_until
+	return True, rel_date + offset
+
+
+def update_task_hide(task):
+	""" Update Task hide_until field.
+
+	Update Task.hide_until according to values of field Task.hide_pattern and
+	due_date, start_date
+
+	Args:
+		task: object Task
+
+	Returns:
+		True = task updated, no error
+
+	Sample patterns:
+		- "task is due"
+		- "given date"
+		- "<number> (weak|day|month) before (due|start)
+	"""
+	hide_pattern = task.hide_pattern
+	_LOG.debug('update_task_hide: date=%r, pattern=%r, due=%r, start=%r',
+			task.hide_until, task.hide_pattern, task.due_date, task.start_date)
+	parsed = (_parse_hide_pattern(hide_pattern)
+			if _is_offset_hide_pattern(hide_pattern) else None)
+	result, hide_until = _compute_hide_until(hide_pattern, parsed,
+			task.hide_until, task.due_date, task.start_date)
+	if hide_until != task.hide_until:
+		task.hide_until = hide_until
+	return result
+
+
+def _group_by(tasks, attr):
+	groups = collections.defaultdict(list)
+	for task in tasks:
+		groups[getattr(task, attr)].append(task)
+	return groups.items()
+
+
+def recompute_tasks_dates(tasks, session=None):
+	""" Update hide_until and alarm of many tasks.
+
+	Tasks are grouped by hide and alarm pattern, so each pattern is parsed
+	once. Only changed values are written.
+
+	Args:
+		tasks: list of Task objects
+		session: when given - pending changes are flushed and new values are
+			written by bulk UPDATE (one statement for each set of changed
+			columns); objects get new values as loaded, not modified.
+			Otherwise new values are set in objects.
+
+	Returns:
+		Number of changed tasks.
+	"""
+	# id(task) -> (task, {column: value})
+	changes = {}
+
+	def set_value(task, column, value):
+		if value != getattr(task, column):
+			changes.setdefault(id(task), (task, {}))[1][column] = value
+
+	for hide_pattern, group in _group_by(tasks, 'hide_pattern'):
+		parsed = (_parse_hide_pattern(hide_pattern)
+				if _is_offset_hide_pattern(hide_pattern) else None)
+		for task in group:
+			_result, hide_until = _compute_hide_until(hide_pattern, parsed,
+					task.hide_until, task.due_date, task.start_date)
+			set_value(task, 'hide_until', hide_until)
+	for alarm_pattern, group in _group_by(tasks, 'alarm_pattern'):
+		offset = (_parse_alarm_pattern(alarm_pattern)
+				if _is_offset_alarm_pattern(alarm_pattern) else None)
+		for task in group:
+			alarm, new_pattern = _compute_alarm(alarm_pattern, offset,
+					task.alarm, task.due_date)
+			set_value(task, 'alarm', alarm)
+			set_value(task, 'alarm_pattern', new_pattern)
+	_LOG.debug("recompute_tasks_dates: %d tasks, %d changed", len(tasks),
+			len(changes))
+	if session is None:
+		for task, values in changes.values():
+			for column, value in values.items():
+				setattr(task, column, value)
+		return len(changes)
+	session.flush()
+	# columns -> list of parameters
+	updates = collections.defaultdict(list)
+	for task, values in changes.values():
+		params = dict(values)
+		params['b_uuid'] = task.uuid
+		updates[tuple(sorted(values))].append(params)
+	table = OBJ.Task.__table__
+	for columns, params in updates.items():
+		stmt = table.update().where(table.c.uuid == bindparam('b_uuid'))\
+				.values({column: bindparam(column) for column in columns})
+		session.execute(stmt, params)
+	for task, values in changes.values():
+		for column, value in values.items():
+			set_committed_value(task, column, value)
+	return len(changes)
 
 
 # Definition simple repeat patterns
@@ -340,7 +491,26 @@ def update_task_from_parent(task, parent_uuid, session, appconfig):
 			task.task.append(OBJ.TaskTag(tag_uuid=tasktag.tag_uuid))
 
 
-def delete_task(task, session=None, permanently=False):
+def _load_tasks(tasks, session):
+	""" Get Task objects for list of Task or uuid; uuids are loaded by one
+	query. Missing tasks are skipped. """
+	uuids = [task for task in tasks if isinstance(task, str)]
+	loaded = {}
+	for idx in range(0, len(uuids), _IN_CHUNK_SIZE):
+		loaded.update((task.uuid, task) for task in session.query(OBJ.Task)
+				.filter(OBJ.Task.uuid.in_(uuids[idx:idx + _IN_CHUNK_SIZE])))
+	result = []
+	for task in tasks:
+		if isinstance(task, str):
+			if task not in loaded:
+				_LOG.warning("missing task %r", task)
+				continue
+			task = loaded[task]
+		result.append(task)
+	return result
+
+
+def delete_task(task, session=None, permanently=False, with_subtasks=False):
 	""" Delete given task.
 
 	Show confirmation and delete task from database.
@@ -349,31 +519,34 @@ def delete_task(task, session=None, permanently=False):
 		task: one or list of task for delete (Task or UUID)
 		session: sqlalchemy session
 		permanently: if True - delete objects from database
+		with_subtasks: delete also all descendants of tasks (by bulk
+			statements; message is sent only for given tasks)
 
 	Returns:
 		True = task deleted
 	"""
 	session = session or OBJ.Session()
 	tasks = task if isinstance(task, (list, tuple)) else [task]
-	deleted = 0
-	deleted_uuids = []
-	for task in tasks:
-		if isinstance(task, str):
-			task = session.query(OBJ.Task).filter_by(uuid=task).first()
-			if not task:
-				_LOG.warning("delete_task: missing task %r", task)
-				continue
-		if permanently:
-			session.delete(task)
-		else:
-			task.deleted = datetime.datetime.now()
-		deleted_uuids.append(task.uuid)
-		deleted += 1
-	if deleted:
-		session.commit()
-		for uuid in deleted_uuids:
-			publisher.sendMessage('task.delete', task_uuid=uuid)
-	return bool(deleted)
+	tasks = _load_tasks(tasks, session)
+	if not tasks:
+		return False
+	deleted_uuids = [task.uuid for task in tasks]
+	if with_subtasks:
+		parents = set(task.parent_uuid for task in tasks)
+		hierarchy.delete_subtrees(session, deleted_uuids, permanently)
+		parents.difference_update(deleted_uuids)
+		parents.discard(None)
+		update_projects_due_dates(parents, session)
+	else:
+		for task in tasks:
+			if permanently:
+				session.delete(task)
+			else:
+				task.deleted = datetime.datetime.now()
+	session.commit()
+	for uuid in deleted_uuids:
+		publisher.sendMessage('task.delete', task_uuid=uuid)
+	return True
 
 
 def undelete_task(task, session=None):
@@ -388,15 +561,9 @@ def undelete_task(task, session=None):
 	"""
 	session = session or OBJ.Session()
 	tasks = task if isinstance(task, (list, tuple)) else [task]
-	tasks_to_save = []
-	for task in tasks:
-		if isinstance(task, str):
-			task = session.query(OBJ.Task).filter_by(uuid=task).first()
-			if not task:
-				_LOG.warning("undelete_task: missing task %r", task)
-				continue
+	tasks_to_save = _load_tasks(tasks, session)
+	for task in tasks_to_save:
 		task.deleted = None
-		tasks_to_save.append(task)
 	save_modified_tasks(tasks_to_save, session)
 
 
@@ -509,35 +676,115 @@ def build_repeat_pattern_every_xdm(num_weekday, weekday, num_months):
 			mname)
 
 
-def update_project_due_date(task):
-	""" Update project due date.
+# session.info key: set of projects uuid which due date must be recomputed
+_DIRTY_PROJECTS = 'wxgtd.dirty_projects'
+# task fields that affect due date of project
+_PROJECT_DATE_FIELDS = ('parent_uuid', 'due_date', 'due_time_set',
+		'due_date_project', 'deleted', 'type')
+# max number of parameters in one IN query
+_IN_CHUNK_SIZE = 500
+
+
+@event.listens_for(orm.Session, 'after_flush')
+def _collect_dirty_projects(session, _flush_context):
+	""" Remember projects which subtasks (or own dates) was changed in flush.
+	"""
+	dirty = set()
+	for task in itertools.chain(session.new, session.deleted):
+		if isinstance(task, OBJ.Task):
+			dirty.add(task.parent_uuid)
+			if task.type == enums.TYPE_PROJECT:
+				dirty.add(task.uuid)
+	for task in session.dirty:
+		if not isinstance(task, OBJ.Task):
+			continue
+		attrs = inspect(task).attrs
+		if not any(attrs[field].history.has_changes()
+				for field in _PROJECT_DATE_FIELDS):
+			continue
+		dirty.add(task.parent_uuid)
+		# previous parent lost subtask
+		dirty.update(attrs.parent_uuid.history.deleted)
+		if task.type == enums.TYPE_PROJECT or \
+				attrs.type.history.has_changes():
+			dirty.add(task.uuid)
+	dirty.discard(None)
+	if dirty:
+		session.info.setdefault(_DIRTY_PROJECTS, set()).update(dirty)
+
+
+def update_dirty_projects(session):
+	""" Flush session and recompute due date of projects affected by
+	changes made in session since last call.
+
+	Returns:
+		Number of updated projects.
+	"""
+	session.flush()
+	dirty = session.info.pop(_DIRTY_PROJECTS, None)
+	if not dirty:
+		return 0
+	return update_projects_due_dates(dirty, session)
+
 
-	if `task` is project:
-		1. copy due_date_project to due_date
-		2. search for subtask with due_date < due_date_project
-			- if found - set project.due_date to subtask.due_date
-	if `task` is not project and have parent:
-		1. if parent.due_date > task.due_date update parent due date
+def update_projects_due_dates(projects_uuids, session):
+	""" Recompute due date of projects.
+
+	Project due date is the earliest from project own due date
+	(due_date_project) and due dates of its not deleted subtasks.
+	Only projects with changed due date are written (by bulk UPDATE); loaded
+	objects get new values as not modified.
 
 	Args:
-		task: task to update
+		projects_uuids: uuids of projects (other tasks are skipped)
+		session: SqlAlchemy session
+	Returns:
+		Number of updated projects.
 	"""
-	if task.type == enums.TYPE_PROJECT:
-		task.due_date = task.due_date_project
-		if task.due_date:
-			for subtask in task.children:
-				if subtask.due_date and subtask.due_date < task.due_date:
-					task.due_date = subtask.due_date
-					task.due_time_set = subtask.due_time_set
-	elif task.due_date and task.parent and task.parent.type == enums.TYPE_PROJECT:
-		if not task.parent.due_date or (task.due_date and task.parent.due_date >
-				task.due_date):
-			task.parent.due_date = task.due_date
-			task.parent.due_time_set = task.due_time_set
+	table = OBJ.Task.__table__
+	changes = []
+	uuids = sorted(projects_uuids)
+	for idx in range(0, len(uuids), _IN_CHUNK_SIZE):
+		chunk = uuids[idx:idx + _IN_CHUNK_SIZE]
+		subtasks_due = {parent_uuid: (due_date, due_time_set or 0)
+				for parent_uuid, due_date, due_time_set in session.execute(
+					select(table.c.parent_uuid, func.min(table.c.due_date),
+						func.min(table.c.due_time_set))
+					.where(table.c.parent_uuid.in_(chunk),
+						table.c.due_date.isnot(None),
+						table.c.deleted.is_(None))
+					.group_by(table.c.parent_uuid))}
+		projects = session.execute(select(table.c.uuid,
+				table.c.due_date_project, table.c.due_date,
+				table.c.due_time_set).where(table.c.uuid.in_(chunk),
+					table.c.type == enums.TYPE_PROJECT,
+					table.c.deleted.is_(None)))
+		for uuid, due_date_project, due_date, due_time_set in projects:
+			new_due, new_time_set = due_date_project, 0
+			subtask_due = subtasks_due.get(uuid)
+			if subtask_due and (not new_due or subtask_due[0] < new_due):
+				new_due, new_time_set = subtask_due
+			if (new_due, new_time_set) != (due_date, due_time_set):
+				changes.append({'b_uuid': uuid, 'due_date': new_due,
+						'due_time_set': new_time_set})
+	_LOG.debug("update_projects_due_dates: %d projects, %d changed",
+			len(uuids), len(changes))
+	if not changes:
+		return 0
+	session.execute(table.update().where(table.c.uuid == bindparam('b_uuid'))
+			.values(due_date=bindparam('due_date'),
+				due_time_set=bindparam('due_time_set')), changes)
+	for params in changes:
+		task = session.identity_map.get(identity_key(OBJ.Task,
+				params['b_uuid']))
+		if task is not None:
+			set_committed_value(task, 'due_date', params['due_date'])
+			set_committed_value(task, 'due_time_set', params['due_time_set'])
+	return len(changes)
 
 
 def clone_task(task_uuid, session=None):
-	""" Clone task.
+	""" Clone task with all subtasks, notes and tags.
 
 	Args:
 		task_uuid: task to clone
@@ -546,14 +793,13 @@ def clone_task(task_uuid, session=None):
 		Cloned task UUID or None when error.
 	"""
 	session = session or OBJ.Session()
-	task = session.query(OBJ.Task).filter_by(uuid=task_uuid).first()
-	if not task:
-		_LOG.warn("_clone_selected_task; missing task %r", task_uuid)
+	new_uuid = hierarchy.clone_subtree(session, task_uuid)
+	if not new_uuid:
+		_LOG.warn("clone_task; missing task %r", task_uuid)
 		return None
-	new_task = task.clone()
-	save_modified_task(new_task, session)
-	publisher.sendMessage('task.update', task_uuid=new_task.uuid)
-	return new_task.uuid
+	session.commit()
+	publisher.sendMessage('task.update', task_uuid=new_uuid)
+	return new_uuid
 
 
 def save_modified_task(task, session=None):
@@ -570,13 +816,13 @@ def save_modified_task(task, session=None):
 	update_task_hide(task)
 	update_task_alarm(task)
 	adjust_task_type(task, session)
-	update_project_due_date(task)
 	if task.type == enums.TYPE_CHECKLIST_ITEM:
 		if not task.importance:
 			task.importance = OBJ.Task.find_max_importance(task.parent_uuid,
 					session) + 1
 	task.update_modify_time()
 	session.add(task)
+	update_dirty_projects(session)
 	session.commit()  # pylint: disable=E1101
 	publisher.sendMessage('task.update', task_uuid=task.uuid)
 	return True
@@ -593,17 +839,16 @@ def save_modified_tasks(tasks, session=None):
 		True if ok.
 	"""
 	session = session or OBJ.Session()
+	recompute_tasks_dates(tasks)
 	for task in tasks:
-		update_task_hide(task)
-		update_task_alarm(task)
 		adjust_task_type(task, session)
-		update_project_due_date(task)
 		if task.type == enums.TYPE_CHECKLIST_ITEM:
 			if not task.importance:
 				task.importance = OBJ.Task.find_max_importance(task.parent_uuid,
 						session) + 1
 		task.update_modify_time()
 		session.add(task)
+	update_dirty_projects(session)
 	session.commit()  # pylint: disable=E1101
 	publisher.sendMessage('task.update')
 	return True
@@ -660,6 +905,7 @@ def change_task_parent(task, parent, session=None):
 	if parent is not None:
 		if isinstance(parent, str):
 			parent = OBJ.Task.get(session, uuid=parent)
-	task.parent = parent
+	if not hierarchy.move_subtree(session, task, parent):
+		return False
 	return adjust_task_type(task, session)
 
@@ -54,8 +54,10 @@ def _parse_opt():
 
 
 def _run_ipcs(config):
+	import wx
 	from wxgtd.wxtools import ipc
-	ipcs = ipc.IPC(os.path.join(config.config_path, "wxgtd_lock"))
+	ipcs = ipc.IPC(os.path.join(config.config_path, "wxgtd_lock"),
+			dispatcher=wx.CallAfter)
 	if not ipcs.startup("gui.frame_main.raise"):
 		_LOG.info("App is already running...")
 		exit(0)
@@ -109,6 +111,11 @@ def run():
 	from wxgtd.model import db
 	db.connect(db.find_db_file(config), options.debug_sql)
 
+	if ipcs:
+		# database is ready; accept commands from cli
+		from wxgtd.logic import commands
+		ipcs.register_commands(commands.COMMANDS)
+
 	if options.quick_task_dialog:
 		from wxgtd.gui import quicktask
 		quicktask.quick_task(None)
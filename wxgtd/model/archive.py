@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+""" Archive of finished tasks (hot/cold split of tasks tables).
+
+Completed tasks older than configured number of days are moved (with their
+tags and notes) from main database to archive database attached to each
+connection as schema `archive`. Archive tables have the same columns as
+main tables, but no foreign keys nor triggers.
+
+Archiving is opt-in: by default no tasks are moved and archive database is
+attached only when it already exists or archiving is enabled (see `enable`).
+Synchronisation restores only archived tasks changed since they were
+archived (`restore_changed`); other are left in archive.
+
+Lists of active tasks use only main database; finished tasks, trash, search
+and sync export select from both (see `entity` and `rows`). Archived tasks
+are read-only; they must be moved back to main database by `restore_tasks`
+before they are changed (GUI restores tasks opened or selected for change).
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import os
+import logging
+import datetime
+import weakref
+
+import sqlalchemy
+from sqlalchemy import orm
+from sqlalchemy import Column, DateTime, Index, MetaData, Table
+from sqlalchemy import select, text, union_all, bindparam
+
+from wxgtd.lib.appconfig import AppConfig
+from wxgtd.model import objects as OBJ
+
+_LOG = logging.getLogger(__name__)
+
+SCHEMA = "archive"
+# default age (in days) of completed tasks moved to archive; 0 - disabled
+DEFAULT_DAYS = 0
+# age proposed when tasks are archived from menu and archiving is disabled
+SUGGESTED_DAYS = 365
+# max number of uuids in one IN clause
+_IN_CHUNK_SIZE = 500
+
+_METADATA = MetaData()
+# engines with attached archive
+_ENGINES = weakref.WeakSet()
+
+
+def _archive_table(table):
+	""" Create copy of `table` in archive schema (only columns and primary
+	key). """
+	return Table(table.name, _METADATA, *[Column(col.name, col.type,
+			primary_key=col.primary_key) for col in table.columns],
+			schema=SCHEMA)
+
+
+TABLES = {table.name: _archive_table(table) for table in (
+		OBJ.Task.__table__, OBJ.TaskTag.__table__, OBJ.Tasknote.__table__)}
+
+Index('ix_archive_tasks_completed', TABLES['tasks'].c.completed)
+Index('ix_archive_tasks_parent_uuid', TABLES['tasks'].c.parent_uuid)
+Index('ix_archive_task_tags_tag', TABLES['task_tags'].c.tag_uuid,
+		TABLES['task_tags'].c.task_uuid)
+Index('ix_archive_tasknotes_task_uuid', TABLES['tasknotes'].c.task_uuid)
+
+# task columns recalculated by triggers when task is restored
+_TASK_COMPUTED = ('tree_path', 'children_count', 'active_children_count',
+		'children_due')
+# references of tasks cleared on restore when target no longer exists
+_TASK_REFERENCES = {'folder_uuid': 'folders', 'context_uuid': 'contexts',
+		'goal_uuid': 'goals'}
+
+# finished tasks without active (or recently finished) subtasks
+_SELECT_FINISHED = """INSERT INTO temp.archive_move (uuid)
+WITH RECURSIVE blocked(uuid) AS (
+	SELECT parent_uuid FROM main.tasks
+		WHERE parent_uuid IS NOT NULL
+			AND (completed IS NULL OR completed >= :threshold)
+	UNION
+	SELECT t.parent_uuid FROM main.tasks t JOIN blocked b ON t.uuid = b.uuid
+		WHERE t.parent_uuid IS NOT NULL)
+SELECT uuid FROM main.tasks
+	WHERE completed < :threshold AND uuid NOT IN (SELECT uuid FROM blocked)"""
+
+
+def archive_filename(db_filename):
+	""" Get name of archive database for `db_filename`. """
+	return os.path.splitext(db_filename)[0] + "-archive.db"
+
+
+def get_archive_days():
+	""" Get age of completed tasks moved to archive from configuration. """
+	return int(AppConfig().get('archive', 'days', DEFAULT_DAYS) or 0)
+
+
+def attach(engine, filename):
+	""" Attach archive database to each connection of engine and create
+	missing tables.
+
+	Must be called before first connection is created (i.e. just after
+	create_engine); see `enable` for already used engine.
+
+	Args:
+		engine: sqlalchemy engine
+		filename: archive database file name (or ":memory:")
+	"""
+	_LOG.info("attach %r", filename)
+
+	@sqlalchemy.event.listens_for(engine, "connect")
+	def _attach(dbapi_connection, _connection_record):
+		cursor = dbapi_connection.cursor()
+		cursor.execute("ATTACH DATABASE ? AS " + SCHEMA, (filename, ))
+		cursor.close()
+
+	_ENGINES.add(engine)
+	_METADATA.create_all(engine)
+	_add_missing_columns(engine)
+
+
+def enable(engine):
+	""" Attach archive of database used by `engine` when it is not attached
+	yet (i.e. archiving is enabled after connect).
+
+	Connections already opened by engine are closed, so engine must not be
+	used in any transaction.
+
+	Args:
+		engine: sqlalchemy engine
+
+	Returns:
+		True when archive is attached.
+	"""
+	if is_attached(engine):
+		return True
+	filename = engine.url.database
+	if not filename or filename == ":memory:":
+		return False
+	engine.dispose()
+	attach(engine, archive_filename(filename))
+	return True
+
+
+def _add_missing_columns(engine):
+	""" Add to archive tables columns added to main tables. """
+	with engine.begin() as conn:
+		for name, table in TABLES.items():
+			existing = set(row[1] for row in conn.execute(
+					"PRAGMA %s.table_info(%s)" % (SCHEMA, name)))
+			for column in table.columns:
+				if column.name not in existing:
+					conn.execute("ALTER TABLE %s.%s ADD COLUMN %s %s" % (SCHEMA,
+							name, column.name,
+							column.type.compile(dialect=engine.dialect)))
+
+
+def is_attached(session):
+	""" Check is archive available for session (or engine). """
+	bind = session.get_bind() if isinstance(session, orm.Session) \
+			else session
+	return getattr(bind, 'engine', bind) in _ENGINES
+
+
+def union(table):
+	""" Build subquery selecting rows of `table` from main and archive
+	databases.
+	"""
+	archived = TABLES[table.name]
+	return union_all(select(*table.columns),
+			select(*[archived.c[col.name] for col in table.columns])
+			).subquery(table.name + "_all")
+
+
+def rows(session, table):
+	""" Get selectable for all rows of `table` (union with archive when it
+	is attached). """
+	return union(table) if is_attached(session) else table
+
+
+def entity(session, mapped_class):
+	""" Get entity for querying `mapped_class` objects from both databases.
+
+	Queries must use columns of returned entity (not `mapped_class`) in
+	criteria and selected columns.
+
+	Returns:
+		aliased class (or `mapped_class` when archive is not attached)
+	"""
+	if not is_attached(session):
+		return mapped_class
+	return orm.aliased(mapped_class, union(mapped_class.__table__))
+
+
+def _columns_list(table):
+	return ", ".join(col.name for col in table.columns)
+
+
+def move_finished(engine, days=None):
+	""" Move tasks completed more than `days` ago to archive database.
+
+	Task is moved with its tags and notes only when all its subtasks are
+	moved, so archived trees are complete and main database has no
+	references to archived tasks.
+
+	Args:
+		engine: sqlalchemy engine
+		days: age of completed tasks; default from configuration; 0 - don't
+			move anything
+
+	Returns:
+		number of moved tasks
+	"""
+	if days is None:
+		days = get_archive_days()
+	if not days or not is_attached(engine):
+		return 0
+	threshold = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+	_LOG.info("move_finished: tasks completed before %s", threshold)
+	select_finished = text(_SELECT_FINISHED).bindparams(
+			bindparam('threshold', type_=DateTime))
+	with engine.begin() as conn:
+		conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_move "
+				"(uuid VARCHAR(36) PRIMARY KEY)")
+		conn.execute("DELETE FROM temp.archive_move")
+		conn.execute(select_finished, threshold=threshold)
+		for name, key in (('tasks', 'uuid'), ('task_tags', 'task_uuid'),
+				('tasknotes', 'task_uuid')):
+			columns = _columns_list(TABLES[name])
+			conn.execute("INSERT OR REPLACE INTO %s.%s (%s) SELECT %s "
+					"FROM main.%s WHERE %s IN (SELECT uuid FROM "
+					"temp.archive_move)" % (SCHEMA, name, columns, columns,
+						name, key))
+		conn.execute("DELETE FROM main.task_tags "
+				"WHERE task_uuid IN (SELECT uuid FROM temp.archive_move)")
+		conn.execute("DELETE FROM main.tasknotes "
+				"WHERE task_uuid IN (SELECT uuid FROM temp.archive_move)")
+		moved = conn.execute("DELETE FROM main.tasks "
+				"WHERE uuid IN (SELECT uuid FROM temp.archive_move)").rowcount
+		conn.execute("DROP TABLE temp.archive_move")
+	_LOG.info("move_finished: moved %d tasks", moved)
+	return moved
+
+
+def _restore_task_columns():
+	""" Build lists of columns and values for restoring tasks. """
+	names, values = [], []
+	for column in OBJ.Task.__table__.columns:
+		if column.name in _TASK_COMPUTED:
+			continue
+		names.append(column.name)
+		if column.name == 'parent_uuid':
+			values.append("CASE WHEN parent_uuid IN (SELECT uuid FROM "
+					"main.tasks UNION ALL SELECT uuid FROM "
+					"temp.archive_restore) THEN parent_uuid END")
+		elif column.name in _TASK_REFERENCES:
+			values.append("CASE WHEN {col} IN (SELECT uuid FROM main.{table}) "
+					"THEN {col} END".format(col=column.name,
+						table=_TASK_REFERENCES[column.name]))
+		else:
+			values.append(column.name)
+	return ", ".join(names), ", ".join(values)
+
+
+def restore_tasks(session, uuids):
+	""" Move archived tasks (and their archived parents) back to main
+	database.
+
+	Restoring is never done implicitly when task is read; it must be
+	called before archived task is changed.
+
+	References to objects that no longer exist are cleared; tree path and
+	subtasks counters are recalculated by triggers.
+
+	Args:
+		session: sqlalchemy session; changes are not committed
+		uuids: uuids of tasks to restore (not archived are ignored)
+
+	Returns:
+		number of restored tasks
+	"""
+	if not uuids or not is_attached(session):
+		return 0
+	session.execute(text("CREATE TEMP TABLE IF NOT EXISTS archive_restore "
+			"(uuid VARCHAR(36) PRIMARY KEY)"))
+	session.execute(text("DELETE FROM temp.archive_restore"))
+	session.execute(text("INSERT OR IGNORE INTO temp.archive_restore (uuid) "
+			"SELECT uuid FROM archive.tasks WHERE uuid = :uuid"),
+			[{'uuid': uuid} for uuid in uuids])
+	# parents must be restored too
+	while session.execute(text("INSERT OR IGNORE INTO temp.archive_restore "
+			"(uuid) SELECT t.parent_uuid FROM archive.tasks t "
+			"WHERE t.uuid IN (SELECT uuid FROM temp.archive_restore) "
+			"AND t.parent_uuid IN (SELECT uuid FROM archive.tasks)")).rowcount:
+		pass
+	names, values = _restore_task_columns()
+	# parents first - tree path is build from path of parent
+	session.execute(text("INSERT INTO main.tasks (%s) SELECT %s "
+			"FROM archive.tasks WHERE uuid IN "
+			"(SELECT uuid FROM temp.archive_restore) "
+			"ORDER BY length(tree_path)" % (names, values)))
+	columns = _columns_list(TABLES['task_tags'])
+	session.execute(text("INSERT OR IGNORE INTO main.task_tags (%s) "
+			"SELECT %s FROM archive.task_tags WHERE task_uuid IN "
+			"(SELECT uuid FROM temp.archive_restore) "
+			"AND tag_uuid IN (SELECT uuid FROM main.tags)" % (columns,
+				columns)))
+	columns = _columns_list(TABLES['tasknotes'])
+	session.execute(text("INSERT OR IGNORE INTO main.tasknotes (%s) "
+			"SELECT %s FROM archive.tasknotes WHERE task_uuid IN "
+			"(SELECT uuid FROM temp.archive_restore)" % (columns, columns)))
+	for name, key in (('task_tags', 'task_uuid'), ('tasknotes', 'task_uuid'),
+			('tasks', 'uuid')):
+		session.execute(text("DELETE FROM %s.%s WHERE %s IN "
+				"(SELECT uuid FROM temp.archive_restore)" % (SCHEMA, name, key)))
+	restored = session.execute(text("SELECT count(*) FROM "
+			"temp.archive_restore")).scalar()
+	session.execute(text("DROP TABLE temp.archive_restore"))
+	_LOG.info("restore_tasks: restored %d tasks", restored)
+	return restored
+
+
+def _archived_modified(session, uuids):
+	""" Get modification time of archived tasks from `uuids`.
+
+	Returns:
+		dict uuid -> modified
+	"""
+	archived = TABLES['tasks']
+	result = {}
+	for idx in range(0, len(uuids), _IN_CHUNK_SIZE):
+		result.update(tuple(row) for row in session.execute(select(
+				archived.c.uuid, archived.c.modified).where(
+					archived.c.uuid.in_(uuids[idx:idx + _IN_CHUNK_SIZE]))))
+	return result
+
+
+def restore_changed(session, tasks):
+	""" Restore archived tasks changed since they were archived (i.e. by
+	synchronisation).
+
+	Task is restored when its modification time is newer than archived one;
+	archived parents of tasks that will be loaded into main database are
+	restored too. Other tasks are left in archive and should not be loaded.
+
+	Args:
+		session: sqlalchemy session; changes are not committed
+		tasks: dict uuid -> (modified, parent uuid) of incoming tasks
+
+	Returns:
+		set of uuids of incoming tasks left in archive
+	"""
+	if not tasks or not is_attached(session):
+		return set()
+	parents = set(parent for _modified, parent in tasks.values() if parent)
+	archived = _archived_modified(session, list(parents.union(tasks)))
+	if not archived:
+		return set()
+	changed = [uuid for uuid, modified in archived.items() if uuid in tasks
+			and (not tasks[uuid][0] or not modified
+				or tasks[uuid][0] > modified)]
+	loaded = set(uuid for uuid in tasks if uuid not in archived)
+	loaded.update(changed)
+	changed.extend(parent for parent in set(tasks[uuid][1] for uuid in loaded)
+			if parent in archived)
+	if not changed:
+		return set(uuid for uuid in archived if uuid in tasks)
+	restore_tasks(session, changed)
+	# ancestors of restored tasks are restored too
+	return set(_archived_modified(session, [uuid for uuid in archived
+			if uuid in tasks]))
+
+
+def count_archived(session):
+	""" Count tasks in archive. """
+	if not is_attached(session):
+		return 0
+	return session.execute(select(sqlalchemy.func.count()).select_from(
+			TABLES['tasks'])).scalar()
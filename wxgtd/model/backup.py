@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+""" Database backups.
+
+Backups are copies of sqlite database made by sqlite online backup api
+(`sqlite3.Connection.backup`); pages are copied in steps so other
+connections can write to database between steps. Copy is stored in
+deduplicated `backupstore.BackupStore` or compressed by gzip - in background
+thread.
+
+Optionally backup may be made in sync file format (json in zip).
+
+Configuration in wxgtd.conf:
+[backup]
+location = <path to dir>
+format = store | db | json
+; retention for store
+keep_daily = 7
+keep_weekly = 4
+keep_monthly = 12
+; number of backup files for db and json format
+number_copies = 21
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import os
+import gzip
+import shutil
+import sqlite3
+import logging
+import gettext
+import datetime
+import tempfile
+import threading
+
+from wxgtd.lib import appconfig
+from wxgtd.lib import ignore_exceptions
+from wxgtd.model import objects as OBJ
+from wxgtd.model import backupstore
+
+_LOG = logging.getLogger(__name__)
+_ = gettext.gettext
+
+BACKUP_PREFIX = "BACKUP_"
+FORMAT_STORE = 'store'
+FORMAT_DB = 'db'
+FORMAT_JSON = 'json'
+_EXTENSIONS = {FORMAT_DB: ".db.gz",
+		FORMAT_JSON: ".json.zip"}
+# raw database copy waiting for compression
+_RAW_EXTENSION = ".db"
+# pages copied in one backup step
+BACKUP_STEP_PAGES = 256
+# pause between steps (in seconds) allowing other connections to write
+BACKUP_STEP_SLEEP = 0.005
+
+# running compression threads
+_COMPRESSORS = []
+# subdirectory of backups dir with backups store
+_STORE_DIR = "store"
+
+
+class BackupError(RuntimeError):
+	""" Backup or restore error. """
+	pass
+
+
+def get_backup_dir():
+	""" Get directory for backups. """
+	appcfg = appconfig.AppConfig()
+	backup_dir = appcfg.get('backup', 'location')
+	if backup_dir:
+		return os.path.expanduser(backup_dir)
+	return os.path.join(appcfg.user_share_dir, 'backups')
+
+
+def get_store():
+	""" Get store for deduplicated backups. """
+	return backupstore.BackupStore(os.path.join(get_backup_dir(), _STORE_DIR))
+
+
+def get_db_filename():
+	""" Get path of currently connected database file. """
+	engine = OBJ.Session.kw.get('bind')
+	if engine is None:
+		raise BackupError(_("Database is not connected"))
+	return engine.url.database
+
+
+def is_backup_file(fname):
+	""" Check is file name looks like backup created by this module. """
+	return fname.startswith(BACKUP_PREFIX) and (fname.endswith(_RAW_EXTENSION)
+			or any(fname.endswith(ext) for ext in _EXTENSIONS.values()))
+
+
+def list_backups(backup_dir=None):
+	""" Get list of backup files, newest first. """
+	backup_dir = backup_dir or get_backup_dir()
+	if not os.path.isdir(backup_dir):
+		return []
+	return sorted((fname for fname in os.listdir(backup_dir)
+			if is_backup_file(fname)), reverse=True)
+
+
+def copy_database(src_filename, dst_filename, pages=BACKUP_STEP_PAGES,
+		sleep=BACKUP_STEP_SLEEP, progress=None):
+	""" Copy sqlite database using online backup api.
+
+	Args:
+		src_filename: source database
+		dst_filename: destination file (overwritten)
+		pages: number of pages copied in one step
+		sleep: pause between steps
+		progress: optional function(status, remaining, total)
+	"""
+	_LOG.info("copy_database %r -> %r", src_filename, dst_filename)
+	src = sqlite3.connect(src_filename)
+	try:
+		dst = sqlite3.connect(dst_filename)
+		try:
+			src.backup(dst, pages=pages, progress=progress, sleep=sleep)
+		finally:
+			dst.close()
+	finally:
+		src.close()
+
+
+def compress_file(filename, dst_filename):
+	""" Compress `filename` to `dst_filename` (gzip) and delete source. """
+	tmp_filename = dst_filename + ".part"
+	with open(filename, "rb") as src, gzip.open(tmp_filename, "wb") as dst:
+		shutil.copyfileobj(src, dst, 1024 * 1024)
+	os.replace(tmp_filename, dst_filename)
+	os.unlink(filename)
+	_LOG.info("compress_file: %r done", dst_filename)
+
+
+def store_file(filename, name):
+	""" Add file to backups store as snapshot `name`, delete file and remove
+	old snapshots according to retention policy. """
+	appcfg = appconfig.AppConfig()
+	store = get_store()
+	store.add_snapshot(filename, name)
+	os.unlink(filename)
+	removed = store.apply_retention(
+			int(appcfg.get('backup', 'keep_daily', 7)),
+			int(appcfg.get('backup', 'keep_weekly', 4)),
+			int(appcfg.get('backup', 'keep_monthly', 12)))
+	if removed:
+		store.gc()
+
+
+def _compress_worker(func, filename, dst):
+	try:
+		func(filename, dst)
+	except (IOError, OSError, backupstore.BackupStoreError):
+		_LOG.exception("backup compression error: %r", filename)
+
+
+def compress_in_background(filename, dst, func=compress_file):
+	""" Start compression of file in background thread.
+
+	Thread is not daemonic, so application waits for it before exit.
+
+	Args:
+		filename: file to compress
+		dst: destination file name or snapshot name
+		func: compression function (compress_file or store_file)
+	Returns:
+		Thread object.
+	"""
+	thread = threading.Thread(target=_compress_worker,
+			args=(func, filename, dst), name="backup-compress")
+	thread.start()
+	_COMPRESSORS[:] = [thr for thr in _COMPRESSORS if thr.is_alive()]
+	_COMPRESSORS.append(thread)
+	return thread
+
+
+def wait_for_compression(timeout=None):
+	""" Wait until all background compressions finish. """
+	for thread in _COMPRESSORS:
+		thread.join(timeout)
+
+
+def _remove_old_backups(backup_dir, num_files_to_keep):
+	# raw copies and compressed backups from the same day are one backup
+	files = list_backups(backup_dir)
+	days = sorted(set(fname.split('.', 1)[0] for fname in files),
+			reverse=True)
+	for day in days[num_files_to_keep:]:
+		for fname in files:
+			if fname.split('.', 1)[0] == day:
+				_LOG.info('create_backup: delete backup: %r', fname)
+				os.unlink(os.path.join(backup_dir, fname))
+
+
+def create_backup(backup_format=None, background=True):
+	""" Create daily backup of current data in database.
+
+	Backup are stored for default in ~/.local/share/wxgtd/backups/
+
+	Args:
+		backup_format: FORMAT_DB or FORMAT_JSON; default from configuration
+		background: compress database copy in background thread.
+	Returns:
+		True when backup exists.
+	"""
+	appcfg = appconfig.AppConfig()
+	backup_format = backup_format or appcfg.get('backup', 'format',
+			FORMAT_STORE)
+	if backup_format != FORMAT_STORE and backup_format not in _EXTENSIONS:
+		_LOG.warning("create_backup: unknown format %r", backup_format)
+		backup_format = FORMAT_STORE
+	backup_dir = get_backup_dir()
+	today = datetime.date.today().isoformat()
+	basename = BACKUP_PREFIX + today
+	if any(fname.startswith(basename) for fname in list_backups(backup_dir)) \
+			or get_store().has_snapshot(today):
+		_LOG.info("create_backup: today backup already exists; skipping...")
+		return True
+	if os.path.isdir(backup_dir):
+		num_files_to_keep = int(appcfg.get('backup', 'number_copies', 21))
+		_remove_old_backups(backup_dir, num_files_to_keep)
+	else:
+		try:
+			os.makedirs(backup_dir)
+		except (IOError, OSError) as error:
+			_LOG.error('create_backup: create dir error: %s', str(error))
+			return False
+	if backup_format == FORMAT_STORE:
+		raw_filename = os.path.join(backup_dir, basename + _RAW_EXTENSION)
+		_LOG.info('create_backup: snapshot %s', today)
+		copy_database(get_db_filename(), raw_filename)
+		if background:
+			compress_in_background(raw_filename, today, store_file)
+		else:
+			store_file(raw_filename, today)
+		return True
+	filename = os.path.join(backup_dir, basename + _EXTENSIONS[backup_format])
+	_LOG.info('create_backup: %s', filename)
+	if backup_format == FORMAT_JSON:
+		from wxgtd.model import exporter
+		exporter.save_to_file(filename, internal_fname="GDT_SYNC.json")
+	else:
+		raw_filename = os.path.join(backup_dir, basename + _RAW_EXTENSION)
+		copy_database(get_db_filename(), raw_filename)
+		if background:
+			compress_in_background(raw_filename, filename)
+		else:
+			compress_file(raw_filename, filename)
+	_LOG.info('create_backup: COMPLETED %s', filename)
+	return True
+
+
+def archive_database(name):
+	""" Store copy of current database in backups store as snapshot `name`.
+
+	Database of archived tasks (if exists) is stored as snapshot
+	`name`-archive. Archive snapshots are not removed by retention policy.
+	"""
+	from wxgtd.model import archive
+	backup_dir = get_backup_dir()
+	os.makedirs(backup_dir, exist_ok=True)
+	db_filename = get_db_filename()
+	for filename, snapshot in ((db_filename, name),
+			(archive.archive_filename(db_filename), name + "-archive")):
+		if not os.path.isfile(filename):
+			continue
+		raw_filename = os.path.join(backup_dir, snapshot + _RAW_EXTENSION)
+		copy_database(filename, raw_filename)
+		try:
+			get_store().add_snapshot(raw_filename, snapshot)
+		finally:
+			with ignore_exceptions(OSError):
+				os.unlink(raw_filename)
+
+
+def _check_database(filename):
+	conn = sqlite3.connect(filename)
+	try:
+		result = conn.execute("PRAGMA integrity_check").fetchone()
+		conn.execute("SELECT count(*) FROM tasks").fetchone()
+	except sqlite3.DatabaseError as err:
+		raise BackupError(_("Invalid backup file: %s") % err)
+	finally:
+		conn.close()
+	if not result or result[0] != 'ok':
+		raise BackupError(_("Backup file is damaged: %s") % (result, ))
+
+
+def restore_backup(filename, db_filename=None):
+	""" Restore database from backup file.
+
+	Database backups (snapshots from store, .db.gz, .db files) replace whole
+	content of database; json backups (.json.zip) are loaded like sync files.
+
+	Args:
+		filename: backup file or name of snapshot in store
+		db_filename: destination database; default - connected database.
+	"""
+	_LOG.info("restore_backup: %r", filename)
+	store = get_store()
+	from_store = not os.path.isfile(filename)
+	if from_store and not store.has_snapshot(filename):
+		raise BackupError(_("Backup file not found"))
+	if filename.endswith(_EXTENSIONS[FORMAT_JSON]):
+		from wxgtd.model import loader
+		loader.load_from_file(filename, force=True)
+		return
+	db_filename = db_filename or get_db_filename()
+	tmp_fd, tmp_filename = tempfile.mkstemp(suffix=".db")
+	try:
+		with os.fdopen(tmp_fd, "wb") as tmp_file:
+			if not from_store:
+				opener = gzip.open if filename.endswith(".gz") else open
+				with opener(filename, "rb") as src:
+					shutil.copyfileobj(src, tmp_file, 1024 * 1024)
+		if from_store:
+			store.restore(filename, tmp_filename)
+		_check_database(tmp_filename)
+		copy_database(tmp_filename, db_filename)
+		from wxgtd.model import dictregistry
+		dictregistry.clear()
+	except (IOError, OSError, EOFError, backupstore.BackupStoreError) as err:
+		raise BackupError(_("Restore error: %s") % err)
+	finally:
+		with ignore_exceptions(OSError):
+			os.unlink(tmp_filename)
+	_LOG.info("restore_backup: COMPLETED")
+
+
+def verify_backups():
+	""" Check all backups in store and compressed database backups.
+
+	Returns:
+		List of errors.
+	"""
+	errors = get_store().verify()
+	backup_dir = get_backup_dir()
+	for fname in list_backups(backup_dir):
+		if not fname.endswith(_EXTENSIONS[FORMAT_DB]):
+			continue
+		try:
+			with gzip.open(os.path.join(backup_dir, fname), "rb") as bfile:
+				while bfile.read(1024 * 1024):
+					pass
+		except (IOError, OSError, EOFError) as err:
+			errors.append("%s: %s" % (fname, err))
+	return errors
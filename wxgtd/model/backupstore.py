@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+""" Content-addressed store for database backups.
+
+Database copy is split into fixed-size chunks (multiple of sqlite page size);
+each chunk is compressed and stored once under its sha256 hash. Snapshot is
+a manifest with list of chunks, so unchanged parts of database are shared
+between backups.
+
+Layout:
+	<store>/chunks/<hash[:2]>/<hash>  - zlib-compressed chunks
+	<store>/snapshots/<name>.json     - manifests
+
+Snapshots named by date (YYYY-MM-DD) are subject of retention policy;
+other snapshots (i.e. archives) are kept until removed explicitly.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import os
+import re
+import zlib
+import time
+import hashlib
+import logging
+import datetime
+
+from wxgtd.lib import ignore_exceptions
+from wxgtd.lib import jsoncodec
+
+_LOG = logging.getLogger(__name__)
+
+# size of chunk; multiply of any sqlite page size up to 64k
+CHUNK_SIZE = 64 * 1024
+
+_RE_DAILY_NAME = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class BackupStoreError(RuntimeError):
+	""" Store is damaged or snapshot not exists. """
+	pass
+
+
+def _write_atomic(filename, data):
+	tmp_filename = filename + ".tmp"
+	with open(tmp_filename, "wb") as ofile:
+		ofile.write(data)
+	os.replace(tmp_filename, filename)
+
+
+class BackupStore(object):
+	""" Deduplicated backups store.
+
+	Args:
+		path: store directory (created when needed)
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		self._chunks_dir = os.path.join(path, "chunks")
+		self._snapshots_dir = os.path.join(path, "snapshots")
+
+	def _chunk_path(self, digest):
+		return os.path.join(self._chunks_dir, digest[:2], digest)
+
+	def _manifest_path(self, name):
+		return os.path.join(self._snapshots_dir, name + ".json")
+
+	def list_snapshots(self):
+		""" Get names of snapshots, newest first. """
+		if not os.path.isdir(self._snapshots_dir):
+			return []
+		return sorted((fname[:-5] for fname in os.listdir(self._snapshots_dir)
+				if fname.endswith(".json")), reverse=True)
+
+	def has_snapshot(self, name):
+		return os.path.isfile(self._manifest_path(name))
+
+	def get_manifest(self, name):
+		""" Load snapshot manifest. """
+		try:
+			with open(self._manifest_path(name), "rb") as ifile:
+				return jsoncodec.loads(ifile.read())
+		except (IOError, OSError):
+			raise BackupStoreError("Snapshot %r not found" % name)
+		except ValueError as err:
+			raise BackupStoreError("Snapshot %r is damaged: %s" % (name, err))
+
+	def add_snapshot(self, filename, name):
+		""" Store content of file as snapshot `name`.
+
+		Returns:
+			(number of chunks, number of new chunks)
+		"""
+		_LOG.info("BackupStore.add_snapshot(%r, %r)", filename, name)
+		os.makedirs(self._snapshots_dir, exist_ok=True)
+		chunks = []
+		new_chunks = 0
+		size = 0
+		total_hash = hashlib.sha256()
+		with open(filename, "rb") as ifile:
+			while True:
+				data = ifile.read(CHUNK_SIZE)
+				if not data:
+					break
+				size += len(data)
+				total_hash.update(data)
+				digest = hashlib.sha256(data).hexdigest()
+				chunks.append(digest)
+				chunk_path = self._chunk_path(digest)
+				if not os.path.isfile(chunk_path):
+					os.makedirs(os.path.dirname(chunk_path), exist_ok=True)
+					_write_atomic(chunk_path, zlib.compress(data))
+					new_chunks += 1
+		manifest = {'name': name,
+				'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+				'size': size,
+				'sha256': total_hash.hexdigest(),
+				'chunk_size': CHUNK_SIZE,
+				'chunks': chunks}
+		_write_atomic(self._manifest_path(name),
+				jsoncodec.dumps(manifest))
+		_LOG.info("BackupStore.add_snapshot: %d chunks, %d new", len(chunks),
+				new_chunks)
+		return len(chunks), new_chunks
+
+	def _read_chunk(self, digest):
+		try:
+			with open(self._chunk_path(digest), "rb") as ifile:
+				data = zlib.decompress(ifile.read())
+		except (IOError, OSError):
+			raise BackupStoreError("Missing chunk %s" % digest)
+		except zlib.error:
+			raise BackupStoreError("Damaged chunk %s" % digest)
+		if hashlib.sha256(data).hexdigest() != digest:
+			raise BackupStoreError("Damaged chunk %s" % digest)
+		return data
+
+	def restore(self, name, filename):
+		""" Write content of snapshot to file. """
+		_LOG.info("BackupStore.restore(%r, %r)", name, filename)
+		manifest = self.get_manifest(name)
+		total_hash = hashlib.sha256()
+		tmp_filename = filename + ".tmp"
+		try:
+			with open(tmp_filename, "wb") as ofile:
+				for digest in manifest['chunks']:
+					data = self._read_chunk(digest)
+					total_hash.update(data)
+					ofile.write(data)
+			if total_hash.hexdigest() != manifest['sha256']:
+				raise BackupStoreError("Snapshot %r checksum mismatch" % name)
+			os.replace(tmp_filename, filename)
+		finally:
+			with ignore_exceptions(OSError):
+				os.unlink(tmp_filename)
+
+	def verify(self, names=None):
+		""" Check snapshots integrity.
+
+		Each chunk is read and checked against its hash once, even when it
+		is shared by many snapshots.
+
+		Args:
+			names: snapshots to check; default all
+
+		Returns:
+			List of errors (empty when everything is ok).
+		"""
+		errors = []
+		# digest -> error or None
+		checked = {}
+		for name in names or self.list_snapshots():
+			try:
+				manifest = self.get_manifest(name)
+			except BackupStoreError as err:
+				errors.append(str(err))
+				continue
+			chunks = manifest['chunks']
+			chunk_size = manifest.get('chunk_size', CHUNK_SIZE)
+			if len(chunks) != (manifest['size'] + chunk_size - 1) // chunk_size:
+				errors.append("%s: invalid number of chunks" % name)
+				continue
+			for digest in chunks:
+				if digest not in checked:
+					try:
+						self._read_chunk(digest)
+						checked[digest] = None
+					except BackupStoreError as err:
+						checked[digest] = str(err)
+				if checked[digest]:
+					errors.append("%s: %s" % (name, checked[digest]))
+		return errors
+
+	def remove_snapshot(self, name):
+		""" Remove snapshot manifest; chunks are removed by `gc`. """
+		_LOG.info("BackupStore.remove_snapshot(%r)", name)
+		with ignore_exceptions(OSError):
+			os.unlink(self._manifest_path(name))
+
+	def apply_retention(self, daily=7, weekly=4, monthly=12):
+		""" Remove old daily snapshots.
+
+		Keep newest snapshot from last `daily` days, `weekly` weeks and
+		`monthly` months. Snapshots not named by date are always kept.
+
+		Returns:
+			List of removed snapshots.
+		"""
+		keep = set()
+		days = []
+		for name in self.list_snapshots():
+			if _RE_DAILY_NAME.match(name):
+				days.append((name, datetime.datetime.strptime(name,
+						"%Y-%m-%d").date()))
+		for count, period in ((daily, lambda day: day),
+				(weekly, lambda day: day.isocalendar()[:2]),
+				(monthly, lambda day: (day.year, day.month))):
+			periods = set()
+			for name, day in days:
+				if len(periods) >= count:
+					break
+				key = period(day)
+				if key not in periods:
+					periods.add(key)
+					keep.add(name)
+		removed = [name for name, _day in days if name not in keep]
+		for name in removed:
+			self.remove_snapshot(name)
+		return removed
+
+	def gc(self):
+		""" Remove chunks not used by any snapshot.
+
+		Returns:
+			Number of removed chunks.
+		"""
+		used = set()
+		for name in self.list_snapshots():
+			used.update(self.get_manifest(name)['chunks'])
+		removed = 0
+		if not os.path.isdir(self._chunks_dir):
+			return removed
+		for subdir in os.listdir(self._chunks_dir):
+			subdir_path = os.path.join(self._chunks_dir, subdir)
+			for digest in os.listdir(subdir_path):
+				if digest not in used:
+					os.unlink(os.path.join(subdir_path, digest))
+					removed += 1
+		_LOG.info("BackupStore.gc: removed %d chunks", removed)
+		return removed
+
+	def disk_usage(self):
+		""" Get size of all files in store (in bytes). """
+		size = 0
+		for root, _dirs, files in os.walk(self.path):
+			size += sum(os.path.getsize(os.path.join(root, fname))
+					for fname in files)
+		return size
@@ -26,6 +26,8 @@ from sqlalchemy.engine import Engine
 
 from wxgtd.model import sqls
 from wxgtd.model import objects
+from wxgtd.model import archive
+from wxgtd.model import dictregistry
 
 _LOG = logging.getLogger(__name__)
 
@@ -37,6 +39,33 @@ def _set_sqlite_pragma(dbapi_connection, _connection_record):
 	cursor.close()
 
 
+def _create_missing_indexes(engine):
+	""" Create indexes added to existing tables (create_all skip them).
+
+	Returns:
+		number of created indexes
+	"""
+	existing = set(row[0] for row in engine.execute(
+			"SELECT name FROM sqlite_master WHERE type = 'index'"))
+	created = 0
+	for table in objects.Base.metadata.sorted_tables:
+		for index in table.indexes:
+			if index.name not in existing:
+				index.create(engine)
+				created += 1
+	return created
+
+
+def _analyze(engine, force=False):
+	""" Collect statistics for query planner when missing (new or upgraded
+	database) or when indexes changed (`force`). Without them sqlite prefer
+	indexes with low selectivity (like tasks.deleted) over i.e. tag lookups.
+	"""
+	if force or not engine.execute("SELECT 1 FROM sqlite_master "
+			"WHERE name = 'sqlite_stat1'").first():
+		engine.execute("ANALYZE")
+
+
 def connect(filename, debug=False, *args, **kwargs):
 	""" Create connection  to database  & initiate it.
 
@@ -49,14 +78,21 @@ def connect(filename, debug=False, *args, **kwargs):
 		Sqlalchemy Session class
 	"""
 	_LOG.info('connect %r', (filename, args, kwargs))
+	# sessions are also used by ipc server thread
 	engine = sqlalchemy.create_engine("sqlite:///" + filename, echo=debug,
 			connect_args={'detect_types': sqlite3.PARSE_DECLTYPES |
-				sqlite3.PARSE_COLNAMES}, native_datetime=True)
+				sqlite3.PARSE_COLNAMES, 'check_same_thread': False},
+			native_datetime=True)
+	# archive is opt-in: attached when enabled or already created
+	archive_file = archive.archive_filename(filename)
+	if archive.get_archive_days() or os.path.isfile(archive_file):
+		archive.attach(engine, archive_file)
 	for schema in sqls.SCHEMA_DEF:
 		for sql in schema:
 			engine.execute(sql)
 	sqls.fix_synclog(engine)
 	objects.Session.configure(bind=engine)  # pylint: disable=E1120
+	dictregistry.clear()
 
 	if debug:
 		@sqlalchemy.event.listens_for(Engine, "before_cursor_execute")
@@ -72,6 +108,11 @@ def connect(filename, debug=False, *args, **kwargs):
 
 	_LOG.info('Database create_all START')
 	objects.Base.metadata.create_all(engine)
+	sqls.fix_tasks_tree_path(engine)
+	sqls.fix_tasks_child_counters(engine)
+	# after fixes - indexes may use added columns
+	indexes_changed = _create_missing_indexes(engine) + \
+			sqls.drop_obsolete_indexes(engine)
 	_LOG.info('Database create_all COMPLETED')
 	# bootstrap
 	_LOG.info('Database bootstrap START')
@@ -112,6 +153,10 @@ def connect(filename, debug=False, *args, **kwargs):
 	_LOG.debug("Cleanup synclog")
 	engine.execute("delete from synclog where sync_time is null")
 
+	_LOG.debug('Move old finished tasks to archive')
+	archive.move_finished(engine)
+	_analyze(engine, indexes_changed > 0)
+
 	_LOG.info('Database bootstrap COMPLETED')
 	return objects.Session
 
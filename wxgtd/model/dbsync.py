@@ -16,34 +16,34 @@ __version__ = "2025-12-03"
 
 
 import os
+import time
+import hashlib
 import logging
 import gettext
 import tempfile
 import datetime
-
-try:
-	import cjson
-	_JSON_DECODER = cjson.decode
-	_JSON_ENCODER = cjson.encode
-except ImportError:
-	import json
-	_JSON_DECODER = json.loads
-	_JSON_ENCODER = json.dumps
+from concurrent import futures
 
 try:
 	import dropbox
 	from dropbox import DropboxOAuth2FlowNoRedirect
 	from dropbox.exceptions import ApiError, AuthError
+	from dropbox.exceptions import RateLimitError, InternalServerError
+	# errors worth retrying request; network errors are OSError
+	_TRANSIENT_ERRORS = (OSError, RateLimitError, InternalServerError)
 except ImportError:
 	dropbox = None  # pylint: disable=C0103
 	DropboxOAuth2FlowNoRedirect = None
 	ApiError = None
 	AuthError = None
+	_TRANSIENT_ERRORS = (OSError, )
 
 from wxgtd.wxtools.wxpub import publisher
 
 from wxgtd.lib import appconfig
 from wxgtd.lib import ignore_exceptions
+from wxgtd.lib import jsoncodec
+from wxgtd.lib import pipeline
 
 from wxgtd.model import exporter
 from wxgtd.model import loader
@@ -58,6 +58,19 @@ _ = gettext.gettext
 SYNC_PATH = '/Apps/DGT-GTD/sync/GTD_SYNC.zip'
 LOCK_PATH = '/Apps/DGT-GTD/sync/sync.locked'
 
+# size of chunks in download and upload session
+CHUNK_SIZE = 4 * 1024 * 1024
+# files bigger than this are sent in upload session
+UPLOAD_SESSION_THRESHOLD = 2 * CHUNK_SIZE
+# number of attempts for one request
+RETRY_COUNT = 5
+# delay before first retry; doubled on each next attempt
+RETRY_DELAY = 1.0
+# size of blocks in Dropbox content hash
+_HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+_sleep = time.sleep
+
 
 def is_available():
 	return bool(dropbox)
@@ -79,18 +92,160 @@ def _create_session():
 	return dropbox.Dropbox(access_token)
 
 
+def _api_errors():
+	return (ApiError, ) if ApiError else ()
+
+
+def _retry(func, *args, **kwargs):
+	""" Call `func`; on transient errors retry it with exponential backoff.
+	"""
+	delay = RETRY_DELAY
+	for attempt in range(1, RETRY_COUNT + 1):
+		try:
+			return func(*args, **kwargs)
+		except _TRANSIENT_ERRORS as err:
+			if attempt == RETRY_COUNT:
+				raise
+			wait = getattr(err, 'backoff', None) or delay
+			_LOG.warning("_retry: %s failed (%s); attempt %d, waiting %.1fs",
+					getattr(func, '__name__', func), err, attempt, wait)
+			_sleep(wait)
+			delay *= 2
+	return None
+
+
 def download_file(file_obj, source, dbclient):
+	""" Download file from Dropbox streaming it to `file_obj`.
+
+	Returns:
+		False when file not exists or is empty.
+	"""
 	_LOG.info('download_file')
-	try:
+
+	def download():
 		metadata, response = dbclient.files_download(source)
-		if metadata and metadata.size > 0:
-			file_obj.write(response.content)
+		try:
+			if not metadata or metadata.size <= 0:
+				return False
+			file_obj.seek(0)
+			file_obj.truncate()
+			for chunk in response.iter_content(CHUNK_SIZE):
+				file_obj.write(chunk)
 			return True
-	except ApiError as err:
+		finally:
+			response.close()
+
+	try:
+		return _retry(download)
+	except _api_errors() as err:
 		_LOG.warning("download_file: %r not found - %s", source, err)
 	return False
 
 
+def _lookup_error(error):
+	""" Get UploadSessionLookupError from upload session error. """
+	error = getattr(error, 'error', None)
+	# finish wraps lookup error
+	if error is not None and getattr(error, 'is_lookup_failed', None) and \
+			error.is_lookup_failed():
+		error = error.get_lookup_failed()
+	return error
+
+
+def _correct_offset(error):
+	""" Get offset expected by Dropbox from upload session error.
+
+	Returns:
+		`correct_offset` from UploadSessionOffsetError or None for other
+		errors.
+	"""
+	error = _lookup_error(error)
+	if error is not None and getattr(error, 'is_incorrect_offset', None) and \
+			error.is_incorrect_offset():
+		return error.get_incorrect_offset().correct_offset
+	return None
+
+
+def _session_closed(error, size):
+	""" Check is upload session error caused by already finished session
+	(all `size` bytes received or session closed). """
+	offset = _correct_offset(error)
+	if offset is not None:
+		return offset >= size
+	error = _lookup_error(error)
+	return error is not None and bool(getattr(error, 'is_closed', None)) and \
+			error.is_closed()
+
+
+def _content_hash(filename):
+	""" Compute Dropbox content hash of file (sha256 of sha256 of each
+	4MB block). """
+	blocks_hash = hashlib.sha256()
+	with open(filename, 'rb') as ifile:
+		for block in iter(lambda: ifile.read(_HASH_BLOCK_SIZE), b""):
+			blocks_hash.update(hashlib.sha256(block).digest())
+	return blocks_hash.hexdigest()
+
+
+def _is_uploaded(filename, size, dest, dbclient):
+	""" Check is `dest` in Dropbox the same as local file. """
+	try:
+		metadata = _retry(dbclient.files_get_metadata, dest)
+	except _api_errors() as err:
+		_LOG.warning("_is_uploaded: %r not found - %s", dest, err)
+		return False
+	return getattr(metadata, 'size', None) == size and \
+			getattr(metadata, 'content_hash', None) == _content_hash(filename)
+
+
+def upload_file(filename, dest, dbclient):
+	""" Upload file to Dropbox; big files are sent in chunks in upload
+	session. Existing file is overwritten.
+
+	When chunk was received by Dropbox but response was lost, retried
+	request fails with incorrect offset error; upload is continued from
+	offset reported by Dropbox. When lost was response for finishing
+	request, upload is confirmed by metadata of `dest`.
+	"""
+	size = os.path.getsize(filename)
+	_LOG.info("upload_file: %r -> %r (%d bytes)", filename, dest, size)
+	mode = dropbox.files.WriteMode('overwrite')
+	with open(filename, 'rb') as ifile:
+		if size <= UPLOAD_SESSION_THRESHOLD:
+			_retry(dbclient.files_upload, ifile.read(), dest, mode=mode)
+			return
+		data = ifile.read(CHUNK_SIZE)
+		result = _retry(dbclient.files_upload_session_start, data)
+		cursor = dropbox.files.UploadSessionCursor(
+				session_id=result.session_id, offset=len(data))
+		commit = dropbox.files.CommitInfo(path=dest, mode=mode)
+		while True:
+			ifile.seek(cursor.offset)
+			data = ifile.read(CHUNK_SIZE)
+			finishing = cursor.offset + len(data) >= size
+			try:
+				if finishing:
+					_retry(dbclient.files_upload_session_finish, data, cursor,
+							commit)
+					break
+				_retry(dbclient.files_upload_session_append_v2, data, cursor)
+			except _api_errors() as err:
+				if finishing and _session_closed(err, size):
+					if not _is_uploaded(filename, size, dest, dbclient):
+						raise
+					_LOG.warning("upload_file: session already finished; "
+							"%r is uploaded", dest)
+					break
+				offset = _correct_offset(err)
+				if offset is None or offset == cursor.offset:
+					raise
+				_LOG.warning("upload_file: offset %d rejected; continue from "
+						"%d", cursor.offset, offset)
+				cursor.offset = offset
+				continue
+			cursor.offset += len(data)
+
+
 def _delete_file(dbclient, path):
 	try:
 		dbclient.files_delete_v2(path)
@@ -101,6 +256,10 @@ def _delete_file(dbclient, path):
 def sync(load_only=False, notify_cb=_notify_progress):
 	""" Sync data from/to given file.
 
+	Backup is created concurrently with connecting and downloading sync file;
+	loader waits for it before first change in database. Time of each stage
+	is reported by `notify_cb`.
+
 	Notify progress by publisher.
 
 	Args:
@@ -116,42 +275,54 @@ def sync(load_only=False, notify_cb=_notify_progress):
 	if not appcfg.get('dropbox', 'access_token') and not appcfg.get('dropbox', 'oauth_key'):
 		raise SYNC.OtherSyncError(_("Dropbox is not configured."))
 	notify_cb(0, _("Sync via Dropbox API v2...."))
+	timer = pipeline.StageTimer()
 	notify_cb(1, _("Creating backup"))
-	SYNC.create_backup()
+	with futures.ThreadPoolExecutor(1) as executor:
+		backup = executor.submit(timer.timed("backup", SYNC.create_backup))
+		_sync(load_only, notify_cb, timer, backup.result)
+		backup.result()
+	timer.report(notify_cb)
+	notify_cb(100, _("Completed"))
+
+
+def _sync(load_only, notify_cb, timer, wait_for_backup):
 	notify_cb(25, _("Checking sync lock"))
 	try:
 		dbclient = _create_session()
 	except (ApiError, AuthError) as error:
 		raise SYNC.OtherSyncError(_("Dropbox: connection failed: %s") %
 				str(error))
-	temp_file = tempfile.NamedTemporaryFile(suffix='.zip', delete=False)
-	temp_filename = temp_file.name
-	if create_sync_lock(dbclient):
-		notify_cb(2, _("Downloading..."))
-		try:
-			loaded = download_file(temp_file, SYNC_PATH, dbclient)
-			temp_file.close()
-			if loaded:
-				loader.load_from_file(temp_filename, notify_cb)
-			if not load_only:
-				exporter.save_to_file(temp_filename, notify_cb, 'GTD_SYNC.json')
-				_delete_file(dbclient, SYNC_PATH)
-				notify_cb(20, _("Uploading..."))
-				with open(temp_filename, 'rb') as temp_file:
-					dbclient.files_upload(temp_file.read(), SYNC_PATH, mode=dropbox.files.WriteMode('overwrite'))
-		except Exception as err:
-			_LOG.exception("file sync error")
-			raise SYNC.OtherSyncError(err)
-		finally:
-			notify_cb(90, _("Removing sync lock"))
-			_delete_file(dbclient, LOCK_PATH)
-			with ignore_exceptions(IOError):
-				os.unlink(temp_filename)
-		notify_cb(100, _("Completed"))
-	else:
+	with timer.stage("lock"):
+		locked = not create_sync_lock(dbclient)
+	if locked:
 		notify_cb(100, _("Synchronization file is locked. "
 			"Can't synchronize..."))
 		raise SYNC.SyncLockedError()
+	temp_file = tempfile.NamedTemporaryFile(suffix='.zip', delete=False)
+	temp_filename = temp_file.name
+	notify_cb(2, _("Downloading..."))
+	try:
+		with timer.stage("download"):
+			loaded = download_file(temp_file, SYNC_PATH, dbclient)
+		temp_file.close()
+		if loaded:
+			loader.load_from_file(temp_filename, notify_cb,
+					before_apply=wait_for_backup, timer=timer)
+		if not load_only:
+			with timer.stage("export"):
+				exporter.save_to_file(temp_filename, notify_cb,
+						'GTD_SYNC.json')
+			notify_cb(20, _("Uploading..."))
+			with timer.stage("upload"):
+				upload_file(temp_filename, SYNC_PATH, dbclient)
+	except Exception as err:
+		_LOG.exception("file sync error")
+		raise SYNC.OtherSyncError(err)
+	finally:
+		notify_cb(90, _("Removing sync lock"))
+		_delete_file(dbclient, LOCK_PATH)
+		with ignore_exceptions(IOError):
+			os.unlink(temp_filename)
 
 
 def create_sync_lock(dbclient):
@@ -180,7 +351,7 @@ def create_sync_lock(dbclient):
 	synclog = {'deviceId': device_id.val,
 			"startTime": exporter.fmt_date(datetime.datetime.utcnow())}
 	session.flush()  # pylint: disable=E1101
-	synclog_data = _JSON_ENCODER(synclog).encode('utf-8')
+	synclog_data = jsoncodec.dumps(synclog)
 	dbclient.files_upload(synclog_data, LOCK_PATH, mode=dropbox.files.WriteMode('overwrite'))
 	return True
 
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+""" In-memory registry of dictionaries: contexts, folders, goals and tags.
+
+Each dictionary is loaded by one query on first use and then kept up to
+date from committed sessions: dictionary objects added, modified or
+deleted in flush are collected and applied to registry after commit
+(changes in not committed transactions are dropped). Every applied change
+increments `version()`, so views can skip rebuilding when nothing changed.
+
+Items are kept as read-only `DictItem` tuples, not as objects bound to any
+session.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import logging
+import itertools
+import threading
+import collections
+
+from sqlalchemy import event, orm
+
+from wxgtd.model import objects as OBJ
+
+_LOG = logging.getLogger(__name__)
+
+DictItem = collections.namedtuple('DictItem',
+		'uuid title parent_uuid deleted')
+
+# session.info key: {(class, uuid): DictItem or None for deleted}
+_PENDING = 'wxgtd.dictregistry_pending'
+
+_LOCK = threading.RLock()
+
+
+class DictRegistry(object):
+	""" Items of one dictionary kept in memory.
+
+	Args:
+		cls: class of dictionary objects (Context, Folder, Goal, Tag)
+	"""
+
+	def __init__(self, cls):
+		self._cls = cls
+		# uuid -> DictItem; None = not loaded
+		self._items = None
+		# lower title -> uuid of not deleted item; None = must be rebuilt
+		self._by_title = None
+		# title -> uuid of any item; None = must be rebuilt
+		self._by_exact_title = None
+		# uuid -> title; None = must be rebuilt
+		self._titles = None
+		self.version = 0
+
+	def _load(self, session=None):
+		items = self._items
+		if items is not None:
+			return items
+		with _LOCK:
+			if self._items is None:
+				session = session or OBJ.Session()
+				cls = self._cls
+				query = session.query(cls.uuid, cls.title, cls.parent_uuid,
+						cls.deleted)
+				self._items = {row[0]: DictItem(*row) for row in query}
+				self._by_title = self._by_exact_title = self._titles = None
+				_LOG.debug("DictRegistry: loaded %d %s", len(self._items),
+						cls.__name__)
+			return self._items
+
+	def get(self, uuid, session=None):
+		""" Get DictItem by uuid or None when not exists. """
+		return self._load(session).get(uuid)
+
+	def titles(self, session=None):
+		""" Get map uuid -> title for all items (also deleted).
+
+		Returned dict is shared and must not be modified.
+		"""
+		titles = self._titles
+		if titles is None:
+			titles = self._titles = {uuid: item.title for uuid, item
+					in self._load(session).items()}
+		return titles
+
+	def items(self, session=None):
+		""" Get not deleted items ordered by title. """
+		return sorted((item for item in self._load(session).values()
+				if not item.deleted), key=lambda item: item.title or '')
+
+	def find(self, title, session=None, exact=False):
+		""" Find uuid of not deleted item by title (case insensitive).
+
+		Args:
+			title: title of item
+			session: optional session used to load dictionary
+			exact: match title exactly and include deleted items (like
+				`filter_by(title=title)`)
+
+		Returns:
+			uuid or None when not found.
+		"""
+		if exact:
+			by_exact_title = self._by_exact_title
+			if by_exact_title is None:
+				by_exact_title = {}
+				for item in self._load(session).values():
+					by_exact_title.setdefault(item.title, item.uuid)
+				self._by_exact_title = by_exact_title
+			return by_exact_title.get(title)
+		by_title = self._by_title
+		if by_title is None:
+			by_title = {}
+			for item in self._load(session).values():
+				if not item.deleted:
+					by_title.setdefault((item.title or '').lower(), item.uuid)
+			self._by_title = by_title
+		return by_title.get((title or '').lower())
+
+	def apply(self, changes):
+		""" Apply changes: uuid -> DictItem or None for removed items. """
+		with _LOCK:
+			if self._items is not None:
+				for uuid, item in changes.items():
+					if item is None:
+						self._items.pop(uuid, None)
+					else:
+						self._items[uuid] = item
+				self._by_title = self._by_exact_title = self._titles = None
+			self.version += 1
+
+	def clear(self):
+		""" Drop loaded items; they will be loaded on next use. """
+		with _LOCK:
+			self._items = None
+			self._by_title = self._by_exact_title = self._titles = None
+			self.version += 1
+
+
+_REGISTRIES = {'contexts': DictRegistry(OBJ.Context),
+		'folders': DictRegistry(OBJ.Folder),
+		'goals': DictRegistry(OBJ.Goal),
+		'tags': DictRegistry(OBJ.Tag)}
+_BY_CLASS = {registry._cls: registry  # pylint: disable=W0212
+		for registry in _REGISTRIES.values()}
+
+
+def get(name):
+	""" Get registry for dictionary.
+
+	Args:
+		name: one of 'contexts', 'folders', 'goals', 'tags'
+	"""
+	return _REGISTRIES[name]
+
+
+def for_class(cls):
+	""" Get registry for class of dictionary objects. """
+	return _BY_CLASS[cls]
+
+
+def version():
+	""" Number changed on every change of any dictionary. """
+	return sum(registry.version for registry in _REGISTRIES.values())
+
+
+def clear():
+	""" Drop all loaded dictionaries (i.e. after database change). """
+	for registry in _REGISTRIES.values():
+		registry.clear()
+
+
+def _to_item(obj):
+	return DictItem(obj.uuid, obj.title, obj.parent_uuid, obj.deleted)
+
+
+@event.listens_for(orm.Session, 'after_flush')
+def _collect_changes(session, _flush_context):
+	pending = None
+	deleted = session.deleted
+	for obj in itertools.chain(session.new, session.dirty, deleted):
+		if type(obj) in _BY_CLASS:
+			if pending is None:
+				pending = session.info.setdefault(_PENDING, {})
+			pending[(type(obj), obj.uuid)] = (None if obj in deleted
+					else _to_item(obj))
+
+
+@event.listens_for(orm.Session, 'after_commit')
+def _apply_changes(session):
+	pending = session.info.pop(_PENDING, None)
+	if not pending:
+		return
+	changes = collections.defaultdict(dict)
+	for (cls, uuid), item in pending.items():
+		changes[cls][uuid] = item
+	for cls, items in changes.items():
+		_BY_CLASS[cls].apply(items)
+
+
+@event.listens_for(orm.Session, 'after_transaction_end')
+def _drop_changes(session, transaction):
+	# called also after commit, when changes are already applied
+	if transaction.parent is None:
+		session.info.pop(_PENDING, None)
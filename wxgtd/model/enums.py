@@ -135,3 +135,12 @@ GOAL_TIME_TERM = {0: _("Lifelong"),
 		1: _("Long Term"),
 		2: _("Short Term")}
 
+
+# how tasks are matched to tags selected in filter
+TAGS_MATCH_ANY = 'any'
+TAGS_MATCH_ALL = 'all'
+TAGS_MATCH_NONE = 'none'
+
+TAGS_MATCH_LIST = [(TAGS_MATCH_ANY, _("Any of selected tags")),
+	(TAGS_MATCH_ALL, _("All of selected tags")),
+	(TAGS_MATCH_NONE, _("None of selected tags"))]
@@ -16,24 +16,23 @@ Copyright (c) Johan Andersson, 2025"""
 __version__ = "2025-12-03"
 
 import os
+import time
 import logging
 import zipfile
 import datetime
 import gettext
 import csv
 import sys
-try:
-	import cjson
-	_JSON_DECODER = cjson.decode
-	_JSON_ENCODER = cjson.encode
-except ImportError:
-	import json
-	_JSON_DECODER = json.loads
-	_JSON_ENCODER = json.dumps
+import functools
+
+from sqlalchemy import orm
 
 from wxgtd.lib import fmt
+from wxgtd.lib import jsoncodec
 from wxgtd.model import objects
+from wxgtd.model import archive
 from wxgtd.model import enums
+from wxgtd.model import taskrow
 
 _LOG = logging.getLogger(__name__)
 _ = gettext.gettext
@@ -63,7 +62,7 @@ def save_to_file(filename, notify_cb=_fake_update_func, internal_fname=None):
 			notify_cb(85, _("Writing..."))
 			zfile.writestr(fname, data)
 	else:
-		with open(filename, 'w') as ifile:
+		with open(filename, 'wb') as ifile:
 			ifile.write(dump_database_to_json(notify_cb))
 	notify_cb(99, _("Saved"))
 
@@ -193,7 +192,7 @@ def _build_uuid_map(session, objclass):
 
 	Args:
 		session: sqlalchemy session
-		objclass: class of objects to query
+		objclass: class (or aliased class) of objects to query
 
 	Returns:
 		Dictionary uuid -> object id
@@ -214,7 +213,7 @@ def dump_database_to_json(notify_cb):
 		notify_cb: function called on each step.
 
 	Returns:
-		Data encoded in json format.
+		Data encoded in json format (UTF-8 bytes).
 	"""
 	res = {'version': 2}
 
@@ -249,7 +248,7 @@ def dump_database_to_json(notify_cb):
 	# Convert to Android format for compatibility with Android app
 	res = _convert_to_android_format(res)
 
-	return _JSON_ENCODER(res)
+	return jsoncodec.dumps(res)
 
 
 def _check_existing_synclock(lock_filename, my_device_id):
@@ -265,8 +264,8 @@ def _check_existing_synclock(lock_filename, my_device_id):
 	if not os.path.isfile(lock_filename):
 		return True
 	data = None
-	with open(lock_filename, 'r') as lock_file:
-		data = _JSON_DECODER(lock_file.read().decode('UTF-8'))
+	with open(lock_filename, 'rb') as lock_file:
+		data = jsoncodec.loads(lock_file.read())
 	if data:
 		sync_device = data.get('deviceId')
 		if sync_device != my_device_id:
@@ -299,8 +298,8 @@ def create_sync_lock(sync_filename):
 	if not _check_existing_synclock(lock_filename, device_id.val):
 		return False
 	_LOG.debug('create_sync_lock: writing synclog: %r', lock_filename)
-	with open(lock_filename, 'w') as ifile:
-		ifile.write(_JSON_ENCODER(synclog))
+	with open(lock_filename, 'wb') as ifile:
+		ifile.write(jsoncodec.dumps(synclog))
 	return True
 
 
@@ -397,14 +396,17 @@ def _dump_tasks(session, notify_cb, folders_cache, contexts_cache,
 		goals_cache):
 	notify_cb(16, _("Saving task, alarms..."))
 	_LOG.info("dump_database_to_json: tasks")
-	tasks_cache = _build_uuid_map(session, objects.Task)
+	# sync file contains also archived tasks
+	task_cls = archive.entity(session, objects.Task)
+	tasks_cache = _build_uuid_map(session, task_cls)
 	tasks = []
 	alarms = []
 	task_folders = []
 	task_contexts = []
 	task_goals = []
-	for task in session.query(objects.Task).filter(  # pylint: disable=E1101
-			objects.Task.deleted.is_(None)):
+	for task in session.query(task_cls).options(  # pylint: disable=E1101
+			orm.Load(task_cls).undefer_group('note')).filter(
+					task_cls.deleted.is_(None)):
 		tasks.append({'_id': tasks_cache[task.uuid],
 				'parent_id': tasks_cache[task.parent_uuid] if task.parent_uuid
 						else 0,
@@ -505,9 +507,10 @@ def _dump_task_notes(session, notify_cb, tasks_cache):
 	notify_cb(60, _("Saving task notes"))
 	# tasknotes
 	_LOG.info("dump_database_to_json: tasknotes")
-	tasknotes_cache = _build_uuid_map(session, objects.Tasknote)
+	tasknote_cls = archive.entity(session, objects.Tasknote)
+	tasknotes_cache = _build_uuid_map(session, tasknote_cls)
 	tasknotes = []
-	for obj in session.query(objects.Tasknote):  # pylint: disable=E1101
+	for obj in session.query(tasknote_cls):  # pylint: disable=E1101
 		folder = {'_id': tasknotes_cache[obj.uuid],
 				'task_id': tasks_cache[obj.task_uuid],
 				'uuid': obj.uuid,
@@ -525,7 +528,8 @@ def _dump_task_notes(session, notify_cb, tasks_cache):
 def _dump_task_tags(session, notify_cb, tasks_cache, tags_cache):
 	notify_cb(65, _("Saving task tags"))
 	tasktags = []
-	for obj in session.query(objects.TaskTag):  # pylint: disable=E1101
+	tasktag_cls = archive.entity(session, objects.TaskTag)
+	for obj in session.query(tasktag_cls):  # pylint: disable=E1101
 		ttag = {'task_id': tasks_cache[obj.task_uuid],
 				'tag_id': tags_cache[obj.tag_uuid],
 				'created': fmt_date(obj.created),
@@ -566,6 +570,7 @@ def _dump_notebooks(session, notify_cb, folders_cache):
 	notebooks = []
 	notebook_folders = []
 	for notebook in (session.query(objects.NotebookPage)  # pylint: disable=E1101
+			.options(orm.undefer_group('note'))
 			.filter(objects.NotebookPage.deleted.is_(None))):
 		notebooks.append({'_id': notebooks_cache[notebook.uuid],
 				'uuid': notebook.uuid,
@@ -591,6 +596,21 @@ def _dump_notebooks(session, notify_cb, folders_cache):
 	return res
 
 
+# number of tasks formatted at once in dump_tasks_to_csv
+_CSV_CHUNK_SIZE = 1000
+
+
+@functools.lru_cache(maxsize=1)
+def _type_names():
+	return {enums.TYPE_PROJECT: _('project'),
+			enums.TYPE_CHECKLIST: _('checklist'),
+			enums.TYPE_CHECKLIST_ITEM: _('checklist item'),
+			enums.TYPE_CALL: _('call'),
+			enums.TYPE_RETURN_CALL: _('return call'),
+			enums.TYPE_EMAIL: _('email'),
+			enums.TYPE_SMS: _('sms')}
+
+
 def dump_tasks_to_csv(tasks, verbose, output=sys.stdout):
 	""" Export task list to stdout in cvs format. """
 	fields = []
@@ -608,46 +628,68 @@ def dump_tasks_to_csv(tasks, verbose, output=sys.stdout):
 		fields.append(_('Task UUID'))
 	writer = csv.writer(output, delimiter=';')
 	writer.writerow(fields)
-	types = {enums.TYPE_PROJECT: _('project'),
-			enums.TYPE_CHECKLIST: _('checklist'),
-			enums.TYPE_CHECKLIST_ITEM: _('checklist item'),
-			enums.TYPE_CALL: _('call'),
-			enums.TYPE_RETURN_CALL: _('return call'),
-			enums.TYPE_EMAIL: _('email'),
-			enums.TYPE_SMS: _('sms')}
-	for task in tasks:
-		row = [task.title,
-				fmt.format_timestamp(task.completed, True),
-				fmt.format_timestamp(task.due_date, task.due_time_set),
-				fmt.format_timestamp(task.start_date, task.start_time_set)]
-		if verbose > 0:
-			row.append('*' if task.starred else '')
-			row.append(types.get(task.type, 'task'))
-			row.append(str(task.priority) if task.priority >= 0 else '')
-			row.append(fmt.format_timestamp(task.alarm, True))
-			row.append(task.repeat_pattern or '')
-			row.append(task.note or '')
-		if verbose > 1:
-			row.append(task.uuid)
-		writer.writerow(row)
+	types = _type_names()
+	for chunk in _iter_chunks(tasks, _CSV_CHUNK_SIZE):
+		# format dates column by column
+		completed = fmt.format_timestamps([task.completed for task in chunk])
+		due_dates = fmt.format_timestamps([task.due_date for task in chunk],
+				[task.due_time_set for task in chunk])
+		start_dates = fmt.format_timestamps(
+				[task.start_date for task in chunk],
+				[task.start_time_set for task in chunk])
+		alarms = fmt.format_timestamps([task.alarm for task in chunk]) \
+				if verbose > 0 else None
+		for idx, task in enumerate(chunk):
+			row = [task.title, completed[idx], due_dates[idx],
+					start_dates[idx]]
+			if verbose > 0:
+				row.append('*' if task.starred else '')
+				row.append(types.get(task.type, 'task'))
+				row.append(str(task.priority) if task.priority >= 0 else '')
+				row.append(alarms[idx])
+				row.append(task.repeat_pattern or '')
+				row.append(task.note or '')
+			if verbose > 1:
+				row.append(task.uuid)
+			writer.writerow(row)
+
+
+def _iter_chunks(items, size):
+	""" Split iterable into lists of `size` items. """
+	chunk = []
+	for item in items:
+		chunk.append(item)
+		if len(chunk) == size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+
+_TEXT_TYPE_NAMES = {enums.TYPE_PROJECT: 'P',
+		enums.TYPE_CHECKLIST: 'C',
+		enums.TYPE_CHECKLIST_ITEM: '-',
+		enums.TYPE_CALL: 'c',
+		enums.TYPE_RETURN_CALL: 'r',
+		enums.TYPE_EMAIL: 'e',
+		enums.TYPE_SMS: 's'}
 
 
 def dump_tasks_to_text(tasks, verbose, output=sys.stdout, title_width=80):
-	""" Export task list to stdout in human-friendly format. """
-	types = {enums.TYPE_PROJECT: 'P',
-			enums.TYPE_CHECKLIST: 'C',
-			enums.TYPE_CHECKLIST_ITEM: '-',
-			enums.TYPE_CALL: 'c',
-			enums.TYPE_RETURN_CALL: 'r',
-			enums.TYPE_EMAIL: 'e',
-			enums.TYPE_SMS: 's'}
+	""" Export task list to stdout in human-friendly format.
+
+	Each task is written in one line (line breaks in title are replaced by
+	spaces).
+	"""
+	types = _TEXT_TYPE_NAMES
 	for task in tasks:
 		if verbose > 0:
 			output.write(('*' if task.starred else ' '))
 			output.write(types.get(task.type, ' '))
 			output.write(str(task.priority) if task.priority >= 0 else ' ')
 			output.write(' [F] ' if task.completed else '     ')
-		output.write('%-80s' % task.title[:title_width])
+		title = ' '.join(task.title[:title_width].splitlines())
+		output.write('%-80s' % title)
 		output.write('%-19s' % fmt.format_timestamp(task.due_date,
 			task.due_time_set))
 		output.write('%-19s' % fmt.format_timestamp(task.start_date,
@@ -656,10 +698,189 @@ def dump_tasks_to_text(tasks, verbose, output=sys.stdout, title_width=80):
 			flags = ("["
 					+ ("r" if task.repeat_pattern else " ")
 					+ ("a" if task.alarm else " ")
-					+ ("n" if task.note else " ")
+					+ ("n" if task.has_note else " ")
 					+ "]")
 			output.write(flags + " ")
 		if verbose > 1:
 			output.write(task.uuid)
 		output.write('\n')
 
+
+def _jsonl_date(date):
+	return date.isoformat() if date else None
+
+
+def dump_tasks_to_jsonl(tasks, verbose, output=sys.stdout):
+	""" Export task list as JSON Lines - one object for each task.
+
+	Dates are in ISO format (UTC); `verbose` add more fields.
+	"""
+	for task in tasks:
+		row = {'title': task.title,
+				'type': task.type,
+				'completed': _jsonl_date(task.completed),
+				'due_date': _jsonl_date(task.due_date),
+				'start_date': _jsonl_date(task.start_date)}
+		if verbose > 0:
+			row['starred'] = bool(task.starred)
+			row['priority'] = task.priority
+			row['status'] = task.status
+			row['alarm'] = _jsonl_date(task.alarm)
+			row['repeat'] = task.repeat_pattern
+			row['note'] = task.note
+		if verbose > 1:
+			row['uuid'] = task.uuid
+			row['parent_uuid'] = task.parent_uuid
+		output.write(jsoncodec.dumps(row).decode('UTF-8'))
+		output.write('\n')
+
+
+# task priority -> iCalendar priority (1 - highest, 9 - lowest)
+_ICAL_PRIORITIES = {3: 1, 2: 3, 1: 5, 0: 9}
+
+
+def _ical_escape(text):
+	return (text.replace('\\', '\\\\').replace(';', '\\;')
+			.replace(',', '\\,').replace('\r\n', '\\n')
+			.replace('\n', '\\n'))
+
+
+def _ical_line(output, line):
+	""" Write content line folded to 75 octets. """
+	data = line.encode('UTF-8')
+	if len(data) <= 75:
+		output.write(line)
+		output.write('\r\n')
+		return
+	start, size = 0, 0
+	for idx, char in enumerate(line):
+		char_size = len(char.encode('UTF-8'))
+		# continuation lines start with space
+		if size + char_size > (75 if start == 0 else 74):
+			output.write((' ' if start else '') + line[start:idx] + '\r\n')
+			start, size = idx, 0
+		size += char_size
+	output.write(' ' + line[start:] + '\r\n')
+
+
+def _ical_date(date):
+	return date.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _ical_date_prop(name, date, with_time):
+	if with_time:
+		return name + ":" + _ical_date(date)
+	return name + ";VALUE=DATE:" + date.strftime("%Y%m%d")
+
+
+def dump_tasks_to_ical(tasks, verbose, output=sys.stdout):
+	""" Export task list as iCalendar file with VTODO components.
+
+	Repeat patterns are not converted to RRULE; with `verbose` they are
+	appended to description.
+	"""
+	now = _ical_date(datetime.datetime.utcnow())
+	types = _type_names()
+	_ical_line(output, "BEGIN:VCALENDAR")
+	_ical_line(output, "VERSION:2.0")
+	_ical_line(output, "PRODID:-//wxGTD//wxGTD//EN")
+	for task in tasks:
+		_ical_line(output, "BEGIN:VTODO")
+		_ical_line(output, "UID:" + task.uuid)
+		_ical_line(output, "DTSTAMP:" + now)
+		if task.created:
+			_ical_line(output, "CREATED:" + _ical_date(task.created))
+		if task.modified:
+			_ical_line(output, "LAST-MODIFIED:" + _ical_date(task.modified))
+		_ical_line(output, "SUMMARY:" + _ical_escape(task.title or ''))
+		note = task.note or ''
+		if verbose > 0 and task.repeat_pattern:
+			note = (note + '\n\n' if note else '') + task.repeat_pattern
+		if note:
+			_ical_line(output, "DESCRIPTION:" + _ical_escape(note))
+		if task.start_date:
+			_ical_line(output, _ical_date_prop("DTSTART", task.start_date,
+					task.start_time_set))
+		if task.due_date:
+			_ical_line(output, _ical_date_prop("DUE", task.due_date,
+					task.due_time_set))
+		if task.completed:
+			_ical_line(output, "COMPLETED:" + _ical_date(task.completed))
+			_ical_line(output, "STATUS:COMPLETED")
+		else:
+			_ical_line(output, "STATUS:NEEDS-ACTION")
+		priority = _ICAL_PRIORITIES.get(task.priority)
+		if priority:
+			_ical_line(output, "PRIORITY:%d" % priority)
+		if task.parent_uuid:
+			_ical_line(output, "RELATED-TO:" + task.parent_uuid)
+		if task.type in types:
+			_ical_line(output, "CATEGORIES:" + _ical_escape(types[task.type]))
+		if verbose > 0 and task.alarm:
+			_ical_line(output, "BEGIN:VALARM")
+			_ical_line(output, "ACTION:DISPLAY")
+			_ical_line(output, "DESCRIPTION:" + _ical_escape(task.title or ''))
+			_ical_line(output, "TRIGGER;VALUE=DATE-TIME:"
+					+ _ical_date(task.alarm))
+			_ical_line(output, "END:VALARM")
+		_ical_line(output, "END:VTODO")
+	_ical_line(output, "END:VCALENDAR")
+
+
+# name -> function writing tasks into output
+EXPORT_FORMATS = {'text': dump_tasks_to_text,
+		'csv': dump_tasks_to_csv,
+		'jsonl': dump_tasks_to_jsonl,
+		'ical': dump_tasks_to_ical}
+
+# number of rows fetched from database at once
+_EXPORT_FETCH_SIZE = 1000
+
+
+def _counted(items, counter):
+	for item in items:
+		counter[0] += 1
+		yield item
+
+
+def _export_notes(output_format, verbose, with_notes):
+	""" Check if notes should be loaded for export. """
+	if with_notes is None:
+		# notes are exported only by ical and verbose csv/jsonl; text show
+		# only flag (`has_note`)
+		with_notes = output_format == 'ical' or \
+				(verbose > 0 and output_format != 'text')
+	return with_notes
+
+
+def export_tasks(query, output_format, verbose, output=sys.stdout,
+		with_notes=None):
+	""" Stream tasks selected by query into output.
+
+	Tasks are loaded as `taskrow.TaskRow`; rows are fetched in batches of
+	`_EXPORT_FETCH_SIZE` and written immediately, so memory usage don't
+	depend on number of tasks.
+
+	Args:
+		query: sqlalchemy query for Task (i.e. result of
+			Task.select_by_filters)
+		output_format: one of EXPORT_FORMATS keys
+		verbose: details level
+		output: file-like text object
+		with_notes: export notes; by default only when format and verbose
+			level show them
+
+	Returns:
+		(number of exported tasks, time in seconds)
+	"""
+	rows = taskrow.iter_rows(query,
+			_export_notes(output_format, verbose, with_notes),
+			_EXPORT_FETCH_SIZE)
+	counter = [0]
+	start = time.time()
+	EXPORT_FORMATS[output_format](_counted(rows, counter), verbose, output)
+	elapsed = time.time() - start
+	_LOG.info("export_tasks: %s, %d tasks in %.2fs (%.0f tasks/s)",
+			output_format, counter[0], elapsed,
+			counter[0] / elapsed if elapsed else 0)
+	return counter[0], elapsed
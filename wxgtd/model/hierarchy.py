@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+""" Queries on tasks hierarchy using materialized path.
+
+Each task has `tree_path` column ("/<root uuid>/.../<task uuid>/") kept
+up to date by database triggers (see `sqls.TASKS_TREE_PATH_TRIGGERS`), so
+subtree of any task is one range scan on indexed column. Whole subtree
+fetch, descendants count, ancestors chain, subtree move, clone and delete
+need constant number of queries regardless of tree depth and size.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import logging
+import datetime
+import collections
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from wxgtd.model import enums
+from wxgtd.model import objects as OBJ
+from wxgtd.model import sqls
+
+_LOG = logging.getLogger(__name__)
+
+TREE_PATH = OBJ.Task.__table__.c.tree_path
+# max number of parameters in one IN query
+_IN_CHUNK_SIZE = 500
+
+
+def subtree_condition(task_uuid, include_root=False, with_deleted=False):
+	""" Build condition selecting descendants of task.
+
+	Path of root is taken by subquery, so condition can be used in any
+	SELECT/UPDATE/DELETE statement (also with bound parameter as
+	`task_uuid`).
+
+	Args:
+		task_uuid: uuid of subtree root (or bindparam)
+		include_root: include `task_uuid` itself
+		with_deleted: include deleted tasks
+	"""
+	root = OBJ.Task.__table__.alias("root")
+	root_path = (select(root.c.tree_path).where(root.c.uuid == task_uuid)
+			.scalar_subquery())
+	conditions = [TREE_PATH >= root_path,
+			TREE_PATH < root_path + sqls.TREE_PATH_END]
+	if not include_root:
+		conditions.append(OBJ.Task.uuid != task_uuid)
+	if not with_deleted:
+		conditions.append(OBJ.Task.deleted.is_(None))
+	return and_(*conditions)
+
+
+def get_path(session, task_uuid):
+	""" Get tree path of task.
+
+	Returns:
+		path as string or None for not existing task.
+	"""
+	return session.query(TREE_PATH).filter(OBJ.Task.uuid == task_uuid)\
+			.scalar()
+
+
+def path_uuids(path):
+	""" Split tree path into list of tasks uuid from root to task. """
+	return [uuid for uuid in (path or '').split('/') if uuid]
+
+
+def subtree(session, task_uuid, include_root=False, with_deleted=False):
+	""" Get query for all descendants of task in one query.
+
+	Tasks are ordered by path, so parents come before its children.
+
+	Args:
+		session: sqlalchemy session
+		task_uuid: uuid of subtree root
+		include_root: include `task_uuid` itself
+		with_deleted: include deleted tasks
+	Returns:
+		sqlalchemy query
+	"""
+	query = session.query(OBJ.Task).filter(subtree_condition(task_uuid,
+			include_root, with_deleted))
+	return query.order_by(TREE_PATH)
+
+
+def count_descendants(session, tasks_uuid, active_only=False):
+	""" Count descendants of many tasks in one query.
+
+	Args:
+		session: sqlalchemy session
+		tasks_uuid: list of task uuid
+		active_only: count only not completed tasks
+	Returns:
+		dict task uuid -> number of not deleted descendants
+	"""
+	tasks_uuid = list(tasks_uuid)
+	if not tasks_uuid:
+		return {}
+	root = OBJ.Task.__table__.alias("root")
+	descendant = OBJ.Task.__table__.alias("descendant")
+	query = (select(root.c.uuid, func.count(descendant.c.uuid))
+			.select_from(root.join(descendant, and_(
+				descendant.c.tree_path > root.c.tree_path,
+				descendant.c.tree_path < root.c.tree_path
+					+ sqls.TREE_PATH_END)))
+			.where(root.c.uuid.in_(tasks_uuid),
+				descendant.c.deleted.is_(None))
+			.group_by(root.c.uuid))
+	if active_only:
+		query = query.where(descendant.c.completed.is_(None))
+	result = dict.fromkeys(tasks_uuid, 0)
+	result.update(session.execute(query).fetchall())
+	return result
+
+
+def get_ancestors(session, task_uuid):
+	""" Get parents of task starting from root.
+
+	Two queries: task path and all ancestors by primary key.
+
+	Returns:
+		list of Task objects
+	"""
+	uuids = path_uuids(get_path(session, task_uuid))[:-1]
+	if not uuids:
+		return []
+	tasks = {task.uuid: task for task in session.query(OBJ.Task).filter(
+			OBJ.Task.uuid.in_(uuids))}
+	return [tasks[uuid] for uuid in uuids if uuid in tasks]
+
+
+def is_in_subtree(session, task_uuid, root_uuid):
+	""" Check is `task_uuid` is `root_uuid` or any of its descendants. """
+	task_path = get_path(session, task_uuid)
+	return bool(task_path) and ('/' + root_uuid + '/') in task_path
+
+
+def move_subtree(session, task, parent):
+	""" Move task with all its descendants under `parent`.
+
+	Only parent of `task` is changed; paths of all descendants are updated
+	by one statement in database trigger on flush.
+
+	Args:
+		session: sqlalchemy session
+		task: Task to move
+		parent: new parent (Task) or None for root level
+	Returns:
+		False when `parent` is `task` or its descendant.
+	"""
+	if parent is not None and task.uuid and \
+			is_in_subtree(session, parent.uuid, task.uuid):
+		_LOG.warning("move_subtree: %r is in subtree of %r", parent.uuid,
+				task.uuid)
+		return False
+	task.parent = parent
+	return True
+
+
+def _chunks(items):
+	items = list(items)
+	for idx in range(0, len(items), _IN_CHUNK_SIZE):
+		yield items[idx:idx + _IN_CHUNK_SIZE]
+
+
+def clone_subtree(session, task_uuid):
+	""" Clone task with all not deleted descendants.
+
+	Subtree, its notes and tags are loaded by three queries and inserted by
+	three bulk INSERTs; paths of new tasks are set by database trigger
+	(parents are inserted before children). Clones are not completed and
+	get new uuids and creation time.
+
+	Args:
+		session: sqlalchemy session
+		task_uuid: uuid of subtree root
+	Returns:
+		uuid of cloned root or None when task not exists.
+	"""
+	session.flush()
+	tasks = OBJ.Task.__table__
+	in_subtree = or_(tasks.c.uuid == task_uuid, subtree_condition(task_uuid))
+	now = datetime.datetime.utcnow()
+	# old uuid -> new uuid
+	new_uuids = {}
+	new_tasks = []
+	for row in session.execute(select(tasks).where(in_subtree)
+			.order_by(TREE_PATH)):
+		values = dict(row._mapping)  # pylint: disable=W0212
+		parent_uuid = values['parent_uuid']
+		if values['uuid'] != task_uuid and parent_uuid not in new_uuids:
+			# descendant of deleted task
+			continue
+		new_uuids[values['uuid']] = values['uuid'] = OBJ.generate_uuid()
+		values['parent_uuid'] = new_uuids.get(parent_uuid, parent_uuid)
+		values['created'] = values['modified'] = now
+		values['completed'] = None
+		del values['tree_path']
+		new_tasks.append(values)
+	if not new_tasks:
+		return None
+	subtree_uuids = select(tasks.c.uuid).where(in_subtree)
+	notes = OBJ.Tasknote.__table__
+	new_notes = []
+	for row in session.execute(select(notes).where(
+			notes.c.task_uuid.in_(subtree_uuids))):
+		values = dict(row._mapping)  # pylint: disable=W0212
+		if values['task_uuid'] in new_uuids:
+			values['uuid'] = OBJ.generate_uuid()
+			values['task_uuid'] = new_uuids[values['task_uuid']]
+			values['created'] = values['modified'] = now
+			new_notes.append(values)
+	task_tags = OBJ.TaskTag.__table__
+	new_task_tags = [{'task_uuid': new_uuids[task_uuid_], 'tag_uuid': tag_uuid,
+			'created': now, 'modified': now}
+			for task_uuid_, tag_uuid in session.execute(
+				select(task_tags.c.task_uuid, task_tags.c.tag_uuid).where(
+					task_tags.c.task_uuid.in_(subtree_uuids)))
+			if task_uuid_ in new_uuids]
+	session.execute(tasks.insert(), new_tasks)
+	if new_notes:
+		session.execute(notes.insert(), new_notes)
+	if new_task_tags:
+		session.execute(task_tags.insert(), new_task_tags)
+	_LOG.debug("clone_subtree: %r -> %r, %d tasks, %d notes, %d tags",
+			task_uuid, new_uuids[task_uuid], len(new_tasks), len(new_notes),
+			len(new_task_tags))
+	return new_uuids[task_uuid]
+
+
+def delete_subtrees(session, tasks_uuid, permanently=False):
+	""" Delete tasks with all its descendants.
+
+	Uuids of all subtrees are loaded by one query, then tasks are marked
+	as deleted (or removed with notes and tags) by bulk statements.
+	Already deleted descendants keep its deletion time. Loaded objects get
+	new values as not modified (permanently deleted are expunged from
+	session).
+
+	Args:
+		session: sqlalchemy session
+		tasks_uuid: list of uuids of subtrees roots
+		permanently: if True - delete rows from database
+	Returns:
+		list of uuids of deleted tasks
+	"""
+	tasks_uuid = list(tasks_uuid)
+	if not tasks_uuid:
+		return []
+	session.flush()
+	tasks = OBJ.Task.__table__
+	uuids = [uuid for uuid, in session.execute(select(tasks.c.uuid).where(
+			or_(*[subtree_condition(uuid, include_root=True,
+				with_deleted=permanently) for uuid in tasks_uuid])))]
+	_LOG.debug("delete_subtrees: %r -> %d tasks, permanently=%r",
+			tasks_uuid, len(uuids), permanently)
+	now = datetime.datetime.now()
+	for chunk in _chunks(uuids):
+		if permanently:
+			notes = OBJ.Tasknote.__table__
+			task_tags = OBJ.TaskTag.__table__
+			session.execute(notes.delete().where(notes.c.task_uuid.in_(chunk)))
+			session.execute(task_tags.delete().where(
+					task_tags.c.task_uuid.in_(chunk)))
+			session.execute(tasks.delete().where(tasks.c.uuid.in_(chunk)))
+		else:
+			session.execute(tasks.update().where(tasks.c.uuid.in_(chunk))
+					.values(deleted=now, modified=now))
+	for uuid in uuids:
+		task = session.identity_map.get(identity_key(OBJ.Task, uuid))
+		if task is None:
+			continue
+		if permanently:
+			session.expunge(task)
+		else:
+			set_committed_value(task, 'deleted', now)
+			set_committed_value(task, 'modified', now)
+	return uuids
+
+
+def projects_tree(session):
+	""" Load tree of not deleted projects and checklists in one query.
+
+	Only projects/checklists that have chain of projects/checklists up to
+	root are included.
+
+	Returns:
+		dict parent uuid (None for root) -> list of (uuid, title, type)
+		ordered by title
+	"""
+	query = (session.query(OBJ.Task.uuid, OBJ.Task.title, OBJ.Task.type,
+			OBJ.Task.parent_uuid)
+			.filter(or_(OBJ.Task.type == enums.TYPE_CHECKLIST,
+				OBJ.Task.type == enums.TYPE_PROJECT),
+				OBJ.Task.deleted.is_(None))
+			.order_by(OBJ.Task.title))
+	children = collections.defaultdict(list)
+	for uuid, title, type_, parent_uuid in query:
+		children[parent_uuid].append((uuid, title, type_))
+	return children
+
+
+def rebuild(session):
+	""" Recalculate paths and subtasks counters of all tasks. """
+	_LOG.info("hierarchy.rebuild")
+	session.flush()
+	sqls.rebuild_tasks_tree_path(session.connection())
+	sqls.rebuild_tasks_child_counters(session.connection())
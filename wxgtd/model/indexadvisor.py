@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+""" Index advisor for tasks table.
+
+Records SQL issued by views (task lists for each group, filter tree counts,
+subtasks and reminders) and checks on copy of database which indexes are
+chosen by sqlite planner. Candidate indexes (`CANDIDATES`) used by any
+query are proposed to create; not used indexes that are not declared in
+schema (left by older versions or created manually) are proposed to drop.
+Queries and inserts are timed before and after the change.
+
+Database itself is modified only by `apply`.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import re
+import time
+import logging
+import sqlite3
+import datetime
+import itertools
+import collections
+
+from sqlalchemy import event
+from sqlalchemy.schema import CreateIndex
+
+from wxgtd.model import archive
+from wxgtd.model import objects as OBJ
+from wxgtd.model import queries
+from wxgtd.model import taskrow
+
+_LOG = logging.getLogger(__name__)
+
+# name -> DDL of additional indexes checked by advisor
+CANDIDATES = collections.OrderedDict((
+	('idx_task_active_due', "CREATE INDEX idx_task_active_due ON tasks "
+		"(due_date) WHERE deleted IS NULL AND completed IS NULL"),
+	('idx_task_active_starred', "CREATE INDEX idx_task_active_starred ON "
+		"tasks (starred, title) WHERE deleted IS NULL AND completed IS NULL"),
+))
+
+# task list groups checked by advisor
+_QUERY_GROUPS = (('all', queries.QUERY_ALL_TASK),
+		('hotlist', queries.QUERY_HOTLIST),
+		('today', queries.QUERY_TODAY),
+		('starred', queries.QUERY_STARRED),
+		('basket', queries.QUERY_BASKET),
+		('finished', queries.QUERY_FINISHED),
+		('projects', queries.QUERY_PROJECTS),
+		('checklists', queries.QUERY_CHECKLISTS),
+		('future_alarms', queries.QUERY_FUTURE_ALARMS),
+		('trash', queries.QUERY_TRASH))
+
+_RE_INDEX = re.compile(r"\bINDEX (\w+)")
+
+# how recorded queries are executed
+_ROWS, _COUNT, _OBJECTS = range(3)
+
+# one recorded query: name of view, sql and parameters
+Shape = collections.namedtuple('Shape', 'name statement params')
+
+# timings (seconds) of queries: name -> time, indexes: name -> set of used
+# indexes, inserts: time of inserting tasks
+Measurement = collections.namedtuple('Measurement', 'queries indexes inserts')
+
+# create: list of (name, sql), drop: list of names
+Advice = collections.namedtuple('Advice', 'create drop before after')
+
+
+def _workload(session):
+	""" Build queries issued by views.
+
+	Returns:
+		list of (name, query, how query is executed)
+	"""
+	result = []
+	for name, group in _QUERY_GROUPS:
+		options = queries.OPT_HIDE_UNTIL
+		if group == queries.QUERY_PROJECTS:
+			options |= queries.OPT_SHOW_SUBTASKS
+		params = queries.build_query_params(group, options, None, '')
+		result.append((name, OBJ.Task.select_by_filters(params, session),
+				_ROWS))
+	options = queries.OPT_HIDE_UNTIL | queries.OPT_SHOW_FINISHED
+	params = queries.build_query_params(queries.QUERY_ALL_TASK, options,
+			None, '')
+	result.append(('all_finished', OBJ.Task.select_by_filters(params,
+			session), _ROWS))
+	# counters in filter tree (see FrameMain._get_filter_item_count)
+	context = session.query(OBJ.Context.uuid).limit(1).scalar()
+	tag = session.query(OBJ.Tag.uuid).limit(1).scalar()
+	for key, value in (('statuses', 1), ('contexts', context),
+			('tags', tag)):
+		params = queries.build_query_params(queries.QUERY_ALL_TASK,
+				queries.OPT_HIDE_UNTIL, None, '')
+		params[key] = [value]
+		result.append(('count_' + key, OBJ.Task.select_by_filters(params,
+				session), _COUNT))
+	parent = session.query(OBJ.Task.uuid).filter(
+			OBJ.Task.children_count > 0).limit(1).scalar()
+	if parent:
+		params = queries.build_query_params(queries.QUERY_ALL_TASK,
+				queries.OPT_HIDE_UNTIL, parent, '')
+		result.append(('subtasks', OBJ.Task.select_by_filters(params,
+				session), _ROWS))
+	result.append(('reminders', OBJ.Task.select_reminders(session=session),
+			_OBJECTS))
+	return result
+
+
+def record_workload(session):
+	""" Execute queries issued by views and record theirs SQL.
+
+	Returns:
+		list of Shape
+	"""
+	shapes = []
+	current = [None]
+
+	def on_execute(_conn, _cursor, statement, parameters, _context,
+			_executemany):
+		if current[0] and statement.lstrip().upper().startswith('SELECT'):
+			shapes.append(Shape(current[0], statement, tuple(parameters)))
+
+	engine = session.get_bind()
+	event.listen(engine, 'before_cursor_execute', on_execute)
+	try:
+		for name, query, kind in _workload(session):
+			current[0] = name
+			if kind == _ROWS:
+				taskrow.select(query)
+			elif kind == _COUNT:
+				query.count()
+			else:
+				query.all()
+	finally:
+		event.remove(engine, 'before_cursor_execute', on_execute)
+	_LOG.debug("record_workload: %d queries", len(shapes))
+	return shapes
+
+
+def _copy_database(engine):
+	raw = engine.raw_connection()
+	try:
+		copy = sqlite3.connect(':memory:')
+		raw.connection.backup(copy)
+		# finished tasks and trash queries read also archive (not changed
+		# by advisor, so attach the same file)
+		for _seq, name, filename in raw.connection.execute(
+				"PRAGMA database_list"):
+			if name == archive.SCHEMA and filename:
+				copy.execute("ATTACH DATABASE ? AS " + archive.SCHEMA,
+						(filename, ))
+	finally:
+		raw.close()
+	return copy
+
+
+def _task_indexes(conn):
+	""" Get names of indexes created for tasks table (without automatic). """
+	return [row[0] for row in conn.execute("SELECT name FROM sqlite_master "
+			"WHERE type = 'index' AND tbl_name = 'tasks' AND sql IS NOT NULL")]
+
+
+def _time_inserts(conn, count):
+	now = datetime.datetime.utcnow().isoformat(' ')
+	conn.execute("SAVEPOINT indexadvisor")
+	start = time.perf_counter()
+	conn.executemany("INSERT INTO tasks (uuid, title, type, created, "
+			"modified) VALUES (?, ?, 0, ?, ?)",
+			[("indexadvisor-%d" % idx, "task %d" % idx, now, now)
+				for idx in range(count)])
+	elapsed = time.perf_counter() - start
+	conn.execute("ROLLBACK TO indexadvisor")
+	conn.execute("RELEASE indexadvisor")
+	return elapsed
+
+
+def measure(conn, shapes, repeat=5, inserts=1000):
+	""" Time recorded queries and inserts on given (sqlite3) connection.
+
+	Args:
+		conn: sqlite3 connection
+		shapes: recorded queries (see `record_workload`)
+		repeat: number of executions of each query; best time is used
+		inserts: number of inserted (and rolled back) tasks
+
+	Returns:
+		Measurement
+	"""
+	timings = collections.defaultdict(float)
+	indexes = collections.defaultdict(set)
+	for shape in shapes:
+		for row in conn.execute("EXPLAIN QUERY PLAN " + shape.statement,
+				shape.params):
+			indexes[shape.name].update(_RE_INDEX.findall(row[-1]))
+		best = None
+		for _idx in range(repeat):
+			start = time.perf_counter()
+			conn.execute(shape.statement, shape.params).fetchall()
+			elapsed = time.perf_counter() - start
+			best = elapsed if best is None else min(best, elapsed)
+		timings[shape.name] += best
+	return Measurement(dict(timings), dict(indexes),
+			_time_inserts(conn, inserts))
+
+
+def advise(engine, session, repeat=5):
+	""" Propose indexes to create and drop for current database.
+
+	Args:
+		engine: sqlalchemy engine (sqlite)
+		session: session bound to engine; used to issue queries
+		repeat: number of executions of each query
+
+	Returns:
+		Advice
+	"""
+	shapes = record_workload(session)
+	declared = collections.OrderedDict((index.name,
+			str(CreateIndex(index).compile(engine)))
+			for index in OBJ.Task.__table__.indexes)
+	conn = _copy_database(engine)
+	try:
+		before = measure(conn, shapes, repeat)
+		existing = _task_indexes(conn)
+		# missing indexes from schema are also candidates
+		candidates = [(name, sql) for name, sql
+				in itertools.chain(declared.items(), CANDIDATES.items())
+				if name not in existing]
+		for _name, sql in candidates:
+			conn.execute(sql)
+		conn.execute("ANALYZE")
+		used = set()
+		for indexes in measure(conn, shapes, 1, 0).indexes.values():
+			used.update(indexes)
+		create = [(name, sql) for name, sql in candidates if name in used]
+		# indexes from schema are never dropped
+		drop = [name for name in existing
+				if name not in used and name not in declared]
+		for name, _sql in candidates:
+			if name not in used:
+				conn.execute("DROP INDEX %s" % name)
+		for name in drop:
+			conn.execute("DROP INDEX %s" % name)
+		conn.execute("ANALYZE")
+		after = measure(conn, shapes, repeat)
+	finally:
+		conn.close()
+	return Advice(create, drop, before, after)
+
+
+def apply(engine, advice):
+	""" Create and drop indexes proposed by `advise`. """
+	with engine.begin() as conn:
+		for name, sql in advice.create:
+			_LOG.info("indexadvisor: create index %s", name)
+			conn.execute(sql)
+		for name in advice.drop:
+			_LOG.info("indexadvisor: drop index %s", name)
+			conn.execute("DROP INDEX IF EXISTS %s" % name)
+	engine.execute("ANALYZE")
+
+
+def format_report(advice):
+	""" Format advice with timings as list of lines. """
+	lines = ["%-16s %10s %10s  %s" % ("query", "before ms", "after ms",
+			"indexes after")]
+	for name in sorted(advice.before.queries):
+		lines.append("%-16s %10.2f %10.2f  %s" % (name,
+				advice.before.queries[name] * 1000.,
+				advice.after.queries.get(name, 0) * 1000.,
+				", ".join(sorted(advice.after.indexes.get(name, ())))))
+	lines.append("%-16s %10.2f %10.2f" % ("queries total",
+			sum(advice.before.queries.values()) * 1000.,
+			sum(advice.after.queries.values()) * 1000.))
+	lines.append("%-16s %10.2f %10.2f" % ("inserts",
+			advice.before.inserts * 1000., advice.after.inserts * 1000.))
+	for name, _sql in advice.create:
+		lines.append("create index " + name)
+	for name in advice.drop:
+		lines.append("drop index " + name)
+	if not advice.create and not advice.drop:
+		lines.append("indexes are ok")
+	return lines
+
+
+def _fill_benchmark_database(engine, tasks):
+	""" Insert `tasks` random tasks with projects, tags and alarms. """
+	import random
+	rnd = random.Random(tasks)
+	now = datetime.datetime.utcnow()
+
+	def date(probability):
+		if rnd.random() < probability:
+			return now + datetime.timedelta(days=rnd.randint(-60, 60))
+		return None
+
+	engine.execute(OBJ.Context.__table__.insert(), [{'uuid': "ctx%d" % idx,
+			'title': "context %d" % idx} for idx in range(5)])
+	engine.execute(OBJ.Tag.__table__.insert(), [{'uuid': "tag%d" % idx,
+			'title': "tag %d" % idx} for idx in range(7)])
+	rows, projects = [], []
+	for idx in range(tasks):
+		uuid = "%08d" % idx
+		task_type = 1 if rnd.random() < 0.05 else 0
+		rows.append({'uuid': uuid, 'title': "task %d" % rnd.randint(0, tasks),
+				'type': task_type, 'created': now, 'modified': now,
+				'parent_uuid': rnd.choice(projects) if projects and
+					rnd.random() < 0.5 else None,
+				'completed': date(0.6), 'deleted': date(0.03),
+				'starred': int(rnd.random() < 0.05),
+				'status': rnd.choice((0, 0, 0, 1, 2)),
+				'priority': rnd.choice((-1, 0, 1, 2, 3)),
+				'start_date': date(0.1), 'due_date': date(0.3),
+				'hide_until': date(0.05), 'alarm': date(0.05),
+				'context_uuid': rnd.choice((None, "ctx1", "ctx2"))})
+		if task_type == 1:
+			projects.append(uuid)
+	engine.execute(OBJ.Task.__table__.insert(), rows)
+	engine.execute(OBJ.TaskTag.__table__.insert(), [{'task_uuid': "%08d" % idx,
+			'tag_uuid': "tag%d" % (idx % 7)} for idx in range(0, tasks, 3)])
+
+
+def benchmark_indexes(tasks=20000, repeat=5):
+	""" Run advisor on database with `tasks` random tasks and indexes from
+	previous version (sqls.OBSOLETE_INDEXES instead of partial indexes).
+
+	Returns:
+		Advice
+	"""
+	import sqlalchemy
+	from sqlalchemy import orm
+	from wxgtd.model import sqls
+	engine = sqlalchemy.create_engine("sqlite:///:memory:")
+	OBJ.Base.metadata.create_all(engine)
+	for index in OBJ.Task.__table__.indexes:
+		if index.name.startswith('idx_task_'):
+			index.drop(engine)
+	for name in sqls.OBSOLETE_INDEXES:
+		columns = {'idx_task_childs': "parent_uuid, due_date, completed",
+				'idx_task_show': "hide_until, parent_uuid, completed, title"}\
+				.get(name, name[len('ix_tasks_'):])
+		engine.execute("CREATE INDEX %s ON tasks (%s)" % (name, columns))
+	_fill_benchmark_database(engine, tasks)
+	engine.execute("ANALYZE")
+	session = orm.sessionmaker(bind=engine)()
+	try:
+		return advise(engine, session, repeat)
+	finally:
+		session.close()
+
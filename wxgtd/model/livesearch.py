@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+""" Search-as-you-type controller.
+
+Keystrokes are debounced; search runs in worker thread with own session and
+results are delivered in parts by `dispatch` (i.e. wx.CallAfter) to GUI
+thread. New input (or `cancel`) makes running search stale: sqlite query is
+interrupted and results not delivered yet are discarded.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import time
+import logging
+import threading
+
+from wxgtd.model import objects as OBJ
+
+_LOG = logging.getLogger(__name__)
+
+# time (in seconds) from last keystroke to start of search
+DEFAULT_DELAY = 0.3
+# number of rows delivered at once
+BATCH_SIZE = 200
+# number of sqlite virtual machine instructions between checks for newer input
+_PROGRESS_STEPS = 1000
+
+
+def _direct_dispatch(func, *args):
+	func(*args)
+
+
+class LiveSearch(object):
+	""" Run search in background for latest input.
+
+	Args:
+		search: function(session, *args) returning iterable of results (i.e.
+			taskrow.iter_rows); args are given to `update`
+		on_results: function(rows, first, done) called (by `dispatch`) with
+			next part of results; `first` - first part of results for new
+			input (list should be cleared); `done` - last part
+		dispatch: function(func, *args) calling func in GUI thread
+		session_factory: function creating sqlalchemy session for worker
+		delay: debounce time in seconds
+		batch_size: number of results delivered at once
+	"""
+
+	def __init__(self, search, on_results, dispatch=_direct_dispatch,
+			session_factory=None, delay=DEFAULT_DELAY, batch_size=BATCH_SIZE):
+		# pylint: disable=R0913
+		self._search = search
+		self._on_results = on_results
+		self._dispatch = dispatch
+		self._session_factory = session_factory or OBJ.Session
+		self._delay = delay
+		self._batch_size = batch_size
+		self._cond = threading.Condition()
+		# incremented on each input; searches for older are stale
+		self._generation = 0
+		# generation of results showed by `on_results`
+		self._showed = None
+		# (generation, args, start time) of search to run
+		self._request = None
+		self._closed = False
+		self._thread = threading.Thread(target=self._worker,
+				name="livesearch")
+		self._thread.daemon = True
+		self._thread.start()
+
+	def update(self, *args):
+		""" Schedule search for `args` after debounce delay.
+
+		Returns:
+			generation of request
+		"""
+		return self._schedule(args, self._delay)
+
+	def search_now(self, *args):
+		""" Start search for `args` without waiting. """
+		return self._schedule(args, 0)
+
+	def cancel(self):
+		""" Drop pending and running search. """
+		with self._cond:
+			self._generation += 1
+			self._request = None
+			self._cond.notify()
+
+	def close(self):
+		""" Cancel search and stop worker. """
+		with self._cond:
+			self._generation += 1
+			self._request = None
+			self._closed = True
+			self._cond.notify()
+		self._thread.join()
+
+	def is_current(self, generation):
+		""" Check is `generation` the latest input. """
+		return generation == self._generation
+
+	def _schedule(self, args, delay):
+		with self._cond:
+			self._generation += 1
+			self._request = (self._generation, args, time.monotonic() + delay)
+			self._cond.notify()
+			return self._generation
+
+	def _next_request(self):
+		""" Wait for request which debounce time passed. """
+		with self._cond:
+			while not self._closed:
+				if self._request is None:
+					self._cond.wait()
+					continue
+				wait = self._request[2] - time.monotonic()
+				if wait <= 0:
+					request, self._request = self._request, None
+					return request
+				self._cond.wait(wait)
+		return None
+
+	def _worker(self):
+		while True:
+			request = self._next_request()
+			if request is None:
+				return
+			generation, args, _start = request
+			try:
+				self._run(generation, args)
+			except Exception:  # pylint: disable=W0703
+				if self.is_current(generation):
+					_LOG.exception("LiveSearch: search %r error", args)
+					self._deliver(generation, [], True)
+
+	def _run(self, generation, args):
+		_LOG.debug("LiveSearch: search %r", args)
+		session = self._session_factory()
+		try:
+			connection = session.connection().connection
+			# abort sqlite query when newer input arrive
+			connection.set_progress_handler(
+					lambda: not self.is_current(generation), _PROGRESS_STEPS)
+			try:
+				batch = []
+				for row in self._search(session, *args):
+					batch.append(row)
+					if len(batch) >= self._batch_size:
+						if not self._deliver(generation, batch, False):
+							return
+						batch = []
+				self._deliver(generation, batch, True)
+			finally:
+				connection.set_progress_handler(None, 0)
+		finally:
+			session.close()
+
+	def _deliver(self, generation, rows, done):
+		""" Send results to GUI thread; return False when search is stale. """
+		if not self.is_current(generation):
+			_LOG.debug("LiveSearch: discard stale results")
+			return False
+		self._dispatch(self._show, generation, rows, done)
+		return True
+
+	def _show(self, generation, rows, done):
+		# input may change while results waited for dispatch
+		if not self.is_current(generation):
+			return
+		first = self._showed != generation
+		self._showed = generation
+		self._on_results(rows, first, done)
@@ -16,41 +16,66 @@ Copyright (c) Johan Andersson, 2025"""
 __version__ = "2025-12-03"
 
 import os
+import re
+import sys
+import time
 import logging
 import zipfile
 import gettext
 import datetime
-try:
-	import cjson
-	_JSON_DECODER = cjson.decode
-	_JSON_ENCODER = cjson.encode
-except ImportError:
-	import json
-	_JSON_DECODER = json.loads
-	_JSON_ENCODER = json.dumps
-
+import functools
 from dateutil import parser, tz
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, inspect
 
+from wxgtd.lib import jsoncodec
+from wxgtd.lib import pipeline
 from wxgtd.model import objects
-from wxgtd.model import enums
+from wxgtd.model import archive
 from wxgtd.logic import task as task_logic
 
 _LOG = logging.getLogger(__name__)
 _ = gettext.gettext
 
+# sections with objects which field names must be normalized
+_NORMALIZED_SECTIONS = ('folder', 'context', 'goal', 'task', 'tasknote',
+		'notebook', 'tag')
+# order of sections decoded at once (`load_json`); other sections go last
+_SECTIONS_ORDER = ('synclog', 'folder', 'context', 'goal', 'task', 'tasknote',
+		'alarm', 'task_folder', 'task_context', 'task_goal', 'tag', 'task_tag',
+		'notebook', 'notebook_folder')
+# number of sections read and decoded ahead of applying
+_SECTIONS_QUEUE_SIZE = 2
+# size of chunks read from (zip) file
+_READ_CHUNK_SIZE = 1024 * 1024
+# timestamps used by Android app: "2013-03-22T21:27:46.461Z",
+# "2025-10-10 00:00", "2025-01-05 08:00:00.000"
+_RE_TIMESTAMP = re.compile(r"(\d{4})-(\d\d)-(\d\d)(?:[T ](\d\d):(\d\d)"
+		r"(?::(\d\d)(?:\.(\d{1,6}))?)?)?(Z|[+-]\d\d:?\d\d)?$")
+# number of cached parsed timestamps
+_TIMESTAMP_CACHE_SIZE = 65536
+# task fields used to compute hide_until and alarm
+_TASK_DATES_FIELDS = ('hide_pattern', 'hide_until', 'alarm_pattern', 'alarm',
+		'due_date', 'start_date')
+
 
 def _fake_update_func(*args, **kwargs):
 	_LOG.info("progress %r %r", args, kwargs)
 
 
-def load_from_file(filename, notify_cb=_fake_update_func, force=False):
+def load_from_file(filename, notify_cb=_fake_update_func, force=False,
+		before_apply=None, timer=None):
 	"""Load data from (zip)file.
 
+	File is decompressed and decoded in worker thread; sections are applied
+	to database as soon as they are ready.
+
 	Args:
 		filename: file to load
 		notify_cb: function called in each step.
 		force: don't check timestamps in synclog; always sync
+		before_apply: optional function called before first change in
+			database (i.e. wait for backup); file is read meanwhile.
+		timer: optional `pipeline.StageTimer` collecting stages time
 
 	Returns:
 		True if success.
@@ -58,15 +83,112 @@ def load_from_file(filename, notify_cb=_fake_update_func, force=False):
 	if not os.path.isfile(filename):
 		notify_cb(50, _("File not found..."))
 		return True
+	timer = timer or pipeline.StageTimer()
 	notify_cb(2, _("Openning file"))
+	with pipeline.BackgroundIterator(iter_file_sections(filename, timer),
+			_SECTIONS_QUEUE_SIZE, "loader") as sections:
+		if before_apply:
+			with timer.stage("wait"):
+				before_apply()
+		return _load_sections(sections, notify_cb, force, timer)
+
+
+def _iter_chunks(filename, timer):
+	""" Read json file (or first file in zip) by chunks. """
 	if filename.endswith(".zip"):
 		with zipfile.ZipFile(filename, "r") as zfile:
-			fname = zfile.namelist()[0]
-			return load_json(zfile.read(fname), notify_cb, force)
-	else:
-		with open(filename, "rb") as ifile:
-			return load_json(ifile.read(), notify_cb, force)
-	return False
+			with zfile.open(zfile.namelist()[0]) as ifile:
+				read = timer.timed("read", ifile.read)
+				for chunk in iter(lambda: read(_READ_CHUNK_SIZE), b""):
+					yield chunk
+		return
+	with open(filename, "rb") as ifile:
+		read = timer.timed("read", ifile.read)
+		for chunk in iter(lambda: read(_READ_CHUNK_SIZE), b""):
+			yield chunk
+
+
+def _section_order(name):
+	try:
+		return _SECTIONS_ORDER.index(name)
+	except ValueError:
+		return len(_SECTIONS_ORDER)
+
+
+def _normalize_section(key, value, timer):
+	""" Normalize name (to lowercase; Android app uses uppercase, Python
+	expects lowercase) and objects of section. """
+	key = key.lower()
+	if key in _NORMALIZED_SECTIONS and isinstance(value, list):
+		with timer.stage("normalize"):
+			value = [_normalize_field_names(obj) for obj in value]
+	return key, value
+
+
+def _iter_sections(data, timer):
+	""" Yield normalized sections (name, value) in order of loading. """
+	for key in sorted(data, key=lambda key: _section_order(key.lower())):
+		yield _normalize_section(key, data.pop(key), timer)
+
+
+def iter_file_sections(filename, timer=None):
+	""" Read and decode sync file section by section.
+
+	File is read when iterator is consumed (i.e. in worker thread of
+	`pipeline.BackgroundIterator`); each section is yielded as soon as it
+	is read and decoded, in order of file.
+
+	Args:
+		filename: file to load (json or zip)
+		timer: optional `pipeline.StageTimer`
+
+	Yields:
+		(section name, normalized data)
+	"""
+	timer = timer or pipeline.StageTimer()
+	decoder = jsoncodec.SectionDecoder()
+	for chunk in _iter_chunks(filename, timer):
+		with timer.stage("decode"):
+			sections = decoder.feed(chunk)
+		for key, value in sections:
+			yield _normalize_section(key, value, timer)
+	with timer.stage("decode"):
+		sections = decoder.finish()
+	for key, value in sections:
+		yield _normalize_section(key, value, timer)
+
+
+class _LazySections(dict):
+	""" Dict of sections filled on demand from iterator of (name, value). """
+
+	def __init__(self, sections):
+		dict.__init__(self)
+		self._sections = iter(sections)
+
+	def _fetch(self, key):
+		while self._sections is not None and not dict.__contains__(self, key):
+			try:
+				name, value = next(self._sections)
+			except StopIteration:
+				self._sections = None
+				break
+			self[name] = value
+
+	def drain(self):
+		""" Get all remaining sections. """
+		self._fetch(_LazySections)
+
+	def __contains__(self, key):
+		self._fetch(key)
+		return dict.__contains__(self, key)
+
+	def __getitem__(self, key):
+		self._fetch(key)
+		return dict.__getitem__(self, key)
+
+	def get(self, key, default=None):
+		self._fetch(key)
+		return dict.get(self, key, default)
 
 
 def _create_or_update(session, cls, datadict):
@@ -137,9 +259,54 @@ def _replace_ids(objdict, cache, key_id, key_uuid=None):
 	return res
 
 
+def _parse_timestamp(string):
+	""" Parse timestamp in one of formats used in sync files.
+
+	Returns:
+		Naive datetime in UTC or None when format is not known.
+	"""
+	match = _RE_TIMESTAMP.match(string)
+	if match is None:
+		return None
+	year, month, day, hour, minute, second, fraction, zone = match.groups()
+	try:
+		value = datetime.datetime(int(year), int(month), int(day),
+				int(hour or 0), int(minute or 0), int(second or 0),
+				int(fraction.ljust(6, "0")) if fraction else 0)
+	except ValueError:
+		return None
+	if zone and zone != "Z":
+		offset = datetime.timedelta(hours=int(zone[1:3]),
+				minutes=int(zone[-2:]))
+		value = value - offset if zone[0] == "+" else value + offset
+	return value
+
+
+def _parse_timestamp_generic(string):
+	try:
+		value = parser.parse(string)
+	except (ValueError, TypeError, OverflowError) as err:
+		_LOG.debug("str2datetime_utc parse error for %r: %s", string, err)
+		return None
+	# convert to UTC if timezone-aware
+	if value.tzinfo is not None:
+		value = value.astimezone(tz.tzutc())
+		# remove timezone
+		value = value.replace(tzinfo=None)
+	return value
+
+
+@functools.lru_cache(maxsize=_TIMESTAMP_CACHE_SIZE)
+def _str2datetime_utc(string):
+	return _parse_timestamp(string) or _parse_timestamp_generic(string)
+
+
 def str2datetime_utc(string):
 	""" Convert string like "2013-03-22T21:27:46.461Z" or "2025-10-10 00:00" into timestamp.
 
+	Known formats are parsed by regular expression, other by dateutil.
+	Results are cached, so repeated values are parsed once.
+
 	Args:
 		string: string to convert
 
@@ -147,17 +314,7 @@ def str2datetime_utc(string):
 		Timestamp as long or None if error.
 	"""
 	if string and len(string) >= 10:  # Accept shorter formats like "2025-10-10 00:00"
-		try:
-			value = parser.parse(string)
-			# convert to UTC if timezone-aware
-			if value.tzinfo is not None:
-				value = value.astimezone(tz.tzutc())
-				# remove timezone
-				value = value.replace(tzinfo=None)
-			return value
-		except (ValueError, TypeError) as err:
-			_LOG.debug("str2datetime_utc parse error for %r: %s", string, err)
-			return None
+		return _str2datetime_utc(string)
 	_LOG.debug("str2datetime_utc: string too short %r", string)
 	return None
 
@@ -454,16 +611,29 @@ def load_json(strdata, notify_cb, force=False):
 		true if success.
 	"""
 	notify_cb(10, _("Decoding.."))
-	data = _JSON_DECODER(strdata.decode("UTF-8"))
-	
-	# Normalize keys to lowercase (Android app uses uppercase, Python expects lowercase)
-	data = {k.lower(): v for k, v in data.items()}
-	
-	# Normalize field names in all object arrays
-	for key in ['folder', 'context', 'goal', 'task', 'tasknote', 'notebook', 'tag']:
-		if key in data and isinstance(data[key], list):
-			data[key] = [_normalize_field_names(obj) for obj in data[key]]
-	
+	timer = pipeline.StageTimer()
+	with timer.stage("decode"):
+		data = jsoncodec.loads(strdata)
+	return _load_sections(_iter_sections(data, timer), notify_cb, force, timer)
+
+
+def _load_sections(sections, notify_cb, force, timer):
+	""" Apply decoded sections to database.
+
+	Args:
+		sections: iterable of (section name, normalized data)
+		notify_cb: function called on each step.
+		force: don't check timestamps in synclog
+		timer: `pipeline.StageTimer`
+
+	Returns:
+		true if success.
+	"""
+	with timer.stage("apply"):
+		return _apply_data(_LazySections(sections), notify_cb, force)
+
+
+def _apply_data(data, notify_cb, force):
 	session = objects.Session()
 
 	notify_cb(15, _("Checking..."))
@@ -476,15 +646,17 @@ def load_json(strdata, notify_cb, force=False):
 	folders_cache = _load_folders(data, session, notify_cb)
 	contexts_cache = _load_contexts(data, session, notify_cb)
 	goals_cache = _load_goals(data, session, notify_cb)
-	tasks_cache = _load_tasks(data, session, notify_cb, contexts_cache, 
-			folders_cache, goals_cache)
-	tasknotes_cache = _load_tasknotes(data, session, tasks_cache, notify_cb)
+	tasks_cache, archived_tasks = _load_tasks(data, session, notify_cb,
+			contexts_cache, folders_cache, goals_cache)
+	tasknotes_cache = _load_tasknotes(data, session, tasks_cache, notify_cb,
+			archived_tasks)
 	_load_alarms(data, session, tasks_cache, notify_cb)
 	_load_task_folders(data, session, tasks_cache, folders_cache, notify_cb)
 	_load_task_contexts(data, session, tasks_cache, contexts_cache, notify_cb)
 	_load_task_goals(data, session, tasks_cache, goals_cache, notify_cb)
 	tags_cache = _load_tags(data, session, notify_cb)
-	_load_task_tags(data, session, tasks_cache, tags_cache, notify_cb)
+	_load_task_tags(data, session, tasks_cache, tags_cache, notify_cb,
+			archived_tasks)
 	notebooks_cache = _load_notebooks(data, session, notify_cb)
 	_load_notebook_folders(data, session, notebooks_cache, folders_cache,
 			notify_cb)
@@ -527,6 +699,7 @@ def load_json(strdata, notify_cb, force=False):
 	session.commit()  # pylint: disable=E1101
 	notify_cb(99, _("Load completed"))
 
+	data.drain()
 	if 'version' in data:
 		del data['version']
 
@@ -604,12 +777,22 @@ def _load_tasks(data, session, notify_cb, contexts_cache=None,
 	notify_cb(21, _("Loading tasks"))
 	tasks = data.get("task")
 	tasks_cache = _build_id_uuid_map(tasks)
+	for task in tasks or []:
+		_convert_timestamps(task, "completed", "start_date", "due_date",
+				"due_date_project", "hide_until", "alarm", "trash_bin")
+	# sync file contains all tasks; archived are restored only when changed
+	# since archiving, other are not loaded
+	archived = archive.restore_changed(session, {task["uuid"]: (
+			task.get("modified"), tasks_cache.get(task.get("parent_id")))
+			for task in tasks or [] if task.get("uuid")})
+	# tasks which require update hide_until/alarm
+	changed_tasks = []
 	for task in sort_objects_by_parent(tasks):
+		if task.get("uuid") in archived:
+			continue
 		task_id = task.get("_id")
 		_replace_ids(task, tasks_cache, "parent_id")
-		_convert_timestamps(task, "completed", "start_date", "due_date",
-				"due_date_project", "hide_until", "alarm", "trash_bin")
-		
+
 		# Convert context/folder/goal IDs to UUIDs if they exist in the task
 		# This handles Android app format where context is embedded in task
 		context_id = task.pop("context_id", None)
@@ -636,22 +819,36 @@ def _load_tasks(data, session, notify_cb, contexts_cache=None,
 		if task_id:
 			if task_id not in tasks_cache or tasks_cache[task_id] is None:
 				tasks_cache[task_id] = task_obj.uuid
-		task_logic.update_task_hide(task_obj)
-		task_logic.update_task_alarm(task_obj)
+		if _task_dates_changed(task_obj):
+			changed_tasks.append(task_obj)
+	task_logic.recompute_tasks_dates(changed_tasks, session)
 	if tasks:
 		del data["task"]
 	notify_cb(29, _("Loaded %d tasks") % len(tasks_cache))
-	return tasks_cache
+	return tasks_cache, archived
+
+
+def _task_dates_changed(task):
+	""" Check if task is new or any field affecting hide_until/alarm was
+	changed. """
+	state = inspect(task)
+	if not state.persistent:
+		return True
+	return any(state.attrs[field].history.has_changes()
+			for field in _TASK_DATES_FIELDS)
 
 
-def _load_tasknotes(data, session, tasks_cache, notify_cb):
+def _load_tasknotes(data, session, tasks_cache, notify_cb,
+		archived_tasks=()):
 	_LOG.info("_load_tasknotes")
 	notify_cb(30, _("Loading task notes"))
 	tasknotes = data.get("tasknote")
 	tasknotes_cache = _build_id_uuid_map(tasknotes)
 	for tasknote in tasknotes or []:
 		tasknote_id = tasknote.get("_id")
-		_replace_ids(tasknote, tasks_cache, "task_id")
+		if _replace_ids(tasknote, tasks_cache, "task_id") in archived_tasks:
+			# note of task left in archive
+			continue
 		_convert_timestamps(tasknote)
 		tasknote_obj = _create_or_update(session, objects.Tasknote, tasknote)
 		# If UUID was auto-generated, update the cache
@@ -680,7 +877,7 @@ def _load_alarms(data, session, tasks_cache, notify_cb):
 	if task_uuids:
 		tasks_map = {task.uuid: task for task in session.query(objects.Task).filter(
 			objects.Task.uuid.in_(task_uuids))}
-		
+		changed_tasks = []
 		for alarm in alarms:
 			task_uuid = tasks_cache.get(alarm.get("task_id"))
 			if not task_uuid or task_uuid not in tasks_map:
@@ -688,9 +885,10 @@ def _load_alarms(data, session, tasks_cache, notify_cb):
 			task = tasks_map[task_uuid]
 			if task.modified <= alarm["modified"]:
 				task.alarm = alarm["alarm"]
-				task_logic.update_task_alarm(task)
+				changed_tasks.append(task)
 			else:
 				_LOG.debug("skip %r", alarm)
+		task_logic.recompute_tasks_dates(changed_tasks, session)
 	if alarms:
 		del data["alarm"]
 	notify_cb(39, _("Loaded %d alarms") % len(alarms))
@@ -815,7 +1013,8 @@ def _load_tags(data, session, notify_cb):
 	return tags_cache
 
 
-def _load_task_tags(data, session, tasks_cache, tags_cache, notify_cb):
+def _load_task_tags(data, session, tasks_cache, tags_cache, notify_cb,
+		archived_tasks=()):
 	_LOG.info("_load_task_tags")
 	notify_cb(60, _("Loading task tags"))
 	task_tags = data.get("task_tag") or []
@@ -825,7 +1024,7 @@ def _load_task_tags(data, session, tasks_cache, tags_cache, notify_cb):
 		task_uuid = _replace_ids(task_tag, tasks_cache, "task_id")
 		tag_uuid = _replace_ids(task_tag, tags_cache, "tag_id")
 		_convert_timestamps(task_tag)
-		if task_uuid and tag_uuid:
+		if task_uuid and tag_uuid and task_uuid not in archived_tasks:
 			task_tag_pairs.append((task_uuid, tag_uuid, task_tag))
 	
 	if task_tag_pairs:
@@ -937,50 +1136,11 @@ def _load_synclog(data, session, notify_cb):
 def _update_all_tasks(session):
 	""" Update tasks after load.
 
-	1. update due dates in projects
+	1. update due dates in projects which subtasks was changed
 	"""
-	# Optimized version to avoid N+1 queries when updating project due dates
-	from sqlalchemy import func, and_
-	
 	_LOG.info("_update_all_tasks: updating project due dates")
-	
-	# Get all projects and their earliest subtask due dates in one query
-	project_updates = session.query(
-		objects.Task.parent_uuid.label('project_uuid'),
-		func.min(objects.Task.due_date).label('earliest_subtask_due'),
-		func.min(objects.Task.due_time_set).label('earliest_subtask_time_set')
-	).filter(
-		and_(
-			objects.Task.parent_uuid.isnot(None),
-			objects.Task.due_date.isnot(None),
-			objects.Task.deleted.is_(None)
-		)
-	).group_by(objects.Task.parent_uuid).all()
-	
-	# Create a lookup dict for quick access
-	project_min_dates = {row.project_uuid: (row.earliest_subtask_due, row.earliest_subtask_time_set or 0) 
-						for row in project_updates}
-	
-	# Update all projects efficiently
-	projects = session.query(objects.Task).filter(
-		and_(
-			objects.Task.type == enums.TYPE_PROJECT,
-			objects.Task.deleted.is_(None)
-		)
-	).all()
-	
-	for project in projects:
-		# Start with project due date
-		project.due_date = project.due_date_project
-		project.due_time_set = 0
-		
-		# Check if we have subtask date info
-		if project.uuid in project_min_dates:
-			subtask_due, subtask_time_set = project_min_dates[project.uuid]
-			# If subtask has earlier due date, use that
-			if subtask_due and (not project.due_date or subtask_due < project.due_date):
-				project.due_date = subtask_due
-				project.due_time_set = subtask_time_set
+	updated = task_logic.update_dirty_projects(session)
+	_LOG.info("_update_all_tasks: updated %d projects", updated)
 
 
 def test():
@@ -991,6 +1151,39 @@ def test():
 	db.connect("wxgtd.db")
 	print(load_json(open("/home/k/GTD_SYNC.json").read(), _fake_update_func))
 
+def benchmark_timestamps(tasks=50000):
+	""" Compare time of parsing timestamps from sync file with `tasks` tasks
+	(9 timestamps per task) by dateutil and by `str2datetime_utc`.
+
+	Returns:
+		(dateutil time, str2datetime_utc time) in seconds
+	"""
+	start = datetime.datetime(2025, 1, 1, 8, 0)
+	values = []
+	for idx in range(tasks):
+		created = start + datetime.timedelta(minutes=idx * 7)
+		stamp = created.strftime("%Y-%m-%dT%H:%M:%S.") + \
+				"%03dZ" % (idx % 1000)
+		due = (created + datetime.timedelta(days=idx % 30)).strftime(
+				"%Y-%m-%d 00:00")
+		values.extend((stamp, stamp, "", stamp, due, due, due, due, ""))
+	values = [value for value in values if value]
+	_str2datetime_utc.cache_clear()
+	tstart = time.perf_counter()
+	for value in values:
+		_parse_timestamp_generic(value)
+	generic_time = time.perf_counter() - tstart
+	tstart = time.perf_counter()
+	for value in values:
+		str2datetime_utc(value)
+	fast_time = time.perf_counter() - tstart
+	return generic_time, fast_time
+
+
 if __name__ == "__main__":
-	test()
+	if "--benchmark-timestamps" in sys.argv:
+		print("dateutil: %.2fs, str2datetime_utc: %.2fs" %
+				benchmark_timestamps())
+	else:
+		test()
 
@@ -25,9 +25,10 @@ from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy import orm, or_, and_
-from sqlalchemy import select, func
+from sqlalchemy import select, func, event, DDL
 
 from wxgtd.model import enums
+from wxgtd.model import sqls
 
 _LOG = logging.getLogger(__name__)
 _ = gettext.gettext
@@ -92,14 +93,6 @@ class BaseModelMixin(object):
 	def update_modify_time(self):
 		if hasattr(self, 'modified'):
 			self.modified = datetime.datetime.utcnow()  # pylint: disable=W0201
-		# Clear cached properties when task is modified
-		self._clear_property_cache()
-	
-	def _clear_property_cache(self):
-		""" Clear cached property values to force recalculation. """
-		for attr in ('_active_child_count_cache', '_child_overdue_cache', '_child_count_cache'):
-			if hasattr(self, attr):
-				delattr(self, attr)
 
 	@classmethod
 	def select_by_modified_is_less(cls, timestamp, session=None):
@@ -146,18 +139,21 @@ class BaseModelMixin(object):
 		return query  # pylint: disable=E1101
 
 	@classmethod
-	def get(cls, session=None, **kwargs):
+	def get(cls, session=None, with_notes=False, **kwargs):
 		""" Get one object with given attributes.
 
 		Args:
 			session: optional sqlalchemy session
+			with_notes: load also deferred note (for editors)
 			kwargs: query filters.
 
 		Return:
 			One object.
 		"""
-		return (session or Session()).query(cls).filter_by(
-				**kwargs).first()
+		query = (session or Session()).query(cls)
+		if with_notes:
+			query = query.options(orm.undefer_group('note'))
+		return query.filter_by(**kwargs).first()
 
 	def __repr__(self):
 		info = []
@@ -175,26 +171,30 @@ class Task(BaseModelMixin, Base):
 	# pylint: disable=R0902
 
 	__tablename__ = "tasks"
+	# tree_path is maintained by database triggers only
+	__mapper_args__ = {'exclude_properties': ['tree_path']}
 
 	uuid = Column(String(36), primary_key=True, default=generate_uuid)
 	parent_uuid = Column(String(36), ForeignKey('tasks.uuid',
 			onupdate="CASCADE", ondelete="SET NULL"), index=True)
 	created = Column(DateTime, default=datetime.datetime.utcnow)
 	modified = Column(DateTime, default=datetime.datetime.utcnow, index=True)
-	completed = Column(DateTime, index=True)  # Indexed for common filters
-	deleted = Column(DateTime, index=True)  # Indexed for common filters
+	completed = Column(DateTime)
+	# indexed for purge and trash; lists use partial indexes (see below)
+	deleted = Column(DateTime, index=True)
 	ordinal = Column(Integer, default=0)
 	title = Column(String, index=True)
-	note = Column(String)
-	type = Column(Integer, nullable=False, default=enums.TYPE_TASK, index=True)  # Indexed for filtering
-	starred = Column(Integer, default=0, index=True)  # Indexed for hotlist
-	status = Column(Integer, default=0, index=True)  # Indexed for filtering
+	# large text; loaded on first access or by `with_notes` queries
+	note = orm.deferred(Column(String), group='note')
+	type = Column(Integer, nullable=False, default=enums.TYPE_TASK)
+	starred = Column(Integer, default=0)
+	status = Column(Integer, default=0)
 	priority = Column(Integer, default=0)
 	importance = Column(Integer, default=0)  # dla checlist pozycja
-	start_date = Column(DateTime, index=True)  # Indexed for date queries
+	start_date = Column(DateTime)
 	start_time_set = Column(Integer, default=0)
-	due_date = Column(DateTime, index=True)
-	due_date_project = Column(DateTime, index=True)  # Indexed for project queries
+	due_date = Column(DateTime)
+	due_date_project = Column(DateTime)
 	due_time_set = Column(Integer, default=0)
 	due_date_mod = Column(Integer, default=0)
 	floating_event = Column(Integer, default=0)
@@ -204,12 +204,20 @@ class Task(BaseModelMixin, Base):
 	repeat_pattern = Column(String)
 	repeat_end = Column(Integer, default=0)
 	hide_pattern = Column(String)
-	hide_until = Column(DateTime, index=True)  # Indexed for hide_until filters
+	hide_until = Column(DateTime)
 	prevent_auto_purge = Column(Integer, default=0)
 	trash_bin = Column(Integer, default=0)
 	metainf = Column(String)
-	alarm = Column(DateTime, index=True)
+	alarm = Column(DateTime)
 	alarm_pattern = Column(String)
+	# materialized path "/<root uuid>/.../<uuid>/"; see hierarchy module
+	tree_path = Column(String, index=True)
+	# counters of direct subtasks; maintained by database triggers only
+	# (see sqls.TASKS_CHILD_COUNTERS_TRIGGERS)
+	children_count = Column(Integer, nullable=False, server_default="0")
+	active_children_count = Column(Integer, nullable=False,
+			server_default="0")
+	children_due = Column(DateTime)
 
 	folder_uuid = Column(String(36), ForeignKey("folders.uuid",
 			onupdate="CASCADE", ondelete="SET NULL"), index=True)
@@ -252,39 +260,14 @@ class Task(BaseModelMixin, Base):
 
 	@property
 	def active_child_count(self):
-		""" Count of not-complete subtask. 
-		
-		Optimized with memoization to avoid repeated queries.
-		"""
-		# Use cached value if available and session is still valid
-		if not hasattr(self, '_active_child_count_cache'):
-			session = orm.object_session(self) or Session()
-			self._active_child_count_cache = session.scalar(
-				select([func.count(Task.uuid)])
-				.where(and_(Task.parent_uuid == self.uuid,
-						Task.completed.is_(None), Task.deleted.is_(None))))
-		return self._active_child_count_cache
+		""" Count of not-complete subtask. """
+		return self.active_children_count or 0
 
 	@property
 	def child_overdue(self):
-		""" Count of not-complete subtask with due date in past. 
-		
-		Optimized with memoization to avoid repeated queries.
-		"""
-		if not hasattr(self, '_child_overdue_cache'):
-			now = datetime.datetime.utcnow()
-			session = orm.object_session(self) or Session()
-			self._child_overdue_cache = session.scalar(
-				select([func.count(Task.uuid)])
-				.where(and_(Task.parent_uuid == self.uuid,
-						Task.due_date.isnot(None), Task.completed.is_(None),
-						Task.deleted.is_(None),
-						or_(
-							and_(Task.due_date < now,
-								Task.type != enums.TYPE_PROJECT),
-							and_(Task.due_date_project < now,
-								Task.type == enums.TYPE_PROJECT)))))
-		return self._child_overdue_cache
+		""" Is any not-complete subtask overdue. """
+		return bool(self.children_due and
+				self.children_due < datetime.datetime.utcnow())
 
 	@property
 	def overdue(self):
@@ -297,12 +280,13 @@ class Task(BaseModelMixin, Base):
 		return self.due_date and self.due_date < now
 
 	@classmethod
-	def select_by_filters(cls, params, session=None):
+	def select_by_filters(cls, params, session=None, with_notes=False):
 		""" Get tasks list according to given criteria.
 
 		Args:
 			params: dict with filter parameters (criteria)
 			session: optional sqlalchemy session
+			with_notes: load also notes (by default deferred)
 
 		Returns:
 			SqlAlchemy query
@@ -310,52 +294,69 @@ class Task(BaseModelMixin, Base):
 		# pylint: disable=R0912
 		_LOG.debug('Task.select_by_filters(%r)', params)
 		session = session or Session()
-		query = session.query(cls)
+		task = cls
+		task_tags = TaskTag.__table__
+		if params.get('finished') or params.get('deleted'):
+			# finished tasks and trash include archived tasks
+			from wxgtd.model import archive
+			task = archive.entity(session, cls)
+			task_tags = archive.rows(session, task_tags)
+		query = session.query(task)
+		if with_notes:
+			query = query.options(orm.Load(task).undefer_group('note'))
 		if params.get('deleted'):
-			query = query.filter(cls.deleted.isnot(None))
+			query = query.filter(task.deleted.isnot(None))
 		else:
-			query = query.filter(cls.deleted.is_(None))
-		query = _append_filter_list(query, Task.context_uuid, params.get('contexts'))
-		query = _append_filter_list(query, Task.folder_uuid, params.get('folders'))
-		query = _append_filter_list(query, Task.goal_uuid, params.get('goals'))
-		query = _append_filter_list(query, Task.status, params.get('statuses'))
-		query = _append_filter_list(query, Task.type, params.get('types'))
+			query = query.filter(task.deleted.is_(None))
+		query = _append_filter_list(query, task.context_uuid, params.get('contexts'))
+		query = _append_filter_list(query, task.folder_uuid, params.get('folders'))
+		query = _append_filter_list(query, task.goal_uuid, params.get('goals'))
+		query = _append_filter_list(query, task.status, params.get('statuses'))
+		query = _append_filter_list(query, task.type, params.get('types'))
 		search_str = params.get('search_str', '').strip()
 		if search_str:
 			search_str = '%%' + search_str.lower() + "%%"
-			query = query.filter(or_(func.lower(Task.title).like(search_str),
-					func.lower(Task.note).like(search_str)))
+			query = query.filter(or_(func.lower(task.title).like(search_str),
+					func.lower(task.note).like(search_str)))
 		now = datetime.datetime.utcnow()
-		query = _query_add_filter_by_tags(query, params)
+		query = _query_add_filter_by_tags(query, params, task_tags, task)
 		if params.get('hide_until'):
 			# hide task with hide_until value in future
-			query = query.filter(or_(Task.hide_until.is_(None),
-					Task.hide_until <= now))
+			query = query.filter(or_(task.hide_until.is_(None),
+					task.hide_until <= now))
 		if params.get('max_due_date'):
-			query = query.filter(Task.due_date.isnot(None))
+			query = query.filter(task.due_date.isnot(None))
 		elif params.get('no_due_date'):
-			query = query.filter(Task.due_date.is_(None))
-		query = _quert_add_filter_by_hotlist(query, params, now)
-		query = _query_add_filter_by_finished(query, params.get('finished'))
-		query = _query_add_filter_by_parent(query, params.get('parent_uuid'))
+			query = query.filter(task.due_date.is_(None))
+		query = _quert_add_filter_by_hotlist(query, params, now, task)
+		query = _query_add_filter_by_finished(query, params.get('finished'),
+				task)
+		query = _query_add_filter_by_parent(query, params.get('parent_uuid'),
+				task)
 		# future alarms
 		if params.get('active_alarm'):
-			query = query.filter(Task.alarm >= now)
-		query = query.order_by(Task.title)
+			query = query.filter(task.alarm >= now)
+		query = query.order_by(task.title)
 		return query
 
 	@classmethod
-	def search(cls, text, active_only, session=None):
+	def search(cls, text, active_only, session=None, with_notes=False):
 		""" Search for task with title/note matching text. """
 		_LOG.debug('Task.search(%r, %r)', text, active_only)
 		session = session or Session()
-		query = session.query(cls).filter(cls.deleted.is_(None))
+		task = cls
+		if not active_only:
+			from wxgtd.model import archive
+			task = archive.entity(session, cls)
+		query = session.query(task).filter(task.deleted.is_(None))
+		if with_notes:
+			query = query.options(orm.Load(task).undefer_group('note'))
 		search_str = '%%' + text.lower() + "%%"
-		query = query.filter(or_(func.lower(Task.title).like(search_str),
-				func.lower(Task.note).like(search_str)))
+		query = query.filter(or_(func.lower(task.title).like(search_str),
+				func.lower(task.note).like(search_str)))
 		if active_only:
-			query = query.filter(Task.completed.is_(None))
-		query = query.order_by(Task.title)
+			query = query.filter(task.completed.is_(None))
+		query = query.order_by(task.title)
 		return query
 
 	@classmethod
@@ -418,17 +419,8 @@ class Task(BaseModelMixin, Base):
 
 	@property
 	def child_count(self):
-		"""  Count subtask. 
-		
-		Optimized with memoization to avoid repeated queries.
-		"""
-		if not hasattr(self, '_child_count_cache'):
-			session = orm.object_session(self) or Session()
-			self._child_count_cache = session.scalar(
-				select([func.count(Task.uuid)])
-				.where(and_(Task.parent_uuid == self.uuid,
-					Task.deleted.is_(None))))
-		return self._child_count_cache
+		"""  Count subtask. """
+		return self.children_count or 0
 
 	@property
 	def sub_projects(self):
@@ -463,6 +455,9 @@ class Task(BaseModelMixin, Base):
 			new_obj.notes.append(note.clone())
 		if cleanup:
 			new_obj.completed = None
+			# counters are set by triggers when subtasks are inserted
+			new_obj.children_count = new_obj.active_children_count = 0
+			new_obj.children_due = None
 		return new_obj
 
 
@@ -492,42 +487,71 @@ def _append_filter_list(query, param, values):
 	return query.filter(param.in_(values))
 
 
-def _query_add_filter_by_tags(query, params):
-	""" Add filters related to tags. """
-	if params.get('tags'):
-		# filter by tags; pylint: disable=E1101
-		tags = set(params.get('tags'))
-		if None in tags:
-			if len(tags) == 1:
-				query = query.filter(~Task.tags.any())
-			else:
-				query = query.filter(or_(
-						Task.tags.any(TaskTag.tag_uuid.in_(params['tags'])),
-						~Task.tags.any()))
-		else:
-			query = query.filter(Task.tags.any(TaskTag.tag_uuid.in_(params['tags'])))
-	return query
+def _query_add_filter_by_tags(query, params, task_tags=None, task=None):
+	""" Add filters related to tags.
 
+	Tags are matched by `IN` subqueries on task_tags, driven by index on
+	(tag_uuid, task_uuid). `params['tags_match']` select how tasks are
+	matched to selected tags (enums.TAGS_MATCH_*, default: any); `None` in
+	tags means "task without tags" (ignored when task must have all of other
+	selected tags).
 
-def _quert_add_filter_by_hotlist(query, params, now):
+	Args:
+		query: query for tasks
+		params: filter parameters
+		task_tags: selectable with task-tag rows (default: task_tags table)
+		task: queried task entity (default: Task)
+	"""
+	if not params.get('tags'):
+		return query
+	tags = set(params['tags'])
+	no_tags = None in tags
+	tags.discard(None)
+	tags = sorted(tags)
+	match = params.get('tags_match') or enums.TAGS_MATCH_ANY
+	if task_tags is None:
+		task_tags = TaskTag.__table__
+	task = task or Task
+	# pylint: disable=E1101
+	tagged = select(task_tags.c.task_uuid)
+	selected = tagged.where(task_tags.c.tag_uuid.in_(tags))
+	if match == enums.TAGS_MATCH_ALL and tags:
+		# task has one row for each tag, so count selected tags
+		return query.filter(task.uuid.in_(selected.group_by(
+				task_tags.c.task_uuid).having(func.count() == len(tags))))
+	if match == enums.TAGS_MATCH_NONE:
+		if tags:
+			query = query.filter(task.uuid.notin_(selected))
+		if no_tags:
+			query = query.filter(task.uuid.in_(tagged))
+		return query
+	if not tags:
+		return query.filter(task.uuid.notin_(tagged))
+	if no_tags:
+		return query.filter(or_(task.uuid.in_(selected),
+				task.uuid.notin_(tagged)))
+	return query.filter(task.uuid.in_(selected))
+
+
+def _quert_add_filter_by_hotlist(query, params, now, task=Task):
 	""" Add filters related to hotlist. """
 	opt = []
 	if params.get('starred'):  # show starred task
-		opt.append(Task.starred > 0)
+		opt.append(task.starred > 0)
 	if params.get('min_priority') is not None:  # minimal task priority
-		opt.append(Task.priority >= params['min_priority'])
+		opt.append(task.priority >= params['min_priority'])
 	if params.get('max_due_date'):
 		opt.append(or_(
-			and_(Task.type != enums.TYPE_PROJECT,
-					Task.due_date.isnot(None),
-					Task.due_date <= params['max_due_date']),
-			and_(Task.type == enums.TYPE_PROJECT,
-					Task.due_date_project.isnot(None),
-					Task.due_date_project <= params['max_due_date'])))
+			and_(task.type != enums.TYPE_PROJECT,
+					task.due_date.isnot(None),
+					task.due_date <= params['max_due_date']),
+			and_(task.type == enums.TYPE_PROJECT,
+					task.due_date_project.isnot(None),
+					task.due_date_project <= params['max_due_date'])))
 	if params.get('next_action'):
-		opt.append(Task.status == 1)  # status = next action
+		opt.append(task.status == 1)  # status = next action
 	if params.get('started'):  # started task (with start date in past)
-		opt.append(Task.start_date <= now)
+		opt.append(task.start_date <= now)
 	if opt:
 		# use "or" or "and" operator for hotlist params
 		if params.get('filter_operator', 'and') == 'or':
@@ -537,25 +561,25 @@ def _quert_add_filter_by_hotlist(query, params, now):
 	return query
 
 
-def _query_add_filter_by_finished(query, finished):
+def _query_add_filter_by_finished(query, finished, task=Task):
 	""" Add filters by completed to query. """
 	if finished is not None:
 		if finished:  # only finished
-			query = query.filter(Task.completed.isnot(None))
+			query = query.filter(task.completed.isnot(None))
 		else:  # only not-completed
-			query = query.filter(Task.completed.is_(None))
+			query = query.filter(task.completed.is_(None))
 	return query
 
 
-def _query_add_filter_by_parent(query, parent_uuid):
+def _query_add_filter_by_parent(query, parent_uuid, task=Task):
 	""" Add filters by parent to query. """
 	if parent_uuid is not None:
 		if parent_uuid == 0:
 			# filter by parent (show only master task (not subtask))
-			query = query.filter(Task.parent_uuid.is_(None))
+			query = query.filter(task.parent_uuid.is_(None))
 		elif parent_uuid:
 			# filter by parent (show only subtask)
-			query = query.filter(Task.parent_uuid == parent_uuid)
+			query = query.filter(task.parent_uuid == parent_uuid)
 	return query
 
 
@@ -707,7 +731,8 @@ class NotebookPage(BaseModelMixin, Base):
 	deleted = Column(DateTime)
 	ordinal = Column(Integer, default=0)
 	title = Column(String, index=True)
-	note = Column(String)
+	# large text; loaded on first access or by `with_notes` queries
+	note = orm.deferred(Column(String), group='note')
 	starred = Column(Integer, default=0)
 	bg_color = Column(String, default="FFEFFF00")
 	visible = Column(Integer, default=1)
@@ -717,6 +742,17 @@ class NotebookPage(BaseModelMixin, Base):
 
 	folder = orm.relationship("Folder", backref=orm.backref('notebook_pages'))
 
+	@classmethod
+	def count_by_folders(cls, session=None):
+		""" Count pages in each folder without loading them.
+
+		Returns:
+			dict folder uuid -> number of pages (also deleted)
+		"""
+		session = session or Session()
+		return dict(session.query(cls.folder_uuid, func.count(cls.uuid))
+				.group_by(cls.folder_uuid))
+
 
 class SyncLog(BaseModelMixin, Base):
 	""" Synclog history """
@@ -726,7 +762,29 @@ class SyncLog(BaseModelMixin, Base):
 	prev_sync_time = Column(DateTime, nullable=True)
 
 
-Index('idx_task_childs', Task.parent_uuid, Task.due_date, Task.completed)
-Index('idx_task_show', Task.hide_until, Task.parent_uuid, Task.completed,
-		Task.title)
+# flag for lists - note itself is not loaded
+Task.has_note = orm.column_property(func.length(Task.__table__.c.note) > 0)
+
+# Lists (select_by_filters, counts) select not deleted tasks by parent
+# and completed and order them by title; reminders by alarm, context counts
+# by context and finished list by parent. Chosen with indexadvisor; former
+# single column indexes on filtered columns were not used by planner and are
+# dropped (sqls.OBSOLETE_INDEXES).
+Index('idx_task_active', Task.parent_uuid, Task.completed, Task.title,
+		sqlite_where=Task.deleted.is_(None))
+Index('idx_task_active_type', Task.type, Task.completed, Task.title,
+		sqlite_where=Task.deleted.is_(None))
+Index('idx_task_active_alarm', Task.alarm,
+		sqlite_where=and_(Task.deleted.is_(None), Task.completed.is_(None)))
+Index('idx_task_active_context', Task.context_uuid, Task.parent_uuid,
+		Task.title, sqlite_where=and_(Task.deleted.is_(None),
+			Task.completed.is_(None)))
+Index('idx_task_finished', Task.parent_uuid, Task.title,
+		sqlite_where=and_(Task.deleted.is_(None), Task.completed.isnot(None)))
+# tag filters search tasks by tag
+Index('idx_task_tags_tag', TaskTag.tag_uuid, TaskTag.task_uuid)
+
+for _sql in sqls.TASKS_TREE_PATH_TRIGGERS + \
+		sqls.TASKS_CHILD_COUNTERS_TRIGGERS:
+	event.listen(Task.__table__, 'after_create', DDL(_sql))
 
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+""" Batch loading of information related to list of tasks.
+
+Showing task rows require titles of context, folder, goal, tags and parent
+tasks. Loading them by relationships cost up to five queries per row; here
+dictionaries are loaded once and kept in memory, tags and parents for
+result set are loaded by few `IN` queries.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import logging
+
+from wxgtd.model import objects as OBJ
+from wxgtd.model import dictregistry
+from wxgtd.model import enums
+from wxgtd.model import taskrow
+
+_LOG = logging.getLogger(__name__)
+
+# max number of parameters in one IN query (sqlite limit is 999)
+_IN_CHUNK_SIZE = 500
+
+_DICT_NAMES = ('contexts', 'folders', 'goals', 'tags')
+
+
+def get_dict_titles(name, session=None):
+	""" Get (cached) map uuid -> title for given dictionary.
+
+	Args:
+		name: one of 'contexts', 'folders', 'goals', 'tags'
+		session: optional sqlalchemy session
+	"""
+	return dictregistry.get(name).titles(session)
+
+
+def invalidate_dicts():
+	""" Drop cached dictionaries; they are reloaded on next use. """
+	dictregistry.clear()
+
+
+def _chunks(items, size=_IN_CHUNK_SIZE):
+	items = list(items)
+	for idx in range(0, len(items), size):
+		yield items[idx:idx + size]
+
+
+def load_project_subtasks(tasks, session=None):
+	""" Load not deleted subtasks of projects (also of subprojects).
+
+	Projects without subtasks are recognized by `Task.child_count`; subtasks
+	are loaded by one query for each level of tree.
+
+	Args:
+		tasks: list of tasks; only projects are expanded
+		session: optional sqlalchemy session
+
+	Returns:
+		dict parent uuid -> list of subtasks (`TaskRow`) ordered by title
+	"""
+	session = session or OBJ.Session()
+
+	def expanded(tasks):
+		return [task.uuid for task in tasks
+				if task.type == enums.TYPE_PROJECT and task.child_count > 0]
+
+	subtasks = {}
+	parents = expanded(tasks)
+	while parents:
+		level = []
+		for chunk in _chunks(parents):
+			level.extend(taskrow.iter_rows(session.query(OBJ.Task).filter(
+					OBJ.Task.parent_uuid.in_(chunk),
+					OBJ.Task.deleted.is_(None)).order_by(OBJ.Task.title)))
+		for task in level:
+			subtasks.setdefault(task.parent_uuid, []).append(task)
+		parents = [uuid for uuid in expanded(level) if uuid not in subtasks]
+	return subtasks
+
+
+def _related_title(task, attr):
+	# TaskRow has no relationships
+	obj = getattr(task, attr, None)
+	return None if obj is None else obj.title
+
+
+class TaskInfo(object):
+	""" Titles of objects related to given tasks.
+
+	Tasks not known by object (i.e. added after loading) are resolved by
+	relationships.
+
+	Args:
+		tasks: list of tasks
+		session: optional sqlalchemy session
+	"""
+
+	def __init__(self, tasks=None, session=None):
+		# task uuid -> (title, parent uuid); None for not existing tasks
+		self._tasks = {}
+		# task uuid -> list of tag uuid
+		self._task_tags = {}
+		if tasks:
+			self.load(tasks, session)
+
+	def load(self, tasks, session=None):
+		""" Load information for (additional) tasks. """
+		session = session or OBJ.Session()
+		tasks = [task for task in tasks if task.uuid not in self._task_tags]
+		if not tasks:
+			return
+		for name in _DICT_NAMES:
+			get_dict_titles(name, session)
+		uuids = []
+		for task in tasks:
+			self._tasks[task.uuid] = (task.title, task.parent_uuid)
+			self._task_tags[task.uuid] = []
+			uuids.append(task.uuid)
+		self._load_tags(uuids, session)
+		self._load_parents((task.parent_uuid for task in tasks), session)
+
+	def _load_tags(self, uuids, session):
+		for chunk in _chunks(uuids):
+			query = session.query(OBJ.TaskTag.task_uuid, OBJ.TaskTag.tag_uuid)\
+					.filter(OBJ.TaskTag.task_uuid.in_(chunk))
+			for task_uuid, tag_uuid in query:
+				self._task_tags[task_uuid].append(tag_uuid)
+
+	def _load_parents(self, parents_uuid, session):
+		missing = set(uuid for uuid in parents_uuid
+				if uuid and uuid not in self._tasks)
+		while missing:
+			for chunk in _chunks(missing):
+				query = session.query(OBJ.Task.uuid, OBJ.Task.title,
+						OBJ.Task.parent_uuid).filter(OBJ.Task.uuid.in_(chunk))
+				for uuid, title, parent_uuid in query:
+					self._tasks[uuid] = (title, parent_uuid)
+			for uuid in missing:
+				self._tasks.setdefault(uuid, None)
+			missing = set(self._tasks[uuid][1] for uuid in missing
+					if self._tasks[uuid])
+			missing = set(uuid for uuid in missing
+					if uuid and uuid not in self._tasks)
+
+	def context_title(self, task):
+		""" Get title of task context. """
+		if not task.context_uuid:
+			return None
+		return get_dict_titles('contexts').get(task.context_uuid) or \
+				_related_title(task, 'context')
+
+	def folder_title(self, task):
+		""" Get title of task folder. """
+		if not task.folder_uuid:
+			return None
+		return get_dict_titles('folders').get(task.folder_uuid) or \
+				_related_title(task, 'folder')
+
+	def goal_title(self, task):
+		""" Get title of task goal. """
+		if not task.goal_uuid:
+			return None
+		return get_dict_titles('goals').get(task.goal_uuid) or \
+				_related_title(task, 'goal')
+
+	def parent_titles(self, task):
+		""" Get titles of all parents of task, starting from root. """
+		titles = []
+		parent_uuid = task.parent_uuid
+		while parent_uuid:
+			if parent_uuid not in self._tasks:
+				# not loaded - use relationships
+				parent = getattr(task, "parent", None)
+				while parent is not None and parent.uuid != parent_uuid:
+					parent = parent.parent
+				while parent is not None:
+					titles.append(parent.title)
+					parent = parent.parent
+				break
+			info = self._tasks[parent_uuid]
+			if info is None:
+				# parent not exists
+				break
+			title, parent_uuid = info
+			titles.append(title)
+			if len(titles) > len(self._tasks):
+				_LOG.warning("TaskInfo.parent_titles: loop in %r", task.uuid)
+				break
+		titles.reverse()
+		return titles
+
+	def tags_titles(self, task):
+		""" Get titles of tags assigned to task. """
+		tags_uuid = self._task_tags.get(task.uuid)
+		if tags_uuid is None:
+			return [tag.title for tag in getattr(task, 'tags', ())]
+		titles = get_dict_titles('tags')
+		return [titles[uuid] for uuid in tags_uuid if uuid in titles]
+
+
+def benchmark_list_refresh(tasks=5000, note_size=32 * 1024):
+	""" Compare peak memory of loading task list (like list refresh do)
+	with notes and with deferred notes.
+
+	Tasks with `note_size` characters notes are created in memory database.
+
+	Returns:
+		(peak bytes with notes, peak bytes with deferred notes)
+	"""
+	import tracemalloc
+	import sqlalchemy
+	from sqlalchemy import orm
+	engine = sqlalchemy.create_engine("sqlite:///:memory:")
+	OBJ.Base.metadata.create_all(engine)
+	note = ("Lorem ipsum dolor sit amet. " * (note_size // 28 + 1))[:note_size]
+	engine.execute(OBJ.Task.__table__.insert(), [
+			{'uuid': "%08d" % idx, 'title': "task %d" % idx, 'note': note,
+				'type': enums.TYPE_TASK} for idx in range(tasks)])
+	session = orm.sessionmaker(bind=engine)()
+	result = []
+	for with_notes in (True, False):
+		session.expunge_all()
+		tracemalloc.start()
+		loaded = OBJ.Task.select_by_filters({}, session=session,
+				with_notes=with_notes).all()
+		info = TaskInfo(loaded, session)
+		flags = [(info.parent_titles(task), task.has_note)
+				for task in loaded]
+		result.append(tracemalloc.get_traced_memory()[1])
+		tracemalloc.stop()
+		del loaded, info, flags
+	session.close()
+	# registry was loaded from benchmark database
+	dictregistry.clear()
+	return tuple(result)
+
+
+if __name__ == "__main__":
+	import sys
+	if "--benchmark-list-refresh" in sys.argv:
+		print("with notes: %.1fMB, deferred notes: %.1fMB" % tuple(
+				size / 1024. / 1024. for size in benchmark_list_refresh()))
@@ -59,6 +59,7 @@ def build_query_params(query_group, options, parent, search_str):
 			'goals': [],
 			'statuses': [],
 			'tags': [],
+			'tags_match': enums.TAGS_MATCH_ANY,
 			'hide_until': options & OPT_HIDE_UNTIL == OPT_HIDE_UNTIL,
 			'search_str': search_str,
 			'parent_uuid': 0 if not parent and not options & OPT_SHOW_SUBTASKS
@@ -136,6 +137,13 @@ def query_params_append_tags(params, statuses):
 	return params
 
 
+def query_params_set_tags_match(params, tags_match):
+	""" Set how tasks are matched to selected tags (enums.TAGS_MATCH_*). """
+	if params['_query_group'] != QUERY_BASKET:
+		params['tags_match'] = tags_match
+	return params
+
+
 def _get_hotlist_settings(params):
 	conf = AppConfig()
 	now = datetime.datetime.utcnow()
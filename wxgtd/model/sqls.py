@@ -158,3 +158,214 @@ def fix_synclog(engine):
 				"prev_sync_time from synclog")
 	engine.execute("drop table synclog_old;")
 
+
+
+# Materialized path of tasks: "/<root uuid>/.../<task uuid>/". Path is
+# maintained only by triggers; subtree of task is range
+# [path, path || TREE_PATH_END).
+TREE_PATH_END = "\U0010ffff"
+
+TASKS_TREE_PATH_TRIGGERS = [
+	"""CREATE TRIGGER IF NOT EXISTS tasks_tree_path_insert
+AFTER INSERT ON tasks
+BEGIN
+	UPDATE tasks SET tree_path = COALESCE(
+			(SELECT p.tree_path FROM tasks p WHERE p.uuid = NEW.parent_uuid),
+			'/') || NEW.uuid || '/'
+		WHERE uuid = NEW.uuid;
+END""",
+	"""CREATE TRIGGER IF NOT EXISTS tasks_tree_path_move
+AFTER UPDATE OF uuid, parent_uuid ON tasks
+WHEN NEW.parent_uuid IS NOT OLD.parent_uuid OR NEW.uuid IS NOT OLD.uuid
+BEGIN
+	UPDATE tasks SET tree_path = COALESCE(
+			(SELECT p.tree_path FROM tasks p WHERE p.uuid = NEW.parent_uuid),
+			'/') || NEW.uuid || '/'
+			|| substr(tree_path, length(OLD.tree_path) + 1)
+		WHERE tree_path >= OLD.tree_path
+			AND tree_path < OLD.tree_path || char(1114111);
+END"""]
+
+_TREE_PATH_REBUILD = [
+	"DROP TABLE IF EXISTS temp.tasks_tree_path",
+	"""CREATE TEMP TABLE tasks_tree_path (
+uuid VARCHAR(36) PRIMARY KEY,
+tree_path VARCHAR)""",
+	"""INSERT INTO temp.tasks_tree_path (uuid, tree_path)
+WITH RECURSIVE tree(uuid, tree_path) AS (
+	SELECT uuid, '/' || uuid || '/' FROM tasks
+		WHERE parent_uuid IS NULL
+			OR parent_uuid NOT IN (SELECT uuid FROM tasks)
+	UNION ALL
+	SELECT tasks.uuid, tree.tree_path || tasks.uuid || '/'
+		FROM tasks JOIN tree ON tasks.parent_uuid = tree.uuid)
+SELECT uuid, tree_path FROM tree""",
+	# tasks in loops are not reachable from roots; treat them as roots
+	"""UPDATE tasks SET tree_path = COALESCE(
+		(SELECT t.tree_path FROM temp.tasks_tree_path t
+			WHERE t.uuid = tasks.uuid),
+		'/' || uuid || '/')""",
+	"DROP TABLE temp.tasks_tree_path"]
+
+
+def rebuild_tasks_tree_path(conn):
+	""" Recalculate tree_path for all tasks.
+
+	Args:
+		conn: sqlalchemy connection or engine
+	"""
+	for sql in _TREE_PATH_REBUILD:
+		conn.execute(sql)
+
+
+def fix_tasks_tree_path(engine):
+	""" Add tree_path column, index and triggers to existing database and
+	fill missing paths. """
+	columns = [row[1] for row in engine.execute("PRAGMA table_info(tasks)")]
+	if not columns:
+		return
+	with engine.begin() as conn:
+		if 'tree_path' not in columns:
+			conn.execute("ALTER TABLE tasks ADD COLUMN tree_path VARCHAR")
+		conn.execute("CREATE INDEX IF NOT EXISTS ix_tasks_tree_path "
+				"ON tasks (tree_path)")
+		for sql in TASKS_TREE_PATH_TRIGGERS:
+			conn.execute(sql)
+		if conn.execute("SELECT 1 FROM tasks WHERE tree_path IS NULL "
+				"LIMIT 1").first():
+			rebuild_tasks_tree_path(conn)
+
+
+# Counters of direct subtasks stored in parent row:
+#   children_count - not deleted subtasks,
+#   active_children_count - not deleted and not completed subtasks,
+#   children_due - nearest due date of active subtasks (due_date_project for
+#       subprojects).
+# Triggers update parent incrementally when subtask is added, removed or
+# changed; parent of moved task is recalculated (this covers also changes of
+# uuid cascaded to parent_uuid of subtasks).
+# Type 1 = enums.TYPE_PROJECT.
+_CHILD_DUE = ("CASE WHEN {t}.type = 1 THEN {t}.due_date_project "
+		"ELSE {t}.due_date END")
+_CHILD_ACTIVE = "{t}.deleted IS NULL AND {t}.completed IS NULL"
+
+_CHILD_COUNTERS_RECALC = ("""children_count = (SELECT count(*) FROM tasks c
+			WHERE c.parent_uuid = tasks.uuid AND c.deleted IS NULL),
+		active_children_count = (SELECT count(*) FROM tasks c
+			WHERE c.parent_uuid = tasks.uuid AND """ + _CHILD_ACTIVE + """),
+		children_due = (SELECT min(""" + _CHILD_DUE + """) FROM tasks c
+			WHERE c.parent_uuid = tasks.uuid AND """ + _CHILD_ACTIVE + ")"
+		).format(t="c")
+
+_CHILD_ADD = ("""UPDATE tasks SET
+		children_count = children_count + (NEW.deleted IS NULL),
+		active_children_count = active_children_count + (""" +
+			_CHILD_ACTIVE + """),
+		children_due = CASE
+			WHEN NOT (""" + _CHILD_ACTIVE + """) OR {due} IS NULL
+				THEN children_due
+			WHEN children_due IS NULL OR {due} < children_due THEN {due}
+			ELSE children_due END
+		WHERE uuid = NEW.parent_uuid;""").format(t="NEW",
+				due=_CHILD_DUE.format(t="NEW"))
+
+_CHILD_REMOVE = ("""UPDATE tasks SET
+		children_count = children_count - (OLD.deleted IS NULL),
+		active_children_count = active_children_count - (""" +
+			_CHILD_ACTIVE + """),
+		children_due = CASE
+			WHEN """ + _CHILD_ACTIVE + """ AND {due} = children_due
+				THEN (SELECT min(""" + _CHILD_DUE.format(t="c") + """)
+					FROM tasks c WHERE c.parent_uuid = tasks.uuid
+						AND """ + _CHILD_ACTIVE.format(t="c") + """)
+			ELSE children_due END
+		WHERE uuid = OLD.parent_uuid;""").format(t="OLD",
+				due=_CHILD_DUE.format(t="OLD"))
+
+TASKS_CHILD_COUNTERS_TRIGGERS = [
+	"""CREATE TRIGGER IF NOT EXISTS tasks_child_counters_insert
+AFTER INSERT ON tasks
+BEGIN
+	UPDATE tasks SET """ + _CHILD_COUNTERS_RECALC + """
+		WHERE uuid = NEW.uuid;
+	""" + _CHILD_ADD + """
+END""",
+	"""CREATE TRIGGER IF NOT EXISTS tasks_child_counters_update
+AFTER UPDATE OF parent_uuid, completed, deleted, due_date, due_date_project,
+	type ON tasks
+WHEN NEW.parent_uuid IS OLD.parent_uuid AND (
+	NEW.completed IS NOT OLD.completed OR NEW.deleted IS NOT OLD.deleted
+	OR NEW.due_date IS NOT OLD.due_date
+	OR NEW.due_date_project IS NOT OLD.due_date_project
+	OR NEW.type IS NOT OLD.type)
+BEGIN
+	""" + _CHILD_REMOVE + """
+	""" + _CHILD_ADD + """
+END""",
+	"""CREATE TRIGGER IF NOT EXISTS tasks_child_counters_move
+AFTER UPDATE OF parent_uuid ON tasks
+WHEN NEW.parent_uuid IS NOT OLD.parent_uuid
+BEGIN
+	""" + _CHILD_REMOVE + """
+	UPDATE tasks SET """ + _CHILD_COUNTERS_RECALC + """
+		WHERE uuid = NEW.parent_uuid;
+END""",
+	"""CREATE TRIGGER IF NOT EXISTS tasks_child_counters_delete
+AFTER DELETE ON tasks
+BEGIN
+	""" + _CHILD_REMOVE + """
+END"""]
+
+
+def rebuild_tasks_child_counters(conn):
+	""" Recalculate counters of subtasks for all tasks.
+
+	Args:
+		conn: sqlalchemy connection or engine
+	"""
+	conn.execute("UPDATE tasks SET " + _CHILD_COUNTERS_RECALC)
+
+
+def fix_tasks_child_counters(engine):
+	""" Add subtasks counters columns and triggers to existing database. """
+	columns = [row[1] for row in engine.execute("PRAGMA table_info(tasks)")]
+	if not columns:
+		return
+	with engine.begin() as conn:
+		missing = False
+		for column, definition in (
+				('children_count', "INTEGER NOT NULL DEFAULT 0"),
+				('active_children_count', "INTEGER NOT NULL DEFAULT 0"),
+				('children_due', "DATETIME")):
+			if column not in columns:
+				conn.execute("ALTER TABLE tasks ADD COLUMN %s %s" % (column,
+						definition))
+				missing = True
+		for sql in TASKS_CHILD_COUNTERS_TRIGGERS:
+			conn.execute(sql)
+		if missing:
+			rebuild_tasks_child_counters(conn)
+
+
+# Indexes removed from schema; not used by any list query (see indexadvisor)
+OBSOLETE_INDEXES = ('ix_tasks_completed', 'ix_tasks_type', 'ix_tasks_starred',
+		'ix_tasks_status', 'ix_tasks_start_date', 'ix_tasks_due_date',
+		'ix_tasks_due_date_project', 'ix_tasks_hide_until', 'ix_tasks_alarm',
+		'idx_task_childs', 'idx_task_show')
+
+
+def drop_obsolete_indexes(engine):
+	""" Drop indexes removed from schema from existing database.
+
+	Returns:
+		number of dropped indexes
+	"""
+	existing = set(row[0] for row in engine.execute(
+			"SELECT name FROM sqlite_master WHERE type = 'index'"))
+	dropped = 0
+	with engine.begin() as conn:
+		for name in OBSOLETE_INDEXES:
+			if name in existing:
+				conn.execute("DROP INDEX %s" % name)
+				dropped += 1
+	return dropped
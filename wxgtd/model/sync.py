@@ -14,15 +14,15 @@ __copyright__ = """Copyright (c) Karol Będkowski, 2013
 Copyright (c) Johan Andersson, 2025"""
 __version__ = "2025-12-03"
 
+import os
 import logging
 import gettext
-import os
-import datetime
+from concurrent import futures
 
 from wxgtd.wxtools.wxpub import publisher
 
-from wxgtd.lib import appconfig
-
+from wxgtd.lib import pipeline
+from wxgtd.model import backup
 from wxgtd.model import exporter
 from wxgtd.model import loader
 
@@ -48,6 +48,10 @@ def _notify_progress(progress, msg):
 def sync(filename, load_only=False, notify_cb=_notify_progress):
 	""" Sync data from/to given file.
 
+	Backup is created concurrently with checking and reading sync file;
+	loader waits for it before first change in database. Time of each stage
+	is reported by `notify_cb`.
+
 	Notify progress by publisher.
 
 	Args:
@@ -59,74 +63,45 @@ def sync(filename, load_only=False, notify_cb=_notify_progress):
 	"""
 	_LOG.info("sync: %r", filename)
 	notify_cb(0, _("Sync via file %s") % filename)
+	timer = pipeline.StageTimer()
 	notify_cb(0, _("Creating backup"))
-	create_backup()
+	with futures.ThreadPoolExecutor(1) as executor:
+		backup = executor.submit(timer.timed("backup", create_backup))
+		_sync(filename, load_only, notify_cb, timer, backup.result)
+		backup.result()
+	timer.report(notify_cb)
+	notify_cb(100, _("Completed"))
+
+
+def _sync(filename, load_only, notify_cb, timer, wait_for_backup):
 	notify_cb(25, _("Sanity check"))
 	_sync_file_check(filename)
 	notify_cb(50, _("Checking sync lock"))
-	if exporter.create_sync_lock(filename):
-		notify_cb(1, _("Loading..."))
-		try:
-			if loader.load_from_file(filename, notify_cb):
-				if not load_only:
-					exporter.save_to_file(filename, notify_cb)
-		except Exception as err:
-			_LOG.exception("file sync error")
-			raise OtherSyncError(err)
-		finally:
-			notify_cb(50, _("Removing sync lock"))
-			exporter.delete_sync_lock(filename)
-		notify_cb(100, _("Completed"))
-	else:
+	if not exporter.create_sync_lock(filename):
 		notify_cb(100, _("Synchronization file is locked. "
 			"Can't synchronize..."))
 		raise SyncLockedError()
+	notify_cb(1, _("Loading..."))
+	try:
+		if loader.load_from_file(filename, notify_cb,
+				before_apply=wait_for_backup, timer=timer):
+			if not load_only:
+				with timer.stage("export"):
+					exporter.save_to_file(filename, notify_cb)
+	except Exception as err:
+		_LOG.exception("file sync error")
+		raise OtherSyncError(err)
+	finally:
+		notify_cb(50, _("Removing sync lock"))
+		exporter.delete_sync_lock(filename)
 
 
 def create_backup():
 	""" Create backup current data in database.
 
-	Format of backup file is identical with synchronization file.
-	Backup are stored for default in ~/.local/share/wxgtd/backups/
-
-	Configuration in wxgtd.conf:
-	[backup]
-	number_copies = 21
-	location = <path to dir>
+	See `backup.create_backup`.
 	"""
-	appcfg = appconfig.AppConfig()
-	backup_dir = appcfg.get('backup', 'location')
-	if backup_dir:
-		backup_dir = os.path.expanduser(backup_dir)
-	else:
-		backup_dir = os.path.join(appcfg.user_share_dir, 'backups')
-	filename = os.path.join(backup_dir,
-			"BACKUP_" + datetime.date.today().isoformat() + ".json.zip")
-	_LOG.info('create_backup: %s', filename)
-	if os.path.isfile(filename):
-		_LOG.info("create_backup: today backup already exists; skipping...")
-		return True
-	if os.path.isdir(backup_dir):
-		num_files_to_keep = int(appcfg.get('backup', 'number_copies', 21))
-		# backup dir exists; check number of files and delete if more than 21
-		files = sorted((fname for fname in os.listdir(backup_dir)
-				if fname.startswith('BACKUP') and fname.endswith('.json.zip')),
-				reverse=True)
-		if len(files) >= num_files_to_keep:
-			for fname in files[num_files_to_keep:]:
-				_LOG.info('create_backup: delete backup: %r', fname)
-				os.unlink(os.path.join(backup_dir, fname))
-	else:
-		try:
-			os.mkdir(backup_dir)
-		except IOError as error:
-			_LOG.error('create_backup: create dir error: %s', str(error))
-			return False
-	# backup is regular export (zip)
-	exporter.save_to_file(os.path.join(backup_dir, filename),
-			internal_fname="GDT_SYNC.json")
-	_LOG.info('create_backup: COMPLETED %s', filename)
-	return True
+	return backup.create_backup()
 
 
 def _sync_file_check(filename):
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+""" Compact, read-only rows of tasks for lists and exports.
+
+`TaskRow` is a tuple with columns displayed by task lists, info boxes and
+exports, and with precomputed flags (overdue, overdue subtasks). Rows are
+loaded by column query (no ORM instances, identity map nor relationships),
+so they are much smaller than `objects.Task`. Attribute names are the same
+as in `objects.Task`, so code showing tasks accept both.
+
+Copyright (c) Johan Andersson, 2026
+
+This file is part of wxGTD
+Licence: GPLv2+
+"""
+
+__author__ = "Johan Andersson"
+__copyright__ = "Copyright (c) Johan Andersson, 2026"
+__version__ = "2026-10-19"
+
+import logging
+import datetime
+import collections
+
+from sqlalchemy import null
+
+from wxgtd.model import objects as OBJ
+from wxgtd.model import enums
+
+_LOG = logging.getLogger(__name__)
+
+# Task columns loaded into rows; `note` is loaded only on request
+_COLUMNS = ('uuid', 'parent_uuid', 'title', 'type', 'status', 'priority',
+		'importance', 'starred', 'created', 'modified', 'completed',
+		'due_date', 'due_time_set', 'due_date_project', 'start_date',
+		'start_time_set', 'alarm', 'repeat_pattern', 'context_uuid',
+		'folder_uuid', 'goal_uuid', 'children_count', 'active_children_count',
+		'children_due', 'has_note', 'note')
+
+_IDX_TYPE = _COLUMNS.index('type')
+_IDX_COMPLETED = _COLUMNS.index('completed')
+_IDX_DUE_DATE = _COLUMNS.index('due_date')
+_IDX_DUE_DATE_PROJECT = _COLUMNS.index('due_date_project')
+_IDX_CHILDREN_DUE = _COLUMNS.index('children_due')
+
+# number of rows fetched from database at once
+_FETCH_SIZE = 1000
+
+
+class TaskRow(collections.namedtuple('_TaskRow',
+		_COLUMNS + ('overdue', 'child_overdue'))):
+	""" Read-only task row; see `_COLUMNS` for available attributes.
+
+	`overdue` and `child_overdue` are computed when row is loaded.
+	"""
+	__slots__ = ()
+
+	@property
+	def child_count(self):
+		""" Count subtask. """
+		return self.children_count or 0
+
+	@property
+	def active_child_count(self):
+		""" Count of not-complete subtask. """
+		return self.active_children_count or 0
+
+	@property
+	def task_completed(self):
+		return bool(self.completed)
+
+
+def _make_row(values, now):
+	if values[_IDX_COMPLETED]:
+		overdue = False
+	else:
+		due = values[_IDX_DUE_DATE_PROJECT] \
+				if values[_IDX_TYPE] == enums.TYPE_PROJECT \
+				else values[_IDX_DUE_DATE]
+		overdue = bool(due and due < now)
+	children_due = values[_IDX_CHILDREN_DUE]
+	return TaskRow(*values, overdue=overdue,
+			child_overdue=bool(children_due and children_due < now))
+
+
+def _columns(task, with_notes):
+	columns = [getattr(task, name) for name in _COLUMNS[:-1]]
+	columns.append(task.note if with_notes else null().label('note'))
+	return columns
+
+
+def iter_rows(query, with_notes=False, fetch_size=_FETCH_SIZE):
+	""" Execute query for tasks and yield `TaskRow` for each result.
+
+	Only columns of `TaskRow` are selected (filters and order of query are
+	kept); rows are fetched in batches of `fetch_size`. Columns are taken
+	from entity of query, so queries for aliased Task (i.e. union with
+	archive) are supported.
+
+	Args:
+		query: sqlalchemy query for Task (i.e. Task.select_by_filters)
+		with_notes: load also notes (otherwise `note` is None)
+		fetch_size: number of rows fetched at once
+
+	Yields:
+		TaskRow
+	"""
+	task = query.column_descriptions[0]['entity']
+	statement = query.with_entities(*_columns(task, with_notes)).statement
+	result = query.session.execute(statement)
+	now = datetime.datetime.utcnow()
+	while True:
+		rows = result.fetchmany(fetch_size)
+		if not rows:
+			break
+		for row in rows:
+			yield _make_row(row, now)
+
+
+def select(query, with_notes=False):
+	""" Load all tasks selected by query as list of `TaskRow`. """
+	return list(iter_rows(query, with_notes))
+
+
+def _measure_load(session_factory, load):
+	""" Get memory (in bytes) kept by result of `load` and its session. """
+	import gc
+	import tracemalloc
+	session = session_factory()
+	query = OBJ.Task.select_by_filters({}, session=session)
+	gc.collect()
+	tracemalloc.start()
+	try:
+		loaded = load(query)
+		size = tracemalloc.get_traced_memory()[0]
+	finally:
+		tracemalloc.stop()
+	del loaded
+	session.close()
+	return size
+
+
+def benchmark_rows(tasks=50000):
+	""" Compare memory used by list of `tasks` Task objects and TaskRows.
+
+	Both loaders are run once before measurement, so compiled queries and
+	other caches are not counted; each load use new session.
+
+	Returns:
+		(bytes for Task objects, bytes for TaskRows)
+	"""
+	import sqlalchemy
+	from sqlalchemy import orm
+	engine = sqlalchemy.create_engine("sqlite:///:memory:")
+	OBJ.Base.metadata.create_all(engine)
+	now = datetime.datetime.utcnow()
+	engine.execute(OBJ.Task.__table__.insert(), [
+			{'uuid': "%08d" % idx, 'title': "task %d" % idx,
+				'type': enums.TYPE_TASK, 'created': now, 'modified': now,
+				'due_date': now + datetime.timedelta(days=idx % 30 - 15)}
+			for idx in range(tasks)])
+	session_factory = orm.sessionmaker(bind=engine)
+	loaders = (lambda query: query.all(), select)
+	for load in loaders:
+		_measure_load(session_factory, load)
+	result = [_measure_load(session_factory, load) for load in loaders]
+	_LOG.info("benchmark_rows: %d tasks: objects %d B, rows %d B", tasks,
+			result[0], result[1])
+	return tuple(result)
+
+
+if __name__ == "__main__":
+	import sys
+	if "--benchmark-rows" in sys.argv:
+		print("Task objects: %.1fMB, TaskRows: %.1fMB" % tuple(
+				size / 1024. / 1024. for size in benchmark_rows()))
@@ -3,6 +3,18 @@
 # pylint: disable-msg=R0901, R0904
 """ Inter process communication.
 
+Messages are exchanged as frames: 4-byte big-endian length followed by
+json-encoded request/response. On platforms supporting it server listen on
+unix domain socket; otherwise on localhost tcp port.
+
+Request:
+	{"message": <pubsub topic>, "data": <data>} - publish message in app
+	{"command": <name>, "data": <kwargs>} - call registered command
+
+Response:
+	{"status": "ok", "result": <result>}
+	{"status": "error" | "unknown_command", "error": <error message>}
+
 Copyright (c) Karol Będkowski, 2013
 Copyright (c) Johan Andersson, 2025
 
@@ -20,58 +32,160 @@ __version__ = "2025-12-03"
 
 
 import os
+import struct
 import logging
 import threading
 import socket
 import socketserver
-try:
-	import cjson
-	_JSON_DECODER = cjson.decode
-	_JSON_ENCODER = cjson.encode
-except ImportError:
-	import json
-	_JSON_DECODER = json.loads
-	_JSON_ENCODER = json.dumps
-
 
 from wxgtd.wxtools.wxpub import publisher
+from wxgtd.lib import ignore_exceptions
+from wxgtd.lib import jsoncodec
 
 _LOG = logging.getLogger(__name__)
 
+_HEADER = struct.Struct("!I")
+# maximal accepted frame size
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+# unix socket path must fit in sockaddr_un.sun_path
+_MAX_UNIX_PATH = 100
+_UNIX_PREFIX = "unix:"
+
+
+class IPCError(RuntimeError):
+	""" Communication or remote execution error. """
+	pass
+
+
+class UnknownCommandError(IPCError):
+	""" Command is not supported by server. """
+	pass
+
+
+def send_frame(sock, obj):
+	""" Encode `obj` and send it as one frame. """
+	payload = jsoncodec.dumps(obj)
+	sock.sendall(_HEADER.pack(len(payload)) + payload)
 
-class _ThreadedTCPRequestHandler(socketserver.BaseRequestHandler):
+
+def _recv_exactly(sock, size):
+	""" Read `size` bytes from socket. Return None on closed connection. """
+	chunks = []
+	while size > 0:
+		chunk = sock.recv(min(size, 65536))
+		if not chunk:
+			return None
+		chunks.append(chunk)
+		size -= len(chunk)
+	return b"".join(chunks)
+
+
+def recv_frame(sock):
+	""" Receive one frame and decode it.
+
+	Returns:
+		Decoded object or None when connection was closed.
+	"""
+	header = _recv_exactly(sock, _HEADER.size)
+	if header is None:
+		return None
+	size, = _HEADER.unpack(header)
+	if size > MAX_FRAME_SIZE:
+		raise IPCError("frame too large: %d" % size)
+	payload = _recv_exactly(sock, size) if size else b""
+	if payload is None:
+		raise IPCError("connection closed while reading frame")
+	return jsoncodec.loads(payload)
+
+
+def _format_address(address):
+	if isinstance(address, int):
+		return str(address)
+	return _UNIX_PREFIX + address
+
+
+def _parse_address(value):
+	""" Parse address stored in lock file: port number or unix:<path>. """
+	value = value.strip()
+	if value.startswith(_UNIX_PREFIX):
+		return value[len(_UNIX_PREFIX):]
+	port = int(value)
+	if 1024 < port < 65536:
+		return port
+	raise ValueError("invalid port %r" % port)
+
+
+def _connect(address, timeout):
+	if isinstance(address, int):
+		sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		sock.settimeout(timeout)
+		sock.connect(("localhost", address))
+	else:
+		sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		sock.settimeout(timeout)
+		sock.connect(address)
+	return sock
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+	""" Handle requests on one connection until client close it. """
 
 	def handle(self):
-		data = self.request.recv(1024).strip()
-		_LOG.info("_ThreadedTCPRequestHandler.handle(%r)", data)
-		try:
-			if data == "check":
-				self.request.sendall("ok")
+		while True:
+			try:
+				request = recv_frame(self.request)
+			except (IPCError, ValueError, OSError) as err:
+				_LOG.warning("_RequestHandler.handle: invalid request: %s", err)
+				return
+			if request is None:
+				return
+			response = self.server.ipc.handle_request(request)
+			try:
+				send_frame(self.request, response)
+			except OSError as err:
+				_LOG.warning("_RequestHandler.handle: send error: %s", err)
 				return
-			data_j = _JSON_DECODER(data.decode("UTF-8"))
-			message = data_j['message']
-			publisher.sendMessage(message, data=data_j.get("data"))
-			self.request.sendall("ok")
-		except Exception as err:  # pylint: disable=W0703
-			print(err)
 
 
 class _ThreadedTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
-	pass
+	daemon_threads = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+	class _ThreadedUnixServer(socketserver.ThreadingMixIn,
+			socketserver.UnixStreamServer):
+		daemon_threads = True
+else:
+	_ThreadedUnixServer = None  # pylint: disable=C0103
+
+
+def _call_directly(func, *args, **kwargs):
+	func(*args, **kwargs)
 
 
 class IPC:
 	""" Inter process communication controller.
 
 	Args:
-		lock_path: path to file holding local server port.
+		lock_path: path to file holding local server address.
+		dispatcher: function used to call publisher in application main
+			thread (i.e. wx.CallAfter); default - call in server thread.
 	"""
 
-	def __init__(self, lock_path):
+	def __init__(self, lock_path, dispatcher=None):
 		self._server = None
 		self._server_thread = None
+		self._commands = {}
+		# commands are executed one by one
+		self._commands_lock = threading.Lock()
+		self._dispatcher = dispatcher or _call_directly
 		self.lock_path = lock_path
-		self.port = None
+		self.address = None
+
+	@property
+	def port(self):
+		""" Server tcp port (None when listening on unix socket). """
+		return self.address if isinstance(self.address, int) else None
 
 	def startup(self, message=None):
 		""" Check is another app is runing; run ipc server if not.
@@ -86,54 +200,118 @@ class IPC:
 
 	def start(self):
 		""" Start IPC server. """
-		self._server = server = _ThreadedTCPServer(("localhost", 0),
-				_ThreadedTCPRequestHandler)
-		addr_ip, port = server.server_address
+		sock_path = self.lock_path + ".sock"
+		if _ThreadedUnixServer is not None and len(sock_path) < _MAX_UNIX_PATH:
+			if os.path.exists(sock_path):
+				os.unlink(sock_path)
+			server = _ThreadedUnixServer(sock_path, _RequestHandler)
+			os.chmod(sock_path, 0o600)
+			self.address = sock_path
+		else:
+			server = _ThreadedTCPServer(("localhost", 0), _RequestHandler)
+			self.address = server.server_address[1]
+		server.ipc = self
+		self._server = server
 		self._server_thread = server_thread = threading.Thread(
 				target=server.serve_forever)
 		server_thread.daemon = True
 		server_thread.start()
-		_LOG.info("IPC.started(port=%r, ip=%r)", port, addr_ip)
-		self.port = port
+		_LOG.info("IPC.started(address=%r)", self.address)
 		return self._create_lock()
 
 	def shutdown(self):
 		""" Shutdown server. """
-		self._server.shutdown()
+		if self._server:
+			self._server.shutdown()
+			self._server.server_close()
+			self._server = None
+			if self.address and not isinstance(self.address, int):
+				with ignore_exceptions(OSError):
+					os.unlink(self.address)
 		self._remove_lock()
 
+	def register(self, command, func, notify=None):
+		""" Register command callable by other processes.
+
+		Args:
+			command: command name
+			func: function called with request data as keyword arguments;
+				result must be json-serializable.
+			notify: optional list of pubsub topics sent after successful
+				command execution.
+		"""
+		self._commands[command] = (func, notify or ())
+
+	def register_commands(self, commands):
+		""" Register many commands.
+
+		Args:
+			commands: dict command name -> (function, notify topics)
+		"""
+		for command, (func, notify) in commands.items():
+			self.register(command, func, notify)
+
+	def handle_request(self, request):
+		""" Process one decoded request and return response. """
+		_LOG.info("IPC.handle_request(%r)", request)
+		if not isinstance(request, dict):
+			return {'status': 'error', 'error': 'invalid request'}
+		data = request.get('data')
+		command = request.get('command')
+		if command is None:
+			message = request.get('message')
+			if not message:
+				return {'status': 'error', 'error': 'missing message'}
+			if message != "check":
+				self._dispatcher(publisher.sendMessage, message, data=data)
+			return {'status': 'ok', 'result': 'ok'}
+		func, notify = self._commands.get(command, (None, None))
+		if func is None:
+			return {'status': 'unknown_command',
+					'error': 'unknown command %r' % command}
+		try:
+			with self._commands_lock:
+				result = func(**(data or {}))
+		except Exception as err:  # pylint: disable=W0703
+			_LOG.exception("IPC.handle_request: command %r error", command)
+			return {'status': 'error', 'error': str(err)}
+		for topic in notify:
+			self._dispatcher(publisher.sendMessage, topic)
+		return {'status': 'ok', 'result': result}
+
 	def check_lock(self, message=None):
 		""" Check lock file; if exists - checking is app response.
 
 		Args:
 			message: message to sent for check.
+		Returns:
+			Address of running server or None.
 		"""
 		if os.path.isfile(self.lock_path):
 			# lock file exists
 			_LOG.debug("check_lock: file exists %s", self.lock_path)
-			with open(self.lock_path)as lock_file:
-				try:
-					port = int(lock_file.read())
-					_LOG.debug("check_lock: port %r", port)
-					if 1024 < port < 65536:
-						resp = self.send(message or "check", port=port)
-						_LOG.info("check_lock: check send; res=%r", resp)
-						if resp == "ok":
-							return port
-				except:  # pylint: disable=W0702
-					pass
+			try:
+				with open(self.lock_path) as lock_file:
+					address = _parse_address(lock_file.read())
+				_LOG.debug("check_lock: address %r", address)
+				resp = self.send(message or "check", address=address)
+				_LOG.info("check_lock: check send; res=%r", resp)
+				if resp == "ok":
+					return address
+			except (IPCError, OSError, ValueError) as err:
+				_LOG.debug("check_lock: error %s", err)
 			# death lock file
 			self._remove_lock()
 		return None
 
 	def _create_lock(self):
-		_LOG.info("IPC._create_lock: %r -> %r", self.lock_path, self.port)
+		_LOG.info("IPC._create_lock: %r -> %r", self.lock_path, self.address)
 		try:
 			with open(self.lock_path, "w") as lock_file:
-				lock_file.write(str(self.port))
+				lock_file.write(_format_address(self.address))
 		except OSError:
 			_LOG.exception("create_lock error (%r, %r)", self.lock_path,
-					self.port)
+					self.address)
 			return False
 		return True
 
@@ -149,26 +327,51 @@ class IPC:
 			return False
 		return True
 
-	def send(self, message, data=None, port=None):
+	def _request(self, request, address, timeout):
+		address = address or self.address
+		_LOG.info("_request(%r, %r)", address, request)
+		sock = _connect(address, timeout)
+		try:
+			send_frame(sock, request)
+			response = recv_frame(sock)
+		finally:
+			sock.close()
+		if not isinstance(response, dict):
+			raise IPCError("invalid response")
+		status = response.get('status')
+		if status == 'ok':
+			return response.get('result')
+		if status == 'unknown_command':
+			raise UnknownCommandError(response.get('error'))
+		raise IPCError(response.get('error'))
+
+	def send(self, message, data=None, address=None, timeout=5):
 		""" Send message to running application.
 
 		Args:
-			message: message to send
+			message: message (pubsub topic) to send
 			data: optional data to send
-			port: optional destination port.
+			address: optional destination address (port or socket path).
+			timeout: socket timeout in seconds
 		Returns:
 			Server response
 		"""
-		port = port or self.port
-		_LOG.info("send(%r, %r, %r)", port, message, data)
-		sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-		sock.connect(("localhost", port))
-		try:
-			data_j = _JSON_ENCODER({'message': message, 'data': data})
-			sock.sendall(data_j)
-			response = sock.recv(1024)
-			return response
-		finally:
-			sock.close()
-		return None
+		return self._request({'message': message, 'data': data}, address,
+				timeout)
+
+	def call(self, command, data=None, address=None, timeout=None):
+		""" Execute command in running application.
 
+		Args:
+			command: registered command name
+			data: dict of command arguments
+			address: optional destination address (port or socket path).
+			timeout: socket timeout in seconds; None = wait for result
+		Returns:
+			Command result
+		Raises:
+			UnknownCommandError: command not registered in server
+			IPCError: command failed
+		"""
+		return self._request({'command': command, 'data': data}, address,
+				timeout)